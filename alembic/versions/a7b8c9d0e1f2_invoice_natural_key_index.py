@@ -0,0 +1,28 @@
+"""invoices: index on the natural key (user_id, invoice_number, direction, supplier_gstin) for bulk sync
+
+Revision ID: a7b8c9d0e1f2
+Revises: f6a7b8c9d0e1
+Create Date: 2026-10-18 20:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers
+revision = "a7b8c9d0e1f2"
+down_revision = "f6a7b8c9d0e1"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_invoices_natural_key",
+        "invoices",
+        ["user_id", "invoice_number", "direction", "supplier_gstin"],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_invoices_natural_key", table_name="invoices")
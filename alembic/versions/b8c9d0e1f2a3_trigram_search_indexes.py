@@ -0,0 +1,46 @@
+"""pg_trgm GIN indexes for CA client search and invoice lookup
+
+Revision ID: b8c9d0e1f2a3
+Revises: a7b8c9d0e1f2
+Create Date: 2026-10-18 21:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers
+revision = "b8c9d0e1f2a3"
+down_revision = "a7b8c9d0e1f2"
+branch_labels = None
+depends_on = None
+
+# (index name, table, column)
+TRGM_INDEXES = (
+    ("ix_business_clients_name_trgm", "business_clients", "name"),
+    ("ix_business_clients_gstin_trgm", "business_clients", "gstin"),
+    ("ix_business_clients_pan_trgm", "business_clients", "pan"),
+    ("ix_business_clients_whatsapp_trgm", "business_clients", "whatsapp_number"),
+    ("ix_invoices_invoice_number_trgm", "invoices", "invoice_number"),
+    ("ix_invoices_supplier_gstin_trgm", "invoices", "supplier_gstin"),
+    ("ix_invoices_receiver_gstin_trgm", "invoices", "receiver_gstin"),
+)
+
+
+def upgrade() -> None:
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    for name, table, column in TRGM_INDEXES:
+        op.create_index(
+            name,
+            table,
+            [column],
+            postgresql_using="gin",
+            postgresql_ops={column: "gin_trgm_ops"},
+        )
+
+
+def downgrade() -> None:
+    for name, table, _column in reversed(TRGM_INDEXES):
+        op.drop_index(name, table_name=table)
+    # pg_trgm is left installed: dropping an extension needs superuser and
+    # other objects may come to depend on it.
@@ -0,0 +1,42 @@
+"""invoices: covering index on (user_id, direction, invoice_date) for period aggregates
+
+Revision ID: c3d4e5f6a7b8
+Revises: b2c3d4e5f6a7
+Create Date: 2026-10-18 10:00:00.000000
+
+"""
+from __future__ import annotations
+
+from alembic import op
+
+# revision identifiers
+revision = "c3d4e5f6a7b8"
+down_revision = "b2c3d4e5f6a7"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_index(
+        "ix_invoices_user_direction_date",
+        "invoices",
+        ["user_id", "direction", "invoice_date"],
+        postgresql_include=[
+            "taxable_value",
+            "igst_amount",
+            "cgst_amount",
+            "sgst_amount",
+            "itc_eligible",
+            "reverse_charge",
+            "gstr2b_match_status",
+            "blocked_itc_reason",
+            "tax_rate",
+            "place_of_supply",
+            "receiver_gstin",
+            "recipient_gstin",
+        ],
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_invoices_user_direction_date", table_name="invoices")
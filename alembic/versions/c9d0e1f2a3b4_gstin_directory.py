@@ -0,0 +1,33 @@
+"""gstin_directory: persistent tier of the GSTIN details lookup
+
+Revision ID: c9d0e1f2a3b4
+Revises: b8c9d0e1f2a3
+Create Date: 2026-10-18 22:30:00.000000
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers
+revision = "c9d0e1f2a3b4"
+down_revision = "b8c9d0e1f2a3"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "gstin_directory",
+        sa.Column("gstin", sa.String(15), primary_key=True),
+        sa.Column("found", sa.Boolean(), nullable=False),
+        sa.Column("legal_name", sa.String(255), nullable=True),
+        sa.Column("state", sa.String(100), nullable=True),
+        sa.Column("status", sa.String(50), nullable=True),
+        sa.Column("fetched_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("gstin_directory")
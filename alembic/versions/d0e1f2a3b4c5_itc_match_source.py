@@ -0,0 +1,29 @@
+"""itc_matches: source column (portal / upload) so the 2B sync keeps uploaded lines
+
+Revision ID: d0e1f2a3b4c5
+Revises: c9d0e1f2a3b4
+Create Date: 2026-10-18 23:30:00.000000
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+
+from alembic import op
+
+# revision identifiers
+revision = "d0e1f2a3b4c5"
+down_revision = "c9d0e1f2a3b4"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    # Existing rows cannot be told apart; treat them as portal pulls
+    op.add_column(
+        "itc_matches",
+        sa.Column("source", sa.String(10), nullable=False, server_default="portal"),
+    )
+
+
+def downgrade() -> None:
+    op.drop_column("itc_matches", "source")
@@ -0,0 +1,95 @@
+"""monthly_gst_rollup: per-month invoice totals for GSTR-9 and turnover recon
+
+Revision ID: d4e5f6a7b8c9
+Revises: c3d4e5f6a7b8
+Create Date: 2026-10-18 11:00:00.000000
+
+Existing invoices are backfilled in ``upgrade()``; the same totals can be
+recomputed any time with ``python scripts/rebuild_gst_rollup.py``.
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from alembic import op
+
+# revision identifiers
+revision = "d4e5f6a7b8c9"
+down_revision = "c3d4e5f6a7b8"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "monthly_gst_rollup",
+        sa.Column("id", sa.Integer(), primary_key=True),
+        sa.Column(
+            "user_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("users.id", ondelete="CASCADE"),
+            nullable=False,
+        ),
+        sa.Column("gstin", sa.String(20), nullable=False, server_default=""),
+        sa.Column("period", sa.String(7), nullable=False),
+        sa.Column("direction", sa.String(10), nullable=False),
+        sa.Column("invoice_count", sa.Integer(), nullable=False, server_default="0"),
+        sa.Column("taxable_value", sa.Numeric(16, 2), nullable=False, server_default="0"),
+        sa.Column("igst", sa.Numeric(16, 2), nullable=False, server_default="0"),
+        sa.Column("cgst", sa.Numeric(16, 2), nullable=False, server_default="0"),
+        sa.Column("sgst", sa.Numeric(16, 2), nullable=False, server_default="0"),
+        sa.Column("itc_eligible_taxable", sa.Numeric(16, 2), nullable=False, server_default="0"),
+        sa.Column("credit_note_taxable", sa.Numeric(16, 2), nullable=False, server_default="0"),
+        sa.Column("exempt_nil_taxable", sa.Numeric(16, 2), nullable=False, server_default="0"),
+        sa.Column(
+            "refreshed_at",
+            sa.DateTime(timezone=True),
+            server_default=sa.text("CURRENT_TIMESTAMP"),
+            nullable=False,
+        ),
+        sa.UniqueConstraint(
+            "user_id", "gstin", "period", "direction",
+            name="uq_monthly_gst_rollup_key",
+        ),
+    )
+    op.create_index(
+        "ix_monthly_gst_rollup_user_period",
+        "monthly_gst_rollup",
+        ["user_id", "period"],
+    )
+
+    # Backfill from invoices so GSTR-9 / turnover recon read correct books
+    # right after deploy (same aggregate as MonthlyRollupRepository.rebuild)
+    op.execute(
+        """
+        INSERT INTO monthly_gst_rollup (
+            user_id, gstin, period, direction, invoice_count,
+            taxable_value, igst, cgst, sgst,
+            itc_eligible_taxable, credit_note_taxable, exempt_nil_taxable
+        )
+        SELECT
+            user_id,
+            CASE WHEN direction = 'outward' THEN COALESCE(supplier_gstin, '')
+                 ELSE COALESCE(NULLIF(receiver_gstin, ''), recipient_gstin, '')
+            END AS rollup_gstin,
+            to_char(invoice_date, 'YYYY-MM') AS rollup_period,
+            direction,
+            count(id),
+            COALESCE(sum(taxable_value), 0),
+            COALESCE(sum(igst_amount), 0),
+            COALESCE(sum(cgst_amount), 0),
+            COALESCE(sum(sgst_amount), 0),
+            COALESCE(sum(taxable_value) FILTER (WHERE itc_eligible IS TRUE), 0),
+            abs(COALESCE(sum(taxable_value) FILTER (WHERE taxable_value < 0), 0)),
+            COALESCE(sum(taxable_value) FILTER (WHERE tax_rate = 0 AND taxable_value > 0), 0)
+        FROM invoices
+        WHERE invoice_date IS NOT NULL
+        GROUP BY user_id, rollup_gstin, rollup_period, direction
+        """
+    )
+
+
+def downgrade() -> None:
+    op.drop_index("ix_monthly_gst_rollup_user_period", table_name="monthly_gst_rollup")
+    op.drop_table("monthly_gst_rollup")
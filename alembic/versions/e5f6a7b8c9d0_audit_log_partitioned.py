@@ -0,0 +1,63 @@
+"""audit_log: append-only audit trail, range-partitioned by month
+
+Revision ID: e5f6a7b8c9d0
+Revises: d4e5f6a7b8c9
+Create Date: 2026-10-18 14:00:00.000000
+
+Creates the partitioned parent, its two lookup indexes (inherited by every
+partition), partitions for the current and next months and a DEFAULT
+partition so inserts never fail if the daily ``audit_partition_job`` has
+not run yet.  The job moves such rows into their month when it creates it
+(``audit_service.ensure_partitions``).
+"""
+from __future__ import annotations
+
+from datetime import date, datetime, timezone
+
+from alembic import op
+
+# revision identifiers
+revision = "e5f6a7b8c9d0"
+down_revision = "d4e5f6a7b8c9"
+branch_labels = None
+depends_on = None
+
+
+def _month(offset: int) -> date:
+    today = datetime.now(timezone.utc).date()
+    index = today.year * 12 + today.month - 1 + offset
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def upgrade() -> None:
+    op.execute(
+        """
+        CREATE TABLE audit_log (
+            id BIGINT GENERATED BY DEFAULT AS IDENTITY,
+            created_at TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP,
+            actor_type VARCHAR(20) NOT NULL,
+            actor_id VARCHAR(255) NOT NULL,
+            action VARCHAR(30) NOT NULL,
+            resource_type VARCHAR(30) NOT NULL,
+            resource_id VARCHAR(100) NOT NULL,
+            client_gstin VARCHAR(20),
+            details TEXT,
+            ip_address VARCHAR(45),
+            PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.create_index("ix_audit_log_gstin_created", "audit_log", ["client_gstin", "created_at"])
+    op.create_index("ix_audit_log_actor_created", "audit_log", ["actor_id", "created_at"])
+    op.execute("CREATE TABLE audit_log_default PARTITION OF audit_log DEFAULT")
+
+    for i in range(3):
+        start, end = _month(i), _month(i + 1)
+        op.execute(
+            f"CREATE TABLE audit_log_{start:%Y%m} PARTITION OF audit_log "
+            f"FOR VALUES FROM ('{start} 00:00:00+00') TO ('{end} 00:00:00+00')"
+        )
+
+
+def downgrade() -> None:
+    op.execute("DROP TABLE IF EXISTS audit_log CASCADE")
@@ -0,0 +1,37 @@
+"""ml_feature_snapshots: cached risk-model feature vectors per return period
+
+Revision ID: f6a7b8c9d0e1
+Revises: e5f6a7b8c9d0
+Create Date: 2026-10-18 18:00:00.000000
+"""
+from __future__ import annotations
+
+import sqlalchemy as sa
+from sqlalchemy.dialects.postgresql import UUID
+
+from alembic import op
+
+# revision identifiers
+revision = "f6a7b8c9d0e1"
+down_revision = "e5f6a7b8c9d0"
+branch_labels = None
+depends_on = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        "ml_feature_snapshots",
+        sa.Column(
+            "period_id",
+            UUID(as_uuid=True),
+            sa.ForeignKey("return_periods.id", ondelete="CASCADE"),
+            primary_key=True,
+        ),
+        sa.Column("feature_version", sa.String(16), nullable=False),
+        sa.Column("features_json", sa.Text(), nullable=False),
+        sa.Column("computed_at", sa.DateTime(timezone=True), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table("ml_feature_snapshots")
@@ -1,6 +1,7 @@
 from fastapi import APIRouter
 
 from app.api.routes.health import router as health_router
+from app.api.routes.metrics import router as metrics_router
 from app.api.routes.whatsapp import router as whatsapp_router
 from app.api.routes.whatsapp_health import router as whatsapp_health_router
 
@@ -34,6 +35,7 @@ api_router = APIRouter()
 
 # Public / health
 api_router.include_router(health_router, tags=["health"])
+api_router.include_router(metrics_router, tags=["metrics"])
 api_router.include_router(whatsapp_health_router, tags=["whatsapp"])
 api_router.include_router(whatsapp_router, tags=["whatsapp"])
 
@@ -13,11 +13,9 @@ from fastapi.templating import Jinja2Templates
 from app.api.deps import require_admin_token
 from app.config.settings import settings
 from app.core.db import AsyncSessionLocal as async_session
-from app.infrastructure.db.repositories.invoice_repository import InvoiceRepository
+from app.infrastructure.db.models import Invoice
 from app.infrastructure.db.repositories.user_repository import UserRepository
 from app.domain.services.tax_analytics import (
-    aggregate_invoices,
-    detect_anomalies_dynamic as detect_anomalies,
     get_filing_deadlines,
     generate_ai_insights,
 )
@@ -43,20 +41,33 @@ async def get_insights(
     Get AI-powered tax insights for a user.
     Query params: period_start (YYYY-MM-DD), period_end (YYYY-MM-DD), lang
     """
+    from app.domain.services.tax_analytics_columnar import (
+        aggregate_columns,
+        detect_anomalies_columns_dynamic,
+        load_invoice_columns,
+    )
+
     async with async_session() as db:
         user_repo = UserRepository(db)
         user = await user_repo.get_by_whatsapp(whatsapp_number)
         if not user:
             raise HTTPException(404, "User not found")
 
-        inv_repo = InvoiceRepository(db)
-
         if period_start and period_end:
             start = date.fromisoformat(period_start)
             end = date.fromisoformat(period_end)
-            invoices = await inv_repo.list_for_period(user.id, start, end)
+            invoices = await load_invoice_columns(
+                db,
+                Invoice.user_id == user.id,
+                Invoice.invoice_date >= start,
+                Invoice.invoice_date <= end,
+                order_by=(Invoice.invoice_date, Invoice.created_at),
+            )
         else:
-            invoices = await inv_repo.get_recent(user.id, limit=100)
+            invoices = await load_invoice_columns(
+                db, Invoice.user_id == user.id,
+                order_by=(Invoice.created_at.desc(),), limit=100,
+            )
 
     if not invoices:
         return JSONResponse({
@@ -64,8 +75,8 @@ async def get_insights(
             "message": "No invoices found for this user/period",
         })
 
-    summary = aggregate_invoices(invoices)
-    anomalies = await detect_anomalies(invoices)
+    summary = aggregate_columns(invoices)
+    anomalies = await detect_anomalies_columns_dynamic(invoices)
     deadlines = get_filing_deadlines()
 
     ai_insights = await generate_ai_insights(summary, anomalies, deadlines, lang)
@@ -122,19 +133,26 @@ async def get_anomalies(
     whatsapp_number: str,
 ):
     """Get invoice anomaly report for a user."""
+    from app.domain.services.tax_analytics_columnar import (
+        detect_anomalies_columns_dynamic,
+        load_invoice_columns,
+    )
+
     async with async_session() as db:
         user_repo = UserRepository(db)
         user = await user_repo.get_by_whatsapp(whatsapp_number)
         if not user:
             raise HTTPException(404, "User not found")
 
-        inv_repo = InvoiceRepository(db)
-        invoices = await inv_repo.get_recent(user.id, limit=200)
+        invoices = await load_invoice_columns(
+            db, Invoice.user_id == user.id,
+            order_by=(Invoice.created_at.desc(),), limit=200,
+        )
 
     if not invoices:
         return JSONResponse({"status": "no_data", "anomalies": {}})
 
-    anomalies = await detect_anomalies(invoices)
+    anomalies = await detect_anomalies_columns_dynamic(invoices)
 
     return JSONResponse({
         "status": "ok",
@@ -12,6 +12,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import require_admin_token, verify_admin_form_token
 from app.core.db import get_db
 from app.infrastructure.audit import log_admin_action
+from app.infrastructure.cache import principal_cache
 from app.infrastructure.db.models import BusinessClient, CAUser, FilingRecord, ITRDraft, User
 
 templates = Jinja2Templates(directory="app/templates")
@@ -410,6 +411,7 @@ async def ca_approve(
     ca.approved = True
     ca.approved_at = datetime.now(timezone.utc)
     await db.commit()
+    await principal_cache.invalidate_ca(ca_id)
 
     log_admin_action(
         "approve_ca",
@@ -442,6 +444,7 @@ async def ca_reject(
 
     ca.active = False
     await db.commit()
+    await principal_cache.invalidate_ca(ca_id)
 
     log_admin_action(
         "reject_ca",
@@ -474,6 +477,7 @@ async def ca_toggle_active(
 
     ca.active = not ca.active
     await db.commit()
+    await principal_cache.invalidate_ca(ca_id)
 
     log_admin_action(
         "toggle_ca_active",
@@ -1,5 +1,6 @@
 
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException
+from fastapi.responses import StreamingResponse
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -77,3 +78,28 @@ async def list_invoices(
         )
         for inv in invoices
     ]
+
+
+@router.get(
+    "/invoices/{whatsapp_number}/export.csv",
+    dependencies=[Depends(require_admin_token)],
+)
+async def export_invoices_csv(
+    whatsapp_number: str,
+    db: AsyncSession = Depends(get_db),
+):
+    """All invoices of one user as CSV, streamed from a server-side cursor."""
+    from app.domain.services.invoice_export import iter_invoice_export
+
+    result = await db.execute(
+        select(User.id).where(User.whatsapp_number == whatsapp_number)
+    )
+    user_id = result.scalar_one_or_none()
+    if user_id is None:
+        raise HTTPException(status_code=404, detail="User not found")
+
+    return StreamingResponse(
+        iter_invoice_export("csv", user_id),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename=invoices_{whatsapp_number}.csv"},
+    )
@@ -122,11 +122,13 @@ async def update_segment_features(
     if segment not in ("small", "medium", "enterprise"):
         raise HTTPException(status_code=400, detail="Invalid segment. Use small/medium/enterprise.")
 
+    from app.domain.services.feature_registry import invalidate_segment_cache
     from app.infrastructure.db.repositories.feature_repository import FeatureRepository
 
     repo = FeatureRepository(db)
     await repo.set_segment_features(segment, body.feature_codes)
     await db.commit()
+    await invalidate_segment_cache(segment)
 
     # Re-fetch to confirm
     features = await repo.get_segment_features(segment)
@@ -219,7 +221,7 @@ async def update_client_segment(
     client.segment_override = True
     await db.commit()
 
-    await invalidate_feature_cache(client_id)
+    await invalidate_feature_cache(client_id, gstin=client.gstin)
 
     return {
         "status": "ok",
@@ -16,8 +16,8 @@ from app.domain.services.ca_auth import (
     create_access_token,
     create_refresh_token,
     decode_token,
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
 )
 from app.infrastructure.db.repositories.ca_repository import CAUserRepository
 
@@ -90,7 +90,7 @@ async def login(
     repo = CAUserRepository(db)
     ca = await repo.get_by_email(email)
 
-    if ca is None or not verify_password(password, ca.password_hash):
+    if ca is None or not await verify_password_async(password, ca.password_hash):
         _record_login_attempt(email)
         return templates.TemplateResponse(
             "ca/login.html",
@@ -215,7 +215,7 @@ async def register(
         )
 
     # Create the CA account
-    password_hashed = hash_password(password)
+    password_hashed = await hash_password_async(password)
     ca = await repo.create(
         email=email,
         password_hash=password_hashed,
@@ -6,19 +6,14 @@ All routes require JWT authentication via ``get_current_ca``.
 
 from __future__ import annotations
 
-import csv
-import io
 from datetime import date, timedelta
-from io import BytesIO
 from types import SimpleNamespace
 from typing import Any
 
 from fastapi import APIRouter, Depends, Form, HTTPException, Query, Request, UploadFile
-from fastapi.responses import HTMLResponse, RedirectResponse, Response, StreamingResponse
+from fastapi.responses import FileResponse, HTMLResponse, RedirectResponse, Response, StreamingResponse
 from fastapi.templating import Jinja2Templates
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
-from sqlalchemy import func, select
+from sqlalchemy import and_, func, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
@@ -32,12 +27,10 @@ from app.domain.services.gstin_pan_validation import (
 )
 from app.infrastructure.audit import log_ca_action
 from app.domain.services.tax_analytics import (
-    aggregate_invoices,
-    detect_anomalies_dynamic as detect_anomalies,
     generate_ai_insights,
     get_filing_deadlines,
 )
-from app.infrastructure.db.models import BusinessClient, CAUser, Invoice, ITRDraft, User
+from app.infrastructure.db.models import BusinessClient, CAUser, Invoice, ITRDraft, ReturnPeriod, User
 from app.infrastructure.db.repositories.ca_repository import (
     BusinessClientRepository,
 )
@@ -90,6 +83,31 @@ async def _get_client_invoices(
     return list(result.scalars().all())
 
 
+async def _get_client_invoice_columns(
+    client: BusinessClient,
+    db: AsyncSession,
+    start: date | None = None,
+    end: date | None = None,
+):
+    """Analytics columns of a client's invoices (see ``tax_analytics_columnar``)."""
+    from app.domain.services.tax_analytics_columnar import InvoiceColumns, load_invoice_columns
+
+    if not client.whatsapp_number:
+        return InvoiceColumns.from_rows([])
+    user_id = await db.scalar(
+        select(User.id).where(User.whatsapp_number == client.whatsapp_number)
+    )
+    if user_id is None:
+        return InvoiceColumns.from_rows([])
+
+    criteria = [Invoice.user_id == user_id]
+    if start:
+        criteria.append(Invoice.invoice_date >= start)
+    if end:
+        criteria.append(Invoice.invoice_date <= end)
+    return await load_invoice_columns(db, *criteria, order_by=(Invoice.invoice_date.desc(),))
+
+
 # ---------------------------------------------------------------------------
 # Dashboard Home
 # ---------------------------------------------------------------------------
@@ -303,96 +321,72 @@ async def bulk_upload_process(
     request: Request,
     file: UploadFile = Form(...),
     ca: CAUser = Depends(get_current_ca),
-    db: AsyncSession = Depends(get_db),
 ):
-    """Process an uploaded CSV and create clients in bulk."""
-    repo = BusinessClientRepository(db)
-
-    added: list[dict[str, str]] = []
-    skipped: list[dict[str, str]] = []
-    failed: list[dict[str, str]] = []
+    """Start a background import of the uploaded CSV and redirect to its progress page."""
+    from app.domain.services.client_import import start_import
 
-    # Read and decode CSV
     try:
-        raw = await file.read()
-        text = raw.decode("utf-8-sig")  # handle BOM from Excel
-        reader = csv.DictReader(io.StringIO(text))
+        job_id = await start_import(file, ca.id, ca.email)
+    except ValueError as exc:
+        error = str(exc)
     except Exception:
-        return templates.TemplateResponse(
-            "ca/client_bulk_upload.html",
-            {"request": request, "title": "Bulk Upload Clients", "ca": ca,
-             "error": "Could not read the file. Please upload a valid UTF-8 CSV."},
-            status_code=400,
-        )
+        error = "Could not start the import. Please try again."
+    else:
+        return RedirectResponse(url=f"/ca/clients/bulk-upload/{job_id}", status_code=303)
 
-    for row_num, row in enumerate(reader, start=2):  # row 1 is header
-        name = (row.get("name") or "").strip()
-        raw_wa = (row.get("whatsapp_number") or "").strip()
-        raw_gstin = (row.get("gstin") or "").strip().upper()
-        raw_pan = (row.get("pan") or "").strip().upper()
-        raw_email = (row.get("email") or "").strip().lower()
-        raw_btype = (row.get("business_type") or "").strip()
-
-        # --- Validate ---
-        row_errors: list[str] = []
-        if not name:
-            row_errors.append("name is required")
-
-        normalized_wa: str | None = None
-        if raw_wa:
-            normalized_wa = normalize_whatsapp_number(raw_wa)
-            if normalized_wa is None:
-                row_errors.append("invalid WhatsApp number")
-            elif not is_valid_whatsapp_number(normalized_wa):
-                row_errors.append("WhatsApp must be valid Indian mobile")
-        if raw_gstin and not is_valid_gstin(raw_gstin):
-            row_errors.append("invalid GSTIN")
-        if raw_pan and not is_valid_pan(raw_pan):
-            row_errors.append("invalid PAN")
-
-        if row_errors:
-            failed.append({"row": str(row_num), "name": name or "(empty)", "reason": "; ".join(row_errors)})
-            continue
-
-        # --- Duplicate check ---
-        if normalized_wa:
-            existing = await repo.get_by_whatsapp(normalized_wa)
-            if existing:
-                skipped.append({"row": str(row_num), "name": name, "reason": f"WhatsApp {normalized_wa} already registered"})
-                continue
-
-        # --- Create ---
-        try:
-            client = await repo.create(
-                ca_id=ca.id,
-                name=name,
-                gstin=raw_gstin or None,
-                whatsapp_number=normalized_wa,
-                pan=raw_pan or None,
-                email=raw_email or None,
-                business_type=raw_btype or None,
-            )
-            added.append({"row": str(row_num), "name": name, "id": str(client.id)})
-        except IntegrityError:
-            await db.rollback()
-            skipped.append({"row": str(row_num), "name": name, "reason": "duplicate (WhatsApp or GSTIN conflict)"})
-        except Exception:
-            failed.append({"row": str(row_num), "name": name, "reason": "unexpected error"})
+    return templates.TemplateResponse(
+        "ca/client_bulk_upload.html",
+        {"request": request, "title": "Bulk Upload Clients", "ca": ca, "error": error},
+        status_code=400,
+    )
 
-    if added:
-        for a in added:
-            log_ca_action("bulk_create_client", ca_id=ca.id, ca_email=ca.email, client_id=int(a["id"]), details={"name": a["name"]})
 
+@router.get("/clients/bulk-upload/{job_id}", response_class=HTMLResponse)
+async def bulk_upload_progress(
+    request: Request,
+    job_id: str,
+    ca: CAUser = Depends(get_current_ca),
+):
+    """Progress page for a bulk import; polls the status endpoint."""
+    from app.domain.services.client_import import get_import_status
+
+    status = await get_import_status(job_id, ca.id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Import not found")
     return templates.TemplateResponse(
         "ca/client_bulk_results.html",
-        {
-            "request": request,
-            "title": "Bulk Upload Results",
-            "ca": ca,
-            "added": added,
-            "skipped": skipped,
-            "failed": failed,
-        },
+        {"request": request, "title": "Bulk Upload Results", "ca": ca, "job": status},
+    )
+
+
+@router.get("/clients/bulk-upload/{job_id}/status")
+async def bulk_upload_status(
+    job_id: str,
+    ca: CAUser = Depends(get_current_ca),
+):
+    """JSON progress for a bulk import."""
+    from app.domain.services.client_import import get_import_status
+
+    status = await get_import_status(job_id, ca.id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return status
+
+
+@router.get("/clients/bulk-upload/{job_id}/results.csv")
+async def bulk_upload_results_csv(
+    job_id: str,
+    ca: CAUser = Depends(get_current_ca),
+):
+    """Download the per-row results file (streams what has been processed so far)."""
+    from app.domain.services.client_import import get_import_status, iter_results_csv
+
+    if await get_import_status(job_id, ca.id) is None:
+        raise HTTPException(status_code=404, detail="Import not found")
+    return StreamingResponse(
+        iter_results_csv(job_id),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename=client_import_{job_id}.csv"},
     )
 
 
@@ -634,6 +628,11 @@ async def client_analytics(
     db: AsyncSession = Depends(get_db),
 ):
     """Tax analytics for a specific client."""
+    from app.domain.services.tax_analytics_columnar import (
+        aggregate_columns,
+        detect_anomalies_columns_dynamic,
+    )
+
     client = await _get_client_or_404(client_id, ca, db)
 
     # Default to last 12 months
@@ -650,30 +649,13 @@ async def client_analytics(
         except ValueError:
             pass
 
-    invoices = await _get_client_invoices(client, db, start=start, end=end)
+    invoices = await _get_client_invoice_columns(client, db, start=start, end=end)
 
     summary = None
     anomalies = None
     if invoices:
-        invoice_dicts = [
-            {
-                "invoice_number": inv.invoice_number,
-                "invoice_date": inv.invoice_date,
-                "supplier_gstin": inv.supplier_gstin,
-                "receiver_gstin": inv.receiver_gstin,
-                "taxable_value": float(inv.taxable_value) if inv.taxable_value else 0,
-                "tax_amount": float(inv.tax_amount) if inv.tax_amount else 0,
-                "total_amount": float(inv.total_amount) if inv.total_amount else 0,
-                "cgst_amount": float(inv.cgst_amount) if inv.cgst_amount else 0,
-                "sgst_amount": float(inv.sgst_amount) if inv.sgst_amount else 0,
-                "igst_amount": float(inv.igst_amount) if inv.igst_amount else 0,
-                "tax_rate": float(inv.tax_rate) if inv.tax_rate else 0,
-                "place_of_supply": inv.place_of_supply,
-            }
-            for inv in invoices
-        ]
-        summary = aggregate_invoices(invoice_dicts)
-        anomalies = await detect_anomalies(invoice_dicts)
+        summary = aggregate_columns(invoices)
+        anomalies = await detect_anomalies_columns_dynamic(invoices)
 
     return templates.TemplateResponse(
         "ca/client_analytics.html",
@@ -703,36 +685,24 @@ async def client_insights(
     db: AsyncSession = Depends(get_db),
 ):
     """AI-powered tax insights for a specific client."""
+    from app.domain.services.tax_analytics_columnar import (
+        aggregate_columns,
+        detect_anomalies_columns_dynamic,
+    )
+
     client = await _get_client_or_404(client_id, ca, db)
 
     end = date.today()
     start = end - timedelta(days=365)
-    invoices = await _get_client_invoices(client, db, start=start, end=end)
+    invoices = await _get_client_invoice_columns(client, db, start=start, end=end)
 
     ai_insights = "No invoices found for this client yet."
     summary = None
     anomalies = None
 
     if invoices:
-        invoice_dicts = [
-            {
-                "invoice_number": inv.invoice_number,
-                "invoice_date": inv.invoice_date,
-                "supplier_gstin": inv.supplier_gstin,
-                "receiver_gstin": inv.receiver_gstin,
-                "taxable_value": float(inv.taxable_value) if inv.taxable_value else 0,
-                "tax_amount": float(inv.tax_amount) if inv.tax_amount else 0,
-                "total_amount": float(inv.total_amount) if inv.total_amount else 0,
-                "cgst_amount": float(inv.cgst_amount) if inv.cgst_amount else 0,
-                "sgst_amount": float(inv.sgst_amount) if inv.sgst_amount else 0,
-                "igst_amount": float(inv.igst_amount) if inv.igst_amount else 0,
-                "tax_rate": float(inv.tax_rate) if inv.tax_rate else 0,
-                "place_of_supply": inv.place_of_supply,
-            }
-            for inv in invoices
-        ]
-        summary = aggregate_invoices(invoice_dicts)
-        anomalies = await detect_anomalies(invoice_dicts)
+        summary = aggregate_columns(invoices)
+        anomalies = await detect_anomalies_columns_dynamic(invoices)
         deadlines = get_filing_deadlines()
         ai_insights = await generate_ai_insights(summary, anomalies, deadlines, "en")
 
@@ -783,79 +753,82 @@ async def client_invoices_pdf(
     ca: CAUser = Depends(get_current_ca),
     db: AsyncSession = Depends(get_db),
 ):
-    """Export all invoices for a client as a PDF."""
-    client = await _get_client_or_404(client_id, ca, db)
-    invoices = await _get_client_invoices(client, db)
-
-    buffer = BytesIO()
-    p = canvas.Canvas(buffer, pagesize=A4)
-    width, height = A4
-    y = height - 50
-
-    def line(text: str, step: int = 16):
-        nonlocal y
-        if y < 60:
-            p.showPage()
-            y = height - 50
-            p.setFont("Helvetica", 10)
-        p.drawString(50, y, text)
-        y -= step
-
-    def fmt(v):
-        return f"{float(v):,.2f}" if v is not None else "-"
-
-    # Header
-    p.setFont("Helvetica-Bold", 16)
-    line(f"Invoice Report: {client.name}", step=24)
-
-    p.setFont("Helvetica", 11)
-    line(f"GSTIN: {client.gstin or '-'}")
-    line(f"PAN: {client.pan or '-'}")
-    line(f"WhatsApp: {client.whatsapp_number or '-'}")
-    line(f"Total Invoices: {len(invoices)}")
-    line(f"Generated: {date.today().isoformat()}")
-    line("", step=12)
-
-    if not invoices:
-        line("No invoices found for this client.")
-    else:
-        # Table header
-        p.setFont("Helvetica-Bold", 9)
-        line(
-            f"{'No.':<5} {'Invoice #':<18} {'Date':<12} "
-            f"{'Taxable':>12} {'Tax':>12} {'Total':>12}"
-        )
-        p.setFont("Helvetica", 9)
-        line("-" * 80, step=12)
-
-        for i, inv in enumerate(invoices, 1):
-            inv_date = inv.invoice_date.isoformat() if inv.invoice_date else "-"
-            line(
-                f"{i:<5} {(inv.invoice_number or '-'):<18} {inv_date:<12} "
-                f"{fmt(inv.taxable_value):>12} {fmt(inv.tax_amount):>12} "
-                f"{fmt(inv.total_amount):>12}"
-            )
+    """Export all invoices for a client as a PDF.
 
-        # Totals
-        line("", step=8)
-        line("-" * 80, step=12)
-        p.setFont("Helvetica-Bold", 10)
-        total_taxable = sum(float(inv.taxable_value or 0) for inv in invoices)
-        total_tax = sum(float(inv.tax_amount or 0) for inv in invoices)
-        total_amount = sum(float(inv.total_amount or 0) for inv in invoices)
-        line(
-            f"{'TOTAL':<35} "
-            f"{fmt(total_taxable):>12} {fmt(total_tax):>12} "
-            f"{fmt(total_amount):>12}"
-        )
+    Rendered off the event loop from streamed rows and served from a file,
+    so large clients do not hold the whole report in memory.
+    """
+    from app.domain.services.pdf_renderer import render_client_invoice_report
 
-    p.showPage()
-    p.save()
-    buffer.seek(0)
+    client = await _get_client_or_404(client_id, ca, db)
+    path = await render_client_invoice_report(client, db)
 
     filename = f"{client.name.replace(' ', '_')}_invoices_{date.today().isoformat()}.pdf"
-    return StreamingResponse(
-        buffer,
+    return FileResponse(
+        path,
         media_type="application/pdf",
         headers={"Content-Disposition": f'attachment; filename="{filename}"'},
     )
+
+
+# ---------------------------------------------------------------------------
+# Month-end period close (portfolio)
+# ---------------------------------------------------------------------------
+
+@router.post("/periods/{period}/close", status_code=202)
+async def close_portfolio_period(
+    period: str,
+    force: bool = Query(False),
+    ca: CAUser = Depends(get_current_ca),
+    db: AsyncSession = Depends(get_db),
+):
+    """Queue the close pipeline for every active client's return period in ``period`` (YYYY-MM)."""
+    import re
+
+    from app.domain.services.period_close import enqueue_close
+
+    if not re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", period):
+        raise HTTPException(status_code=400, detail="Period must be YYYY-MM")
+
+    # A client's periods belong to the user behind its WhatsApp number (as
+    # in _get_client_invoices); the GSTIN alone is neither unique nor verified
+    rows = await db.execute(
+        select(ReturnPeriod.id).distinct()
+        .join(User, User.id == ReturnPeriod.user_id)
+        .join(BusinessClient, and_(
+            BusinessClient.whatsapp_number == User.whatsapp_number,
+            BusinessClient.gstin == ReturnPeriod.gstin,
+        ))
+        .where(
+            ReturnPeriod.period == period,
+            BusinessClient.ca_id == ca.id,
+            BusinessClient.status == "active",
+        )
+    )
+    period_ids = list(rows.scalars())
+    if not period_ids:
+        raise HTTPException(status_code=404, detail="No client return periods for this month")
+
+    try:
+        job_id = await enqueue_close(period_ids, owner=f"ca:{ca.id}", force=force)
+    except Exception:
+        raise HTTPException(status_code=503, detail="Background queue unavailable, try again shortly")
+    log_ca_action(
+        "period_close", ca_id=ca.id, ca_email=ca.email,
+        details={"period": period, "job_id": job_id, "periods": len(period_ids)},
+    )
+    return {"job_id": job_id, "period": period, "total": len(period_ids)}
+
+
+@router.get("/periods/close/{job_id}")
+async def close_portfolio_status(
+    job_id: str,
+    ca: CAUser = Depends(get_current_ca),
+):
+    """JSON progress of a portfolio close: per-period status and step outcomes."""
+    from app.domain.services.period_close import get_job_status
+
+    status = await get_job_status(job_id, f"ca:{ca.id}")
+    if status is None:
+        raise HTTPException(status_code=404, detail="Close job not found")
+    return status
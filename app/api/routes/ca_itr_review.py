@@ -354,6 +354,7 @@ async def edit_draft(
             "savings": float(result.savings),
             "old_regime": asdict(result.old_regime),
             "new_regime": asdict(result.new_regime),
+            "config_version": result.config_version,
         }
 
         await repo.update_fields(
@@ -97,7 +97,7 @@ async def get_gstr1_json(
 
     b2b_count = len(payload_obj.b2b)
     b2b_invoice_count = sum(len(entry.inv) for entry in payload_obj.b2b)
-    b2c_invoice_count = len(payload_obj.b2c)
+    b2c_invoice_count = sum(b2c.count for b2c in payload_obj.b2c)
 
     return {
         "debug": {
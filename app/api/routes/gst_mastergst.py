@@ -325,7 +325,7 @@ async def file_gstr1_to_mastergst(
             gstin=use_gstin,
             b2b_parties=len(payload_obj.b2b),
             b2b_invoices=b2b_invoices,
-            b2c_invoices=len(payload_obj.b2c),
+            b2c_invoices=sum(b2c.count for b2c in payload_obj.b2c),
         ),
         save_response=save_resp,
         submit_response=submit_resp,
@@ -229,8 +229,10 @@ async def reconcile(
             "value_mismatch": summary.value_mismatch,
             "missing_in_2b": summary.missing_in_2b,
             "missing_in_books": summary.missing_in_books,
+            "fuzzy_review": summary.fuzzy_review,
             "matched_taxable": float(summary.matched_taxable),
             "mismatch_taxable_diff": float(summary.mismatch_taxable_diff),
+            "fuzzy_review_taxable": float(summary.fuzzy_review_taxable),
         },
     }
 
@@ -242,13 +244,15 @@ async def compute_liability(
 ):
     """Compute net GST liability for a period."""
     from app.domain.services.gst_liability import compute_net_liability
+    from app.domain.services.period_close import schedule_risk_score
     try:
-        comp = await compute_net_liability(period_id, db)
+        comp = await compute_net_liability(period_id, db, score_risk=False)
     except ValueError as exc:
         raise HTTPException(status_code=404, detail=str(exc))
     except Exception as exc:
         logger.exception("Liability computation failed for period %s", period_id)
         raise HTTPException(status_code=500, detail=str(exc))
+    await schedule_risk_score(period_id, db)
 
     return {
         "status": "ok",
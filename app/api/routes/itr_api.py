@@ -28,7 +28,6 @@ from app.domain.services.itr_service import (
     compute_itr4_dynamic as compute_itr4,
     format_itr_result,
 )
-from app.domain.services.itr_pdf import generate_itr1_pdf, generate_itr4_pdf
 from app.domain.services.itr_json import (
     generate_itr1_json,
     generate_itr4_json,
@@ -337,10 +336,12 @@ async def download_itr1_pdf(req: ITR1Request) -> StreamingResponse:
     Returns a professional computation sheet with income details,
     deductions, and Old vs New regime comparison.
     """
+    from app.domain.services.pdf_renderer import render_itr1_pdf
+
     try:
         inp = _to_itr1_input(req)
         result = await compute_itr1(inp)
-        pdf_bytes = generate_itr1_pdf(inp, result)
+        pdf_bytes = await render_itr1_pdf(inp, result)
     except Exception as e:
         logger.exception("ITR-1 PDF generation failed")
         raise HTTPException(status_code=422, detail=f"PDF generation error: {str(e)}")
@@ -360,10 +361,12 @@ async def download_itr4_pdf(req: ITR4Request) -> StreamingResponse:
     """
     Compute ITR-4 and return the result as a downloadable PDF.
     """
+    from app.domain.services.pdf_renderer import render_itr4_pdf
+
     try:
         inp = _to_itr4_input(req)
         result = await compute_itr4(inp)
-        pdf_bytes = generate_itr4_pdf(inp, result)
+        pdf_bytes = await render_itr4_pdf(inp, result)
     except Exception as e:
         logger.exception("ITR-4 PDF generation failed")
         raise HTTPException(status_code=422, detail=f"PDF generation error: {str(e)}")
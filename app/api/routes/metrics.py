@@ -0,0 +1,57 @@
+# app/api/routes/metrics.py
+"""
+Prometheus scrape endpoint.
+
+  GET /metrics  → text exposition of every metric in app.core.metrics
+
+Queue-depth gauges are refreshed at scrape time: the in-process WhatsApp
+sender queue is read directly, the ARQ queue with one ZCARD.
+"""
+
+import asyncio
+import logging
+
+from fastapi import APIRouter, HTTPException
+from fastapi.responses import PlainTextResponse
+
+from app.core import metrics
+from app.core.config import settings
+
+logger = logging.getLogger("metrics")
+
+router = APIRouter(tags=["metrics"])
+
+_ARQ_QUEUE_KEY = "arq:queue"
+_ARQ_TIMEOUT_SECONDS = 0.5
+
+
+def _outgoing_queue_depth() -> int:
+    from app.infrastructure.external.whatsapp_client import _outgoing_queue
+
+    return _outgoing_queue.qsize()
+
+
+metrics.WHATSAPP_OUTGOING_QUEUE_DEPTH.set_function(_outgoing_queue_depth)
+
+
+async def _refresh_arq_depth() -> None:
+    from app.infrastructure.queue.whatsapp_queue import get_redis_pool
+
+    try:
+        pool = await asyncio.wait_for(get_redis_pool(), _ARQ_TIMEOUT_SECONDS)
+        depth = await asyncio.wait_for(pool.zcard(_ARQ_QUEUE_KEY), _ARQ_TIMEOUT_SECONDS)
+        metrics.ARQ_QUEUE_DEPTH.set(depth)
+    except Exception:
+        logger.debug("ARQ queue depth unavailable", exc_info=True)
+        metrics.ARQ_QUEUE_DEPTH.set(float("nan"))
+
+
+@router.get("/metrics", include_in_schema=False)
+async def prometheus_metrics():
+    if not settings.METRICS_ENABLED:
+        raise HTTPException(status_code=404)
+    await _refresh_arq_depth()
+    return PlainTextResponse(
+        metrics.render(),
+        media_type="text/plain; version=0.0.4; charset=utf-8",
+    )
@@ -25,12 +25,19 @@ Handler signature::
         get_lang,
     ) -> Response | None
 
-If the handler recognises the state it returns a ``Response``; otherwise
-it returns ``None`` so the next handler in the chain can try.
+Each module lists the states it owns in ``HANDLED_STATES``.  Those sets are
+folded into ``STATE_ROUTER`` (state → module) once at import, so dispatch is
+a single dict lookup instead of awaiting every handler in turn.  A state may
+have only one owner: ``build_state_router`` raises ``DuplicateStateOwnerError``
+and the app refuses to start.  An owner may still return ``None`` to fall
+through to the inline handling in ``whatsapp.py``.
 """
 
 from __future__ import annotations
 
+from types import ModuleType
+from typing import Iterable
+
 from . import (
     gst_onboarding,
     gst_upload,
@@ -53,9 +60,8 @@ from . import (
     module_switch,
 )
 
-# Ordered list of handlers — the main webhook tries each in sequence.
-# session_expiry and module_switch first (session-level concerns),
-# then gst_onboarding and feature handlers.
+# Registration order — session-level concerns (session_expiry,
+# module_switch) first, then gst_onboarding and feature handlers.
 HANDLER_CHAIN = [
     session_expiry,
     module_switch,
@@ -78,8 +84,33 @@ HANDLER_CHAIN = [
     itr_doc_upload,
 ]
 
+
+class DuplicateStateOwnerError(RuntimeError):
+    """Two handler modules claim the same conversation state."""
+
+
+def build_state_router(handlers: Iterable[ModuleType]) -> dict[str, ModuleType]:
+    """Map every state in each module's ``HANDLED_STATES`` to that module."""
+    router: dict[str, ModuleType] = {}
+    for mod in handlers:
+        for state in mod.HANDLED_STATES:
+            owner = router.get(state)
+            if owner is not None and owner is not mod:
+                raise DuplicateStateOwnerError(
+                    f"State {state!r} is claimed by both {owner.__name__} and {mod.__name__}"
+                )
+            router[state] = mod
+    return router
+
+
+# Built once at import — a duplicate owner fails application startup
+STATE_ROUTER = build_state_router(HANDLER_CHAIN)
+
 __all__ = [
     "HANDLER_CHAIN",
+    "STATE_ROUTER",
+    "DuplicateStateOwnerError",
+    "build_state_router",
     "session_expiry",
     "module_switch",
     "gst_onboarding",
@@ -526,6 +526,7 @@ async def handle(
                 from app.infrastructure.db.models import User as UserModel
 
                 comp = None
+                risk_job_id = None
                 async for db in _get_db():
                     user_stmt = sa_select(UserModel).where(UserModel.whatsapp_number == wa_id)
                     user_result = await db.execute(user_stmt)
@@ -535,7 +536,13 @@ async def handle(
                         rp = await rp_repo.create_or_get(user.id, gstin, period)
 
                         from app.domain.services.gst_liability import compute_net_liability
-                        comp = await compute_net_liability(rp.id, db)
+                        from app.domain.services.period_close import schedule_risk_score
+                        comp = await compute_net_liability(rp.id, db, score_risk=False)
+                        # Risk scoring runs on the period-close worker and is sent when ready
+                        risk_job_id = await schedule_risk_score(
+                            rp.id, db, owner=str(user.id), notify_wa_id=wa_id,
+                            lang=get_lang(session) if get_lang else session.get("lang", "en"),
+                        )
                     else:
                         await send(wa_id, t(session, "PERIOD_NO_GSTIN"))
 
@@ -560,23 +567,26 @@ async def handle(
 
                     # Phase 2: Show risk score summary after liability
                     try:
-                        async for db2 in _get_db():
-                            from app.infrastructure.db.repositories.risk_assessment_repository import RiskAssessmentRepository
-                            ra_repo = RiskAssessmentRepository(db2)
-                            ra = await ra_repo.get_by_period(rp.id)
-                            if ra:
-                                await send(wa_id, t(session, "GST_RISK_SCORE_RESULT",
-                                    period=period,
-                                    score=ra.risk_score,
-                                    level=ra.risk_level,
-                                    cat_a=ra.category_a_score,
-                                    cat_b=ra.category_b_score,
-                                    cat_c=ra.category_c_score,
-                                    cat_d=ra.category_d_score,
-                                    cat_e=ra.category_e_score,
-                                    flag_count=len(ra.risk_flags.split('"code"')) - 1 if ra.risk_flags else 0,
-                                    flags_summary=f"Level: {ra.risk_level}"))
-                            break
+                        if risk_job_id:
+                            await send(wa_id, t(session, "GST_RISK_SCORE_QUEUED", period=period))
+                        else:
+                            async for db2 in _get_db():
+                                from app.infrastructure.db.repositories.risk_assessment_repository import RiskAssessmentRepository
+                                ra_repo = RiskAssessmentRepository(db2)
+                                ra = await ra_repo.get_by_period(rp.id)
+                                if ra:
+                                    await send(wa_id, t(session, "GST_RISK_SCORE_RESULT",
+                                        period=period,
+                                        score=ra.risk_score,
+                                        level=ra.risk_level,
+                                        cat_a=ra.category_a_score,
+                                        cat_b=ra.category_b_score,
+                                        cat_c=ra.category_c_score,
+                                        cat_d=ra.category_d_score,
+                                        cat_e=ra.category_e_score,
+                                        flag_count=len(ra.risk_flags.split('"code"')) - 1 if ra.risk_flags else 0,
+                                        flags_summary=f"Level: {ra.risk_level}"))
+                                break
                     except Exception:
                         pass
 
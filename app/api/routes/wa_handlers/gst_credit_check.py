@@ -75,14 +75,17 @@ async def handle(
                     rp = await rp_repo.create_or_get(user.id, gstin, period)
 
                     from app.domain.services.gstr2b_service import import_gstr2b
-
-                    await import_gstr2b(
-                        user_id=user.id,
-                        gstin=gstin,
-                        period=period,
-                        period_id=rp.id,
-                        db=db,
-                    )
+                    from app.domain.services.gstr2b_sync import is_fresh
+
+                    # The scheduled sync may already have pulled this month's 2B
+                    if not await is_fresh(gstin, period):
+                        await import_gstr2b(
+                            user_id=user.id,
+                            gstin=gstin,
+                            period=period,
+                            period_id=rp.id,
+                            db=db,
+                        )
 
                     from app.domain.services.gst_reconciliation import reconcile_period
 
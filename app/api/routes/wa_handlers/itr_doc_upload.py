@@ -442,7 +442,7 @@ async def handle(
 
     # --- ITR_FILING_DOWNLOAD ---
     if state == ITR_FILING_DOWNLOAD:
-        from app.domain.services.itr_pdf import generate_itr1_pdf, generate_itr4_pdf
+        from app.domain.services.pdf_renderer import render_itr1_pdf, render_itr4_pdf
         from app.infrastructure.external.whatsapp_client import (
             send_whatsapp_document as send_whatsapp_document_bytes,
         )
@@ -459,12 +459,12 @@ async def handle(
                 # Generate PDF
                 await send(wa_id, t(session, "ITR_FILING_GENERATING", form_type=form_type))
                 if form_type == "ITR-1":
-                    pdf_bytes = generate_itr1_pdf(inp, result)
+                    pdf_bytes = await render_itr1_pdf(inp, result)
                 elif form_type == "ITR-2":
                     # Reuse ITR-1 PDF layout (covers salary + CG breakdown)
-                    pdf_bytes = generate_itr1_pdf(inp, result)
+                    pdf_bytes = await render_itr1_pdf(inp, result)
                 else:
-                    pdf_bytes = generate_itr4_pdf(inp, result)
+                    pdf_bytes = await render_itr4_pdf(inp, result)
                 filename = f"{form_type.replace('-', '')}_computation.pdf"
                 await send_whatsapp_document_bytes(
                     wa_id, pdf_bytes, filename,
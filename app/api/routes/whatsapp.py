@@ -2,13 +2,24 @@ import hashlib
 import hmac
 import json
 import logging
+import time
 from decimal import Decimal
 from typing import Dict, Any
 
 from fastapi import APIRouter, Request, Response
 
 from app.core.config import settings
+from app.core.metrics import (
+    WA_HANDLER_SECONDS,
+    WEBHOOK_SIGNATURE_SECONDS,
+    WEBHOOK_STATE_SECONDS,
+)
+from app.api.routes.wa_handlers import STATE_ROUTER
 from app.infrastructure.cache.session_cache import SessionCache
+from app.infrastructure.cache.webhook_idempotency import (
+    WebhookIdempotencyStore,
+    status_from_claim,
+)
 from app.infrastructure.external.whatsapp_media import (
     get_media_url,
     download_media,
@@ -78,7 +89,6 @@ from app.domain.services.itr_filing_service import (
     submit_itr_to_sandbox,
     is_itr_sandbox_configured,
 )
-from app.domain.services.itr_pdf import generate_itr1_pdf, generate_itr4_pdf
 from app.domain.services.itr_json import (
     generate_itr1_json,
     generate_itr4_json,
@@ -104,16 +114,17 @@ from app.infrastructure.external.whatsapp_client import (
     send_whatsapp_text,
     send_whatsapp_document as send_whatsapp_document_bytes,
 )
-from app.domain.services.invoice_pdf import (
-    generate_invoice_pdf,
-    generate_multi_invoice_summary_pdf,
-)
 
 logger = logging.getLogger("whatsapp")
 
 router = APIRouter(prefix="", tags=["whatsapp"])
 
 session_cache = SessionCache(settings.REDIS_URL)
+idempotency_store = WebhookIdempotencyStore(
+    settings.REDIS_URL,
+    settings.WHATSAPP_IDEMPOTENCY_TTL_SECONDS,
+    memoize=settings.WHATSAPP_IDEMPOTENCY_MEMOIZE,
+)
 
 # =========================
 # STATES
@@ -295,6 +306,34 @@ GST_SEGMENT_DONE = "GST_SEGMENT_DONE"
 # Language number mapping
 LANG_NUMBER_MAP = {"1": "en", "2": "hi", "3": "gu", "4": "ta", "5": "te", "6": "kn"}
 
+# States that expect free-form input — global commands (MENU, BACK) are
+# not intercepted in them; the typed text IS valid data.
+_FREE_INPUT_STATES = frozenset({
+    # Personal details (PAN, name, DOB — free text)
+    ITR1_ASK_PAN, ITR1_ASK_NAME, ITR1_ASK_DOB,
+    ITR2_ASK_PAN, ITR2_ASK_NAME, ITR2_ASK_DOB,
+    ITR4_ASK_PAN, ITR4_ASK_NAME, ITR4_ASK_DOB,
+    # Numeric amounts (salary, deductions, etc.)
+    ITR1_ASK_SALARY, ITR1_ASK_OTHER_INCOME, ITR1_ASK_80C,
+    ITR1_ASK_80D, ITR1_ASK_TDS,
+    ITR2_ASK_SALARY, ITR2_ASK_OTHER_INCOME,
+    ITR2_ASK_STCG, ITR2_ASK_LTCG,
+    ITR2_ASK_80C, ITR2_ASK_80D, ITR2_ASK_TDS,
+    ITR4_ASK_TURNOVER, ITR4_ASK_80C, ITR4_ASK_TDS,
+    # GSTIN entry
+    WAIT_GSTIN,
+    # GST Onboarding: free-form GSTIN entry
+    GST_START_GSTIN,
+    GST_MULTI_GST_ADD,
+    # Connect with CA: free-text question
+    "CONNECT_CA_ASK_TEXT",
+    # Change Number: email + OTP entry
+    "CHANGE_NUMBER_CONFIRM_EMAIL",
+    "CHANGE_NUMBER_ENTER_OTP",
+    # GST Payment: challan number/date/amount entry
+    "GST_PAYMENT_CAPTURE",
+})
+
 
 # =========================
 # i18n helper
@@ -781,8 +820,10 @@ async def _handle_nlp_route(
 # =========================
 async def _send_invoice_pdf(wa_id: str, inv_dict: dict, session: dict) -> None:
     """Generate an invoice PDF and send it as a WhatsApp document."""
+    from app.domain.services.pdf_renderer import render_invoice_pdf
+
     try:
-        pdf_bytes = generate_invoice_pdf(inv_dict)
+        pdf_bytes = await render_invoice_pdf(inv_dict)
         inv_no = inv_dict.get("invoice_number") or "invoice"
         filename = f"Invoice_{inv_no}.pdf"
         media_id = await upload_media(pdf_bytes, "application/pdf", filename)
@@ -798,8 +839,10 @@ async def _send_batch_summary_pdf(
     wa_id: str, invoices: list[dict], session: dict
 ) -> None:
     """Generate a multi-invoice summary PDF and send it as a WhatsApp document."""
+    from app.domain.services.pdf_renderer import render_invoice_summary_pdf
+
     try:
-        pdf_bytes = generate_multi_invoice_summary_pdf(invoices)
+        pdf_bytes = await render_invoice_summary_pdf(invoices)
         filename = f"Invoice_Summary_{len(invoices)}_items.pdf"
         media_id = await upload_media(pdf_bytes, "application/pdf", filename)
         await send_whatsapp_document(
@@ -937,11 +980,75 @@ async def verify(request: Request):
 async def inbound(request: Request):
     body = await request.body()
     signature = request.headers.get("X-Hub-Signature-256")
-    if not _verify_webhook_signature(body, signature):
+    with WEBHOOK_SIGNATURE_SECONDS.time():
+        signature_ok = _verify_webhook_signature(body, signature)
+    if not signature_ok:
         logger.warning("Invalid webhook signature — rejecting request")
         return Response(status_code=403)
 
     payload = json.loads(body)
+
+    msg_id = _message_id(payload) if settings.WHATSAPP_IDEMPOTENCY_ENABLED else None
+    if msg_id:
+        prior = await idempotency_store.claim(msg_id)
+        if prior is not None:
+            logger.info("Duplicate webhook delivery for message %s (%s) — skipped", msg_id, prior)
+            return Response(status_code=status_from_claim(prior))
+
+    entry_state = ["none"]
+    start = time.perf_counter()
+    response = await _handle_inbound(payload, entry_state)
+    WEBHOOK_STATE_SECONDS.labels(entry_state[0]).observe(time.perf_counter() - start)
+    if msg_id:
+        await idempotency_store.remember(msg_id, response.status_code)
+    return response
+
+
+def _message_id(payload: Dict[str, Any]) -> str | None:
+    """WhatsApp message id of an inbound-message webhook (None for status updates)."""
+    try:
+        return payload["entry"][0]["changes"][0]["value"]["messages"][0].get("id")
+    except (KeyError, IndexError, TypeError, AttributeError):
+        return None
+
+
+# Keyword arguments every wa_handlers ``handle()`` receives — built once
+_HANDLER_KWARGS = dict(
+    session_cache=session_cache,
+    send=_send,
+    send_buttons=_send_buttons,
+    send_menu_result=_send_menu_result,
+    t=_t,
+    push_state=push_state,
+    pop_state=pop_state,
+    state_to_screen_key=_state_to_screen_key,
+    get_lang=_get_lang,
+)
+
+_STATE_TIMERS: dict[str, tuple[Any, Any]] = {}
+
+
+def _state_timers(state: str, handler_mod: Any) -> tuple[Any, Any]:
+    """(hit, miss) histogram children for a routed state, bound once."""
+    timers = _STATE_TIMERS.get(state)
+    if timers is None:
+        name = handler_mod.__name__.rsplit(".", 1)[-1]
+        timers = _STATE_TIMERS[state] = (
+            WA_HANDLER_SECONDS.labels(state, name, "hit"),
+            WA_HANDLER_SECONDS.labels(state, name, "miss"),
+        )
+    return timers
+
+
+async def _handle_inbound(
+    payload: Dict[str, Any],
+    entry_state: list[str] | None = None,
+) -> Response:
+    """Run the state machine for one inbound message.
+
+    ``entry_state[0]`` is set to the session state on arrival so the caller
+    can label its latency histogram.
+    """
     logger.info("Inbound WhatsApp payload: %s", payload)
 
     try:
@@ -955,6 +1062,8 @@ async def inbound(request: Request):
 
         session = await session_cache.get_session(wa_id)
         state = session.get("state", MAIN_MENU)
+        if entry_state is not None:
+            entry_state[0] = state
         lang = _get_lang(session)
         text = ""
 
@@ -998,35 +1107,6 @@ async def inbound(request: Request):
         # PROCESS TEXT (typed, transcribed, or interactive reply)
         # =====================================================
         if text:
-            # === universal nav ===
-            # States that expect free-form input — global commands are NOT
-            # intercepted here (the typed text IS valid data).
-            _FREE_INPUT_STATES = {
-                # Personal details (PAN, name, DOB — free text)
-                ITR1_ASK_PAN, ITR1_ASK_NAME, ITR1_ASK_DOB,
-                ITR2_ASK_PAN, ITR2_ASK_NAME, ITR2_ASK_DOB,
-                ITR4_ASK_PAN, ITR4_ASK_NAME, ITR4_ASK_DOB,
-                # Numeric amounts (salary, deductions, etc.)
-                ITR1_ASK_SALARY, ITR1_ASK_OTHER_INCOME, ITR1_ASK_80C,
-                ITR1_ASK_80D, ITR1_ASK_TDS,
-                ITR2_ASK_SALARY, ITR2_ASK_OTHER_INCOME,
-                ITR2_ASK_STCG, ITR2_ASK_LTCG,
-                ITR2_ASK_80C, ITR2_ASK_80D, ITR2_ASK_TDS,
-                ITR4_ASK_TURNOVER, ITR4_ASK_80C, ITR4_ASK_TDS,
-                # GSTIN entry
-                WAIT_GSTIN,
-                # GST Onboarding: free-form GSTIN entry
-                GST_START_GSTIN,
-                GST_MULTI_GST_ADD,
-                # Connect with CA: free-text question
-                "CONNECT_CA_ASK_TEXT",
-                # Change Number: email + OTP entry
-                "CHANGE_NUMBER_CONFIRM_EMAIL",
-                "CHANGE_NUMBER_ENTER_OTP",
-                # GST Payment: challan number/date/amount entry
-                "GST_PAYMENT_CAPTURE",
-            }
-
             # --- Update session activity timestamp on every inbound text ---
             from app.infrastructure.cache.session_cache import touch_session
             touch_session(session)
@@ -1043,6 +1123,7 @@ async def inbound(request: Request):
             # Normalize for command matching
             text_upper = text.strip().upper()
 
+            # === universal nav (skipped in _FREE_INPUT_STATES) ===
             # === MENU — return to main menu from any state ===
             if text_upper == "MENU" and state not in _FREE_INPUT_STATES:
                 await show_main_menu(wa_id, session)
@@ -1226,9 +1307,9 @@ async def inbound(request: Request):
                     segment_label = _t(session, f"SEGMENT_LABEL_{detected}")
                     try:
                         from app.core.db import get_db as _get_db
-                        from app.domain.services.feature_registry import get_features_for_segment
+                        from app.domain.services.feature_registry import get_cached_segment_features
                         async for _db in _get_db():
-                            features = await get_features_for_segment(detected, _db)
+                            features = await get_cached_segment_features(detected, _db)
                             break
                         features_summary = "\n".join(
                             f"- {f['name']}" for f in features
@@ -1268,7 +1349,7 @@ async def inbound(request: Request):
                                     await _db.commit()
                                     # Invalidate feature cache
                                     from app.domain.services.feature_registry import invalidate_feature_cache
-                                    await invalidate_feature_cache(bc.id)
+                                    await invalidate_feature_cache(bc.id, gstin=gstin)
                                 break
                         except Exception:
                             logger.exception("Failed to save segment for gstin=%s", gstin)
@@ -1311,27 +1392,21 @@ async def inbound(request: Request):
 
             # ===================================================
             # PHASE 6–10: Modular handler dispatch
-            # Each handler module handles a set of states and
-            # returns Response if handled, None otherwise.
+            # STATE_ROUTER maps each state to the one wa_handlers
+            # module that owns it; None falls through to the
+            # inline handling below.
             # ===================================================
-            from app.api.routes.wa_handlers import HANDLER_CHAIN as _wa_handler_chain
-            _handler_kwargs = dict(
-                session_cache=session_cache,
-                send=_send,
-                send_buttons=_send_buttons,
-                send_menu_result=_send_menu_result,
-                t=_t,
-                push_state=push_state,
-                pop_state=pop_state,
-                state_to_screen_key=_state_to_screen_key,
-                get_lang=_get_lang,
-            )
-            for _handler_mod in _wa_handler_chain:
+            _handler_mod = STATE_ROUTER.get(state)
+            if _handler_mod is not None:
+                _hit_timer, _miss_timer = _state_timers(state, _handler_mod)
+                _handler_start = time.perf_counter()
                 _handler_result = await _handler_mod.handle(
-                    state, text, wa_id, session, **_handler_kwargs
+                    state, text, wa_id, session, **_HANDLER_KWARGS
                 )
                 if _handler_result is not None:
+                    _hit_timer.observe(time.perf_counter() - _handler_start)
                     return _handler_result
+                _miss_timer.observe(time.perf_counter() - _handler_start)
 
             # ===================================================
             # PHASE 6: e-Invoice Conversational Flow (inline fallback)
@@ -2043,7 +2118,7 @@ async def inbound(request: Request):
 
             # --- SETTINGS MENU ---
             # DEPRECATED: SETTINGS_MENU is now handled by wa_handlers/settings_handler.py
-            # (intercepted by the handler chain above before reaching this point)
+            # (intercepted by the state router above before reaching this point)
 
             # --- SMART UPLOAD (text commands) ---
             if state == SMART_UPLOAD:
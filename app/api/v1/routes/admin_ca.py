@@ -20,6 +20,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from app.api.deps import require_admin_token
 from app.core.db import get_db
 from app.infrastructure.audit import log_admin_action
+from app.infrastructure.cache import principal_cache
 from app.infrastructure.db.models import BusinessClient, CAUser, FilingRecord, ITRDraft, User
 from app.infrastructure.db.repositories.filing_repository import FilingRepository
 from app.infrastructure.db.repositories.itr_draft_repository import ITRDraftRepository
@@ -375,6 +376,7 @@ async def approve_ca(
     ca.approved = True
     ca.approved_at = datetime.now(timezone.utc)
     await db.commit()
+    await principal_cache.invalidate_ca(ca_id)
 
     log_admin_action(
         "approve_ca",
@@ -403,6 +405,7 @@ async def reject_ca(
 
     ca.active = False
     await db.commit()
+    await principal_cache.invalidate_ca(ca_id)
 
     log_admin_action(
         "reject_ca",
@@ -428,6 +431,7 @@ async def toggle_ca_active(
 
     ca.active = not ca.active
     await db.commit()
+    await principal_cache.invalidate_ca(ca_id)
 
     log_admin_action(
         "toggle_ca_active",
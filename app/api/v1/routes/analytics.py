@@ -9,7 +9,6 @@ import logging
 from datetime import date
 
 from fastapi import APIRouter, Depends, Query
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_db
@@ -34,21 +33,21 @@ router = APIRouter(prefix="/analytics", tags=["Analytics"])
 # Helpers
 # ---------------------------------------------------------------------------
 
-async def _fetch_user_invoices(
+async def _fetch_user_invoice_columns(
     user: User,
     db: AsyncSession,
     date_from: date | None = None,
     date_to: date | None = None,
-) -> list:
-    """Fetch user's invoices with optional date filters."""
-    q = select(Invoice).where(Invoice.user_id == user.id)
+):
+    """Fetch the analytics columns of the user's invoices with optional date filters."""
+    from app.domain.services.tax_analytics_columnar import load_invoice_columns
+
+    criteria = [Invoice.user_id == user.id]
     if date_from:
-        q = q.where(Invoice.invoice_date >= date_from)
+        criteria.append(Invoice.invoice_date >= date_from)
     if date_to:
-        q = q.where(Invoice.invoice_date <= date_to)
-    q = q.order_by(Invoice.created_at.desc())
-    result = await db.execute(q)
-    return list(result.scalars().all())
+        criteria.append(Invoice.invoice_date <= date_to)
+    return await load_invoice_columns(db, *criteria, order_by=(Invoice.created_at.desc(),))
 
 
 # ---------------------------------------------------------------------------
@@ -63,10 +62,10 @@ async def tax_summary(
     db: AsyncSession = Depends(get_db),
 ):
     """Aggregate tax summary for the authenticated user's invoices."""
-    from app.domain.services.tax_analytics import aggregate_invoices
+    from app.domain.services.tax_analytics_columnar import aggregate_columns
 
-    invoices = await _fetch_user_invoices(user, db, date_from, date_to)
-    summary = aggregate_invoices(invoices)
+    invoices = await _fetch_user_invoice_columns(user, db, date_from, date_to)
+    summary = aggregate_columns(invoices)
 
     resp = TaxSummarySchema(
         period_start=summary.period_start,
@@ -101,10 +100,10 @@ async def anomalies(
     db: AsyncSession = Depends(get_db),
 ):
     """Detect invoice anomalies (duplicates, invalid GSTINs, outliers, etc.)."""
-    from app.domain.services.tax_analytics import detect_anomalies_dynamic
+    from app.domain.services.tax_analytics_columnar import detect_anomalies_columns_dynamic
 
-    invoices = await _fetch_user_invoices(user, db, date_from, date_to)
-    report = await detect_anomalies_dynamic(invoices)
+    invoices = await _fetch_user_invoice_columns(user, db, date_from, date_to)
+    report = await detect_anomalies_columns_dynamic(invoices)
 
     resp = AnomalySchema(
         duplicate_invoice_numbers=report.duplicate_invoice_numbers,
@@ -159,16 +158,15 @@ async def insights(
     Analyses the user's invoice summary, anomalies, and upcoming deadlines
     to produce actionable recommendations.
     """
-    from app.domain.services.tax_analytics import (
-        aggregate_invoices,
-        detect_anomalies_dynamic,
-        get_filing_deadlines,
-        generate_ai_insights,
+    from app.domain.services.tax_analytics import get_filing_deadlines, generate_ai_insights
+    from app.domain.services.tax_analytics_columnar import (
+        aggregate_columns,
+        detect_anomalies_columns_dynamic,
     )
 
-    invoices = await _fetch_user_invoices(user, db)
-    summary = aggregate_invoices(invoices)
-    anomaly_report = await detect_anomalies_dynamic(invoices)
+    invoices = await _fetch_user_invoice_columns(user, db)
+    summary = aggregate_columns(invoices)
+    anomaly_report = await detect_anomalies_columns_dynamic(invoices)
     deadline_list = get_filing_deadlines()
 
     text = await generate_ai_insights(summary, anomaly_report, deadline_list, lang=body.lang)
@@ -2,8 +2,10 @@
 """Admin audit console REST API."""
 
 from fastapi import APIRouter, Depends, Query
+from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.api.deps import require_admin_token
+from app.core.db import get_db
 
 router = APIRouter(prefix="/audit", tags=["Audit Console"])
 
@@ -12,25 +14,29 @@ router = APIRouter(prefix="/audit", tags=["Audit Console"])
 async def get_recent_audit(
     limit: int = Query(50, ge=1, le=500),
     actor_type: str | None = Query(None),
+    actor_id: str | None = Query(None),
     client_gstin: str | None = Query(None),
     action: str | None = Query(None),
+    db: AsyncSession = Depends(get_db),
 ):
     """Get recent audit entries with optional filters."""
     from app.domain.services.audit_service import get_recent_audit_entries
 
-    entries = get_recent_audit_entries(
+    entries = await get_recent_audit_entries(
+        db,
         limit=limit,
         actor_type=actor_type,
         client_gstin=client_gstin,
         action=action,
+        actor_id=actor_id,
     )
     return {"ok": True, "entries": entries, "count": len(entries)}
 
 
 @router.get("/client/{gstin}", dependencies=[Depends(require_admin_token)])
-async def get_client_access_summary(gstin: str):
+async def get_client_access_summary(gstin: str, db: AsyncSession = Depends(get_db)):
     """Get access summary for a specific client GSTIN."""
     from app.domain.services.audit_service import get_access_summary
 
-    summary = get_access_summary(gstin)
+    summary = await get_access_summary(gstin, db)
     return {"ok": True, "data": summary}
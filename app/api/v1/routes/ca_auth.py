@@ -17,8 +17,8 @@ from app.domain.services.ca_auth import (
     create_refresh_token,
     decode_token,
     get_current_ca,
-    hash_password,
-    verify_password,
+    hash_password_async,
+    verify_password_async,
 )
 from app.infrastructure.db.models import CAUser
 from app.infrastructure.db.repositories.ca_repository import CAUserRepository
@@ -43,7 +43,7 @@ async def ca_login(body: CALoginRequest, db: AsyncSession = Depends(get_db)):
     repo = CAUserRepository(db)
     ca = await repo.get_by_email(body.email)
 
-    if not ca or not verify_password(body.password, ca.password_hash):
+    if not ca or not await verify_password_async(body.password, ca.password_hash):
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
             detail="Invalid email or password",
@@ -92,7 +92,7 @@ async def ca_register(body: CARegisterRequest, db: AsyncSession = Depends(get_db
 
     ca = await repo.create(
         email=body.email,
-        password_hash=hash_password(body.password),
+        password_hash=await hash_password_async(body.password),
         name=body.name,
         phone=body.phone,
         membership_number=body.membership_number,
@@ -7,16 +7,14 @@ import csv
 import io
 import logging
 from datetime import datetime, timezone
-from io import BytesIO
 
 from fastapi import APIRouter, Depends, HTTPException, Query, UploadFile, File, status
-from fastapi.responses import Response, StreamingResponse
-from reportlab.lib.pagesizes import A4
-from reportlab.pdfgen import canvas
+from fastapi.responses import FileResponse, Response
 from sqlalchemy import func, select
 from sqlalchemy.exc import IntegrityError
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.db import get_db
 from app.domain.services.ca_auth import get_current_ca
 from app.domain.services.gstin_pan_validation import (
@@ -26,8 +24,6 @@ from app.domain.services.gstin_pan_validation import (
     normalize_whatsapp_number,
 )
 from app.domain.services.tax_analytics import (
-    aggregate_invoices,
-    detect_anomalies_dynamic as detect_anomalies,
     generate_ai_insights,
     get_filing_deadlines,
 )
@@ -91,6 +87,22 @@ async def _get_client_or_404(
     return client
 
 
+async def _client_invoice_columns(client: BusinessClient, db: AsyncSession):
+    """Analytics columns of the invoices of the client's WhatsApp user (empty if none)."""
+    from app.domain.services.tax_analytics_columnar import InvoiceColumns, load_invoice_columns
+
+    if not client.whatsapp_number:
+        return InvoiceColumns.from_rows([])
+    user_id = await db.scalar(
+        select(User.id).where(User.whatsapp_number == client.whatsapp_number)
+    )
+    if user_id is None:
+        return InvoiceColumns.from_rows([])
+    return await load_invoice_columns(
+        db, Invoice.user_id == user_id, order_by=(Invoice.invoice_date.desc(),)
+    )
+
+
 def _validate_client_fields(
     raw_wa: str | None,
     gstin: str | None,
@@ -135,12 +147,11 @@ async def list_clients(
     repo = BusinessClientRepository(db)
 
     if q.strip():
-        all_clients = await repo.search(ca.id, q.strip())
+        page, total = await repo.search_page(ca.id, q.strip(), limit, offset)
     else:
         all_clients = await repo.list_for_ca(ca.id)
-
-    total = len(all_clients)
-    page = all_clients[offset : offset + limit]
+        total = len(all_clients)
+        page = all_clients[offset : offset + limit]
 
     return paginated(
         items=[_client_to_out(c) for c in page],
@@ -150,6 +161,31 @@ async def list_clients(
     )
 
 
+@router.get("/typeahead", response_model=dict)
+async def typeahead_clients(
+    q: str = Query(..., description="Name, GSTIN, PAN or WhatsApp fragment"),
+    limit: int = Query(settings.SEARCH_TYPEAHEAD_LIMIT, ge=1, le=25),
+    ca: CAUser = Depends(get_current_ca),
+    db: AsyncSession = Depends(get_db),
+):
+    """Ranked client suggestions for a search box (trigram-indexed)."""
+    query = q.strip()
+    if len(query) < settings.SEARCH_MIN_QUERY_CHARS:
+        return ok(data=[])
+
+    rows = await BusinessClientRepository(db).typeahead(ca.id, query, limit)
+    return ok(data=[
+        {
+            "id": r.id,
+            "name": r.name,
+            "gstin": r.gstin,
+            "pan": r.pan,
+            "whatsapp_number": r.whatsapp_number,
+        }
+        for r in rows
+    ])
+
+
 @router.post("", response_model=dict, status_code=status.HTTP_201_CREATED)
 async def create_client(
     body: ClientCreate,
@@ -440,25 +476,15 @@ async def client_analytics(
     db: AsyncSession = Depends(get_db),
 ):
     """Return tax analytics for a client: invoice summary, anomalies, deadlines."""
-    client = await _get_client_or_404(client_id, ca, db)
-
-    # Fetch invoices for this client's WhatsApp user
-    invoices = []
-    if client.whatsapp_number:
-        user_stmt = select(User).where(User.whatsapp_number == client.whatsapp_number)
-        user_result = await db.execute(user_stmt)
-        user = user_result.scalar_one_or_none()
-        if user:
-            inv_stmt = (
-                select(Invoice)
-                .where(Invoice.user_id == user.id)
-                .order_by(Invoice.invoice_date.desc())
-            )
-            inv_result = await db.execute(inv_stmt)
-            invoices = list(inv_result.scalars().all())
+    from app.domain.services.tax_analytics_columnar import (
+        aggregate_columns,
+        detect_anomalies_columns_dynamic,
+    )
 
-    summary = aggregate_invoices(invoices)
-    anomalies = await detect_anomalies(invoices)
+    client = await _get_client_or_404(client_id, ca, db)
+    invoices = await _client_invoice_columns(client, db)
+    summary = aggregate_columns(invoices)
+    anomalies = await detect_anomalies_columns_dynamic(invoices)
     deadlines = get_filing_deadlines()
 
     return ok(
@@ -477,25 +503,16 @@ async def client_insights(
     db: AsyncSession = Depends(get_db),
 ):
     """Return AI-generated insights for a client's tax data."""
-    client = await _get_client_or_404(client_id, ca, db)
-
-    invoices = []
-    if client.whatsapp_number:
-        user_stmt = select(User).where(User.whatsapp_number == client.whatsapp_number)
-        user_result = await db.execute(user_stmt)
-        user = user_result.scalar_one_or_none()
-        if user:
-            inv_stmt = (
-                select(Invoice)
-                .where(Invoice.user_id == user.id)
-                .order_by(Invoice.invoice_date.desc())
-            )
-            inv_result = await db.execute(inv_stmt)
-            invoices = list(inv_result.scalars().all())
+    from app.domain.services.tax_analytics_columnar import (
+        aggregate_columns,
+        detect_anomalies_columns_dynamic,
+    )
 
-    summary = aggregate_invoices(invoices)
-    anomalies = await detect_anomalies(invoices)
-    text = await generate_ai_insights(summary, anomalies) if invoices else "No invoice data available for insights."
+    client = await _get_client_or_404(client_id, ca, db)
+    invoices = await _client_invoice_columns(client, db)
+    summary = aggregate_columns(invoices)
+    anomalies = await detect_anomalies_columns_dynamic(invoices)
+    text = await generate_ai_insights(summary, anomalies, get_filing_deadlines()) if invoices else "No invoice data available for insights."
 
     return ok(
         data=InsightsOut(
@@ -512,46 +529,13 @@ async def client_invoices_pdf(
     db: AsyncSession = Depends(get_db),
 ):
     """Download a PDF report of all invoices for this client."""
+    from app.domain.services.pdf_renderer import render_client_invoice_report
+
     client = await _get_client_or_404(client_id, ca, db)
+    path = await render_client_invoice_report(client, db)
 
-    invoices = []
-    if client.whatsapp_number:
-        user_stmt = select(User).where(User.whatsapp_number == client.whatsapp_number)
-        user_result = await db.execute(user_stmt)
-        user = user_result.scalar_one_or_none()
-        if user:
-            inv_stmt = (
-                select(Invoice)
-                .where(Invoice.user_id == user.id)
-                .order_by(Invoice.invoice_date.desc())
-            )
-            inv_result = await db.execute(inv_stmt)
-            invoices = list(inv_result.scalars().all())
-
-    buf = BytesIO()
-    c = canvas.Canvas(buf, pagesize=A4)
-    w, h = A4
-    c.setFont("Helvetica-Bold", 14)
-    c.drawString(50, h - 50, f"Invoice Report: {client.name}")
-    c.setFont("Helvetica", 10)
-    y = h - 80
-
-    for inv in invoices:
-        if y < 60:
-            c.showPage()
-            y = h - 50
-        line = f"{inv.invoice_date}  |  Taxable: {inv.taxable_value:,.2f}  |  Tax: {inv.tax_amount:,.2f}"
-        c.drawString(50, y, line)
-        y -= 18
-
-    if not invoices:
-        c.drawString(50, y, "No invoices found.")
-
-    c.save()
-    buf.seek(0)
-
-    return StreamingResponse(
-        buf,
+    return FileResponse(
+        path,
         media_type="application/pdf",
         headers={"Content-Disposition": f'attachment; filename="{client.name}_invoices.pdf"'},
     )
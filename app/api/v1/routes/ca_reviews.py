@@ -4,6 +4,7 @@ REST API endpoints for CA ITR and GST review workflows.
 
 ITR:  list, detail, approve, request-changes, edit (recompute)
 GST:  list, detail, approve, request-changes, submit to MasterGST
+ITC:  confirm a fuzzy GSTR-2B ↔ books pair (fuzzy_review → matched)
 """
 
 from __future__ import annotations
@@ -15,7 +16,7 @@ from typing import Any
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query, status
-from sqlalchemy import select, func
+from sqlalchemy import and_, select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_db
@@ -44,7 +45,9 @@ from app.domain.services.gst_workflow import (
     VALID_TRANSITIONS as GST_TRANSITIONS,
 )
 
-from app.infrastructure.db.models import CAUser, ITRDraft, FilingRecord, User
+from app.infrastructure.db.models import (
+    BusinessClient, CAUser, ITCMatch, ITRDraft, FilingRecord, ReturnPeriod, User,
+)
 from app.infrastructure.db.repositories.itr_draft_repository import ITRDraftRepository
 from app.infrastructure.db.repositories.filing_repository import FilingRepository
 
@@ -377,6 +380,7 @@ async def edit_itr_draft(
             "savings": float(result.savings),
             "old_regime": asdict(result.old_regime),
             "new_regime": asdict(result.new_regime),
+            "config_version": result.config_version,
         }
 
         update_kwargs: dict[str, str] = {
@@ -627,3 +631,49 @@ async def submit_gst_filing(
 
     updated = await _get_filing_or_404(filing_id, ca, db)
     return ok(data=_filing_to_out(updated), message="Filing submitted to MasterGST")
+
+
+# ═══════════════════════════════════════════════════════════════════════════
+# ITC Reconciliation Review
+# ═══════════════════════════════════════════════════════════════════════════
+
+
+@router.post("/itc-matches/{match_id}/confirm", response_model=dict)
+async def confirm_itc_match(
+    match_id: UUID,
+    ca: CAUser = Depends(get_current_ca),
+    db: AsyncSession = Depends(get_db),
+):
+    """Confirm a fuzzy 2B ↔ books pair so its ITC counts as eligible."""
+    from app.domain.services.gst_reconciliation import confirm_fuzzy_match
+
+    # The period must belong to the user behind one of this CA's clients;
+    # a client GSTIN alone is neither unique nor verified
+    row = (await db.execute(
+        select(ITCMatch.period_id, ReturnPeriod.gstin, ReturnPeriod.period)
+        .join(ReturnPeriod, ReturnPeriod.id == ITCMatch.period_id)
+        .join(User, User.id == ReturnPeriod.user_id)
+        .join(BusinessClient, and_(
+            BusinessClient.whatsapp_number == User.whatsapp_number,
+            BusinessClient.gstin == ReturnPeriod.gstin,
+        ))
+        .where(ITCMatch.id == match_id, BusinessClient.ca_id == ca.id)
+        .limit(1)
+    )).first()
+    if row is None:
+        raise HTTPException(status_code=404, detail="ITC match not found")
+
+    entry = await confirm_fuzzy_match(row.period_id, match_id, db, confirmed_by=ca.email)
+    if entry is None:
+        raise HTTPException(status_code=400, detail="ITC match is not awaiting review")
+
+    log_ca_action(
+        "confirm_itc_match",
+        ca_id=ca.id,
+        ca_email=ca.email,
+        details={"match_id": str(match_id), "gstin": row.gstin, "period": row.period},
+    )
+    return ok(
+        data={"id": str(entry.id), "match_status": entry.match_status},
+        message="ITC match confirmed",
+    )
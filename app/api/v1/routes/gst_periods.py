@@ -12,6 +12,7 @@ import re
 from uuid import UUID
 
 from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import JSONResponse, StreamingResponse
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.db import get_db
@@ -27,6 +28,7 @@ from app.api.v1.schemas.periods import (
     Import2bResponse,
     MismatchEntry,
     StatusTransitionRequest,
+    PeriodCloseRequest,
 )
 
 logger = logging.getLogger("api.v1.gst_periods")
@@ -182,8 +184,10 @@ async def reconcile(
         value_mismatch=summary.value_mismatch,
         missing_in_2b=summary.missing_in_2b,
         missing_in_books=summary.missing_in_books,
+        fuzzy_review=summary.fuzzy_review,
         matched_taxable=float(summary.matched_taxable),
         mismatch_taxable_diff=float(summary.mismatch_taxable_diff),
+        fuzzy_review_taxable=float(summary.fuzzy_review_taxable),
     ).model_dump())
 
 
@@ -201,11 +205,13 @@ async def compute_liability(
         raise HTTPException(status_code=404, detail="Period not found")
 
     from app.domain.services.gst_liability import compute_net_liability
+    from app.domain.services.period_close import schedule_risk_score
     try:
-        comp = await compute_net_liability(period_id, db)
+        comp = await compute_net_liability(period_id, db, score_risk=False)
     except Exception as exc:
         logger.exception("Liability computation failed for period %s", period_id)
         raise HTTPException(status_code=500, detail=str(exc))
+    await schedule_risk_score(period_id, db, owner=str(user.id))
 
     return ok(data=LiabilityResponse(
         outward_count=comp.outward_count,
@@ -370,6 +376,151 @@ async def get_risk(
     return ok(data=data)
 
 
+# ============================================================
+# Period close pipeline (2B import → reconcile → liability → risk)
+# ============================================================
+
+@router.post("/close", status_code=202, summary="Close several periods in the background")
+async def close_periods(
+    body: PeriodCloseRequest,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Queue the close pipeline for several of the user's periods (e.g. all GSTINs for a month)."""
+    from app.infrastructure.db.repositories.return_period_repository import ReturnPeriodRepository
+    from app.domain.services.period_close import enqueue_close
+
+    repo = ReturnPeriodRepository(db)
+    period_ids = []
+    for raw in dict.fromkeys(body.period_ids):
+        try:
+            pid = UUID(raw)
+        except ValueError:
+            raise HTTPException(status_code=400, detail=f"Invalid period id: {raw}")
+        rp = await repo.get_by_id(pid)
+        if not rp or rp.user_id != user.id:
+            raise HTTPException(status_code=404, detail=f"Period not found: {raw}")
+        period_ids.append(pid)
+
+    try:
+        job_id = await enqueue_close(period_ids, owner=str(user.id), force=body.force)
+    except Exception:
+        logger.exception("Could not queue period close for user %s", user.id)
+        raise HTTPException(status_code=503, detail="Background queue unavailable, try again shortly")
+    return ok(data={"job_id": job_id, "period_ids": [str(p) for p in period_ids]})
+
+
+@router.get("/close/{job_id}", summary="Get close progress for a batch")
+async def get_close_job(
+    job_id: str,
+    user: User = Depends(get_current_user),
+):
+    """Per-period, per-step progress of a batch queued with POST /close."""
+    from app.domain.services.period_close import get_job_status
+
+    status = await get_job_status(job_id, str(user.id))
+    if status is None:
+        raise HTTPException(status_code=404, detail="Close job not found")
+    return ok(data=status)
+
+
+@router.post("/{period_id}/close", status_code=202, summary="Close period in the background")
+async def close_period(
+    period_id: UUID,
+    force: bool = Query(False, description="Re-run steps even if their inputs are unchanged"),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Queue 2B import → reconcile → liability → risk; poll GET for progress."""
+    from app.infrastructure.db.repositories.return_period_repository import ReturnPeriodRepository
+    from app.domain.services.period_close import enqueue_close
+
+    repo = ReturnPeriodRepository(db)
+    rp = await repo.get_by_id(period_id)
+    if not rp or rp.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Period not found")
+
+    try:
+        job_id = await enqueue_close([period_id], owner=str(user.id), force=force)
+    except Exception:
+        logger.exception("Could not queue period close for user %s", user.id)
+        raise HTTPException(status_code=503, detail="Background queue unavailable, try again shortly")
+    return ok(data={"job_id": job_id, "period_id": str(period_id)})
+
+
+@router.get("/{period_id}/close", summary="Get close progress")
+async def get_close_status(
+    period_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Status and per-step outcome of the latest close of a period."""
+    from app.infrastructure.db.repositories.return_period_repository import ReturnPeriodRepository
+    from app.domain.services.period_close import get_period_status
+
+    repo = ReturnPeriodRepository(db)
+    rp = await repo.get_by_id(period_id)
+    if not rp or rp.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Period not found")
+
+    status = await get_period_status(period_id)
+    if status is None:
+        raise HTTPException(status_code=404, detail="Period has not been closed yet")
+    return ok(data=status)
+
+
+# ============================================================
+# Return JSON exports
+# ============================================================
+
+async def _owned_period(period_id: UUID, user: User, db: AsyncSession):
+    from app.infrastructure.db.repositories.return_period_repository import ReturnPeriodRepository
+
+    rp = await ReturnPeriodRepository(db).get_by_id(period_id)
+    if not rp or rp.user_id != user.id:
+        raise HTTPException(status_code=404, detail="Period not found")
+    return rp
+
+
+@router.get("/{period_id}/export/gstr1", summary="Download GSTR-1 JSON")
+async def export_gstr1(
+    period_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Portal-format GSTR-1 JSON, streamed invoice by invoice."""
+    from app.domain.services.invoice_export import iter_gstr1_export
+    from app.infrastructure.db.repositories.return_period_repository import _period_date_range
+
+    rp = await _owned_period(period_id, user, db)
+    start, end = _period_date_range(rp.period)
+    fp = f"{start.month:02d}{start.year}"
+    return StreamingResponse(
+        iter_gstr1_export(rp.user_id, rp.gstin, start, end),
+        media_type="application/json",
+        headers={"Content-Disposition": f"attachment; filename=GSTR1_{rp.gstin}_{fp}.json"},
+    )
+
+
+@router.get("/{period_id}/export/gstr3b", summary="Download GSTR-3B JSON")
+async def export_gstr3b(
+    period_id: UUID,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Portal-format GSTR-3B JSON, summed in SQL."""
+    from app.domain.services.invoice_export import gstr3b_export
+    from app.infrastructure.db.repositories.return_period_repository import _period_date_range
+
+    rp = await _owned_period(period_id, user, db)
+    start, end = _period_date_range(rp.period)
+    payload = await gstr3b_export(db, rp.user_id, rp.gstin, start, end)
+    return JSONResponse(
+        payload,
+        headers={"Content-Disposition": f"attachment; filename=GSTR3B_{rp.gstin}_{payload['fp']}.json"},
+    )
+
+
 # ============================================================
 # Phase 2: Payments
 # ============================================================
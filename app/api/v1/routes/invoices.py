@@ -8,13 +8,17 @@ from __future__ import annotations
 import logging
 from datetime import date
 
-from fastapi import APIRouter, Depends, HTTPException, Query, status
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, status
 from fastapi.responses import StreamingResponse
 from sqlalchemy import func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.core.config import settings
 from app.core.db import get_db
 from app.infrastructure.db.models import Invoice, User
+from app.infrastructure.db.repositories.monthly_rollup_repository import (
+    add_invoice_to_rollup,
+)
 
 from app.api.v1.deps import get_current_user
 from app.api.v1.envelope import ok, paginated
@@ -95,6 +99,65 @@ async def list_invoices(
     )
 
 
+# ---------------------------------------------------------------------------
+# Search (typeahead)
+# ---------------------------------------------------------------------------
+
+@router.get("/search", response_model=dict)
+async def search_invoices(
+    q: str = Query(..., description="Invoice number or counterparty GSTIN fragment"),
+    limit: int = Query(default=settings.SEARCH_TYPEAHEAD_LIMIT, ge=1, le=50),
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Ranked invoice suggestions by number or counterparty GSTIN (trigram-indexed)."""
+    from app.infrastructure.db.repositories.invoice_repository import InvoiceRepository
+
+    query = q.strip()
+    if len(query) < settings.SEARCH_MIN_QUERY_CHARS:
+        return ok(data=[])
+
+    rows = await InvoiceRepository(db).search(user.id, query, limit)
+    return ok(data=[
+        {
+            "id": str(r.id),
+            "invoice_number": r.invoice_number,
+            "invoice_date": r.invoice_date.isoformat() if r.invoice_date else None,
+            "direction": r.direction,
+            "counterparty_gstin": r.supplier_gstin if r.direction == "inward" else r.receiver_gstin,
+            "total_amount": float(r.total_amount) if r.total_amount is not None else None,
+        }
+        for r in rows
+    ])
+
+
+# ---------------------------------------------------------------------------
+# Export (streamed)
+# ---------------------------------------------------------------------------
+
+@router.get("/export")
+async def export_invoices(
+    format: str = Query(default="csv", description="csv or xlsx"),
+    date_from: date | None = Query(default=None, description="Filter: invoice_date >= this"),
+    date_to: date | None = Query(default=None, description="Filter: invoice_date <= this"),
+    direction: str | None = Query(default=None, description="outward or inward"),
+    user: User = Depends(get_current_user),
+):
+    """Download all matching invoices as CSV or XLSX, streamed from a server-side cursor."""
+    from app.domain.services.invoice_export import FORMATS, MEDIA_TYPES, iter_invoice_export
+
+    if format not in FORMATS:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="format must be csv or xlsx")
+    if direction not in (None, "outward", "inward"):
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail="direction must be outward or inward")
+
+    return StreamingResponse(
+        iter_invoice_export(format, user.id, date_from, date_to, direction),
+        media_type=MEDIA_TYPES[format],
+        headers={"Content-Disposition": f"attachment; filename=invoices.{format}"},
+    )
+
+
 # ---------------------------------------------------------------------------
 # Get single invoice
 # ---------------------------------------------------------------------------
@@ -146,10 +209,68 @@ async def create_invoice(
     db.add(inv)
     await db.commit()
     await db.refresh(inv)
+    await add_invoice_to_rollup(db, inv)
 
     return ok(data=_invoice_to_detail(inv), message="Invoice created")
 
 
+# ---------------------------------------------------------------------------
+# Bulk ingestion (ERP / Tally sync)
+# ---------------------------------------------------------------------------
+
+@router.post("/bulk", response_model=dict, status_code=status.HTTP_202_ACCEPTED)
+async def bulk_ingest(
+    request: Request,
+    format: str | None = Query(None, description="ndjson or csv; defaults from Content-Type"),
+    user: User = Depends(get_current_user),
+):
+    """Queue an NDJSON or CSV stream of invoices (optionally gzip) for idempotent upsert.
+
+    Rows are matched on (supplier_gstin, invoice_number, direction); re-sending
+    the same data updates nothing.  Poll ``GET /invoices/bulk/{job_id}``.
+    """
+    from app.domain.services.invoice_bulk_import import detect_format, start_import
+
+    try:
+        fmt = detect_format(request.headers.get("content-type"), format)
+        job_id = await start_import(request.stream(), user.id, fmt)
+    except ValueError as exc:
+        raise HTTPException(status_code=status.HTTP_400_BAD_REQUEST, detail=str(exc))
+
+    return ok(data={"job_id": job_id, "status": "queued"}, message="Bulk import started")
+
+
+@router.get("/bulk/{job_id}", response_model=dict)
+async def bulk_ingest_status(
+    job_id: str,
+    user: User = Depends(get_current_user),
+):
+    """Progress and row counts for a bulk import."""
+    from app.domain.services.invoice_bulk_import import get_import_status
+
+    job = await get_import_status(job_id, user.id)
+    if job is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import not found")
+    return ok(data=job)
+
+
+@router.get("/bulk/{job_id}/errors.csv")
+async def bulk_ingest_errors(
+    job_id: str,
+    user: User = Depends(get_current_user),
+):
+    """Per-row error report (failed and superseded rows) for a bulk import."""
+    from app.domain.services.invoice_bulk_import import get_import_status, iter_errors_csv
+
+    if await get_import_status(job_id, user.id) is None:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Import not found")
+    return StreamingResponse(
+        iter_errors_csv(job_id),
+        media_type="text/csv",
+        headers={"Content-Disposition": f"attachment; filename=invoice_bulk_{job_id}_errors.csv"},
+    )
+
+
 # ---------------------------------------------------------------------------
 # Parse OCR text → structured invoice
 # ---------------------------------------------------------------------------
@@ -218,6 +339,7 @@ async def parse_text(
         db.add(inv)
         await db.commit()
         await db.refresh(inv)
+        await add_invoice_to_rollup(db, inv)
         parsed.saved_invoice_id = str(inv.id)
 
     return ok(data=parsed.model_dump())
@@ -241,7 +363,7 @@ async def download_pdf(
     if not inv:
         raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail="Invoice not found")
 
-    from app.domain.services.invoice_pdf import generate_invoice_pdf
+    from app.domain.services.pdf_renderer import render_invoice_pdf
 
     invoice_data = {
         "invoice_number": inv.invoice_number,
@@ -259,7 +381,7 @@ async def download_pdf(
         "tax_rate": float(inv.tax_rate) if inv.tax_rate else 0,
     }
 
-    pdf_bytes = generate_invoice_pdf(invoice_data)
+    pdf_bytes = await render_invoice_pdf(invoice_data)
 
     import io
 
@@ -82,6 +82,7 @@ async def compute_itr1(body: ITR1Request, user: User = Depends(get_current_user)
         new_regime=_breakdown_to_schema(result.new_regime) if result.new_regime else None,
         recommended_regime=result.recommended_regime,
         savings=result.savings,
+        config_version=result.config_version,
     )
 
     return ok(data=resp.model_dump())
@@ -121,6 +122,7 @@ async def compute_itr4(body: ITR4Request, user: User = Depends(get_current_user)
         new_regime=_breakdown_to_schema(result.new_regime) if result.new_regime else None,
         recommended_regime=result.recommended_regime,
         savings=result.savings,
+        config_version=result.config_version,
     )
 
     return ok(data=resp.model_dump())
@@ -167,6 +169,7 @@ async def compute_itr2_endpoint(body: ITR2Request, user: User = Depends(get_curr
         new_regime=_breakdown_to_schema(result.new_regime) if result.new_regime else None,
         recommended_regime=result.recommended_regime,
         savings=result.savings,
+        config_version=result.config_version,
     )
 
     return ok(data=resp.model_dump())
@@ -93,3 +93,31 @@ async def get_consolidated_summary(
         period = get_current_gst_period()
     summary = await get_consolidated_summary(user.id, period, db)
     return ok(data=summary)
+
+
+@router.get("/summary/trend")
+async def get_consolidated_trend(
+    period: str = "",
+    months: int = 6,
+    user: User = Depends(get_current_user),
+    db: AsyncSession = Depends(get_db),
+):
+    """Month-by-month consolidated totals across all GSTINs, ending at ``period``."""
+    from app.core.config import settings
+    from app.domain.services.multi_gstin_service import get_consolidated_trend
+    from app.domain.services.gst_service import get_current_gst_period
+    if not period:
+        period = get_current_gst_period()
+    if not 1 <= months <= settings.MULTI_GSTIN_TREND_MAX_MONTHS:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"months must be between 1 and {settings.MULTI_GSTIN_TREND_MAX_MONTHS}",
+        )
+    try:
+        trend = await get_consolidated_trend(user.id, period, db, months=months)
+    except ValueError:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="period must be in YYYY-MM format",
+        )
+    return ok(data=trend)
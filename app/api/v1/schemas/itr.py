@@ -132,3 +132,4 @@ class ITRResultResponse(BaseModel):
     new_regime: TaxBreakdownSchema | None = None
     recommended_regime: str
     savings: Decimal
+    config_version: str = ""      # tax slab config version used for the computation
@@ -46,8 +46,10 @@ class ReconciliationSummaryResponse(BaseModel):
     value_mismatch: int = 0
     missing_in_2b: int = 0
     missing_in_books: int = 0
+    fuzzy_review: int = 0
     matched_taxable: float = 0
     mismatch_taxable_diff: float = 0
+    fuzzy_review_taxable: float = 0
 
 
 class LiabilityResponse(BaseModel):
@@ -92,3 +94,9 @@ class MismatchEntry(BaseModel):
 class StatusTransitionRequest(BaseModel):
     """Request to transition period status."""
     new_status: str = Field(description="Target status")
+
+
+class PeriodCloseRequest(BaseModel):
+    """Queue the close pipeline for several return periods."""
+    period_ids: list[str] = Field(min_length=1, max_length=500, description="ReturnPeriod UUIDs")
+    force: bool = Field(default=False, description="Re-run steps even if their inputs are unchanged")
@@ -26,6 +26,9 @@ class Settings(BaseSettings):
     WHATSAPP_ACCESS_TOKEN: str = Field(default="")
     WHATSAPP_PHONE_NUMBER_ID: str = Field(default="")
     WHATSAPP_APP_SECRET: str = Field(default="")
+    WHATSAPP_IDEMPOTENCY_ENABLED: bool = Field(default=True)
+    WHATSAPP_IDEMPOTENCY_TTL_SECONDS: int = Field(default=86400)   # remember message ids for 24h
+    WHATSAPP_IDEMPOTENCY_MEMOIZE: bool = Field(default=True)       # store first delivery's status
 
     AISENSY_API_KEY: str = Field(default="")
     AISENSY_PROJECT_ID: str = Field(default="")
@@ -53,6 +56,16 @@ class Settings(BaseSettings):
     BHASHINI_API_KEY: str = Field(default="")
     BHASHINI_TRANSLATION_URL: str = Field(default="")
 
+    # ---- Voice notes ----
+    VOICE_FFMPEG_PATH: str = Field(default="ffmpeg")           # decoder for OGG/Opus; missing = send audio as-is
+    VOICE_TRANSCODE_WORKERS: int = Field(default=2)            # concurrent decodes per process
+    VOICE_TRANSCODE_TIMEOUT_SECONDS: float = Field(default=20.0)
+    VOICE_SEGMENT_MAX_SECONDS: float = Field(default=15.0)     # shorter = more parallel STT; Sarvam caps a call at 30 s
+    VOICE_SILENCE_THRESHOLD_DB: float = Field(default=-40.0)   # frames quieter than this (dBFS) are silence
+    VOICE_MIN_SILENCE_MS: int = Field(default=250)             # pauses at least this long are cut points
+    VOICE_STT_CONCURRENCY: int = Field(default=4)              # segments of one note transcribed at once
+    VOICE_TRANSCRIPT_CACHE_TTL: int = Field(default=7 * 86400)  # transcripts by audio hash
+
     # ---- OpenAI ----
     OPENAI_API_KEY: str = Field(default="")
     OPENAI_MODEL: str = Field(default="gpt-4o")
@@ -104,6 +117,8 @@ class Settings(BaseSettings):
     CA_JWT_ALGORITHM: str = Field(default="HS256")
     CA_JWT_ACCESS_EXPIRE_MINUTES: int = Field(default=30)
     CA_JWT_REFRESH_EXPIRE_DAYS: int = Field(default=7)
+    CA_PRINCIPAL_CACHE_TTL_SECONDS: int = Field(default=60)     # per access-token jti; 0 = always hit the DB
+    PASSWORD_HASH_WORKERS: int = Field(default=2)               # bcrypt threads; caps concurrent hashes
 
     # ---- User API JWT (mobile / web clients) ----
     USER_JWT_SECRET: str = Field(default="change-me-user-jwt")
@@ -126,11 +141,96 @@ class Settings(BaseSettings):
     ML_RISK_N_ESTIMATORS: int = Field(default=100)
     ML_RISK_MAX_DEPTH: int = Field(default=5)
     ML_RISK_SHAP_ENABLED: bool = Field(default=True)
+    ML_RISK_CANDIDATES: str = Field(default="gradient_boosting,hist_gradient_boosting")  # compared by CV
+    ML_RISK_CV_FOLDS: int = Field(default=5)
+    ML_RISK_N_JOBS: int = Field(default=-1)                    # CV workers; -1 = all cores
+    ML_FEATURE_BATCH_SIZE: int = Field(default=1000)           # periods per bulk feature query
+    ML_FEATURE_CACHE_TTL_HOURS: int = Field(default=24)        # snapshot reuse for unfiled periods
 
     # ---- Segment Gating ----
     SEGMENT_GATING_ENABLED: bool = Field(default=True)
     DEFAULT_SEGMENT: str = Field(default="small")          # small / medium / enterprise
     SEGMENT_CACHE_TTL: int = Field(default=3600)            # Redis cache TTL in seconds
+    SEGMENT_LOCAL_TTL_SECONDS: int = Field(default=60)      # in-process copy; pub/sub invalidates sooner
+    SEGMENT_LOCAL_MAX_ENTRIES: int = Field(default=10_000)  # in-process keys, LRU evicted
+
+    # ---- Metrics ----
+    METRICS_ENABLED: bool = Field(default=True)             # /metrics + request/DB timing
+
+    # ---- Write-behind log sinks ----
+    WRITE_BEHIND_BATCH_SIZE: int = Field(default=500)               # rows per INSERT
+    WRITE_BEHIND_FLUSH_INTERVAL_SECONDS: float = Field(default=1.0)
+    WRITE_BEHIND_MAX_QUEUE: int = Field(default=20000)              # rows; beyond this new rows are dropped
+    WRITE_BEHIND_DURABLE_MAX_QUEUE: int = Field(default=200_000)    # durable sinks: beyond this rows are logged, not kept
+
+    # ---- CA bulk client import ----
+    CLIENT_IMPORT_BATCH_SIZE: int = Field(default=500)                  # rows per SELECT + INSERT
+    CLIENT_IMPORT_MAX_BYTES: int = Field(default=20 * 1024 * 1024)      # upload size cap
+    CLIENT_IMPORT_RESULT_TTL_SECONDS: int = Field(default=86400)        # progress + results file
+
+    # ---- Invoice bulk ingestion (ERP / Tally sync) ----
+    INVOICE_BULK_BATCH_SIZE: int = Field(default=5000)                  # rows per COPY + merge
+    INVOICE_BULK_MAX_BYTES: int = Field(default=200 * 1024 * 1024)      # request body cap (compressed size)
+    INVOICE_BULK_RESULT_TTL_SECONDS: int = Field(default=86400)         # progress + error report
+
+    # ---- Streaming exports (CSV / XLSX / return JSON) ----
+    EXPORT_FETCH_ROWS: int = Field(default=2000)        # rows per server-side cursor fetch
+    EXPORT_FLUSH_ROWS: int = Field(default=500)         # rows per chunk written to the response
+
+    # ---- Search (pg_trgm) ----
+    SEARCH_TYPEAHEAD_LIMIT: int = Field(default=10)     # suggestions per keystroke
+    SEARCH_MIN_QUERY_CHARS: int = Field(default=3)      # shorter queries cannot use the trigram index
+
+    # ---- GSTIN directory (details lookup) ----
+    GSTIN_DIRECTORY_LRU_SIZE: int = Field(default=50_000)                   # in-process entries
+    GSTIN_DIRECTORY_LOCAL_TTL_SECONDS: int = Field(default=3600)            # in-process copy
+    GSTIN_DIRECTORY_REDIS_TTL_SECONDS: int = Field(default=7 * 86400)
+    GSTIN_DIRECTORY_REFRESH_AFTER_SECONDS: int = Field(default=7 * 86400)   # older answers are served, then refreshed
+    GSTIN_DIRECTORY_NEGATIVE_TTL_SECONDS: int = Field(default=86400)        # "no such GSTIN" answers
+    GSTIN_DIRECTORY_CONCURRENCY: int = Field(default=8)                     # MasterGST searches in flight per process
+
+    # ---- ITC reconciliation (fuzzy second pass) ----
+    RECON_FUZZY_ENABLED: bool = Field(default=True)
+    RECON_FUZZY_MIN_SCORE: float = Field(default=0.8)       # 0..1; below this a residual pair is left unmatched
+    RECON_FUZZY_AMOUNT_PCT: float = Field(default=0.02)     # amount bucket width; values further apart are never paired
+    RECON_FUZZY_OPTIMAL_MAX: int = Field(default=8)         # blocks with at most this many book lines are solved exactly
+
+    # ---- Audit log ----
+    AUDIT_LOG_RETENTION_MONTHS: int = Field(default=96)     # GST records must be kept 72 months; keep margin
+    AUDIT_LOG_PARTITIONS_AHEAD: int = Field(default=3)      # monthly partitions created in advance
+
+    # ---- Tax rate configs ----
+    TAX_RATE_LOCAL_TTL_SECONDS: int = Field(default=300)       # in-process copy; pub/sub invalidates sooner
+
+    # ---- Period close pipeline ----
+    PERIOD_CLOSE_CONCURRENCY: int = Field(default=8)            # periods closed in parallel per job
+    PERIOD_CLOSE_2B_REFRESH_HOURS: int = Field(default=6)       # re-pull GSTR-2B at most this often; 0 = always
+    PERIOD_CLOSE_LOCK_SECONDS: int = Field(default=900)         # one close per period at a time
+    PERIOD_CLOSE_BUSY_RETRIES: int = Field(default=5)           # re-queue a period whose lock is held
+    PERIOD_CLOSE_BUSY_RETRY_SECONDS: int = Field(default=60)    # delay before each re-queue
+    PERIOD_CLOSE_STATE_TTL_SECONDS: int = Field(default=45 * 86400)   # progress + input digests
+
+    # ---- Scheduled GSTR-2B sync ----
+    GSTR2B_SYNC_ENABLED: bool = Field(default=True)
+    GSTR2B_SYNC_GENERATION_DAY: int = Field(default=14)        # portal generates 2B for the previous month on this day
+    GSTR2B_SYNC_LAST_DAY: int = Field(default=20)              # keep re-pulling until GSTR-3B is due
+    GSTR2B_SYNC_REFRESH_HOURS: int = Field(default=24)         # a GSTIN synced more recently is not asked again
+    GSTR2B_SYNC_CONCURRENCY: int = Field(default=16)           # GSTINs in flight across all providers
+    GSTR2B_SYNC_PROVIDER_CONCURRENCY: int = Field(default=4)   # GSTINs in flight per provider
+    GSTR2B_SYNC_PROVIDER_RATE: float = Field(default=2.0)      # API calls/second per provider; 0 = unlimited
+    GSTR2B_SYNC_MAX_ATTEMPTS: int = Field(default=4)           # per GSTIN, for 429 / 5xx / network errors
+    GSTR2B_SYNC_BACKOFF_SECONDS: float = Field(default=2.0)    # base of the jittered exponential backoff
+    GSTR2B_SYNC_STATE_TTL_SECONDS: int = Field(default=45 * 86400)   # payload hash + last sync per GSTIN/period
+
+    # ---- PDF rendering ----
+    PDF_RENDER_WORKERS: int = Field(default=2)                  # process pool size; 0 = render in a thread
+    PDF_CACHE_DIR: str = Field(default="")                      # "" = <tmp>/gst-itr-pdf-cache
+    PDF_CACHE_TTL_SECONDS: int = Field(default=3600)
+    PDF_REPORT_FETCH_ROWS: int = Field(default=2000)            # invoice rows per DB fetch for reports
+
+    # ---- Multi-GSTIN Dashboard ----
+    MULTI_GSTIN_DASHBOARD_CACHE_TTL: int = Field(default=60)   # seconds per (user, period)
+    MULTI_GSTIN_TREND_MAX_MONTHS: int = Field(default=24)
 
     # ---- Proactive Notifications ----
     NOTIFICATION_ENABLED: bool = Field(default=True)
@@ -90,6 +90,11 @@ engine = create_async_engine(
     connect_args=_connect_args,
 )
 
+if settings.METRICS_ENABLED:
+    from app.core.metrics import instrument_engine
+
+    instrument_engine(engine)
+
 # ------------------------------------------------------------------------------
 # SESSION FACTORY
 # ------------------------------------------------------------------------------
@@ -0,0 +1,401 @@
+# app/core/metrics.py
+"""
+In-process latency metrics with Prometheus text exposition.
+
+A deliberately small subset of the Prometheus data model (counters, gauges,
+histograms with fixed buckets) so the webhook hot path can be timed without
+pulling in a client library.  Label values are positional and each
+``labels(...)`` child is created once and cached; call sites with static
+labels bind their child at import time, so observing a value is a bisect
+and three integer/float updates — no dict is built per call.
+
+All metrics live in ``REGISTRY`` and are rendered by ``render()`` for the
+``/metrics`` route.
+"""
+
+from __future__ import annotations
+
+import functools
+import time
+from bisect import bisect_left
+from collections.abc import Callable, Iterable
+from contextvars import ContextVar
+from typing import Any
+
+DEFAULT_BUCKETS: tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0,
+)
+COUNT_BUCKETS: tuple[float, ...] = (0, 1, 2, 5, 10, 20, 50, 100, 250)
+
+REGISTRY: list[_Metric] = []
+
+
+def _escape(value: str) -> str:
+    return value.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+def _fmt(value: float) -> str:
+    if value == float("inf"):
+        return "+Inf"
+    return repr(float(value)) if not float(value).is_integer() else str(int(value))
+
+
+# ---------------------------------------------------------------------------
+# Children (one per label-value tuple)
+# ---------------------------------------------------------------------------
+
+class _CounterChild:
+    __slots__ = ("value",)
+
+    def __init__(self) -> None:
+        self.value = 0.0
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+
+class _GaugeChild:
+    __slots__ = ("value", "_fn")
+
+    def __init__(self) -> None:
+        self.value = 0.0
+        self._fn: Callable[[], float] | None = None
+
+    def set(self, value: float) -> None:
+        self.value = value
+
+    def inc(self, amount: float = 1.0) -> None:
+        self.value += amount
+
+    def dec(self, amount: float = 1.0) -> None:
+        self.value -= amount
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        """Read the value from ``fn`` at scrape time instead of storing it."""
+        self._fn = fn
+
+    def get(self) -> float:
+        if self._fn is not None:
+            try:
+                return float(self._fn())
+            except Exception:
+                return float("nan")
+        return self.value
+
+
+class _Timer:
+    __slots__ = ("_child", "_start")
+
+    def __init__(self, child: _HistogramChild) -> None:
+        self._child = child
+
+    def __enter__(self) -> _Timer:
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self._child.observe(time.perf_counter() - self._start)
+
+
+class _HistogramChild:
+    __slots__ = ("_upper", "counts", "sum", "count")
+
+    def __init__(self, upper: tuple[float, ...]) -> None:
+        self._upper = upper
+        self.counts = [0] * (len(upper) + 1)   # last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float) -> None:
+        self.counts[bisect_left(self._upper, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def time(self) -> _Timer:
+        """``with child.time(): ...`` observes the block's duration in seconds."""
+        return _Timer(self)
+
+
+# ---------------------------------------------------------------------------
+# Metric families
+# ---------------------------------------------------------------------------
+
+class _Metric:
+    type_name = ""
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        *,
+        register: bool = True,
+    ) -> None:
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._children: dict[tuple[str, ...], Any] = {}
+        if not self.labelnames:
+            self._children[()] = self._new_child()
+        if register:
+            REGISTRY.append(self)
+
+    def _new_child(self) -> Any:
+        raise NotImplementedError
+
+    def labels(self, *values: str) -> Any:
+        """Child for these label values (created once, then cached)."""
+        child = self._children.get(values)
+        if child is None:
+            if len(values) != len(self.labelnames):
+                raise ValueError(
+                    f"{self.name} expects labels {self.labelnames}, got {values!r}"
+                )
+            child = self._children[values] = self._new_child()
+        return child
+
+    def _label_str(self, values: tuple[str, ...], extra: str = "") -> str:
+        parts = [f'{k}="{_escape(str(v))}"' for k, v in zip(self.labelnames, values)]
+        if extra:
+            parts.append(extra)
+        return "{" + ",".join(parts) + "}" if parts else ""
+
+    def _samples(self) -> list[str]:
+        raise NotImplementedError
+
+    def render(self) -> str:
+        lines = [
+            f"# HELP {self.name} {self.documentation}",
+            f"# TYPE {self.name} {self.type_name}",
+        ]
+        lines.extend(self._samples())
+        return "\n".join(lines)
+
+
+class Counter(_Metric):
+    type_name = "counter"
+
+    def _new_child(self) -> _CounterChild:
+        return _CounterChild()
+
+    def inc(self, amount: float = 1.0) -> None:
+        self._children[()].inc(amount)
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{self._label_str(values)} {_fmt(child.value)}"
+            for values, child in list(self._children.items())
+        ]
+
+
+class Gauge(_Metric):
+    type_name = "gauge"
+
+    def _new_child(self) -> _GaugeChild:
+        return _GaugeChild()
+
+    def set(self, value: float) -> None:
+        self._children[()].set(value)
+
+    def set_function(self, fn: Callable[[], float]) -> None:
+        self._children[()].set_function(fn)
+
+    def _samples(self) -> list[str]:
+        return [
+            f"{self.name}{self._label_str(values)} {_fmt(child.get())}"
+            for values, child in list(self._children.items())
+        ]
+
+
+class Histogram(_Metric):
+    type_name = "histogram"
+
+    def __init__(
+        self,
+        name: str,
+        documentation: str,
+        labelnames: Iterable[str] = (),
+        *,
+        buckets: tuple[float, ...] = DEFAULT_BUCKETS,
+        register: bool = True,
+    ) -> None:
+        self.buckets = tuple(sorted(buckets))
+        super().__init__(name, documentation, labelnames, register=register)
+
+    def _new_child(self) -> _HistogramChild:
+        return _HistogramChild(self.buckets)
+
+    def observe(self, value: float) -> None:
+        self._children[()].observe(value)
+
+    def time(self) -> _Timer:
+        return self._children[()].time()
+
+    def _samples(self) -> list[str]:
+        lines = []
+        for values, child in list(self._children.items()):
+            cumulative = 0
+            for upper, n in zip(self.buckets + (float("inf"),), child.counts):
+                cumulative += n
+                le = f'le="{_fmt(upper)}"'
+                bucket = self._label_str(values, le)
+                lines.append(f"{self.name}_bucket{bucket} {cumulative}")
+            labels = self._label_str(values)
+            lines.append(f"{self.name}_sum{labels} {_fmt(child.sum)}")
+            lines.append(f"{self.name}_count{labels} {child.count}")
+        return lines
+
+
+def render() -> str:
+    """Prometheus text exposition (format 0.0.4) for every registered metric."""
+    return "\n".join(m.render() for m in REGISTRY) + "\n"
+
+
+def timed(child: _HistogramChild) -> Callable:
+    """Decorator: observe the wall time of each call to an async function."""
+    def decorator(fn: Callable) -> Callable:
+        @functools.wraps(fn)
+        async def wrapper(*args: Any, **kwargs: Any) -> Any:
+            start = time.perf_counter()
+            try:
+                return await fn(*args, **kwargs)
+            finally:
+                child.observe(time.perf_counter() - start)
+        return wrapper
+    return decorator
+
+
+# ---------------------------------------------------------------------------
+# Application metrics
+# ---------------------------------------------------------------------------
+
+HTTP_REQUEST_SECONDS = Histogram(
+    "http_request_duration_seconds",
+    "HTTP request latency by route template.",
+    ("method", "route"),
+)
+DB_QUERIES_PER_REQUEST = Histogram(
+    "http_request_db_queries",
+    "Number of SQL statements executed while serving one HTTP request.",
+    ("route",),
+    buckets=COUNT_BUCKETS,
+)
+DB_QUERY_SECONDS = Histogram(
+    "db_query_duration_seconds",
+    "SQL statement execution time by statement verb.",
+    ("verb",),
+)
+
+WEBHOOK_SIGNATURE_SECONDS = Histogram(
+    "whatsapp_webhook_signature_seconds",
+    "Time spent verifying the X-Hub-Signature-256 header.",
+    buckets=(0.00005, 0.0001, 0.00025, 0.0005, 0.001, 0.0025, 0.005, 0.01),
+)
+WEBHOOK_STATE_SECONDS = Histogram(
+    "whatsapp_webhook_state_seconds",
+    "End-to-end inbound message handling time by conversation state on entry.",
+    ("state",),
+)
+SESSION_CACHE_SECONDS = Histogram(
+    "session_cache_seconds",
+    "SessionCache Redis round-trip time by operation.",
+    ("op",),
+    buckets=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 1.0),
+)
+WA_HANDLER_SECONDS = Histogram(
+    "whatsapp_handler_seconds",
+    "Time in the wa_handlers module that owns the state; outcome is hit "
+    "(handled) or miss (fell through to inline handling).",
+    ("state", "handler", "outcome"),
+)
+RESOLVE_INTENT_SECONDS = Histogram(
+    "resolve_intent_seconds",
+    "resolve_intent latency by resolution method.",
+    ("method",),
+)
+OCR_SECONDS = Histogram(
+    "ocr_seconds",
+    "OCR extraction time by backend.",
+    ("backend",),
+)
+OPENAI_SECONDS = Histogram(
+    "openai_call_seconds",
+    "OpenAI client function latency.",
+    ("function",),
+)
+GST_API_SECONDS = Histogram(
+    "gst_api_seconds",
+    "MasterGST / e-Invoice / e-WayBill API latency by endpoint and outcome.",
+    ("api", "endpoint", "outcome"),
+)
+
+WHATSAPP_OUTGOING_QUEUE_DEPTH = Gauge(
+    "whatsapp_outgoing_queue_depth",
+    "Messages waiting in the in-process WhatsApp sender queue.",
+)
+ARQ_QUEUE_DEPTH = Gauge(
+    "arq_queue_depth",
+    "Jobs waiting in the default ARQ queue.",
+)
+
+
+# ---------------------------------------------------------------------------
+# Per-request DB query counting
+# ---------------------------------------------------------------------------
+
+# One-element list so SQLAlchemy event hooks (running in the request's
+# context via greenlet) can increment it without a ContextVar.set per query.
+_request_query_count: ContextVar[list[int] | None] = ContextVar(
+    "request_query_count", default=None
+)
+
+_VERBS = ("SELECT", "INSERT", "UPDATE", "DELETE")
+_VERB_CHILDREN = {v: DB_QUERY_SECONDS.labels(v) for v in _VERBS}
+_OTHER_VERB = DB_QUERY_SECONDS.labels("OTHER")
+
+
+def instrument_engine(engine: Any) -> None:
+    """Attach query timing / counting hooks to an (async) SQLAlchemy engine."""
+    from sqlalchemy import event
+
+    sync_engine = getattr(engine, "sync_engine", engine)
+
+    @event.listens_for(sync_engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        conn.info["query_start"] = time.perf_counter()
+
+    @event.listens_for(sync_engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        start = conn.info.pop("query_start", None)
+        if start is None:
+            return
+        child = _VERB_CHILDREN.get(statement.lstrip()[:6].upper(), _OTHER_VERB)
+        child.observe(time.perf_counter() - start)
+        counter = _request_query_count.get()
+        if counter is not None:
+            counter[0] += 1
+
+
+class MetricsMiddleware:
+    """ASGI middleware recording request latency and SQL statements per request."""
+
+    def __init__(self, app: Any) -> None:
+        self.app = app
+
+    async def __call__(self, scope: dict, receive: Any, send: Any) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        counter = [0]
+        token = _request_query_count.set(counter)
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            elapsed = time.perf_counter() - start
+            _request_query_count.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "unmatched"
+            HTTP_REQUEST_SECONDS.labels(scope.get("method", ""), path).observe(elapsed)
+            DB_QUERIES_PER_REQUEST.labels(path).observe(counter[0])
@@ -3005,6 +3005,38 @@ MESSAGES = {
         "te": "❓ అర్థం కాలేదు. అందుబాటులో ఉన్న ఆదేశాలు చూడటానికి *HELP* టైప్ చేయండి.",
         "kn": "❓ ನನಗೆ ಅರ್ಥವಾಗಲಿಲ್ಲ. ಲಭ್ಯವಿರುವ ಆದೇಶಗಳನ್ನು ನೋಡಲು *HELP* ಟೈಪ್ ಮಾಡಿ.",  # MT
     },
+
+    # =========================================================
+    # PERIOD CLOSE PIPELINE
+    # =========================================================
+    "GST_RISK_SCORE_QUEUED": {
+        "en": "Computing the risk score for {period} in the background. It will arrive here shortly.",
+        "hi": "{period} का जोखिम स्कोर बैकग्राउंड में गणना हो रहा है. यह जल्द ही यहां आएगा.",
+        "gu": "{period} માટે જોખમ સ્કોર બેકગ્રાઉન્ડમાં ગણાઈ રહ્યો છે. તે ટૂંક સમયમાં અહીં આવશે.",
+        "ta": "{period} க்கான ஆபத்து மதிப்பெண் பின்னணியில் கணக்கிடப்படுகிறது. விரைவில் இங்கே வரும்.",
+        "te": "{period} కోసం రిస్క్ స్కోర్ బ్యాక్‌గ్రౌండ్‌లో లెక్కిస్తోంది. త్వరలో ఇక్కడ వస్తుంది.",
+    },
+    "GST_CLOSE_STEP_DONE": {
+        "en": "{period}: {step} done.",
+        "hi": "{period}: {step} पूर्ण.",
+        "gu": "{period}: {step} પૂર્ણ.",
+        "ta": "{period}: {step} முடிந்தது.",
+        "te": "{period}: {step} పూర్తయింది.",
+    },
+    "GST_CLOSE_STEP_FAILED": {
+        "en": "{period}: {step} failed. Error: {error}",
+        "hi": "{period}: {step} विफल. त्रुटि: {error}",
+        "gu": "{period}: {step} નિષ્ફળ. ભૂલ: {error}",
+        "ta": "{period}: {step} தோல்வி. பிழை: {error}",
+        "te": "{period}: {step} విఫలం. లోపం: {error}",
+    },
+    "GST_CLOSE_BUSY": {
+        "en": "{period}: another update for this period is still running, so it could not be finished now. Please try again in a few minutes.",
+        "hi": "{period}: इस अवधि का एक और अपडेट अभी चल रहा है, इसलिए यह अभी पूरा नहीं हो सका. कृपया कुछ मिनट बाद फिर से प्रयास करें.",
+        "gu": "{period}: આ સમયગાળાનું બીજું અપડેટ હજી ચાલી રહ્યું છે, તેથી તે હમણાં પૂર્ણ થઈ શક્યું નથી. કૃપા કરીને થોડી મિનિટોમાં ફરી પ્રયાસ કરો.",
+        "ta": "{period}: இந்தக் காலத்திற்கான மற்றொரு புதுப்பிப்பு இன்னும் இயங்குகிறது, எனவே இப்போது முடிக்க முடியவில்லை. சில நிமிடங்களில் மீண்டும் முயற்சிக்கவும்.",
+        "te": "{period}: ఈ కాలానికి మరో అప్‌డేట్ ఇంకా నడుస్తోంది, కాబట్టి ఇప్పుడు పూర్తి చేయలేకపోయాము. దయచేసి కొన్ని నిమిషాల్లో మళ్లీ ప్రయత్నించండి.",
+    },
 }
 
 
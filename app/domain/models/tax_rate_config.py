@@ -8,12 +8,19 @@ GSTRateConfig: Set of valid GST rates used for anomaly detection.
 
 from __future__ import annotations
 
+import hashlib
 import json
-from dataclasses import dataclass, field
+from dataclasses import dataclass, field, replace
 from decimal import Decimal
 from typing import Any
 
 
+def _version_stamp(scope: str, data: dict[str, Any]) -> str:
+    """``<scope>:<12 hex>`` hash of a serialized config, e.g. ``2025-26:3f2a9c01b7de``."""
+    digest = hashlib.sha256(json.dumps(data, sort_keys=True).encode()).hexdigest()
+    return f"{scope}:{digest[:12]}"
+
+
 @dataclass
 class ITRSlabConfig:
     """All income-tax parameters for one assessment year."""
@@ -79,6 +86,22 @@ class ITRSlabConfig:
 
     # Metadata
     source: str = "hardcoded"  # "hardcoded", "manual", "openai"
+    version: str = ""          # content stamp set by frozen(); not serialized
+
+    def frozen(self) -> ITRSlabConfig:
+        """Copy with tuple slab tables and ``version`` stamped.
+
+        ``TaxRateService`` shares one frozen copy across computations.
+        """
+        return replace(
+            self,
+            old_regime_slabs=tuple(self.old_regime_slabs),
+            old_regime_senior_slabs=tuple(self.old_regime_senior_slabs),
+            old_regime_super_senior_slabs=tuple(self.old_regime_super_senior_slabs),
+            new_regime_slabs=tuple(self.new_regime_slabs),
+            surcharge_slabs=tuple(self.surcharge_slabs),
+            version=_version_stamp(self.assessment_year, self.to_dict()),
+        )
 
     # ---- serialization ----
 
@@ -176,6 +199,15 @@ class GSTRateConfig:
         default_factory=lambda: {0, 0.1, 0.25, 1.5, 3, 5, 6, 7.5, 12, 14, 18, 28},
     )
     source: str = "hardcoded"
+    version: str = ""          # content stamp set by frozen(); not serialized
+
+    def frozen(self) -> GSTRateConfig:
+        """Copy with a frozenset of rates and ``version`` stamped."""
+        return replace(
+            self,
+            valid_rates=frozenset(self.valid_rates),
+            version=_version_stamp("gst", self.to_dict()),
+        )
 
     def to_dict(self) -> dict[str, Any]:
         return {
@@ -4,21 +4,35 @@ Audit trail service for tracking data access and operations.
 
 Logs every access to client data by CAs, admins, or system operations
 for compliance and security monitoring.
+
+Entries are written to the ``audit_log`` table, which is range-partitioned
+by month on ``created_at``.  ``log_access`` stays synchronous: it hands the
+row to the durable ``audit_log`` write-behind sink, which inserts in batches,
+never drops a row and retries a failed batch until it is written (failures
+are logged and shown on the health dashboard).
+Queries filter on ``client_gstin`` / ``actor_id`` plus a time bound so they
+use the ``(client_gstin, created_at)`` and ``(actor_id, created_at)``
+indexes and prune old partitions.  ``ensure_partitions`` and
+``drop_expired_partitions`` are run daily by the ARQ ``audit_partition_job``.
 """
 
 from __future__ import annotations
 
 import logging
+import re
 from dataclasses import dataclass
-from datetime import datetime, timezone
+from datetime import date, datetime, timezone
 from typing import Any
-from uuid import UUID
+
+from sqlalchemy import func, select, text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.infrastructure.db.models import AuditLog
 
 logger = logging.getLogger("audit_service")
 
-# In-memory audit log for quick access (also logged to structured logging)
-_audit_buffer: list[dict] = []
-_MAX_BUFFER_SIZE = 10000
+_PARTITION_PREFIX = "audit_log_"
+_PARTITION_RE = re.compile(r"^audit_log_(\d{4})(\d{2})$")
 
 
 @dataclass
@@ -60,12 +74,15 @@ def log_access(
 ) -> AuditEntry:
     """Log a data access event.
 
-    This is synchronous and non-blocking -- writes to structured log
-    and in-memory buffer. For production, integrate with a DB table
-    or external audit service.
+    Synchronous and non-blocking: writes to the structured log and queues
+    the row for the batched ``audit_log`` insert, which is retried until it
+    succeeds.
     """
+    from app.infrastructure.db.write_behind import audit_log_sink
+
+    now = datetime.now(timezone.utc)
     entry = AuditEntry(
-        timestamp=datetime.now(timezone.utc).isoformat(),
+        timestamp=now.isoformat(),
         actor_type=actor_type,
         actor_id=actor_id,
         action=action,
@@ -87,61 +104,231 @@ def log_access(
         entry.client_gstin or "-",
     )
 
-    # Buffer for API queries
-    _audit_buffer.append(entry.to_dict())
-    if len(_audit_buffer) > _MAX_BUFFER_SIZE:
-        _audit_buffer.pop(0)
+    row = entry.to_dict()
+    del row["timestamp"]
+    row["created_at"] = now
+    audit_log_sink.add(row)
 
     return entry
 
 
-def get_recent_audit_entries(
+# ---------------------------------------------------------------------------
+# Queries
+# ---------------------------------------------------------------------------
+
+def recent_entries_stmt(
     limit: int = 50,
     actor_type: str | None = None,
     client_gstin: str | None = None,
     action: str | None = None,
-) -> list[dict]:
-    """Query recent audit entries from in-memory buffer.
-
-    For production, this should query a database table.
-    """
-    results = _audit_buffer.copy()
-
-    if actor_type:
-        results = [e for e in results if e["actor_type"] == actor_type]
+    actor_id: str | None = None,
+    since: datetime | None = None,
+):
+    """Newest-first audit rows; GSTIN / actor filters hit their indexes."""
+    stmt = select(AuditLog)
     if client_gstin:
-        results = [e for e in results if e["client_gstin"] == client_gstin]
+        stmt = stmt.where(AuditLog.client_gstin == client_gstin)
+    if actor_id:
+        stmt = stmt.where(AuditLog.actor_id == actor_id)
+    if actor_type:
+        stmt = stmt.where(AuditLog.actor_type == actor_type)
     if action:
-        results = [e for e in results if e["action"] == action]
+        stmt = stmt.where(AuditLog.action == action)
+    if since is not None:
+        stmt = stmt.where(AuditLog.created_at >= since)
+    return stmt.order_by(AuditLog.created_at.desc(), AuditLog.id.desc()).limit(limit)
 
-    # Return most recent first
-    results.reverse()
-    return results[:limit]
+
+def access_summary_stmt(client_gstin: str, since: datetime | None = None):
+    """Per-actor access counts for one GSTIN, aggregated in SQL."""
+    stmt = (
+        select(
+            AuditLog.actor_type,
+            AuditLog.actor_id,
+            func.min(AuditLog.created_at).label("first_access"),
+            func.max(AuditLog.created_at).label("last_access"),
+            func.count().label("count"),
+        )
+        .where(AuditLog.client_gstin == client_gstin)
+        .group_by(AuditLog.actor_type, AuditLog.actor_id)
+    )
+    if since is not None:
+        stmt = stmt.where(AuditLog.created_at >= since)
+    return stmt
 
 
-def get_access_summary(client_gstin: str) -> dict:
+def _row_to_dict(row: AuditLog) -> dict:
+    return {
+        "timestamp": row.created_at.isoformat() if row.created_at else None,
+        "actor_type": row.actor_type,
+        "actor_id": row.actor_id,
+        "action": row.action,
+        "resource_type": row.resource_type,
+        "resource_id": row.resource_id,
+        "client_gstin": row.client_gstin,
+        "details": row.details,
+        "ip_address": row.ip_address,
+    }
+
+
+async def get_recent_audit_entries(
+    db: AsyncSession,
+    limit: int = 50,
+    actor_type: str | None = None,
+    client_gstin: str | None = None,
+    action: str | None = None,
+    actor_id: str | None = None,
+    since: datetime | None = None,
+) -> list[dict]:
+    """Query recent audit entries, most recent first."""
+    result = await db.execute(
+        recent_entries_stmt(limit, actor_type, client_gstin, action, actor_id, since)
+    )
+    return [_row_to_dict(r) for r in result.scalars().all()]
+
+
+async def get_access_summary(
+    client_gstin: str,
+    db: AsyncSession,
+    since: datetime | None = None,
+) -> dict:
     """Get access summary for a specific client GSTIN.
 
     Returns who accessed this client's data and when.
     """
-    entries = [e for e in _audit_buffer if e["client_gstin"] == client_gstin]
+    result = await db.execute(access_summary_stmt(client_gstin, since))
 
-    actors = {}
-    for e in entries:
-        key = f"{e['actor_type']}:{e['actor_id']}"
-        if key not in actors:
-            actors[key] = {"first_access": e["timestamp"], "last_access": e["timestamp"], "count": 0}
-        actors[key]["last_access"] = e["timestamp"]
-        actors[key]["count"] += 1
+    actors: dict[str, dict[str, Any]] = {}
+    total = 0
+    for r in result.all():
+        actors[f"{r.actor_type}:{r.actor_id}"] = {
+            "first_access": r.first_access.isoformat(),
+            "last_access": r.last_access.isoformat(),
+            "count": r.count,
+        }
+        total += r.count
 
     return {
         "client_gstin": client_gstin,
-        "total_accesses": len(entries),
+        "total_accesses": total,
         "unique_actors": len(actors),
         "actors": actors,
     }
 
 
-def clear_buffer():
-    """Clear the in-memory audit buffer (for testing)."""
-    _audit_buffer.clear()
+# ---------------------------------------------------------------------------
+# Partition maintenance
+# ---------------------------------------------------------------------------
+
+def _month_start(d: date) -> date:
+    return date(d.year, d.month, 1)
+
+
+def _add_months(d: date, months: int) -> date:
+    index = d.year * 12 + d.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"{_PARTITION_PREFIX}{month:%Y%m}"
+
+
+_DEFAULT_PARTITION = "audit_log_default"
+
+
+def _partition_bounds(month: date) -> tuple[str, str]:
+    start = _month_start(month)
+    end = _add_months(start, 1)
+    return f"{start.isoformat()} 00:00:00+00", f"{end.isoformat()} 00:00:00+00"
+
+
+def create_partition_sql(month: date) -> str:
+    """DDL for the partition holding ``month`` (idempotent)."""
+    lo, hi = _partition_bounds(month)
+    return (
+        f"CREATE TABLE IF NOT EXISTS {partition_name(month)} PARTITION OF audit_log "
+        f"FOR VALUES FROM ('{lo}') TO ('{hi}')"
+    )
+
+
+def split_default_sql(month: date) -> list[str]:
+    """Create ``month``'s partition while the DEFAULT partition holds rows for it.
+
+    Postgres refuses ``CREATE TABLE ... PARTITION OF`` when the default
+    partition already has rows in the new range (a missed job run, clock
+    skew), so the default is detached, the month created, its rows moved
+    across and the default reattached — all in the caller's transaction.
+    """
+    lo, hi = _partition_bounds(month)
+    name = partition_name(month)
+    return [
+        f"ALTER TABLE audit_log DETACH PARTITION {_DEFAULT_PARTITION}",
+        create_partition_sql(month),
+        (
+            f"WITH moved AS (DELETE FROM {_DEFAULT_PARTITION} "
+            f"WHERE created_at >= '{lo}' AND created_at < '{hi}' RETURNING *) "
+            f"INSERT INTO {name} SELECT * FROM moved"
+        ),
+        f"ALTER TABLE audit_log ATTACH PARTITION {_DEFAULT_PARTITION} DEFAULT",
+    ]
+
+
+async def _partition_names(db: AsyncSession) -> list[str]:
+    result = await db.execute(text(
+        "SELECT c.relname FROM pg_inherits i "
+        "JOIN pg_class c ON c.oid = i.inhrelid "
+        "JOIN pg_class p ON p.oid = i.inhparent "
+        "WHERE p.relname = 'audit_log'"
+    ))
+    return [r[0] for r in result.all()]
+
+
+def expired_partitions(names: list[str], today: date, retention_months: int) -> list[str]:
+    """Monthly partitions whose whole month is older than the retention window."""
+    cutoff = _add_months(_month_start(today), -retention_months)
+    expired = []
+    for name in names:
+        m = _PARTITION_RE.match(name)
+        if m and date(int(m.group(1)), int(m.group(2)), 1) < cutoff:
+            expired.append(name)
+    return sorted(expired)
+
+
+async def ensure_partitions(db: AsyncSession, months_ahead: int, today: date | None = None) -> list[str]:
+    """Create partitions for the current month and ``months_ahead`` after it.
+
+    Months already present are skipped.  New months are split out of the
+    DEFAULT partition, so rows that landed there meanwhile move to their
+    own month instead of blocking the partition from being created.
+    """
+    start = _month_start(today or datetime.now(timezone.utc).date())
+    months = [_add_months(start, i) for i in range(months_ahead + 1)]
+    existing = set(await _partition_names(db))
+    for month in months:
+        if partition_name(month) in existing:
+            continue
+        if _DEFAULT_PARTITION in existing:
+            for stmt in split_default_sql(month):
+                await db.execute(text(stmt))
+        else:
+            await db.execute(text(create_partition_sql(month)))
+        await db.commit()
+        logger.info("Created audit partition %s", partition_name(month))
+    return [partition_name(m) for m in months]
+
+
+async def drop_expired_partitions(
+    db: AsyncSession,
+    retention_months: int,
+    today: date | None = None,
+) -> list[str]:
+    """Drop whole monthly partitions older than ``retention_months``."""
+    names = await _partition_names(db)
+    expired = expired_partitions(
+        names, today or datetime.now(timezone.utc).date(), retention_months
+    )
+    for name in expired:
+        await db.execute(text(f"DROP TABLE IF EXISTS {name}"))
+        logger.info("Dropped expired audit partition %s", name)
+    await db.commit()
+    return expired
@@ -9,14 +9,20 @@ that could trigger notices or missed ITC.
 from __future__ import annotations
 
 import logging
+from calendar import monthrange
 from dataclasses import dataclass, field
+from datetime import date
 from decimal import Decimal
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy import and_, select
+from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.infrastructure.db.repositories.invoice_aggregate_repository import (
+    InvoiceAggregateRepository,
+)
+
 logger = logging.getLogger("books_vs_portal")
 
 
@@ -108,6 +114,37 @@ class ComparisonSummary:
 _MATCH_TOLERANCE = Decimal("1.0")
 
 
+def _period_bounds(period: str) -> tuple[date, date] | None:
+    """Return (first_day, last_day) for 'YYYY-MM', or None if unparseable."""
+    try:
+        year, month = (int(p) for p in period.split("-")[:2])
+        return date(year, month, 1), date(year, month, monthrange(year, month)[1])
+    except (ValueError, TypeError):
+        return None
+
+
+async def _load_books(
+    db: AsyncSession, user_id: UUID, period: str, direction: str
+) -> dict[str, Any]:
+    """Invoice rows for the period keyed by normalised invoice number.
+
+    Filters by date range in SQL (covering index on user/direction/date)
+    and fetches only the compared columns instead of full ORM objects.
+    """
+    bounds = _period_bounds(period)
+    if bounds is None:
+        return {}
+    rows = await InvoiceAggregateRepository(db).list_lines(
+        user_id, bounds[0], bounds[1], direction
+    )
+    books = {}
+    for inv in rows:
+        key = (inv.invoice_number or "").strip().upper()
+        if key:
+            books[key] = inv
+    return books
+
+
 async def compare_sales(
     user_id: UUID,
     gstin: str,
@@ -115,27 +152,10 @@ async def compare_sales(
     db: AsyncSession,
 ) -> ComparisonSummary:
     """Compare uploaded sales invoices against GSTR-1 filed data."""
-    from app.infrastructure.db.models import Invoice
-
     summary = ComparisonSummary(comparison_type="sales", period=period)
 
     # Get books data (outward invoices for this period)
-    stmt = select(Invoice).where(
-        and_(
-            Invoice.user_id == user_id,
-            Invoice.direction == "outward",
-        )
-    )
-    result = await db.execute(stmt)
-    all_invoices = result.scalars().all()
-
-    # Filter to period
-    books = {}
-    for inv in all_invoices:
-        if inv.invoice_date and inv.invoice_date.strftime("%Y-%m") == period:
-            key = (inv.invoice_number or "").strip().upper()
-            if key:
-                books[key] = inv
+    books = await _load_books(db, user_id, period, "outward")
 
     summary.total_books_count = len(books)
     summary.total_books_value = sum(
@@ -175,26 +195,12 @@ async def compare_purchases(
     db: AsyncSession,
 ) -> ComparisonSummary:
     """Compare uploaded purchase invoices against GSTR-2B imported data."""
-    from app.infrastructure.db.models import Invoice, ITCMatch
+    from app.infrastructure.db.models import ITCMatch
 
     summary = ComparisonSummary(comparison_type="purchases", period=period)
 
-    # Get books data (inward invoices)
-    stmt = select(Invoice).where(
-        and_(
-            Invoice.user_id == user_id,
-            Invoice.direction == "inward",
-        )
-    )
-    result = await db.execute(stmt)
-    all_invoices = result.scalars().all()
-
-    books = {}
-    for inv in all_invoices:
-        if inv.invoice_date and inv.invoice_date.strftime("%Y-%m") == period:
-            key = (inv.invoice_number or "").strip().upper()
-            if key:
-                books[key] = inv
+    # Get books data (inward invoices for this period)
+    books = await _load_books(db, user_id, period, "inward")
 
     summary.total_books_count = len(books)
     summary.total_books_value = sum(
@@ -12,6 +12,9 @@ Usage in routes:
 
 from __future__ import annotations
 
+import asyncio
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta, timezone
 from typing import NoReturn
 
@@ -22,6 +25,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
 from app.core.db import get_db
+from app.infrastructure.cache import principal_cache
 from app.infrastructure.db.models import CAUser
 from app.infrastructure.db.repositories.ca_repository import CAUserRepository
 
@@ -40,6 +44,33 @@ def verify_password(plain: str, hashed: str) -> bool:
     return _bcrypt.checkpw(plain.encode(), hashed.encode())
 
 
+# bcrypt releases the GIL, so a small thread pool keeps hashing off the event
+# loop; its size caps how many hashes run at once (the rest queue).
+_hash_pool: ThreadPoolExecutor | None = None
+
+
+def _get_hash_pool() -> ThreadPoolExecutor:
+    global _hash_pool
+    if _hash_pool is None:
+        _hash_pool = ThreadPoolExecutor(
+            max_workers=max(settings.PASSWORD_HASH_WORKERS, 1),
+            thread_name_prefix="bcrypt",
+        )
+    return _hash_pool
+
+
+async def hash_password_async(plain: str) -> str:
+    """:func:`hash_password` on the bounded bcrypt pool — use from async routes."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_pool(), hash_password, plain)
+
+
+async def verify_password_async(plain: str, hashed: str) -> bool:
+    """:func:`verify_password` on the bounded bcrypt pool — use from async routes."""
+    loop = asyncio.get_running_loop()
+    return await loop.run_in_executor(_get_hash_pool(), verify_password, plain, hashed)
+
+
 # ---------------------------------------------------------------------------
 # JWT helpers
 # ---------------------------------------------------------------------------
@@ -54,6 +85,7 @@ def create_access_token(ca_id: int, email: str) -> str:
         "email": email,
         "type": "access",
         "exp": expire,
+        "jti": uuid.uuid4().hex,    # principal cache key
     }
     return jwt.encode(
         payload,
@@ -103,6 +135,10 @@ async def get_current_ca(
     FastAPI dependency that reads the ``ca_token`` httpOnly cookie,
     validates the JWT, and returns the authenticated :class:`CAUser`.
 
+    Within ``CA_PRINCIPAL_CACHE_TTL_SECONDS`` of the first request for a
+    token, the CA comes from ``principal_cache`` as a transient (detached)
+    instance instead of the DB.
+
     On failure it redirects to the login page (for browser requests)
     or raises HTTP 401 (for API requests).
     """
@@ -125,12 +161,20 @@ async def get_current_ca(
     except (JWTError, KeyError, ValueError):
         _raise_or_redirect(request)
 
+    jti = payload.get("jti")
+    if jti:
+        cached = await principal_cache.get(jti)
+        if cached is not None and cached.id == ca_id:
+            return cached
+
     repo = CAUserRepository(db)
     ca = await repo.get_by_id(ca_id)
 
     if ca is None or not ca.active or not ca.approved:
         _raise_or_redirect(request)
 
+    if jti:
+        await principal_cache.put(jti, ca)
     return ca  # type: ignore[return-value]
 
 
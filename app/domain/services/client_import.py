@@ -0,0 +1,495 @@
+# app/domain/services/client_import.py
+"""
+Streaming bulk import of CA business clients from CSV.
+
+The upload is spooled to a temporary file in fixed-size chunks and imported
+by a background task, so a 20k-row file never sits in memory and never
+holds the HTTP request open.  Rows are read and validated in batches of
+``CLIENT_IMPORT_BATCH_SIZE``; each batch costs one set-based SELECT to find
+WhatsApp numbers / GSTINs that already exist and one
+``INSERT ... ON CONFLICT DO NOTHING RETURNING`` to create the rest.  Every
+batch commits on its own, so a failure never discards earlier batches.
+
+Progress and the per-row results file live in Redis so any web worker can
+answer the CA dashboard's polling::
+
+    client_import:{job_id}           hash — ca_id, status, total_rows,
+                                     processed, added, skipped, failed, error
+    client_import:{job_id}:results   list — one CSV chunk per batch
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import io
+import logging
+import os
+import tempfile
+import uuid
+from collections import defaultdict, deque
+from collections.abc import AsyncIterator, Iterable, Iterator
+from dataclasses import dataclass
+from typing import Any
+
+from sqlalchemy import and_, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.core.config import settings
+from app.domain.services.gstin_pan_validation import (
+    is_valid_gstin,
+    is_valid_pan,
+    is_valid_whatsapp_number,
+    normalize_whatsapp_number,
+)
+from app.infrastructure.db.models import BusinessClient
+
+logger = logging.getLogger("client_import")
+
+_KEY_PREFIX = "client_import"
+_SPOOL_CHUNK = 64 * 1024
+
+RESULT_COLUMNS = (
+    "row", "name", "whatsapp_number", "gstin", "outcome", "client_id", "reason",
+)
+
+# Background tasks are referenced here so they are not garbage-collected mid-run
+_tasks: set[asyncio.Task] = set()
+
+
+@dataclass
+class ImportRow:
+    row: int
+    name: str
+    whatsapp_number: str | None
+    gstin: str | None
+    pan: str | None
+    email: str | None
+    business_type: str | None
+
+
+@dataclass
+class RowResult:
+    row: int
+    name: str
+    outcome: str                      # added / skipped / failed
+    whatsapp_number: str | None = None
+    gstin: str | None = None
+    client_id: int | None = None
+    reason: str = ""
+
+
+def _key(job_id: str) -> str:
+    return f"{_KEY_PREFIX}:{job_id}"
+
+
+def _results_key(job_id: str) -> str:
+    return f"{_KEY_PREFIX}:{job_id}:results"
+
+
+# ---------------------------------------------------------------------------
+# Parsing / validation
+# ---------------------------------------------------------------------------
+
+def validate_row(row_num: int, row: dict[str, Any]) -> ImportRow | RowResult:
+    """Normalise one CSV row; returns a ``failed`` RowResult if it is invalid."""
+    name = (row.get("name") or "").strip()
+    raw_wa = (row.get("whatsapp_number") or "").strip()
+    raw_gstin = (row.get("gstin") or "").strip().upper()
+    raw_pan = (row.get("pan") or "").strip().upper()
+    raw_email = (row.get("email") or "").strip().lower()
+    raw_btype = (row.get("business_type") or "").strip()
+
+    errors: list[str] = []
+    if not name:
+        errors.append("name is required")
+
+    normalized_wa: str | None = None
+    if raw_wa:
+        normalized_wa = normalize_whatsapp_number(raw_wa)
+        if normalized_wa is None:
+            errors.append("invalid WhatsApp number")
+        elif not is_valid_whatsapp_number(normalized_wa):
+            errors.append("WhatsApp must be valid Indian mobile")
+    if raw_gstin and not is_valid_gstin(raw_gstin):
+        errors.append("invalid GSTIN")
+    if raw_pan and not is_valid_pan(raw_pan):
+        errors.append("invalid PAN")
+
+    if errors:
+        return RowResult(
+            row=row_num,
+            name=name or "(empty)",
+            outcome="failed",
+            whatsapp_number=raw_wa or None,
+            gstin=raw_gstin or None,
+            reason="; ".join(errors),
+        )
+    return ImportRow(
+        row=row_num,
+        name=name,
+        whatsapp_number=normalized_wa,
+        gstin=raw_gstin or None,
+        pan=raw_pan or None,
+        email=raw_email or None,
+        business_type=raw_btype or None,
+    )
+
+
+def iter_batches(
+    rows: Iterable[dict[str, Any]], batch_size: int
+) -> Iterator[list[tuple[int, dict[str, Any]]]]:
+    """Yield ``(row_number, row)`` lists of at most ``batch_size``.
+
+    Row 1 is the header, so data rows are numbered from 2.
+    """
+    batch: list[tuple[int, dict[str, Any]]] = []
+    for row_num, row in enumerate(rows, start=2):
+        batch.append((row_num, row))
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------------------------------------------------------------------------
+# Set-based dedupe + insert
+# ---------------------------------------------------------------------------
+
+def existing_clients_stmt(
+    ca_id: int, whatsapp_numbers: list[str], gstins: list[str]
+):
+    """One SELECT for every WhatsApp number (global) or GSTIN (this CA) on file."""
+    conds = []
+    if whatsapp_numbers:
+        conds.append(BusinessClient.whatsapp_number.in_(whatsapp_numbers))
+    if gstins:
+        conds.append(
+            and_(BusinessClient.ca_id == ca_id, BusinessClient.gstin.in_(gstins))
+        )
+    return select(
+        BusinessClient.ca_id,
+        BusinessClient.whatsapp_number,
+        BusinessClient.gstin,
+    ).where(or_(*conds))
+
+
+def insert_clients_stmt(ca_id: int, rows: list[ImportRow]):
+    """Multi-row INSERT that skips WhatsApp-number conflicts, returning new rows."""
+    values = [
+        {
+            "ca_id": ca_id,
+            "name": r.name,
+            "whatsapp_number": r.whatsapp_number,
+            "gstin": r.gstin,
+            "pan": r.pan,
+            "email": r.email,
+            "business_type": r.business_type,
+        }
+        for r in rows
+    ]
+    return (
+        pg_insert(BusinessClient)
+        .values(values)
+        .on_conflict_do_nothing(index_elements=[BusinessClient.whatsapp_number])
+        .returning(
+            BusinessClient.id,
+            BusinessClient.name,
+            BusinessClient.whatsapp_number,
+            BusinessClient.gstin,
+        )
+    )
+
+
+class _SeenInFile:
+    """WhatsApp numbers / GSTINs already claimed by an earlier row of the file."""
+
+    def __init__(self) -> None:
+        self.whatsapp: dict[str, int] = {}
+        self.gstin: dict[str, int] = {}
+
+    def duplicate_reason(self, r: ImportRow) -> str | None:
+        if r.whatsapp_number and r.whatsapp_number in self.whatsapp:
+            first = self.whatsapp[r.whatsapp_number]
+            return f"WhatsApp {r.whatsapp_number} repeats row {first}"
+        if r.gstin and r.gstin in self.gstin:
+            return f"GSTIN {r.gstin} repeats row {self.gstin[r.gstin]}"
+        return None
+
+    def add(self, r: ImportRow) -> None:
+        if r.whatsapp_number:
+            self.whatsapp[r.whatsapp_number] = r.row
+        if r.gstin:
+            self.gstin[r.gstin] = r.row
+
+
+async def import_batch(
+    db: AsyncSession,
+    ca_id: int,
+    rows: list[ImportRow],
+    seen: _SeenInFile,
+) -> list[RowResult]:
+    """Dedupe and insert one batch of valid rows, then commit it."""
+    results: list[RowResult] = []
+    candidates: list[ImportRow] = []
+
+    def _skip(r: ImportRow, reason: str) -> None:
+        results.append(RowResult(
+            row=r.row, name=r.name, outcome="skipped",
+            whatsapp_number=r.whatsapp_number, gstin=r.gstin, reason=reason,
+        ))
+
+    for r in rows:
+        reason = seen.duplicate_reason(r)
+        if reason:
+            _skip(r, reason)
+        else:
+            seen.add(r)
+            candidates.append(r)
+
+    wa_numbers = [r.whatsapp_number for r in candidates if r.whatsapp_number]
+    gstins = [r.gstin for r in candidates if r.gstin]
+    taken_wa: set[str] = set()
+    taken_gstin: set[str] = set()
+    if wa_numbers or gstins:
+        existing = await db.execute(existing_clients_stmt(ca_id, wa_numbers, gstins))
+        for row in existing.all():
+            if row.whatsapp_number:
+                taken_wa.add(row.whatsapp_number)
+            if row.gstin and row.ca_id == ca_id:
+                taken_gstin.add(row.gstin)
+
+    to_insert: list[ImportRow] = []
+    for r in candidates:
+        if r.whatsapp_number and r.whatsapp_number in taken_wa:
+            _skip(r, f"WhatsApp {r.whatsapp_number} already registered")
+        elif r.gstin and r.gstin in taken_gstin:
+            _skip(r, f"GSTIN {r.gstin} already registered")
+        else:
+            to_insert.append(r)
+
+    if to_insert:
+        created = await db.execute(insert_clients_stmt(ca_id, to_insert))
+        # RETURNING order is not guaranteed; match rows back on their values
+        ids: dict[tuple, deque[int]] = defaultdict(deque)
+        for row in created.all():
+            ids[(row.name, row.whatsapp_number, row.gstin)].append(row.id)
+        for r in to_insert:
+            bucket = ids.get((r.name, r.whatsapp_number, r.gstin))
+            if bucket:
+                results.append(RowResult(
+                    row=r.row, name=r.name, outcome="added",
+                    whatsapp_number=r.whatsapp_number, gstin=r.gstin,
+                    client_id=bucket.popleft(),
+                ))
+            else:
+                # Lost an ON CONFLICT race with a concurrent insert
+                _skip(r, "duplicate (WhatsApp conflict)")
+    await db.commit()
+
+    results.sort(key=lambda res: res.row)
+    return results
+
+
+# ---------------------------------------------------------------------------
+# Job lifecycle
+# ---------------------------------------------------------------------------
+
+async def spool_upload(upload: Any, max_bytes: int | None = None) -> tuple[str, int]:
+    """Copy an uploaded file to a temp file in chunks.
+
+    Returns ``(path, approximate_row_count)``.  Raises ``ValueError`` when the
+    file is larger than ``CLIENT_IMPORT_MAX_BYTES``.
+    """
+    limit = max_bytes or settings.CLIENT_IMPORT_MAX_BYTES
+    fd, path = tempfile.mkstemp(prefix="client_import_", suffix=".csv")
+    size = newlines = 0
+    last = b""
+    try:
+        with os.fdopen(fd, "wb") as out:
+            while True:
+                chunk = await upload.read(_SPOOL_CHUNK)
+                if not chunk:
+                    break
+                size += len(chunk)
+                if size > limit:
+                    limit_mb = limit // (1024 * 1024)
+                    raise ValueError(f"File is larger than {limit_mb} MB.")
+                newlines += chunk.count(b"\n")
+                last = chunk
+                out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    lines = newlines + (1 if last and not last.endswith(b"\n") else 0)
+    return path, max(lines - 1, 0)
+
+
+async def start_import(upload: Any, ca_id: int, ca_email: str = "") -> str:
+    """Spool the upload, register the job in Redis and run it in the background."""
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    path, total_rows = await spool_upload(upload)
+    job_id = uuid.uuid4().hex
+    r = get_redis_client()
+    try:
+        await r.hset(_key(job_id), mapping={
+            "ca_id": ca_id,
+            "status": "queued",
+            "total_rows": total_rows,
+            "processed": 0,
+            "added": 0,
+            "skipped": 0,
+            "failed": 0,
+            "error": "",
+        })
+        await r.expire(_key(job_id), settings.CLIENT_IMPORT_RESULT_TTL_SECONDS)
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    task = asyncio.create_task(run_import(job_id, ca_id, ca_email, path))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job_id
+
+
+def _results_csv(results: list[RowResult]) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for res in results:
+        writer.writerow([
+            res.row, res.name, res.whatsapp_number or "", res.gstin or "",
+            res.outcome, res.client_id or "", res.reason,
+        ])
+    return buf.getvalue()
+
+
+async def _record(r: Any, job_id: str, results: list[RowResult]) -> None:
+    counts = {"added": 0, "skipped": 0, "failed": 0}
+    for res in results:
+        counts[res.outcome] += 1
+    pipe = r.pipeline(transaction=False)
+    pipe.rpush(_results_key(job_id), _results_csv(results))
+    pipe.hincrby(_key(job_id), "processed", len(results))
+    for outcome, n in counts.items():
+        if n:
+            pipe.hincrby(_key(job_id), outcome, n)
+    pipe.expire(_results_key(job_id), settings.CLIENT_IMPORT_RESULT_TTL_SECONDS)
+    await pipe.execute()
+
+
+async def run_import(
+    job_id: str,
+    ca_id: int,
+    ca_email: str,
+    path: str,
+    *,
+    batch_size: int | None = None,
+) -> None:
+    """Import the spooled CSV at ``path`` batch by batch, then delete it."""
+    from app.core.db import AsyncSessionLocal
+    from app.infrastructure.audit import log_ca_action
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    size = batch_size or settings.CLIENT_IMPORT_BATCH_SIZE
+    r = get_redis_client()
+    seen = _SeenInFile()
+    status, error = "done", ""
+    try:
+        await r.hset(_key(job_id), "status", "running")
+        with open(path, newline="", encoding="utf-8-sig") as fh:
+            reader = csv.DictReader(fh)
+            if "name" not in (reader.fieldnames or []):
+                raise ValueError("CSV header must include a 'name' column.")
+
+            async with AsyncSessionLocal() as db:
+                for batch in iter_batches(reader, size):
+                    results: list[RowResult] = []
+                    valid: list[ImportRow] = []
+                    for row_num, row in batch:
+                        parsed = validate_row(row_num, row)
+                        if isinstance(parsed, RowResult):
+                            results.append(parsed)
+                        else:
+                            valid.append(parsed)
+                    try:
+                        results.extend(await import_batch(db, ca_id, valid, seen))
+                    except Exception:
+                        logger.exception(
+                            "Client import %s: batch at row %d failed",
+                            job_id, batch[0][0],
+                        )
+                        await db.rollback()
+                        results.extend(
+                            RowResult(
+                                row=v.row, name=v.name, outcome="failed",
+                                whatsapp_number=v.whatsapp_number, gstin=v.gstin,
+                                reason="database error",
+                            )
+                            for v in valid
+                        )
+                    results.sort(key=lambda res: res.row)
+                    await _record(r, job_id, results)
+
+                    for res in results:
+                        if res.outcome == "added":
+                            log_ca_action(
+                                "bulk_create_client", ca_id=ca_id, ca_email=ca_email,
+                                client_id=res.client_id, details={"name": res.name},
+                            )
+    except UnicodeDecodeError:
+        status = "failed"
+        error = "Could not read the file. Please upload a valid UTF-8 CSV."
+    except ValueError as exc:
+        status, error = "failed", str(exc)
+    except Exception:
+        logger.exception("Client import %s failed", job_id)
+        status = "failed"
+        error = "Unexpected error; rows before this point were imported."
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        try:
+            await r.hset(_key(job_id), mapping={"status": status, "error": error})
+        except Exception:
+            logger.warning("Could not record final status for client import %s", job_id)
+    logger.info("Client import %s finished: %s", job_id, status)
+
+
+async def get_import_status(job_id: str, ca_id: int) -> dict[str, Any] | None:
+    """Progress for a job owned by ``ca_id`` (``None`` if unknown or not theirs)."""
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    data = await get_redis_client().hgetall(_key(job_id))
+    if not data or str(data.get("ca_id")) != str(ca_id):
+        return None
+    status = {
+        "job_id": job_id,
+        "status": data.get("status", ""),
+        "error": data.get("error", ""),
+    }
+    for field in ("total_rows", "processed", "added", "skipped", "failed"):
+        status[field] = int(data.get(field) or 0)
+    return status
+
+
+async def iter_results_csv(job_id: str, chunk: int = 50) -> AsyncIterator[str]:
+    """Stream the per-row results file (header first) straight from Redis."""
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    r = get_redis_client()
+    buf = io.StringIO()
+    csv.writer(buf).writerow(RESULT_COLUMNS)
+    yield buf.getvalue()
+    start = 0
+    while True:
+        parts = await r.lrange(_results_key(job_id), start, start + chunk - 1)
+        if not parts:
+            return
+        yield "".join(parts)
+        start += len(parts)
@@ -5,20 +5,40 @@ Scheduled filing deadline reminder service.
 Runs periodically (e.g., daily) and sends proactive WhatsApp reminders
 to users whose sessions are active, notifying them of upcoming GST/ITR
 filing deadlines.
+
+Active users come from the per-language ``wa:active:{lang}`` sorted sets
+that ``SessionCache.save_session`` maintains, paged with ZSCAN in batches
+of ``REMINDER_BATCH_SIZE``.  For each batch the sent-markers are checked
+and set with one pipelined round trip each, and messages are fed to the
+outbound sender no faster than it drains (``MAX_PENDING_OUTBOUND``), so
+a run over a million users neither blocks Redis nor floods memory.
 """
 
 from __future__ import annotations
 
 import asyncio
+import json
 import logging
+import time
 from datetime import date
 
 import redis.asyncio as redis
 
 from app.core.config import settings
+from app.domain.i18n import SUPPORTED_LANGS
 from app.domain.i18n import t as i18n_t
 from app.domain.services.tax_analytics import get_filing_deadlines
-from app.infrastructure.external.whatsapp_client import send_whatsapp_text
+from app.infrastructure.cache.session_cache import (
+    SESSION_TTL_SECONDS,
+    backfill_active_users,
+    iter_active_users,
+    prune_active_users,
+)
+from app.infrastructure.external.whatsapp_client import (
+    MIN_SECONDS_BETWEEN_MESSAGES,
+    outgoing_queue_depth,
+    send_whatsapp_text,
+)
 
 logger = logging.getLogger("deadline_scheduler")
 
@@ -27,63 +47,95 @@ REMINDER_THRESHOLDS = [7, 3, 1, 0]  # 7 days, 3 days, 1 day, and on the day
 
 # Key prefix in Redis for tracking sent reminders (avoid duplicate sends)
 REMINDER_SENT_PREFIX = "wa:reminder:"
+REMINDER_SENT_TTL_SECONDS = 30 * 24 * 3600
 
 # How often the scheduler loop runs (in seconds)
 CHECK_INTERVAL_SECONDS = 6 * 3600  # Every 6 hours
 
+# Users per registry page (and per pipelined marker check)
+REMINDER_BATCH_SIZE = 500
 
-async def _get_active_sessions(redis_url: str) -> list[dict]:
-    """
-    Scan Redis for all active WhatsApp sessions.
-    Returns list of dicts with wa_id and lang.
-    """
-    import json
+# The producer pauses while more than this many messages wait to be sent
+MAX_PENDING_OUTBOUND = 200
+
+
+def _reminder_key(wa_id: str, form_name: str, due_date: date) -> str:
+    return f"{REMINDER_SENT_PREFIX}{wa_id}:{form_name}:{due_date}"
+
+
+def _nudge_key(wa_id: str, form_name: str, due_date: date) -> str:
+    return f"{REMINDER_SENT_PREFIX}nil_nudge:{wa_id}:{form_name}:{due_date}"
+
+
+async def _iter_active_batches(r: redis.Redis):
+    """Yield ``(lang, [wa_id, ...])`` for every user active within the session TTL."""
+    registered = await backfill_active_users(r)
+    if registered:
+        logger.info("Registered %d pre-existing sessions as active users", registered)
+    await prune_active_users(r)
+
+    active_since = time.time() - SESSION_TTL_SECONDS
+    for lang in SUPPORTED_LANGS:
+        async for wa_ids in iter_active_users(r, lang, REMINDER_BATCH_SIZE, active_since):
+            yield lang, wa_ids
 
-    r = redis.from_url(redis_url, decode_responses=True)
-    sessions = []
-    try:
-        cursor = "0"
-        while True:
-            cursor, keys = await r.scan(cursor=cursor, match="wa:session:*", count=100)
-            if keys:
-                # Batch fetch with MGET instead of individual GETs
-                values = await r.mget(keys)
-                for key, raw in zip(keys, values):
-                    if not raw:
-                        continue
-                    try:
-                        data = json.loads(raw)
-                        # Extract wa_id from key: "wa:session:{wa_id}"
-                        wa_id = key.split(":", 2)[-1] if key.startswith("wa:session:") else None
-                        if wa_id:
-                            sessions.append({
-                                "wa_id": wa_id,
-                                "lang": data.get("lang", "en"),
-                            })
-                    except Exception:
-                        continue
-            if cursor == "0" or cursor == 0:
-                break
-    finally:
-        await r.aclose()
 
-    return sessions
+async def _unsent_keys(r: redis.Redis, keys: list[str]) -> set[str]:
+    """The subset of marker ``keys`` not yet set — one pipelined round trip."""
+    if not keys:
+        return set()
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.exists(key)
+    return {key for key, exists in zip(keys, await pipe.execute()) if not exists}
 
 
-async def _was_reminder_sent(
-    r: redis.Redis, wa_id: str, form_name: str, due_date: date
-) -> bool:
-    """Check if we already sent this specific reminder."""
-    key = f"{REMINDER_SENT_PREFIX}{wa_id}:{form_name}:{due_date}"
-    return await r.exists(key) > 0
+async def _mark_sent(r: redis.Redis, keys: list[str]) -> None:
+    if not keys:
+        return
+    pipe = r.pipeline(transaction=False)
+    for key in keys:
+        pipe.set(key, "1", ex=REMINDER_SENT_TTL_SECONDS)
+    await pipe.execute()
 
 
-async def _mark_reminder_sent(
-    r: redis.Redis, wa_id: str, form_name: str, due_date: date
-) -> None:
-    """Mark a reminder as sent, with a TTL of 30 days."""
-    key = f"{REMINDER_SENT_PREFIX}{wa_id}:{form_name}:{due_date}"
-    await r.set(key, "1", ex=30 * 24 * 3600)
+async def _wait_for_outbound_capacity() -> None:
+    """Block until the outbound queue has drained below ``MAX_PENDING_OUTBOUND``."""
+    while (depth := outgoing_queue_depth()) >= MAX_PENDING_OUTBOUND:
+        backlog = depth - MAX_PENDING_OUTBOUND // 2
+        await asyncio.sleep(backlog * MIN_SECONDS_BETWEEN_MESSAGES)
+
+
+def _actionable_deadlines(deadlines: list) -> list:
+    actionable = []
+    for dl in deadlines:
+        if dl.days_remaining < 0:
+            # Overdue — always remind
+            actionable.append(dl)
+        elif dl.days_remaining in REMINDER_THRESHOLDS or dl.days_remaining <= 3:
+            # Approaching deadline
+            actionable.append(dl)
+    return actionable
+
+
+def _reminder_text(dl, lang: str) -> str:
+    if dl.days_remaining < 0:
+        return i18n_t(
+            "DEADLINE_OVERDUE",
+            lang,
+            form_name=dl.form_name,
+            period=dl.period,
+            due_date=str(dl.due_date),
+            days_overdue=abs(dl.days_remaining),
+        )
+    return i18n_t(
+        "DEADLINE_REMINDER",
+        lang,
+        form_name=dl.form_name,
+        period=dl.period,
+        due_date=str(dl.due_date),
+        days_remaining=dl.days_remaining,
+    )
 
 
 async def send_deadline_reminders() -> int:
@@ -96,26 +148,11 @@ async def send_deadline_reminders() -> int:
         logger.warning("REDIS_URL not configured — skipping deadline reminders")
         return 0
 
-    sessions = await _get_active_sessions(settings.REDIS_URL)
-    if not sessions:
-        logger.info("No active sessions found — no reminders to send")
-        return 0
-
     deadlines = get_filing_deadlines()
     if not deadlines:
         return 0
 
-    # Filter deadlines that qualify for reminders
-    today = date.today()
-    actionable_deadlines = []
-    for dl in deadlines:
-        if dl.days_remaining < 0:
-            # Overdue — always remind
-            actionable_deadlines.append(dl)
-        elif dl.days_remaining in REMINDER_THRESHOLDS or dl.days_remaining <= 3:
-            # Approaching deadline
-            actionable_deadlines.append(dl)
-
+    actionable_deadlines = _actionable_deadlines(deadlines)
     if not actionable_deadlines:
         logger.info("No actionable deadlines for reminders today")
         return 0
@@ -124,55 +161,34 @@ async def send_deadline_reminders() -> int:
     sent_count = 0
 
     try:
-        for user_session in sessions:
-            wa_id = user_session["wa_id"]
-            lang = user_session.get("lang", "en")
-
-            for dl in actionable_deadlines:
-                # Check if already sent
-                already_sent = await _was_reminder_sent(
-                    r, wa_id, dl.form_name, dl.due_date
-                )
-                if already_sent:
+        async for lang, wa_ids in _iter_active_batches(r):
+            # Message text depends only on (deadline, lang): build once per batch
+            texts = [(dl, _reminder_text(dl, lang)) for dl in actionable_deadlines]
+            candidates = [
+                (wa_id, dl, msg, _reminder_key(wa_id, dl.form_name, dl.due_date))
+                for wa_id in wa_ids
+                for dl, msg in texts
+            ]
+            unsent = await _unsent_keys(r, [c[3] for c in candidates])
+
+            sent_keys = []
+            for wa_id, dl, msg, key in candidates:
+                if key not in unsent:
                     continue
-
-                # Build reminder message
-                if dl.days_remaining < 0:
-                    msg = i18n_t(
-                        "DEADLINE_OVERDUE",
-                        lang,
-                        form_name=dl.form_name,
-                        period=dl.period,
-                        due_date=str(dl.due_date),
-                        days_overdue=abs(dl.days_remaining),
-                    )
-                else:
-                    msg = i18n_t(
-                        "DEADLINE_REMINDER",
-                        lang,
-                        form_name=dl.form_name,
-                        period=dl.period,
-                        due_date=str(dl.due_date),
-                        days_remaining=dl.days_remaining,
-                    )
-
+                await _wait_for_outbound_capacity()
                 try:
                     await send_whatsapp_text(wa_id, msg)
-                    await _mark_reminder_sent(r, wa_id, dl.form_name, dl.due_date)
-                    sent_count += 1
-                    logger.info(
-                        "Sent %s reminder to %s (due: %s, days: %d)",
-                        dl.form_name,
-                        wa_id,
-                        dl.due_date,
-                        dl.days_remaining,
-                    )
                 except Exception:
                     logger.exception(
                         "Failed to send reminder to %s for %s",
                         wa_id,
                         dl.form_name,
                     )
+                    continue
+                sent_keys.append(key)
+                unsent.discard(key)      # ZSCAN may repeat a user within a batch
+            await _mark_sent(r, sent_keys)
+            sent_count += len(sent_keys)
     finally:
         await r.aclose()
 
@@ -190,51 +206,46 @@ async def send_nil_filing_nudges() -> int:
     if not settings.REDIS_URL:
         return 0
 
-    import json as _json
+    deadlines = get_filing_deadlines()
+    # Only nudge for GSTR-3B deadlines that are 5 days away or less
+    gst_deadlines = [
+        d for d in deadlines
+        if "GSTR-3B" in d.form_name
+        and 0 <= d.days_remaining <= 5
+    ]
+    if not gst_deadlines:
+        return 0
 
     r = redis.from_url(settings.REDIS_URL, decode_responses=True)
     sent_count = 0
 
     try:
-        deadlines = get_filing_deadlines()
-        # Only nudge for GSTR-3B deadlines that are 5 days away or less
-        gst_deadlines = [
-            d for d in deadlines
-            if "GSTR-3B" in d.form_name
-            and 0 <= d.days_remaining <= 5
-        ]
-        if not gst_deadlines:
-            return 0
-
-        sessions = await _get_active_sessions(settings.REDIS_URL)
-
-        for user_session in sessions:
-            wa_id = user_session["wa_id"]
-            lang = user_session.get("lang", "en")
-
-            # Read full session data to check for GSTIN and invoices
-            raw = await r.get(f"wa:session:{wa_id}")
-            if not raw:
-                continue
-            try:
-                session_data = _json.loads(raw)
-            except Exception:
-                continue
-
-            data = session_data.get("data", {})
-            gstin = data.get("gstin")
-            invoices = data.get("uploaded_invoices", [])
-
-            # Only nudge if user has GSTIN set but NO invoices
-            if not gstin or invoices:
-                continue
-
-            for dl in gst_deadlines:
-                nudge_key = f"{REMINDER_SENT_PREFIX}nil_nudge:{wa_id}:{dl.form_name}:{dl.due_date}"
-                already_sent = await r.exists(nudge_key) > 0
-                if already_sent:
+        async for lang, wa_ids in _iter_active_batches(r):
+            # The GSTIN / invoice check needs the session blob: one MGET per batch
+            raws = await r.mget([f"wa:session:{wa_id}" for wa_id in wa_ids])
+            eligible = []
+            for wa_id, raw in zip(wa_ids, raws):
+                if not raw:
+                    continue
+                try:
+                    data = json.loads(raw).get("data", {})
+                except Exception:
+                    continue
+                # Only nudge if user has GSTIN set but NO invoices
+                if data.get("gstin") and not data.get("uploaded_invoices"):
+                    eligible.append((wa_id, data["gstin"]))
+
+            candidates = [
+                (wa_id, gstin, dl, _nudge_key(wa_id, dl.form_name, dl.due_date))
+                for wa_id, gstin in eligible
+                for dl in gst_deadlines
+            ]
+            unsent = await _unsent_keys(r, [c[3] for c in candidates])
+
+            sent_keys = []
+            for wa_id, gstin, dl, key in candidates:
+                if key not in unsent:
                     continue
-
                 msg = i18n_t(
                     "NIL_FILING_PROACTIVE_NUDGE",
                     lang,
@@ -242,23 +253,26 @@ async def send_nil_filing_nudges() -> int:
                     due_date=str(dl.due_date),
                     days_remaining=dl.days_remaining,
                 )
-
+                await _wait_for_outbound_capacity()
                 try:
                     await send_whatsapp_text(wa_id, msg)
-                    await r.set(nudge_key, "1", ex=30 * 24 * 3600)
-                    sent_count += 1
-                    logger.info(
-                        "Sent NIL filing nudge to %s (GSTIN: %s, due: %s)",
-                        wa_id,
-                        gstin,
-                        dl.due_date,
-                    )
                 except Exception:
                     logger.exception(
                         "Failed to send NIL nudge to %s for %s",
                         wa_id,
                         dl.form_name,
                     )
+                    continue
+                sent_keys.append(key)
+                unsent.discard(key)
+                logger.info(
+                    "Sent NIL filing nudge to %s (GSTIN: %s, due: %s)",
+                    wa_id,
+                    gstin,
+                    dl.due_date,
+                )
+            await _mark_sent(r, sent_keys)
+            sent_count += len(sent_keys)
     finally:
         await r.aclose()
 
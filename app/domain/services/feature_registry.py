@@ -3,7 +3,8 @@
 Feature registry service for segment-based gating.
 
 Resolves which features a client can access based on their segment
-plus any individual addons.  Results are cached in Redis.
+plus any individual addons.  Results are cached in process and in Redis
+(see the Cache section).
 """
 
 from __future__ import annotations
@@ -17,6 +18,7 @@ from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import joinedload
 
 from app.core.config import settings
+from app.infrastructure.cache.local_cache import TTLCache
 
 logger = logging.getLogger("feature_registry")
 
@@ -121,52 +123,192 @@ async def is_feature_enabled(client_id: int, feature_code: str, db: AsyncSession
     return any(f["code"] == feature_code for f in features)
 
 
-async def get_cached_features(client_id: int, db: AsyncSession) -> list[dict[str, Any]]:
-    """Redis-cached version of get_features_for_client.
+# ---------------------------------------------------------------------------
+# Cache
+#
+# Layer 0 is an in-process copy (SEGMENT_LOCAL_TTL_SECONDS), layer 1 Redis
+# (SEGMENT_CACHE_TTL).  Keys:
+#
+#   seg:segment:{segment}   features enabled for the segment
+#   seg:client:{client_id}  {"segment": ..., "addons": [feature, ...]}
+#   seg:gstin:{gstin}       {"client_id": ..., "segment": ...} (nulls = no such client)
+#
+# A client's feature list is composed from its entry and its segment's, so a
+# segment matrix edit only touches one key.  Invalidations delete the Redis
+# keys and publish them on ``seg:invalidate``; every API process drops its
+# layer-0 copies via the shared listener in ``app.infrastructure.cache.invalidation``
+# (started from the lifespan).
+# Layer 0 holds at most SEGMENT_LOCAL_MAX_ENTRIES keys, least recently used
+# evicted first — the GSTIN keys include negative answers for every unknown
+# sender, so it must not grow with traffic.
+# The layer-0 TTL bounds staleness where nobody listens (ARQ worker, scripts).
+# ---------------------------------------------------------------------------
+
+_KEY_PREFIX = "seg:"
+INVALIDATE_CHANNEL = f"{_KEY_PREFIX}invalidate"
+_NEGATIVE_TTL = 300          # "no client with this GSTIN" answers
+
+_local = TTLCache(settings.SEGMENT_LOCAL_MAX_ENTRIES)
+
+
+def _segment_key(segment: str) -> str:
+    return f"{_KEY_PREFIX}segment:{segment}"
 
-    Key: ``seg:features:{client_id}``, TTL from settings.SEGMENT_CACHE_TTL.
-    """
-    if not settings.SEGMENT_GATING_ENABLED:
-        return list(_ALL_FEATURES)
 
-    cache_key = f"seg:features:{client_id}"
+def _client_key(client_id: int) -> str:
+    return f"{_KEY_PREFIX}client:{client_id}"
+
+
+def _gstin_key(gstin: str) -> str:
+    return f"{_KEY_PREFIX}gstin:{gstin}"
+
+
+async def _cache_get(key: str) -> Any | None:
+    value = _local.get(key)
+    if value is not None:
+        return value
 
     try:
-        from app.infrastructure.cache.session_cache import _redis_pool
-        redis = await _redis_pool()
-        cached = await redis.get(cache_key)
-        if cached:
-            return json.loads(cached)
+        from app.infrastructure.cache.redis_client import get_redis_client
+
+        raw = await get_redis_client().get(key)
     except Exception:
-        logger.debug("Redis cache miss/error for %s", cache_key)
+        logger.debug("Redis cache error for %s", key, exc_info=True)
+        return None
+    if raw is None:
+        return None
+    value = json.loads(raw)
+    _local.put(key, value, settings.SEGMENT_LOCAL_TTL_SECONDS)
+    return value
+
+
+async def _cache_set(key: str, value: Any, ttl: int | None = None) -> None:
+    ttl = ttl or settings.SEGMENT_CACHE_TTL
+    _local.put(key, value, min(ttl, settings.SEGMENT_LOCAL_TTL_SECONDS))
+    try:
+        from app.infrastructure.cache.redis_client import get_redis_client
 
-    # Cache miss — query DB
-    features = await get_features_for_client(client_id, db)
+        await get_redis_client().set(key, json.dumps(value), ex=ttl)
+    except Exception:
+        logger.debug("Failed to cache %s", key, exc_info=True)
 
-    # Store in Redis
+
+async def _invalidate(*keys: str) -> None:
+    """Drop ``keys`` here, in Redis, and (via pub/sub) in every other process."""
+    for key in keys:
+        _local.pop(key)
     try:
-        from app.infrastructure.cache.session_cache import _redis_pool
-        redis = await _redis_pool()
-        await redis.set(
-            cache_key,
-            json.dumps(features),
-            ex=settings.SEGMENT_CACHE_TTL,
-        )
+        from app.infrastructure.cache.redis_client import get_redis_client
+
+        r = get_redis_client()
+        await r.delete(*keys)
+        for key in keys:
+            await r.publish(INVALIDATE_CHANNEL, key)
     except Exception:
-        logger.debug("Failed to cache features for client_id=%d", client_id)
+        logger.warning("Failed to invalidate %s", ", ".join(keys), exc_info=True)
+
+
+def clear_local_cache() -> None:
+    _local.clear()
+
+
+def invalidate_local(key: str | None = None) -> None:
+    """Drop one layer-0 entry, or all of them when ``key`` is None."""
+    if key is None:
+        _local.clear()
+    else:
+        _local.pop(key)
 
+
+async def listen_for_invalidations() -> None:
+    """Drop layer-0 entries as other processes invalidate them. Runs until cancelled."""
+    from app.infrastructure.cache.invalidation import listen_for_invalidations
+
+    await listen_for_invalidations({INVALIDATE_CHANNEL: invalidate_local})
+
+
+async def get_cached_segment_features(segment: str, db: AsyncSession) -> list[dict[str, Any]]:
+    """Cached version of get_features_for_segment."""
+    key = _segment_key(segment)
+    cached = await _cache_get(key)
+    if cached is not None:
+        return cached
+    features = await get_features_for_segment(segment, db)
+    await _cache_set(key, features)
     return features
 
 
-async def invalidate_feature_cache(client_id: int) -> None:
-    """Clear Redis cache for a client's features."""
-    cache_key = f"seg:features:{client_id}"
-    try:
-        from app.infrastructure.cache.session_cache import _redis_pool
-        redis = await _redis_pool()
-        await redis.delete(cache_key)
-    except Exception:
-        logger.debug("Failed to invalidate cache for %s", cache_key)
+async def _get_client_entry(client_id: int, db: AsyncSession) -> dict[str, Any]:
+    key = _client_key(client_id)
+    cached = await _cache_get(key)
+    if cached is not None:
+        return cached
+
+    from app.infrastructure.db.models import BusinessClient, ClientAddon, Feature
+
+    segment = (await db.execute(
+        select(BusinessClient.segment).where(BusinessClient.id == client_id)
+    )).scalar_one_or_none()
+    if not segment:
+        logger.warning("get_cached_features: client_id=%d not found, using default", client_id)
+        segment = settings.DEFAULT_SEGMENT
+
+    addon_result = await db.execute(
+        select(Feature)
+        .join(ClientAddon, ClientAddon.feature_id == Feature.id)
+        .where(
+            ClientAddon.client_id == client_id,
+            ClientAddon.enabled.is_(True),
+            Feature.is_active.is_(True),
+        )
+    )
+    entry = {"segment": segment, "addons": [_feature_to_dict(f) for f in addon_result.scalars().all()]}
+    await _cache_set(key, entry)
+    return entry
+
+
+async def get_cached_features(client_id: int, db: AsyncSession) -> list[dict[str, Any]]:
+    """Cached version of get_features_for_client (segment features + addons)."""
+    if not settings.SEGMENT_GATING_ENABLED:
+        return list(_ALL_FEATURES)
+
+    entry = await _get_client_entry(client_id, db)
+    features = {f["code"]: f for f in await get_cached_segment_features(entry["segment"], db)}
+    for f in entry["addons"]:
+        features.setdefault(f["code"], f)
+    return sorted(features.values(), key=lambda f: f["display_order"])
+
+
+async def get_client_segment_by_gstin(gstin: str, db: AsyncSession) -> str | None:
+    """Segment of the business client registered under ``gstin``, or None."""
+    key = _gstin_key(gstin)
+    cached = await _cache_get(key)
+    if cached is not None:
+        return cached["segment"]
+
+    from app.infrastructure.db.models import BusinessClient
+
+    row = (await db.execute(
+        select(BusinessClient.id, BusinessClient.segment).where(BusinessClient.gstin == gstin).limit(1)
+    )).first()
+    if row is None:
+        await _cache_set(key, {"client_id": None, "segment": None}, ttl=_NEGATIVE_TTL)
+        return None
+    await _cache_set(key, {"client_id": row.id, "segment": row.segment})
+    return row.segment
+
+
+async def invalidate_feature_cache(client_id: int, gstin: str | None = None) -> None:
+    """Forget a client's cached segment and addons (pass ``gstin`` when the segment changed)."""
+    keys = [_client_key(client_id)]
+    if gstin:
+        keys.append(_gstin_key(gstin))
+    await _invalidate(*keys)
+
+
+async def invalidate_segment_cache(segment: str) -> None:
+    """Forget a segment's cached feature list (after editing the segment matrix)."""
+    await _invalidate(_segment_key(segment))
 
 
 def get_all_features_fallback() -> list[dict[str, Any]]:
@@ -19,11 +19,8 @@ from decimal import Decimal
 from typing import Any
 from uuid import UUID
 
-from sqlalchemy import and_, func, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.infrastructure.db.models import Invoice, ReturnPeriod
-
 logger = logging.getLogger("gst_annual")
 
 
@@ -134,9 +131,10 @@ async def aggregate_annual(
     result.total_tax_paid = float(cumulative_tax_paid)
     result.period_count = len(periods)
 
-    # Books-vs-GST reconciliation
-    books_outward = await _sum_books_outward(user_id, fy, db)
-    books_inward = await _sum_books_inward(user_id, fy, db)
+    # Books-vs-GST reconciliation (from monthly_gst_rollup, not the invoice table)
+    books_outward, books_inward = await _sum_books_from_rollup(
+        user_id, expected_periods, db
+    )
 
     diff_outward = float(books_outward - cumulative_outward)
     diff_inward = float(books_inward - cumulative_itc)
@@ -223,56 +221,27 @@ def _fy_expected_periods(fy: str) -> list[str]:
     return periods
 
 
-async def _sum_books_outward(user_id: UUID, fy: str, db: AsyncSession) -> Decimal:
-    """Sum taxable_value from all outward invoices in the FY."""
-    period_range = _fy_expected_periods(fy)
-    start_month = period_range[0]  # YYYY-04
-    end_month = period_range[-1]   # YYYY+1-03
+async def _sum_books_from_rollup(
+    user_id: UUID, periods: list[str], db: AsyncSession
+) -> tuple[Decimal, Decimal]:
+    """Return (outward taxable, ITC-eligible inward taxable) for the FY periods.
 
-    start_y, start_m = int(start_month.split("-")[0]), int(start_month.split("-")[1])
-    end_y, end_m = int(end_month.split("-")[0]), int(end_month.split("-")[1])
-
-    from datetime import date
-    start_date = date(start_y, start_m, 1)
-    # End of March
-    end_date = date(end_y, end_m, 31)
+    Reads at most 12 rows per direction from ``monthly_gst_rollup``.
+    """
+    from app.infrastructure.db.repositories.monthly_rollup_repository import (
+        MonthlyRollupRepository,
+    )
 
-    stmt = select(func.coalesce(func.sum(Invoice.taxable_value), 0)).where(
-        and_(
-            Invoice.user_id == user_id,
-            Invoice.direction == "outward",
-            Invoice.invoice_date >= start_date,
-            Invoice.invoice_date <= end_date,
-        )
+    totals = await MonthlyRollupRepository(db).totals_by_period(user_id, periods)
+    outward = sum(
+        (t.taxable_value for (_, d), t in totals.items() if d == "outward"),
+        Decimal("0"),
     )
-    result = await db.execute(stmt)
-    return Decimal(str(result.scalar() or 0))
-
-
-async def _sum_books_inward(user_id: UUID, fy: str, db: AsyncSession) -> Decimal:
-    """Sum taxable_value from all inward (purchase) invoices with ITC in the FY."""
-    period_range = _fy_expected_periods(fy)
-    start_month = period_range[0]
-    end_month = period_range[-1]
-
-    start_y, start_m = int(start_month.split("-")[0]), int(start_month.split("-")[1])
-    end_y, end_m = int(end_month.split("-")[0]), int(end_month.split("-")[1])
-
-    from datetime import date
-    start_date = date(start_y, start_m, 1)
-    end_date = date(end_y, end_m, 31)
-
-    stmt = select(func.coalesce(func.sum(Invoice.taxable_value), 0)).where(
-        and_(
-            Invoice.user_id == user_id,
-            Invoice.direction == "inward",
-            Invoice.itc_eligible.is_(True),
-            Invoice.invoice_date >= start_date,
-            Invoice.invoice_date <= end_date,
-        )
+    inward = sum(
+        (t.itc_eligible_taxable for (_, d), t in totals.items() if d == "inward"),
+        Decimal("0"),
     )
-    result = await db.execute(stmt)
-    return Decimal(str(result.scalar() or 0))
+    return outward, inward
 
 
 async def _persist_annual(
@@ -8,11 +8,13 @@ GSTR-1:  From Gstr1Payload (B2B/B2C entries from gstr1_service.py)
 
 from __future__ import annotations
 
+import json
+from collections.abc import AsyncIterator, Iterable, Mapping
 from datetime import date
 from decimal import Decimal
-from typing import Any, Dict
+from typing import Any, Dict, Tuple
 
-from app.domain.models.gst import Gstr3bSummary
+from app.domain.models.gst import Gstr3bSummary, ItcBucket, TaxBucket
 
 # Backward-compat alias
 Gstr3BSummary = Gstr3bSummary
@@ -108,6 +110,56 @@ def make_gstr3b_json(
     }
 
 
+def _b2b_invoice_json(inv) -> Dict[str, Any]:
+    items = []
+    for item in inv.itms:
+        items.append({
+            "num": 1,
+            "itm_det": {
+                "txval": _d(item.txval),
+                "rt": _d(item.rt),
+                "iamt": _d(item.igst),
+                "camt": _d(item.cgst),
+                "samt": _d(item.sgst),
+                "csamt": 0,
+            },
+        })
+    return {
+        "inum": inv.num,
+        "idt": inv.dt,
+        "val": _d(inv.val),
+        "pos": inv.pos,
+        "rchrg": "N",
+        "inv_typ": "R",
+        "itms": items,
+    }
+
+
+def _b2cs_json(b2c) -> Dict[str, Any]:
+    return {
+        "pos": b2c.pos,
+        "typ": "OE",
+        "txval": _d(b2c.txval),
+        "rt": _d(b2c.rt),
+        "iamt": _d(b2c.igst),
+        "camt": _d(b2c.cgst),
+        "samt": _d(b2c.sgst),
+        "csamt": 0,
+    }
+
+
+# Sections this builder does not populate yet
+_GSTR1_EMPTY_SECTIONS: Dict[str, Any] = {
+    "b2cl": [],
+    "cdnr": [],
+    "cdnur": [],
+    "exp": [],
+    "nil": {"inv": []},
+    "hsn": {"data": []},
+    "doc_issue": {"doc_det": []},
+}
+
+
 def make_gstr1_json(payload) -> Dict[str, Any]:
     """
     Build GSTR-1 JSON from a Gstr1Payload dataclass.
@@ -119,51 +171,11 @@ def make_gstr1_json(payload) -> Dict[str, Any]:
     Returns:
         Dict matching MasterGST GSTR-1 API schema.
     """
-    # Serialize B2B entries
-    b2b_list = []
-    for entry in payload.b2b:
-        inv_list = []
-        for inv in entry.inv:
-            items = []
-            for item in inv.itms:
-                items.append({
-                    "num": 1,
-                    "itm_det": {
-                        "txval": _d(item.txval),
-                        "rt": _d(item.rt),
-                        "iamt": _d(item.igst),
-                        "camt": _d(item.cgst),
-                        "samt": _d(item.sgst),
-                        "csamt": 0,
-                    },
-                })
-            inv_list.append({
-                "inum": inv.num,
-                "idt": inv.dt,
-                "val": _d(inv.val),
-                "pos": inv.pos,
-                "rchrg": "N",
-                "inv_typ": "R",
-                "itms": items,
-            })
-        b2b_list.append({
-            "ctin": entry.ctin,
-            "inv": inv_list,
-        })
-
-    # Serialize B2C entries
-    b2cs_list = []
-    for b2c in payload.b2c:
-        b2cs_list.append({
-            "pos": b2c.pos,
-            "typ": "OE",
-            "txval": _d(b2c.txval),
-            "rt": _d(b2c.rt),
-            "iamt": _d(b2c.igst),
-            "camt": _d(b2c.cgst),
-            "samt": _d(b2c.sgst),
-            "csamt": 0,
-        })
+    b2b_list = [
+        {"ctin": entry.ctin, "inv": [_b2b_invoice_json(inv) for inv in entry.inv]}
+        for entry in payload.b2b
+    ]
+    b2cs_list = [_b2cs_json(b2c) for b2c in payload.b2c]
 
     # Calculate grand total
     grand_total = 0.0
@@ -179,11 +191,73 @@ def make_gstr1_json(payload) -> Dict[str, Any]:
         "gt": grand_total,
         "b2b": b2b_list,
         "b2cs": b2cs_list,
-        "b2cl": [],
-        "cdnr": [],
-        "cdnur": [],
-        "exp": [],
-        "nil": {"inv": []},
-        "hsn": {"data": []},
-        "doc_issue": {"doc_det": []},
+        **_GSTR1_EMPTY_SECTIONS,
     }
+
+
+async def iter_gstr1_json(
+    gstin: str,
+    fp: str,
+    b2b: AsyncIterator[Tuple[str, Any]],
+    b2c: Iterable[Any],
+) -> AsyncIterator[str]:
+    """
+    Encode the same document as ``make_gstr1_json`` incrementally.
+
+    ``b2b`` yields ``(ctin, Gstr1Invoice)`` grouped by ctin (see
+    ``gstr1_service.iter_b2b_invoices``); each invoice is written as soon as
+    it arrives.  The grand total is only known at the end, so ``gt`` is the
+    last key of the object rather than the third — key order carries no
+    meaning in the portal schema.
+    """
+    grand_total = 0.0
+    yield '{"gstin":' + json.dumps(gstin) + ',"fp":' + json.dumps(fp) + ',"b2b":['
+
+    current = None
+    async for ctin, inv in b2b:
+        if ctin != current:
+            opener = '{"ctin":' + json.dumps(ctin) + ',"inv":['
+            yield (opener if current is None else "]}," + opener)
+            current = ctin
+        else:
+            yield ","
+        grand_total += _d(inv.val)
+        yield json.dumps(_b2b_invoice_json(inv), separators=(",", ":"))
+    if current is not None:
+        yield "]}"
+
+    parts = []
+    for bucket in b2c:
+        grand_total += _d(bucket.txval)
+        parts.append(json.dumps(_b2cs_json(bucket), separators=(",", ":")))
+    yield '],"b2cs":[' + ",".join(parts) + "]"
+
+    for key, value in _GSTR1_EMPTY_SECTIONS.items():
+        yield "," + json.dumps(key) + ":" + json.dumps(value, separators=(",", ":"))
+    yield ',"gt":' + json.dumps(grand_total) + "}"
+
+
+def gstr3b_summary_from_totals(totals: Mapping[str, Any]) -> Gstr3bSummary:
+    """
+    Build a Gstr3bSummary from ``InvoiceAggregateRepository.totals_by_direction``.
+
+    Same split as the liability computation: outward tax heads, reverse
+    charge and eligible (2B-matched) ITC from inward invoices.
+    """
+    out = totals.get("outward")
+    inward = totals.get("inward")
+    summary = Gstr3bSummary()
+    if out is not None:
+        summary.outward_taxable_supplies = TaxBucket(
+            taxable_value=out.taxable_value, igst=out.igst, cgst=out.cgst, sgst=out.sgst,
+        )
+        summary.total_invoices = out.count
+    if inward is not None:
+        summary.inward_reverse_charge = TaxBucket(
+            taxable_value=inward.rcm_taxable_value,
+            igst=inward.rcm_igst, cgst=inward.rcm_cgst, sgst=inward.rcm_sgst,
+        )
+        summary.itc_eligible = ItcBucket(
+            igst=inward.itc_igst, cgst=inward.itc_cgst, sgst=inward.itc_sgst,
+        )
+    return summary
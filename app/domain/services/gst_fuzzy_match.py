@@ -0,0 +1,378 @@
+# app/domain/services/gst_fuzzy_match.py
+"""
+Second-pass fuzzy matching of GSTR-2B entries against book invoices.
+
+The exact pass in ``gst_reconciliation`` keys on (GSTIN, invoice number)
+after stripping separators, so a typo in the number ("INV-0012" vs
+"INV-012A"), a financial-year prefix ("2024-25/12" vs "12") or an OCR error
+in the supplier GSTIN leaves both sides unmatched.  This module pairs those
+residuals.
+
+Blocking keeps it sub-quadratic: a pair is only scored when
+
+* the GSTINs are equal or differ in one character — books are indexed under
+  each half of the GSTIN, and by pigeonhole a one-character difference
+  leaves one half intact;
+* the taxable values fall in the same or an adjacent logarithmic bucket of
+  width ``RECON_FUZZY_AMOUNT_PCT``;
+* the invoice dates are within ``DATE_TOLERANCE_DAYS`` (found by bisection
+  on a date-sorted block; undated lines are compared with the whole block).
+
+Surviving pairs are scored on invoice-number edit distance, value closeness
+and date distance.  Pairs above ``RECON_FUZZY_MIN_SCORE`` form a bipartite
+graph; each connected component is assigned optimally when it is small and
+greedily by score otherwise.
+"""
+
+from __future__ import annotations
+
+import math
+import re
+from bisect import bisect_left, bisect_right
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass, field
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+from app.core.config import settings
+from app.domain.services.gst_reconciliation import DATE_TOLERANCE_DAYS, VALUE_TOLERANCE
+
+# Score weights; a pair whose GSTINs differ by one character loses GSTIN_PENALTY
+NUMBER_WEIGHT = 0.6
+VALUE_WEIGHT = 0.25
+DATE_WEIGHT = 0.15
+GSTIN_PENALTY = 0.1
+
+# "2024-25/", "/FY24-25", "2024-2025-" as a leading or trailing segment
+_FY_PREFIX = re.compile(r"^(?:FY)?(?:20)?\d{2}[-/](?:20)?\d{2}[-/ ]+")
+_FY_SUFFIX = re.compile(r"[-/ ]+(?:FY)?(?:20)?\d{2}[-/](?:20)?\d{2}$")
+_SEPARATORS = re.compile(r"[-/\\ ._#]")
+_LEADING_ZEROS = re.compile(r"(?<!\d)0+(?=\d)")
+
+_GSTIN_LEN = 15
+_GSTIN_SPLIT = 8
+
+
+@dataclass(slots=True)
+class FuzzyLine:
+    """One residual line: a GSTR-2B entry or a book invoice."""
+    ref: Any
+    gstin: str
+    number: str
+    invoice_date: date | None
+    taxable_value: Decimal
+
+
+@dataclass(slots=True)
+class FuzzyMatch:
+    twob: Any
+    book: Any
+    score: float
+    number_distance: int
+    gstin_exact: bool
+    date_gap_days: int | None = None
+
+    def details(self) -> dict:
+        """JSON-serializable marker stored with the match for CA review."""
+        return {
+            "method": "fuzzy",
+            "score": round(self.score, 3),
+            "number_distance": self.number_distance,
+            "gstin_exact": self.gstin_exact,
+            "date_gap_days": self.date_gap_days,
+        }
+
+
+@dataclass(slots=True)
+class _Prepared:
+    line: FuzzyLine
+    gstin: str
+    number: str
+    ordinal: int | None
+    value: float
+
+
+@dataclass(slots=True)
+class _Block:
+    """Book lines sharing one (GSTIN half, amount bucket) key."""
+    ordinals: list[int] = field(default_factory=list)
+    dated: list[int] = field(default_factory=list)
+    undated: list[int] = field(default_factory=list)
+
+
+# ---------------------------------------------------------------------------
+# Normalisation / distances
+# ---------------------------------------------------------------------------
+
+def normalize_invoice_number(number: str | None) -> str:
+    """Uppercase, drop a financial-year segment, separators and leading zeros."""
+    n = (number or "").strip().upper()
+    stripped = _FY_SUFFIX.sub("", _FY_PREFIX.sub("", n))
+    n = _SEPARATORS.sub("", stripped or n)
+    return _LEADING_ZEROS.sub("", n)
+
+
+def bounded_levenshtein(a: str, b: str, limit: int) -> int:
+    """Edit distance between ``a`` and ``b``, or ``limit + 1`` once it exceeds ``limit``.
+
+    Only the diagonal band of width ``2 * limit + 1`` is computed.
+    """
+    if a == b:
+        return 0
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    if len(a) > len(b):
+        a, b = b, a
+    over = limit + 1
+    width = len(a)
+    previous = [j if j <= limit else over for j in range(width + 1)]
+    for i, cb in enumerate(b, 1):
+        lo = max(1, i - limit)
+        hi = min(width, i + limit)
+        current = [over] * (width + 1)
+        if i <= limit:
+            current[0] = i
+        row_min = current[lo - 1]
+        for j in range(lo, hi + 1):
+            cost = previous[j - 1] + (a[j - 1] != cb)
+            if previous[j] + 1 < cost:
+                cost = previous[j] + 1
+            if current[j - 1] + 1 < cost:
+                cost = current[j - 1] + 1
+            current[j] = cost
+            if cost < row_min:
+                row_min = cost
+        if row_min > limit:
+            return over
+        previous = current
+    return min(previous[width], over)
+
+
+def _gstin_close(a: str, b: str) -> bool:
+    if a == b:
+        return True
+    if len(a) != _GSTIN_LEN or len(b) != _GSTIN_LEN:
+        return False
+    return sum(x != y for x, y in zip(a, b)) == 1
+
+
+def _gstin_keys(gstin: str) -> tuple[str, ...]:
+    if len(gstin) != _GSTIN_LEN:
+        return (gstin,)
+    return ("L" + gstin[:_GSTIN_SPLIT], "R" + gstin[_GSTIN_SPLIT:])
+
+
+def _amount_bucket(value: float, pct: float) -> int:
+    if value <= 1.0:
+        return 0
+    return int(math.log(value) / math.log1p(pct)) + 1
+
+
+def _max_edits(length: int) -> int:
+    return max(1, min(3, length // 3))
+
+
+# ---------------------------------------------------------------------------
+# Scoring
+# ---------------------------------------------------------------------------
+
+def _score(
+    a: _Prepared, b: _Prepared, pct: float, tolerance: float, window: int,
+) -> tuple[float, int, bool, int | None] | None:
+    if not _gstin_close(a.gstin, b.gstin):
+        return None
+
+    longest = max(len(a.number), len(b.number))
+    if not longest:
+        return None
+    limit = _max_edits(longest)
+    distance = bounded_levenshtein(a.number, b.number, limit)
+    if distance > limit:
+        return None
+    number_sim = 1.0 - distance / longest
+
+    diff = abs(a.value - b.value)
+    if diff <= tolerance:
+        value_sim = 1.0
+    else:
+        value_sim = max(0.0, 1.0 - diff / (pct * max(a.value, b.value, 1.0)))
+
+    if a.ordinal is None or b.ordinal is None:
+        gap = None
+        date_sim = 0.5
+    else:
+        gap = abs(a.ordinal - b.ordinal)
+        date_sim = 1.0 - gap / (window + 1)
+
+    gstin_exact = a.gstin == b.gstin
+    score = NUMBER_WEIGHT * number_sim + VALUE_WEIGHT * value_sim + DATE_WEIGHT * date_sim
+    if not gstin_exact:
+        score -= GSTIN_PENALTY
+    return score, distance, gstin_exact, gap
+
+
+# ---------------------------------------------------------------------------
+# Assignment
+# ---------------------------------------------------------------------------
+
+def _components(edges: Sequence[tuple[float, int, int]]) -> list[list[tuple[float, int, int]]]:
+    """Split bipartite edges (score, left, right) into connected components."""
+    parent: dict[tuple[int, int], tuple[int, int]] = {}
+
+    def find(x):
+        while parent.setdefault(x, x) != x:
+            parent[x] = parent[parent[x]]
+            x = parent[x]
+        return x
+
+    for _, i, j in edges:
+        ri, rj = find((0, i)), find((1, j))
+        if ri != rj:
+            parent[ri] = rj
+
+    groups: dict[tuple[int, int], list[tuple[float, int, int]]] = {}
+    for edge in edges:
+        groups.setdefault(find((0, edge[1])), []).append(edge)
+    return list(groups.values())
+
+
+def _assign_greedy(edges: Sequence[tuple[float, int, int]]) -> list[tuple[float, int, int]]:
+    used_left: set[int] = set()
+    used_right: set[int] = set()
+    chosen = []
+    for edge in sorted(edges, key=lambda e: (-e[0], e[1], e[2])):
+        _, i, j = edge
+        if i in used_left or j in used_right:
+            continue
+        used_left.add(i)
+        used_right.add(j)
+        chosen.append(edge)
+    return chosen
+
+
+def _assign_optimal(edges: Sequence[tuple[float, int, int]]) -> list[tuple[float, int, int]]:
+    """Maximum-weight matching by DP over subsets of the (small) right side."""
+    lefts = sorted({e[1] for e in edges})
+    rights = sorted({e[2] for e in edges})
+    col = {j: k for k, j in enumerate(rights)}
+    by_left: dict[int, list[tuple[float, int, int]]] = {}
+    for edge in edges:
+        by_left.setdefault(edge[1], []).append(edge)
+
+    # best[mask] = (total score, chosen edges) using the lefts seen so far
+    best: dict[int, tuple[float, tuple]] = {0: (0.0, ())}
+    for i in lefts:
+        nxt = dict(best)
+        for mask, (total, chosen) in best.items():
+            for edge in by_left[i]:
+                bit = 1 << col[edge[2]]
+                if mask & bit:
+                    continue
+                cand = (total + edge[0], chosen + (edge,))
+                if cand[0] > nxt.get(mask | bit, (-1.0,))[0]:
+                    nxt[mask | bit] = cand
+        best = nxt
+    return list(max(best.values(), key=lambda v: v[0])[1])
+
+
+def _assign(edges: Sequence[tuple[float, int, int]], optimal_max: int) -> list[tuple[float, int, int]]:
+    chosen = []
+    for component in _components(edges):
+        rights = {e[2] for e in component}
+        if len(component) == 1:
+            chosen.extend(component)
+        elif len(rights) <= optimal_max:
+            chosen.extend(_assign_optimal(component))
+        else:
+            chosen.extend(_assign_greedy(component))
+    return chosen
+
+
+# ---------------------------------------------------------------------------
+# Public API
+# ---------------------------------------------------------------------------
+
+def _prepare(line: FuzzyLine) -> _Prepared:
+    return _Prepared(
+        line=line,
+        gstin=(line.gstin or "").strip().upper(),
+        number=normalize_invoice_number(line.number),
+        ordinal=line.invoice_date.toordinal() if line.invoice_date else None,
+        value=abs(float(line.taxable_value or 0)),
+    )
+
+
+def match_residuals(
+    twob_lines: Iterable[FuzzyLine],
+    book_lines: Iterable[FuzzyLine],
+    *,
+    min_score: float | None = None,
+    amount_pct: float | None = None,
+    date_window_days: int = DATE_TOLERANCE_DAYS,
+    optimal_max: int | None = None,
+) -> list[FuzzyMatch]:
+    """Pair unmatched 2B lines with unmatched book lines; each line is used at most once."""
+    min_score = settings.RECON_FUZZY_MIN_SCORE if min_score is None else min_score
+    pct = settings.RECON_FUZZY_AMOUNT_PCT if amount_pct is None else amount_pct
+    optimal_max = settings.RECON_FUZZY_OPTIMAL_MAX if optimal_max is None else optimal_max
+    tolerance = float(VALUE_TOLERANCE)
+
+    twob = [p for p in map(_prepare, twob_lines) if p.gstin and p.number]
+    books = [p for p in map(_prepare, book_lines) if p.gstin and p.number]
+    if not twob or not books:
+        return []
+
+    index: dict[tuple[str, int], _Block] = {}
+    for j, book in enumerate(books):
+        bucket = _amount_bucket(book.value, pct)
+        for key in _gstin_keys(book.gstin):
+            block = index.setdefault((key, bucket), _Block())
+            if book.ordinal is None:
+                block.undated.append(j)
+            else:
+                block.ordinals.append(book.ordinal)
+                block.dated.append(j)
+    for block in index.values():
+        order = sorted(range(len(block.dated)), key=block.ordinals.__getitem__)
+        block.ordinals = [block.ordinals[k] for k in order]
+        block.dated = [block.dated[k] for k in order]
+
+    edges: list[tuple[float, int, int]] = []
+    meta: dict[tuple[int, int], tuple[int, bool, int | None]] = {}
+    for i, entry in enumerate(twob):
+        bucket = _amount_bucket(entry.value, pct)
+        seen: set[int] = set()
+        for key in _gstin_keys(entry.gstin):
+            for b in (bucket - 1, bucket, bucket + 1):
+                block = index.get((key, b))
+                if block is None:
+                    continue
+                if entry.ordinal is None:
+                    candidates = block.dated + block.undated
+                else:
+                    lo = bisect_left(block.ordinals, entry.ordinal - date_window_days)
+                    hi = bisect_right(block.ordinals, entry.ordinal + date_window_days)
+                    candidates = block.dated[lo:hi] + block.undated
+                for j in candidates:
+                    if j in seen:
+                        continue
+                    seen.add(j)
+                    scored = _score(entry, books[j], pct, tolerance, date_window_days)
+                    if scored is None or scored[0] < min_score:
+                        continue
+                    edges.append((scored[0], i, j))
+                    meta[(i, j)] = scored[1:]
+
+    matches = []
+    for score, i, j in _assign(edges, optimal_max):
+        distance, gstin_exact, gap = meta[(i, j)]
+        matches.append(FuzzyMatch(
+            twob=twob[i].line.ref,
+            book=books[j].line.ref,
+            score=score,
+            number_distance=distance,
+            gstin_exact=gstin_exact,
+            date_gap_days=gap,
+        ))
+    return matches
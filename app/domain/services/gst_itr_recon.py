@@ -86,6 +86,7 @@ async def reconcile_turnover(
     # -------------------------------------------------------------------
     gst_turnover = ZERO
     periods_with_data = 0
+    outward_by_period = await _outward_rollup(user_id, [p.period for p in periods], db)
 
     for p in periods:
         # Sum outward tax as a proxy for taxable value
@@ -100,8 +101,10 @@ async def reconcile_turnover(
             periods_with_data += 1
 
         # For turnover, we need actual taxable value, not just tax.
-        # Use invoice aggregation for accurate turnover.
-        gst_turnover += await _sum_outward_taxable(user_id, p.period, db)
+        # Use the monthly invoice rollup for accurate turnover.
+        rollup = outward_by_period.get(p.period)
+        if rollup is not None:
+            gst_turnover += rollup.taxable_value
 
     result.gst_turnover = gst_turnover
     result.periods_with_data = periods_with_data
@@ -171,27 +174,18 @@ def _fy_to_ay(fy: str) -> str:
     return f"{start_year + 1}-{end_suffix + 1:02d}"
 
 
-async def _sum_outward_taxable(user_id: UUID, period: str, db: Any) -> Decimal:
-    """Sum taxable_value of all outward invoices for a period."""
-    from calendar import monthrange
-    from datetime import date
-
-    from app.infrastructure.db.repositories.invoice_repository import InvoiceRepository
-
-    parts = period.split("-")
-    year, month = int(parts[0]), int(parts[1])
-    start = date(year, month, 1)
-    end = date(year, month, monthrange(year, month)[1])
-
-    inv_repo = InvoiceRepository(db)
-    invoices = await inv_repo.list_for_period_by_direction(
-        user_id, start, end, "outward"
+async def _outward_rollup(
+    user_id: UUID, periods: list[str], db: Any
+) -> dict[str, Any]:
+    """Outward ``RollupTotals`` per period from monthly_gst_rollup (one query)."""
+    from app.infrastructure.db.repositories.monthly_rollup_repository import (
+        MonthlyRollupRepository,
     )
 
-    total = ZERO
-    for inv in invoices:
-        total += _dec(inv.taxable_value)
-    return total
+    totals = await MonthlyRollupRepository(db).totals_by_period(
+        user_id, periods, direction="outward"
+    )
+    return {period: t for (period, _), t in totals.items()}
 
 
 async def _get_itr_turnover(user_id: UUID, ay: str, db: Any) -> Decimal | None:
@@ -331,10 +325,6 @@ async def reconcile_turnover_detailed(
     - Exempt / nil-rated supply tracking
     - Books-vs-GST comparison per period
     """
-    from calendar import monthrange
-    from datetime import date
-    from sqlalchemy import and_, func, select
-    from app.infrastructure.db.models import Invoice
     from app.infrastructure.db.repositories.return_period_repository import (
         ReturnPeriodRepository,
     )
@@ -350,44 +340,18 @@ async def reconcile_turnover_detailed(
     total_credit_notes = ZERO
     total_exempt_nil = ZERO
     total_adjusted = ZERO
+    outward_by_period = await _outward_rollup(user_id, [p.period for p in periods], db)
 
     for p in periods:
         entry = PeriodReconEntry(period=p.period)
 
-        # GST outward taxable from invoices
-        entry.gst_outward_taxable = await _sum_outward_taxable(user_id, p.period, db)
-
-        # Credit notes for the period (negative taxable_value or total_amount)
-        parts = p.period.split("-")
-        year, month = int(parts[0]), int(parts[1])
-        period_start = date(year, month, 1)
-        period_end = date(year, month, monthrange(year, month)[1])
-
-        cn_stmt = select(func.coalesce(func.sum(Invoice.taxable_value), 0)).where(
-            and_(
-                Invoice.user_id == user_id,
-                Invoice.direction == "outward",
-                Invoice.invoice_date >= period_start,
-                Invoice.invoice_date <= period_end,
-                Invoice.taxable_value < 0,
-            )
-        )
-        cn_result = await db.execute(cn_stmt)
-        entry.gst_credit_notes = abs(_dec(cn_result.scalar()))
-
-        # Exempt / nil-rated supplies (tax_rate == 0 but positive taxable_value)
-        exempt_stmt = select(func.coalesce(func.sum(Invoice.taxable_value), 0)).where(
-            and_(
-                Invoice.user_id == user_id,
-                Invoice.direction == "outward",
-                Invoice.invoice_date >= period_start,
-                Invoice.invoice_date <= period_end,
-                Invoice.tax_rate == 0,
-                Invoice.taxable_value > 0,
-            )
-        )
-        exempt_result = await db.execute(exempt_stmt)
-        entry.gst_exempt_nil = _dec(exempt_result.scalar())
+        # Outward taxable, credit notes (negative taxable) and exempt/nil-rated
+        # supplies (rate 0, positive taxable) all come from the monthly rollup
+        rollup = outward_by_period.get(p.period)
+        if rollup is not None:
+            entry.gst_outward_taxable = rollup.taxable_value
+            entry.gst_credit_notes = rollup.credit_note_taxable
+            entry.gst_exempt_nil = rollup.exempt_nil_taxable
 
         entry.gst_net_taxable = entry.gst_outward_taxable - entry.gst_credit_notes
         entry.books_turnover = entry.gst_net_taxable  # Default to GST data
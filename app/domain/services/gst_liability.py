@@ -53,7 +53,9 @@ class PeriodComputation:
 # Public API
 # ---------------------------------------------------------------------------
 
-async def compute_net_liability(period_id: UUID, db: Any) -> PeriodComputation:
+async def compute_net_liability(
+    period_id: UUID, db: Any, *, score_risk: bool = True
+) -> PeriodComputation:
     """
     Compute net GST liability for a return period.
 
@@ -64,12 +66,17 @@ async def compute_net_liability(period_id: UUID, db: Any) -> PeriodComputation:
     4. Net payable = output_tax + RCM - eligible_ITC (per head)
     5. Generate risk flags
     6. Store computed values in ReturnPeriod record
+    7. Risk scoring, unless ``score_risk`` is False (the period-close
+       pipeline runs it as its own step)
 
     Returns PeriodComputation with all aggregated values and risk flags.
     """
     from calendar import monthrange
 
-    from app.infrastructure.db.repositories.invoice_repository import InvoiceRepository
+    from app.infrastructure.db.repositories.invoice_aggregate_repository import (
+        DirectionTotals,
+        InvoiceAggregateRepository,
+    )
     from app.infrastructure.db.repositories.return_period_repository import ReturnPeriodRepository
 
     period_repo = ReturnPeriodRepository(db)
@@ -83,49 +90,38 @@ async def compute_net_liability(period_id: UUID, db: Any) -> PeriodComputation:
     start = __import__("datetime").date(year, month, 1)
     end = __import__("datetime").date(year, month, monthrange(year, month)[1])
 
-    inv_repo = InvoiceRepository(db)
+    agg_repo = InvoiceAggregateRepository(db)
     comp = PeriodComputation()
 
+    # One GROUP BY direction query instead of loading every invoice row
+    totals = await agg_repo.totals_by_direction(period_rec.user_id, start, end)
+    outward = totals.get("outward") or DirectionTotals()
+    inward = totals.get("inward") or DirectionTotals()
+
     # -------------------------------------------------------------------
     # 1. Aggregate OUTWARD invoices → output tax
     # -------------------------------------------------------------------
-    outward = await inv_repo.list_for_period_by_direction(
-        period_rec.user_id, start, end, "outward"
-    )
-    comp.outward_count = len(outward)
-    for inv in outward:
-        comp.output_igst += _dec(inv.igst_amount)
-        comp.output_cgst += _dec(inv.cgst_amount)
-        comp.output_sgst += _dec(inv.sgst_amount)
+    comp.outward_count = outward.count
+    comp.output_igst = outward.igst
+    comp.output_cgst = outward.cgst
+    comp.output_sgst = outward.sgst
 
     # -------------------------------------------------------------------
     # 2. Aggregate eligible ITC
     #    Conditions: direction=inward, itc_eligible=True,
     #                gstr2b_match_status='matched', blocked_itc_reason IS NULL
     # -------------------------------------------------------------------
-    inward = await inv_repo.list_for_period_by_direction(
-        period_rec.user_id, start, end, "inward"
-    )
-    comp.inward_count = len(inward)
-
-    for inv in inward:
-        if (
-            inv.itc_eligible
-            and inv.gstr2b_match_status == "matched"
-            and not inv.blocked_itc_reason
-        ):
-            comp.itc_igst += _dec(inv.igst_amount)
-            comp.itc_cgst += _dec(inv.cgst_amount)
-            comp.itc_sgst += _dec(inv.sgst_amount)
+    comp.inward_count = inward.count
+    comp.itc_igst = inward.itc_igst
+    comp.itc_cgst = inward.itc_cgst
+    comp.itc_sgst = inward.itc_sgst
 
     # -------------------------------------------------------------------
     # 3. Aggregate RCM liability (inward + reverse_charge=True)
     # -------------------------------------------------------------------
-    for inv in inward:
-        if inv.reverse_charge:
-            comp.rcm_igst += _dec(inv.igst_amount)
-            comp.rcm_cgst += _dec(inv.cgst_amount)
-            comp.rcm_sgst += _dec(inv.sgst_amount)
+    comp.rcm_igst = inward.rcm_igst
+    comp.rcm_cgst = inward.rcm_cgst
+    comp.rcm_sgst = inward.rcm_sgst
 
     # -------------------------------------------------------------------
     # 4. Net payable = output + RCM - ITC (per head, floor at 0)
@@ -162,6 +158,12 @@ async def compute_net_liability(period_id: UUID, db: Any) -> PeriodComputation:
     }
     await period_repo.update_computation(period_id, computation_data)
 
+    # Resync this month's rollup bucket (read by GSTR-9 / turnover recon)
+    from app.infrastructure.db.repositories.monthly_rollup_repository import (
+        refresh_rollup_for_dates,
+    )
+    await refresh_rollup_for_dates(db, period_rec.user_id, [start])
+
     # Try to transition status to "data_ready"
     try:
         await period_repo.update_status(period_id, "data_ready")
@@ -181,6 +183,9 @@ async def compute_net_liability(period_id: UUID, db: Any) -> PeriodComputation:
         comp.risk_flags,
     )
 
+    if not score_risk:
+        return comp
+
     # Phase 2: Auto-trigger 100-point risk scoring after liability computation
     try:
         from app.domain.services.gst_risk_scoring import compute_risk_score
@@ -235,16 +240,3 @@ def _generate_risk_flags(
 
     return flags
 
-
-# ---------------------------------------------------------------------------
-# Helper
-# ---------------------------------------------------------------------------
-
-def _dec(val: Any) -> Decimal:
-    """Safely convert a value to Decimal."""
-    if val is None:
-        return ZERO
-    try:
-        return Decimal(str(val))
-    except Exception:
-        return ZERO
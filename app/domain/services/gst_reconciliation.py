@@ -4,6 +4,11 @@ ITC Reconciliation Engine.
 
 Matches purchase invoices in the books against GSTR-2B entries
 to identify matched, mismatched, and missing records.
+
+Pairs found only by the fuzzy second pass are never ``matched`` on their
+own: they are marked ``fuzzy_review`` (excluded from eligible ITC) until a
+CA confirms them with ``confirm_fuzzy_match``.  A confirmed pair stays
+matched on later runs as long as the same two lines pair up again.
 """
 
 from __future__ import annotations
@@ -11,17 +16,21 @@ from __future__ import annotations
 import json
 import logging
 from dataclasses import dataclass, field
-from datetime import date, timedelta
+from datetime import date, datetime, timedelta, timezone
 from decimal import Decimal
 from typing import Any
 from uuid import UUID
 
+from app.core.config import settings
+
 logger = logging.getLogger("gst_reconciliation")
 
 # Tolerance for value matching (Rs 1)
 VALUE_TOLERANCE = Decimal("1.00")
 # Tolerance for date matching (5 days)
 DATE_TOLERANCE_DAYS = 5
+# Status for fuzzy pairs awaiting CA confirmation (ITCMatch and Invoice)
+FUZZY_REVIEW = "fuzzy_review"
 
 
 # ---------------------------------------------------------------------------
@@ -42,6 +51,11 @@ class ReconciliationSummary:
     mismatch_taxable_diff: Decimal = Decimal("0")
     missing_in_2b_taxable: Decimal = Decimal("0")
     missing_in_books_taxable: Decimal = Decimal("0")
+    # Of matched + value_mismatch + fuzzy_review, pairs found by the fuzzy second pass
+    fuzzy_matched: int = 0
+    # Fuzzy pairs whose values agree, held back from ITC until a CA confirms
+    fuzzy_review: int = 0
+    fuzzy_review_taxable: Decimal = Decimal("0")
 
 
 # ---------------------------------------------------------------------------
@@ -56,7 +70,8 @@ async def reconcile_period(period_id: UUID, db: Any) -> ReconciliationSummary:
     2. Load all ITCMatch records (GSTR-2B entries) for the period
     3. Build lookup index on normalized (supplier_gstin, invoice_number)
     4. For each 2B entry, find best matching book invoice
-    5. Classify: matched / value_mismatch / missing_in_books / missing_in_2b
+    4a. Fuzzy-match the leftovers on both sides (gst_fuzzy_match)
+    5. Classify: matched / value_mismatch / fuzzy_review / missing_in_books / missing_in_2b
     6. Update both Invoice.gstr2b_match_status and ITCMatch fields
     7. Return ReconciliationSummary
     """
@@ -99,6 +114,7 @@ async def reconcile_period(period_id: UUID, db: Any) -> ReconciliationSummary:
     )
 
     matched_book_ids: set = set()
+    residual_2b: list = []
 
     for entry in twob_entries:
         key = _normalize_match_key(
@@ -108,36 +124,40 @@ async def reconcile_period(period_id: UUID, db: Any) -> ReconciliationSummary:
         best_match = _find_best_match(entry, candidates, matched_book_ids)
 
         if best_match is None:
-            # Missing in books (excess in 2B)
-            entry.match_status = "missing_in_books"
-            summary.missing_in_books += 1
-            summary.missing_in_books_taxable += entry.gstr2b_taxable_value or Decimal("0")
+            residual_2b.append(entry)
         else:
+            _apply_match(entry, best_match, summary)
             matched_book_ids.add(best_match.id)
-            entry.purchase_invoice_id = best_match.id
-
-            if _values_match(entry, best_match):
-                entry.match_status = "matched"
-                best_match.gstr2b_match_status = "matched"
-                best_match.gstr2b_match_id = entry.id
-                summary.matched += 1
-                summary.matched_taxable += entry.gstr2b_taxable_value or Decimal("0")
-                summary.matched_tax += (
-                    (entry.gstr2b_igst or Decimal("0"))
-                    + (entry.gstr2b_cgst or Decimal("0"))
-                    + (entry.gstr2b_sgst or Decimal("0"))
-                )
-            else:
-                details = _build_mismatch_details(entry, best_match)
-                entry.match_status = "value_mismatch"
-                entry.mismatch_details = json.dumps(details)
-                best_match.gstr2b_match_status = "mismatch"
-                best_match.gstr2b_match_id = entry.id
-                summary.value_mismatch += 1
-                summary.mismatch_taxable_diff += abs(
-                    (entry.gstr2b_taxable_value or Decimal("0"))
-                    - Decimal(str(best_match.taxable_value or 0))
-                )
+
+    # Second pass: typos, FY prefixes and GSTIN OCR errors in the residuals
+    if residual_2b and settings.RECON_FUZZY_ENABLED:
+        from app.domain.services.gst_fuzzy_match import FuzzyLine, match_residuals
+
+        fuzzy = match_residuals(
+            (
+                FuzzyLine(e, e.gstr2b_supplier_gstin, e.gstr2b_invoice_number,
+                          e.gstr2b_invoice_date, e.gstr2b_taxable_value)
+                for e in residual_2b
+            ),
+            (
+                FuzzyLine(inv, inv.supplier_gstin, inv.invoice_number,
+                          inv.invoice_date, inv.taxable_value)
+                for inv in book_invoices if inv.id not in matched_book_ids
+            ),
+        )
+        fuzzy_matched: set = set()
+        for m in fuzzy:
+            _apply_match(m.twob, m.book, summary, fuzzy=m.details())
+            matched_book_ids.add(m.book.id)
+            fuzzy_matched.add(m.twob.id)
+        summary.fuzzy_matched = len(fuzzy)
+        residual_2b = [e for e in residual_2b if e.id not in fuzzy_matched]
+
+    # Missing in books (excess in 2B)
+    for entry in residual_2b:
+        entry.match_status = "missing_in_books"
+        summary.missing_in_books += 1
+        summary.missing_in_books_taxable += entry.gstr2b_taxable_value or Decimal("0")
 
     # Remaining unmatched book invoices -> missing_in_2b
     for inv in book_invoices:
@@ -159,10 +179,10 @@ async def reconcile_period(period_id: UUID, db: Any) -> ReconciliationSummary:
         )
 
     logger.info(
-        "Reconciliation done: period=%s, matched=%d, mismatch=%d, "
+        "Reconciliation done: period=%s, matched=%d, mismatch=%d, fuzzy=%d (review=%d), "
         "missing_in_2b=%d, missing_in_books=%d",
-        period_rec.period, summary.matched, summary.value_mismatch,
-        summary.missing_in_2b, summary.missing_in_books,
+        period_rec.period, summary.matched, summary.value_mismatch, summary.fuzzy_matched,
+        summary.fuzzy_review, summary.missing_in_2b, summary.missing_in_books,
     )
 
     return summary
@@ -181,7 +201,7 @@ async def get_mismatches(period_id: UUID, db: Any) -> list:
     repo = ITCMatchRepository(db)
 
     results = []
-    for status in ("value_mismatch", "missing_in_books", "missing_in_2b"):
+    for status in (FUZZY_REVIEW, "value_mismatch", "missing_in_books", "missing_in_2b"):
         entries = await repo.list_for_period(period_id, status=status)
         results.extend(entries)
     return results
@@ -231,6 +251,100 @@ def _find_best_match(entry, candidates: list, already_matched_ids: set) -> Any |
     return best or available[0]
 
 
+async def confirm_fuzzy_match(
+    period_id: UUID,
+    match_id: UUID,
+    db: Any,
+    confirmed_by: str,
+) -> Any | None:
+    """CA confirmation of a ``fuzzy_review`` pair: both sides become ``matched``.
+
+    Returns the updated ITCMatch, or None if there is no such pair awaiting
+    review in this period.
+    """
+    from sqlalchemy import select
+
+    from app.infrastructure.db.models import Invoice, ITCMatch
+
+    entry = (await db.execute(
+        select(ITCMatch).where(ITCMatch.id == match_id, ITCMatch.period_id == period_id)
+    )).scalar_one_or_none()
+    if entry is None or entry.match_status != FUZZY_REVIEW or entry.purchase_invoice_id is None:
+        return None
+    invoice = await db.get(Invoice, entry.purchase_invoice_id)
+    if invoice is None:
+        return None
+
+    details = _stored_details(entry)
+    details.setdefault("match", {}).update({
+        "confirmed_by": confirmed_by,
+        "confirmed_at": datetime.now(timezone.utc).isoformat(),
+    })
+    entry.match_status = "matched"
+    entry.mismatch_details = json.dumps(details)
+    invoice.gstr2b_match_status = "matched"
+    await db.commit()
+    logger.info("Fuzzy ITC match %s confirmed by %s", match_id, confirmed_by)
+    return entry
+
+
+def _stored_details(entry) -> dict:
+    try:
+        details = json.loads(entry.mismatch_details or "{}")
+    except (TypeError, ValueError):
+        return {}
+    return details if isinstance(details, dict) else {}
+
+
+def _confirmed_pair(entry, invoice) -> dict | None:
+    """The stored confirmation if a CA already accepted this exact pair."""
+    if entry.match_status != "matched" or entry.purchase_invoice_id != invoice.id:
+        return None
+    match = _stored_details(entry).get("match") or {}
+    return match if match.get("confirmed_by") else None
+
+
+def _apply_match(entry, invoice, summary: ReconciliationSummary, fuzzy: dict | None = None) -> None:
+    """Link a 2B entry to a book invoice and classify the pair."""
+    confirmed = _confirmed_pair(entry, invoice) if fuzzy else None
+    entry.purchase_invoice_id = invoice.id
+    invoice.gstr2b_match_id = entry.id
+
+    if fuzzy and confirmed is None and _values_match(entry, invoice):
+        # Probable pair, but unverified: keep it out of eligible ITC
+        entry.match_status = FUZZY_REVIEW
+        entry.mismatch_details = json.dumps({"match": fuzzy})
+        invoice.gstr2b_match_status = FUZZY_REVIEW
+        summary.fuzzy_review += 1
+        summary.fuzzy_review_taxable += entry.gstr2b_taxable_value or Decimal("0")
+    elif _values_match(entry, invoice):
+        entry.match_status = "matched"
+        invoice.gstr2b_match_status = "matched"
+        if fuzzy:
+            entry.mismatch_details = json.dumps({"match": fuzzy | {
+                k: confirmed[k] for k in ("confirmed_by", "confirmed_at") if k in confirmed
+            }})
+        summary.matched += 1
+        summary.matched_taxable += entry.gstr2b_taxable_value or Decimal("0")
+        summary.matched_tax += (
+            (entry.gstr2b_igst or Decimal("0"))
+            + (entry.gstr2b_cgst or Decimal("0"))
+            + (entry.gstr2b_sgst or Decimal("0"))
+        )
+    else:
+        details = _build_mismatch_details(entry, invoice)
+        if fuzzy:
+            details["match"] = fuzzy
+        entry.match_status = "value_mismatch"
+        entry.mismatch_details = json.dumps(details)
+        invoice.gstr2b_match_status = "mismatch"
+        summary.value_mismatch += 1
+        summary.mismatch_taxable_diff += abs(
+            (entry.gstr2b_taxable_value or Decimal("0"))
+            - Decimal(str(invoice.taxable_value or 0))
+        )
+
+
 def _values_match(entry, invoice) -> bool:
     """Check if taxable and tax values are within tolerance (±Rs 1)."""
     tv_diff = abs(
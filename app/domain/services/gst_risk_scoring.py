@@ -674,42 +674,18 @@ def _recommend_actions(flags: list[RiskFlag]) -> list[RecommendedAction]:
 
 # ── Load metrics from DB ──────────────────────────────────────
 
-async def _load_risk_metrics(
-    period_id: UUID,
-    db: AsyncSession,
-) -> RiskMetrics:
-    """Gather all scoring inputs from DB for a single period."""
-    m = RiskMetrics()
+def _sum3(igst, cgst, sgst) -> Decimal:
+    return (igst or Decimal("0")) + (cgst or Decimal("0")) + (sgst or Decimal("0"))
 
-    # 1. Load ReturnPeriod
-    rp_stmt = select(ReturnPeriod).where(ReturnPeriod.id == period_id)
-    rp_result = await db.execute(rp_stmt)
-    rp = rp_result.scalar_one_or_none()
-    if not rp:
-        return m
 
+def _apply_period_fields(m: RiskMetrics, rp, today: date) -> None:
+    """Fill the metrics that come straight from the ReturnPeriod row."""
     m.period_status = rp.status
     m.filing_mode = rp.filing_mode or "monthly"
-    m.net_payable = (
-        (rp.net_payable_igst or Decimal("0"))
-        + (rp.net_payable_cgst or Decimal("0"))
-        + (rp.net_payable_sgst or Decimal("0"))
-    )
-    m.rcm_total = (
-        (rp.rcm_igst or Decimal("0"))
-        + (rp.rcm_cgst or Decimal("0"))
-        + (rp.rcm_sgst or Decimal("0"))
-    )
-    m.itc_claimed = (
-        (rp.itc_igst or Decimal("0"))
-        + (rp.itc_cgst or Decimal("0"))
-        + (rp.itc_sgst or Decimal("0"))
-    )
-    m.output_tax_total = (
-        (rp.output_tax_igst or Decimal("0"))
-        + (rp.output_tax_cgst or Decimal("0"))
-        + (rp.output_tax_sgst or Decimal("0"))
-    )
+    m.net_payable = _sum3(rp.net_payable_igst, rp.net_payable_cgst, rp.net_payable_sgst)
+    m.rcm_total = _sum3(rp.rcm_igst, rp.rcm_cgst, rp.rcm_sgst)
+    m.itc_claimed = _sum3(rp.itc_igst, rp.itc_cgst, rp.itc_sgst)
+    m.output_tax_total = _sum3(rp.output_tax_igst, rp.output_tax_cgst, rp.output_tax_sgst)
     m.current_turnover = m.output_tax_total  # proxy via output tax
     m.total_outward_invoices = rp.outward_count or 0
     m.total_inward_invoices = rp.inward_count or 0
@@ -719,10 +695,52 @@ async def _load_risk_metrics(
 
     m.due_date_gstr3b = rp.due_date_gstr3b
     if rp.due_date_gstr3b:
-        today = date.today()
         if today > rp.due_date_gstr3b and rp.status not in ("filed", "closed"):
             m.days_past_due = (today - rp.due_date_gstr3b).days
 
+
+def _apply_match_counts(m: RiskMetrics, status_counts: dict[str, int]) -> None:
+    """Fill the 2B reconciliation metrics from ITCMatch counts per status."""
+    total = sum(status_counts.values())
+    if not total:
+        return
+    m.has_2b_data = True
+    m.total_2b_entries = total
+    m.matched_count = status_counts.get("matched", 0)
+    m.missing_in_2b_count = status_counts.get("missing_in_2b", 0)
+    m.value_mismatch_count = status_counts.get("value_mismatch", 0)
+    m.missing_in_books_count = status_counts.get("missing_in_books", 0)
+
+
+def _apply_history(m: RiskMetrics, hist_periods: list) -> None:
+    """Averages over the (up to 3) periods preceding this one, newest first."""
+    if not hist_periods:
+        return
+    turnovers = [
+        _sum3(hp.output_tax_igst, hp.output_tax_cgst, hp.output_tax_sgst)
+        for hp in hist_periods
+    ]
+    itcs = [_sum3(hp.itc_igst, hp.itc_cgst, hp.itc_sgst) for hp in hist_periods]
+    m.avg_turnover_3 = sum(turnovers) / len(turnovers)
+    m.avg_itc_3 = sum(itcs) / len(itcs)
+
+
+async def _load_risk_metrics(
+    period_id: UUID,
+    db: AsyncSession,
+) -> RiskMetrics:
+    """Gather all scoring inputs from DB for a single period."""
+    m = RiskMetrics()
+
+    # 1. Load ReturnPeriod
+    rp_stmt = select(ReturnPeriod).where(ReturnPeriod.id == period_id)
+    rp_result = await db.execute(rp_stmt)
+    rp = rp_result.scalar_one_or_none()
+    if not rp:
+        return m
+
+    _apply_period_fields(m, rp, date.today())
+
     # 2. Invoice-level metrics
     dup_stmt = (
         select(
@@ -758,18 +776,10 @@ async def _load_risk_metrics(
     match_result = await db.execute(match_stmt)
     matches = list(match_result.scalars().all())
 
-    if matches:
-        m.has_2b_data = True
-        m.total_2b_entries = len(matches)
-        for mtch in matches:
-            if mtch.match_status == "matched":
-                m.matched_count += 1
-            elif mtch.match_status == "missing_in_2b":
-                m.missing_in_2b_count += 1
-            elif mtch.match_status == "value_mismatch":
-                m.value_mismatch_count += 1
-            elif mtch.match_status == "missing_in_books":
-                m.missing_in_books_count += 1
+    status_counts: dict[str, int] = {}
+    for mtch in matches:
+        status_counts[mtch.match_status] = status_counts.get(mtch.match_status, 0) + 1
+    _apply_match_counts(m, status_counts)
 
     # Blocked ITC count
     blocked_stmt = select(func.count(Invoice.id)).where(
@@ -812,21 +822,7 @@ async def _load_risk_metrics(
     hist_result = await db.execute(hist_stmt)
     hist_periods = list(hist_result.scalars().all())
 
-    if hist_periods:
-        turnovers = [
-            (hp.output_tax_igst or Decimal("0"))
-            + (hp.output_tax_cgst or Decimal("0"))
-            + (hp.output_tax_sgst or Decimal("0"))
-            for hp in hist_periods
-        ]
-        itcs = [
-            (hp.itc_igst or Decimal("0"))
-            + (hp.itc_cgst or Decimal("0"))
-            + (hp.itc_sgst or Decimal("0"))
-            for hp in hist_periods
-        ]
-        m.avg_turnover_3 = sum(turnovers) / len(turnovers) if turnovers else Decimal("0")
-        m.avg_itc_3 = sum(itcs) / len(itcs) if itcs else Decimal("0")
+    _apply_history(m, hist_periods)
 
     # 6. Taxpayer type (check BusinessClient if linked via GSTIN)
     bc_stmt = select(BusinessClient).where(BusinessClient.gstin == rp.gstin)
@@ -838,6 +834,157 @@ async def _load_risk_metrics(
     return m
 
 
+def bulk_metric_stmts(period_ids: list[UUID], user_ids: list[UUID]) -> dict:
+    """Set-based versions of the per-period queries in ``_load_risk_metrics``.
+
+    Invoice metrics are per user (as in the single-period path), 2B and
+    payment metrics per period; each is one GROUP BY over the whole batch.
+    """
+    dup_numbers = (
+        select(Invoice.user_id)
+        .where(Invoice.user_id.in_(user_ids), Invoice.direction == "outward")
+        .group_by(Invoice.user_id, Invoice.invoice_number)
+        .having(func.count(Invoice.id) > 1)
+        .subquery()
+    )
+    return {
+        "duplicates": (
+            select(dup_numbers.c.user_id, func.count().label("cnt"))
+            .group_by(dup_numbers.c.user_id)
+        ),
+        "invoice_counts": (
+            select(
+                Invoice.user_id,
+                func.count(Invoice.id).filter(
+                    and_(
+                        Invoice.direction == "outward",
+                        Invoice.recipient_gstin.is_(None),
+                        Invoice.taxable_value > 250000,
+                    )
+                ).label("missing_gstin_b2b"),
+                func.count(Invoice.id).filter(
+                    and_(
+                        Invoice.direction == "inward",
+                        Invoice.blocked_itc_reason.isnot(None),
+                    )
+                ).label("blocked_itc"),
+            )
+            .where(Invoice.user_id.in_(user_ids))
+            .group_by(Invoice.user_id)
+        ),
+        "matches": (
+            select(ITCMatch.period_id, ITCMatch.match_status, func.count().label("cnt"))
+            .where(ITCMatch.period_id.in_(period_ids))
+            .group_by(ITCMatch.period_id, ITCMatch.match_status)
+        ),
+        "payments": (
+            select(
+                PaymentRecord.period_id,
+                func.count(PaymentRecord.id).label("cnt"),
+                func.coalesce(func.sum(PaymentRecord.total), 0).label("total"),
+            )
+            .where(
+                PaymentRecord.period_id.in_(period_ids),
+                PaymentRecord.status == "confirmed",
+            )
+            .group_by(PaymentRecord.period_id)
+        ),
+        "history": (
+            select(
+                ReturnPeriod.user_id,
+                ReturnPeriod.gstin,
+                ReturnPeriod.period,
+                ReturnPeriod.output_tax_igst,
+                ReturnPeriod.output_tax_cgst,
+                ReturnPeriod.output_tax_sgst,
+                ReturnPeriod.itc_igst,
+                ReturnPeriod.itc_cgst,
+                ReturnPeriod.itc_sgst,
+            )
+            .where(ReturnPeriod.user_id.in_(user_ids))
+        ),
+    }
+
+
+async def _load_risk_metrics_bulk(
+    period_ids: list[UUID],
+    db: AsyncSession,
+    today: date | None = None,
+) -> dict[UUID, RiskMetrics]:
+    """``_load_risk_metrics`` for many periods with a fixed number of queries.
+
+    Used to build ML training data: ~7 queries per batch instead of ~9 per
+    period.  Values match the single-period loader, except that a GSTIN
+    shared by several BusinessClients resolves to the oldest client instead
+    of raising.
+    """
+    today = today or date.today()
+    out = {pid: RiskMetrics() for pid in period_ids}
+    if not period_ids:
+        return out
+
+    rp_result = await db.execute(select(ReturnPeriod).where(ReturnPeriod.id.in_(period_ids)))
+    periods = list(rp_result.scalars().all())
+    if not periods:
+        return out
+
+    user_ids = sorted({rp.user_id for rp in periods}, key=str)
+    gstins = sorted({rp.gstin for rp in periods if rp.gstin})
+    stmts = bulk_metric_stmts([rp.id for rp in periods], user_ids)
+
+    dup_by_user = dict((await db.execute(stmts["duplicates"])).all())
+    counts_by_user = {
+        row.user_id: row for row in (await db.execute(stmts["invoice_counts"])).all()
+    }
+    matches: dict[UUID, dict[str, int]] = {}
+    for pid, status, cnt in (await db.execute(stmts["matches"])).all():
+        matches.setdefault(pid, {})[status] = cnt
+    payments = {row.period_id: row for row in (await db.execute(stmts["payments"])).all()}
+
+    history: dict[tuple, list] = {}
+    for row in (await db.execute(stmts["history"])).all():
+        history.setdefault((row.user_id, row.gstin), []).append(row)
+
+    taxpayer_types: dict[str, str | None] = {}
+    if gstins:
+        bc_result = await db.execute(
+            select(BusinessClient.gstin, BusinessClient.taxpayer_type)
+            .where(BusinessClient.gstin.in_(gstins))
+            .order_by(BusinessClient.id)
+        )
+        for gstin, taxpayer_type in bc_result.all():
+            taxpayer_types.setdefault(gstin, taxpayer_type)
+
+    for rp in periods:
+        m = out[rp.id]
+        _apply_period_fields(m, rp, today)
+
+        m.duplicate_invoice_count = dup_by_user.get(rp.user_id, 0)
+        counts = counts_by_user.get(rp.user_id)
+        if counts is not None:
+            m.missing_gstin_b2b_count = counts.missing_gstin_b2b
+            m.blocked_itc_count = counts.blocked_itc
+
+        _apply_match_counts(m, matches.get(rp.id, {}))
+
+        pay = payments.get(rp.id)
+        if pay is not None:
+            m.payment_count = pay.cnt
+            m.total_paid = pay.total
+
+        # Keep the 3 periods before this one, newest first
+        earlier = sorted(
+            (h for h in history.get((rp.user_id, rp.gstin), []) if h.period < rp.period),
+            key=lambda h: h.period,
+        )
+        _apply_history(m, earlier[-3:][::-1])
+
+        if rp.gstin in taxpayer_types:
+            m.taxpayer_type = taxpayer_types[rp.gstin] or "regular"
+
+    return out
+
+
 # ── Persist result ────────────────────────────────────────────
 
 async def _persist_result(
@@ -159,6 +159,17 @@ def validate_period_transition(
 # Workflow operations
 # ---------------------------------------------------------------------------
 
+async def on_period_status_changed(user_id: Any, period: str) -> None:
+    """Side effects of a ReturnPeriod status change or recomputation.
+
+    Drops the cached consolidated multi-GSTIN summary for that period so
+    the enterprise dashboard never shows a stale status.
+    """
+    from app.domain.services.multi_gstin_service import invalidate_consolidated_cache
+
+    await invalidate_consolidated_cache(user_id, period)
+
+
 async def transition_gst_filing(
     filing_id: UUID,
     new_status: str,
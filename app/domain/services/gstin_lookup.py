@@ -1,27 +1,68 @@
 # app/domain/services/gstin_lookup.py
 """
-GSTIN details lookup service.
+GSTIN directory: business details (legal name, state, status) per GSTIN.
 
-Calls the GST public/MasterGST API to fetch business details for a given
-GSTIN (legal name, state, status).  Results are cached in Redis for 24 h.
+Resolution order, fastest first:
+0. In-process LRU (GSTIN_DIRECTORY_LRU_SIZE entries, GSTIN_DIRECTORY_LOCAL_TTL_SECONDS)
+1. Redis ``gstin:details:{gstin}`` (GSTIN_DIRECTORY_REDIS_TTL_SECONDS)
+2. PostgreSQL ``gstin_directory`` (last answer the provider gave, kept indefinitely)
+3. MasterGST public taxpayer search (``MasterGSTClient.search_taxpayer``)
+
+``lookup_many`` resolves a whole batch tier by tier — one ``MGET``, one
+``SELECT ... IN`` — and only the GSTINs no tier knows go to the provider.
+At most ``GSTIN_DIRECTORY_CONCURRENCY`` searches are in flight per process,
+however many lookups are running.  Concurrent lookups of the same GSTIN in a process share
+one provider call.  Answers are written back to every tier below the one
+that had them.
+
+Negative caching: GSTINs that fail the format / PAN check never leave the
+process; GSTINs the provider reports as unknown are stored with
+``found=False`` and trusted for GSTIN_DIRECTORY_NEGATIVE_TTL_SECONDS.
+Transient failures (timeouts, HTTP errors, no MasterGST credentials) are
+not cached.
+
+Answers older than GSTIN_DIRECTORY_REFRESH_AFTER_SECONDS are still
+returned — a cancelled registration is rare and the caller needs an answer
+now — and a background task re-fetches them.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from typing import Any, Dict, Optional
-
-import httpx
+import time
+from collections.abc import Iterable
+from datetime import datetime, timezone
+from typing import TYPE_CHECKING, Any
 
 from app.core.config import settings
+from app.domain.services.gstin_pan_validation import is_valid_gstin
+from app.infrastructure.cache.local_cache import TTLCache
+
+if TYPE_CHECKING:
+    from app.infrastructure.external.mastergst_client import MasterGSTClient
 
 logger = logging.getLogger("gstin_lookup")
 
-_CACHE_TTL = 86_400  # 24 hours
+_KEY_PREFIX = "gstin:details:"
+_PUBLIC_FIELDS = ("legal_name", "state", "status")
+# Provider messages that mean "no such GSTIN" rather than "try again later"
+_NOT_FOUND_HINTS = ("invalid gstin", "not found", "no record")
+
+
+_local = TTLCache(settings.GSTIN_DIRECTORY_LRU_SIZE)
+_inflight: dict[str, asyncio.Future] = {}
+_refreshing: set[str] = set()
+_tasks: set[asyncio.Task] = set()
+_slots: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
 
 
-async def lookup_gstin_details(gstin: str) -> Optional[Dict[str, Any]]:
+# ------------------------------------------------------------------
+# Public API
+# ------------------------------------------------------------------
+
+async def lookup_gstin_details(gstin: str) -> dict[str, Any] | None:
     """Fetch business details for a GSTIN.
 
     Returns
@@ -31,67 +72,324 @@ async def lookup_gstin_details(gstin: str) -> Optional[Dict[str, Any]]:
         or *None* on failure / not found.
     """
     gstin = gstin.strip().upper()
+    return (await lookup_many([gstin])).get(gstin)
+
+
+async def lookup_many(gstins: Iterable[str]) -> dict[str, dict[str, Any] | None]:
+    """Details for each distinct GSTIN in ``gstins`` (normalised to upper case).
+
+    Every requested GSTIN is a key of the result; the value is None when
+    the GSTIN is invalid, unknown to the provider or could not be fetched.
+    """
+    wanted = list(dict.fromkeys(g.strip().upper() for g in gstins if g and g.strip()))
+    result: dict[str, dict[str, Any] | None] = dict.fromkeys(wanted)
+    now = time.time()
+
+    entries: dict[str, dict] = {}
+    pending = []
+    for gstin in wanted:
+        if not is_valid_gstin(gstin):
+            continue
+        entry = _local.get(gstin)
+        if entry is not None:
+            entries[gstin] = entry
+        else:
+            pending.append(gstin)
+
+    if pending:
+        found = await _redis_get_many(pending)
+        _remember(found, now)
+        entries.update(found)
+        pending = [g for g in pending if g not in found]
+
+    if pending:
+        found = await _db_get_many(pending, now)
+        if found:
+            _remember(found, now)
+            await _redis_set_many(found)
+        entries.update(found)
+        pending = [g for g in pending if g not in found]
 
-    # 1. Check Redis cache first
-    cached = await _get_from_cache(gstin)
-    if cached is not None:
-        logger.debug("gstin_lookup: cache hit for %s", gstin)
-        return cached
+    if pending:
+        entries.update(await _fetch_shared(pending))
 
-    # 2. Call external API
-    details = await _call_gst_api(gstin)
-    if details:
-        await _set_cache(gstin, details)
-        return details
+    stale = [g for g, e in entries.items() if e["found"] and _is_stale(e, now)]
+    if stale:
+        _schedule_refresh(stale)
 
-    return None
+    for gstin, entry in entries.items():
+        result[gstin] = _public(entry)
+    return result
+
+
+def clear_local_cache() -> None:
+    """Drop the in-process tier (tests, or after a bulk directory correction)."""
+    _local.clear()
 
 
 # ------------------------------------------------------------------
-# Internal helpers
+# Entries
 # ------------------------------------------------------------------
 
-async def _call_gst_api(gstin: str) -> Optional[Dict[str, Any]]:
-    """Call MasterGST / GST public API.
+def _public(entry: dict) -> dict[str, Any] | None:
+    if not entry.get("found"):
+        return None
+    return {k: entry.get(k) for k in _PUBLIC_FIELDS}
 
-    Uses ``settings.MASTERGST_API_URL`` if configured, otherwise returns None
-    (the caller should fall back to asking the user for details).
-    """
-    api_url = getattr(settings, "MASTERGST_API_URL", None)
-    api_key = getattr(settings, "MASTERGST_API_KEY", None)
 
-    if not api_url:
-        logger.info("gstin_lookup: no MASTERGST_API_URL configured, skipping API call")
-        return None
+def _is_stale(entry: dict, now: float) -> bool:
+    return now - entry.get("fetched_at", 0) >= settings.GSTIN_DIRECTORY_REFRESH_AFTER_SECONDS
+
+
+def _is_expired_negative(entry: dict, now: float) -> bool:
+    return not entry["found"] and now - entry.get("fetched_at", 0) >= settings.GSTIN_DIRECTORY_NEGATIVE_TTL_SECONDS
+
+
+def _local_ttl(entry: dict, now: float) -> float:
+    ttl = settings.GSTIN_DIRECTORY_LOCAL_TTL_SECONDS
+    if not entry["found"]:
+        left = settings.GSTIN_DIRECTORY_NEGATIVE_TTL_SECONDS - (now - entry.get("fetched_at", now))
+        ttl = min(ttl, left)
+    return max(ttl, 1)
+
+
+def _redis_ttl(entry: dict) -> int:
+    if entry["found"]:
+        return settings.GSTIN_DIRECTORY_REDIS_TTL_SECONDS
+    return settings.GSTIN_DIRECTORY_NEGATIVE_TTL_SECONDS
+
+
+def _remember(entries: dict[str, dict], now: float) -> None:
+    for gstin, entry in entries.items():
+        _local.put(gstin, entry, _local_ttl(entry, now))
+
+
+def _spawn(coro) -> None:
+    task = asyncio.create_task(coro)
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+
+
+# ------------------------------------------------------------------
+# Tier 1: Redis
+# ------------------------------------------------------------------
+
+async def _redis_get_many(gstins: list[str]) -> dict[str, dict]:
+    """Cached entries for ``gstins``; Redis failures fail open (empty result)."""
+    try:
+        from app.infrastructure.cache.redis_client import get_redis_client
+
+        raws = await get_redis_client().mget([f"{_KEY_PREFIX}{g}" for g in gstins])
+    except Exception:
+        logger.debug("gstin_lookup: cache read failed for %d GSTINs", len(gstins), exc_info=True)
+        return {}
+    out = {}
+    for gstin, raw in zip(gstins, raws):
+        if raw:
+            entry = json.loads(raw)
+            if "found" in entry:          # entries written before the directory had no marker
+                out[gstin] = entry
+    return out
+
+
+async def _redis_set_many(entries: dict[str, dict]) -> None:
+    try:
+        from app.infrastructure.cache.redis_client import get_redis_client
+
+        pipe = get_redis_client().pipeline(transaction=False)
+        for gstin, entry in entries.items():
+            pipe.set(f"{_KEY_PREFIX}{gstin}", json.dumps(entry), ex=_redis_ttl(entry))
+        await pipe.execute()
+    except Exception:
+        logger.debug("gstin_lookup: cache write failed for %d GSTINs", len(entries), exc_info=True)
+
+
+# ------------------------------------------------------------------
+# Tier 2: PostgreSQL
+# ------------------------------------------------------------------
+
+def _row_to_entry(row) -> dict:
+    return {
+        "found": row.found,
+        "legal_name": row.legal_name,
+        "state": row.state,
+        "status": row.status,
+        "fetched_at": row.fetched_at.timestamp(),
+    }
 
+
+def _entry_to_row(gstin: str, entry: dict) -> dict:
+    return {
+        "gstin": gstin,
+        "found": entry["found"],
+        "legal_name": entry.get("legal_name"),
+        "state": entry.get("state"),
+        "status": entry.get("status"),
+        "fetched_at": datetime.fromtimestamp(entry["fetched_at"], tz=timezone.utc),
+    }
+
+
+async def _db_get_many(gstins: list[str], now: float) -> dict[str, dict]:
+    """Stored answers, minus negative ones older than the negative TTL."""
     try:
-        async with httpx.AsyncClient(timeout=10.0) as client:
-            headers = {}
-            if api_key:
-                headers["Authorization"] = f"Bearer {api_key}"
-            resp = await client.get(
-                f"{api_url.rstrip('/')}/commonapi/v1.1/search",
-                params={"gstin": gstin, "aspid": api_key or ""},
-                headers=headers,
+        from app.core.db import AsyncSessionLocal
+        from app.infrastructure.db.repositories.gstin_directory_repository import (
+            GstinDirectoryRepository,
+        )
+
+        async with AsyncSessionLocal() as db:
+            rows = await GstinDirectoryRepository(db).get_many(gstins)
+    except Exception:
+        logger.warning("gstin_lookup: directory read failed for %d GSTINs", len(gstins), exc_info=True)
+        return {}
+    entries = {row.gstin: _row_to_entry(row) for row in rows}
+    return {g: e for g, e in entries.items() if not _is_expired_negative(e, now)}
+
+
+async def _db_save_many(entries: dict[str, dict]) -> None:
+    try:
+        from app.core.db import AsyncSessionLocal
+        from app.infrastructure.db.repositories.gstin_directory_repository import (
+            GstinDirectoryRepository,
+        )
+
+        async with AsyncSessionLocal() as db:
+            await GstinDirectoryRepository(db).upsert_many(
+                [_entry_to_row(g, e) for g, e in entries.items()]
             )
-            resp.raise_for_status()
-            data = resp.json()
-
-            # Parse MasterGST response format
-            if data.get("error") or not data.get("data"):
-                logger.warning("gstin_lookup: API returned error for %s: %s", gstin, data.get("message"))
-                return None
-
-            gst_data = data["data"]
-            return {
-                "legal_name": gst_data.get("lgnm") or gst_data.get("tradeNam") or "",
-                "state": gst_data.get("pradr", {}).get("addr", {}).get("stcd") or _state_from_gstin(gstin),
-                "status": gst_data.get("sts") or "Unknown",
-            }
+            await db.commit()
     except Exception:
-        logger.exception("gstin_lookup: API call failed for %s", gstin)
+        logger.warning("gstin_lookup: directory write failed for %d GSTINs", len(entries), exc_info=True)
+
+
+# ------------------------------------------------------------------
+# Tier 3: provider
+# ------------------------------------------------------------------
+
+async def _fetch_shared(gstins: list[str]) -> dict[str, dict]:
+    """Provider answers for ``gstins``, joining calls already in flight."""
+    loop = asyncio.get_running_loop()
+    own: list[str] = []
+    waits: dict[str, asyncio.Future] = {}
+    for gstin in gstins:
+        fut = _inflight.get(gstin)
+        if fut is None:
+            _inflight[gstin] = loop.create_future()
+            own.append(gstin)
+        else:
+            waits[gstin] = fut
+
+    fetched: dict[str, dict] = {}
+    try:
+        if own:
+            fetched = await _fetch_many(own)
+            if fetched:
+                await _save(fetched)
+    finally:
+        for gstin in own:
+            fut = _inflight.pop(gstin)
+            if not fut.done():
+                fut.set_result(fetched.get(gstin))
+
+    out = dict(fetched)
+    for gstin, fut in waits.items():
+        entry = await fut
+        if entry is not None:
+            out[gstin] = entry
+    return out
+
+
+async def _save(entries: dict[str, dict]) -> None:
+    _remember(entries, time.time())
+    await asyncio.gather(_redis_set_many(entries), _db_save_many(entries))
+
+
+def _provider_slots() -> asyncio.Semaphore:
+    """Process-wide bound on provider calls (one semaphore per event loop)."""
+    global _slots
+    loop = asyncio.get_running_loop()
+    if _slots is None or _slots[0] is not loop:
+        _slots = (loop, asyncio.Semaphore(max(1, settings.GSTIN_DIRECTORY_CONCURRENCY)))
+    return _slots[1]
+
+
+async def _fetch_many(gstins: list[str]) -> dict[str, dict]:
+    """Search the provider for each GSTIN, within the process-wide bound."""
+    if not (settings.MASTERGST_CLIENT_ID and settings.MASTERGST_CLIENT_SECRET):
+        logger.info("gstin_lookup: MasterGST credentials not configured, skipping API call")
+        return {}
+
+    from app.infrastructure.external.mastergst_client import MasterGSTClient
+
+    client = MasterGSTClient()
+    slots = _provider_slots()
+
+    async def one(gstin: str) -> tuple[str, dict | None]:
+        async with slots:
+            return gstin, await _call_gst_api(gstin, client)
+
+    results = await asyncio.gather(*(one(g) for g in gstins))
+    return {gstin: entry for gstin, entry in results if entry is not None}
+
+
+def _error_message(data: dict) -> str:
+    error = data.get("error")
+    if isinstance(error, dict):
+        error = error.get("message") or error.get("error_cd")
+    return str(data.get("message") or error or data.get("status_desc") or "")
+
+
+async def _call_gst_api(gstin: str, client: MasterGSTClient) -> dict | None:
+    """Search one GSTIN through MasterGST.
+
+    Returns a directory entry (``found`` False when the provider does not
+    know the GSTIN) or None when no answer could be obtained.
+    """
+    from app.infrastructure.external.mastergst_client import MasterGSTError
+
+    try:
+        data = await client.search_taxpayer(gstin)
+    except MasterGSTError as exc:
+        data = exc.response or {"message": str(exc)}
+        if exc.status_code and exc.status_code not in (400, 404):
+            logger.warning("gstin_lookup: search failed for %s: %s", gstin, exc)
+            return None
+
+    fetched_at = time.time()
+    gst_data = data.get("data")
+    if str(data.get("status_cd", "1")) != "1" or data.get("error") or not isinstance(gst_data, dict):
+        message = _error_message(data)
+        logger.warning("gstin_lookup: search returned no details for %s: %s", gstin, message)
+        if any(hint in message.lower() for hint in _NOT_FOUND_HINTS):
+            return {"found": False, "fetched_at": fetched_at}
         return None
 
+    return {
+        "found": True,
+        "legal_name": gst_data.get("lgnm") or gst_data.get("tradeNam") or "",
+        "state": gst_data.get("pradr", {}).get("addr", {}).get("stcd") or _state_from_gstin(gstin),
+        "status": gst_data.get("sts") or "Unknown",
+        "fetched_at": fetched_at,
+    }
+
+
+def _schedule_refresh(gstins: list[str]) -> None:
+    """Re-fetch stale answers in the background, once per GSTIN at a time."""
+    todo = [g for g in gstins if g not in _refreshing and g not in _inflight]
+    if not todo:
+        return
+    _refreshing.update(todo)
+
+    async def refresh() -> None:
+        try:
+            await _fetch_shared(todo)
+        except Exception:
+            logger.warning("gstin_lookup: background refresh failed for %d GSTINs", len(todo), exc_info=True)
+        finally:
+            _refreshing.difference_update(todo)
+
+    _spawn(refresh())
+
 
 def _state_from_gstin(gstin: str) -> str:
     """Extract state code from GSTIN (first 2 digits) and map to state name."""
@@ -112,26 +410,3 @@ def _state_from_gstin(gstin: str) -> str:
     }
     code = gstin[:2] if len(gstin) >= 2 else ""
     return _STATE_CODES.get(code, f"State Code {code}")
-
-
-async def _get_from_cache(gstin: str) -> Optional[Dict[str, Any]]:
-    """Read GSTIN details from Redis cache."""
-    try:
-        from app.infrastructure.cache.session_cache import redis_pool
-        r = redis_pool()
-        raw = await r.get(f"gstin:details:{gstin}")
-        if raw:
-            return json.loads(raw)
-    except Exception:
-        logger.debug("gstin_lookup: cache read failed for %s", gstin, exc_info=True)
-    return None
-
-
-async def _set_cache(gstin: str, details: Dict[str, Any]) -> None:
-    """Write GSTIN details to Redis cache."""
-    try:
-        from app.infrastructure.cache.session_cache import redis_pool
-        r = redis_pool()
-        await r.setex(f"gstin:details:{gstin}", _CACHE_TTL, json.dumps(details))
-    except Exception:
-        logger.debug("gstin_lookup: cache write failed for %s", gstin, exc_info=True)
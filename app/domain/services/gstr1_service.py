@@ -2,10 +2,14 @@
 
 from __future__ import annotations
 
+from collections.abc import AsyncIterator
 from dataclasses import dataclass, field
 from datetime import date
 from decimal import Decimal, InvalidOperation
 
+from app.infrastructure.db.repositories.invoice_aggregate_repository import (
+    InvoiceAggregateRepository,
+)
 from app.infrastructure.db.repositories.invoice_repository import InvoiceRepository
 
 
@@ -55,6 +59,7 @@ class Gstr1B2CInvoice:
     igst: Decimal
     cgst: Decimal
     sgst: Decimal
+    count: int = 1  # invoices rolled into this (pos, rate) bucket
 
 
 @dataclass
@@ -68,6 +73,49 @@ class Gstr1Payload:
 # ---------- Builder from invoices ----------
 
 
+def _b2b_invoice(row, period_start: date) -> Gstr1Invoice:
+    """One ``list_b2b_lines`` row as a GSTR-1 B2B invoice."""
+    taxable = _to_decimal(row.taxable_value)
+    igst = _to_decimal(row.igst_amount)
+    cgst = _to_decimal(row.cgst_amount)
+    sgst = _to_decimal(row.sgst_amount)
+    tax_rate = _to_decimal(row.tax_rate)
+
+    # If rate is missing, try to infer from tax / taxable
+    if tax_rate <= 0 and taxable > 0:
+        total_tax = igst + cgst + sgst
+        if total_tax > 0:
+            tax_rate = (total_tax * Decimal("100")) / taxable
+
+    total_amount = _to_decimal(row.total_amount)
+    if total_amount <= 0:
+        total_amount = taxable + igst + cgst + sgst
+
+    inv_date = row.invoice_date or period_start
+    if isinstance(inv_date, date):
+        dt_str = inv_date.strftime("%d-%m-%Y")
+    else:
+        dt_str = period_start.strftime("%d-%m-%Y")
+
+    pos = (row.place_of_supply or "").strip() or row.ctin[:2]
+
+    item = Gstr1Item(
+        txval=taxable,
+        rt=tax_rate,
+        igst=igst,
+        cgst=cgst,
+        sgst=sgst,
+    )
+
+    return Gstr1Invoice(
+        num=row.invoice_number or "NA",
+        dt=dt_str,
+        val=total_amount,
+        pos=pos,
+        itms=[item],
+    )
+
+
 async def prepare_gstr1_payload(
     user_id,
     gstin: str,
@@ -81,87 +129,25 @@ async def prepare_gstr1_payload(
     Rules (simple v1):
     - If receiver_gstin present and looks like a GSTIN (len == 15) -> B2B.
     - Else -> B2C.
-    - One Gstr1Item per invoice.
+    - One Gstr1Item per B2B invoice.
+    - B2C is summed in SQL per (place of supply, rate), as in the portal's
+      B2CS table, so only B2B rows are materialised.
     """
+    agg_repo = InvoiceAggregateRepository(repo.db)
 
-    invoices = await repo.list_for_period(
+    b2b_rows = await agg_repo.list_b2b_lines(
         user_id=user_id,
         start=period_start,
         end=period_end,
     )
+    b2c_list = await list_b2c_buckets(user_id, period_start, period_end, repo.db)
 
     # Filing period MMYYYY (e.g. 112025)
     fp = f"{period_start.month:02d}{period_start.year}"
 
     b2b_index: dict[str, list[Gstr1Invoice]] = {}
-    b2c_list: list[Gstr1B2CInvoice] = []
-
-    for inv in invoices:
-        receiver_gstin = getattr(inv, "receiver_gstin", None) or getattr(
-            inv, "recipient_gstin", None
-        )
-
-        taxable = _to_decimal(getattr(inv, "taxable_value", None))
-        igst = _to_decimal(getattr(inv, "igst_amount", None))
-        cgst = _to_decimal(getattr(inv, "cgst_amount", None))
-        sgst = _to_decimal(getattr(inv, "sgst_amount", None))
-        tax_rate = _to_decimal(getattr(inv, "tax_rate", None))
-
-        # If rate is missing, try to infer from tax / taxable
-        if tax_rate <= 0 and taxable > 0:
-            total_tax = igst + cgst + sgst
-            if total_tax > 0:
-                tax_rate = (total_tax * Decimal("100")) / taxable
-
-        total_amount = _to_decimal(getattr(inv, "total_amount", None))
-        if total_amount <= 0:
-            total_amount = taxable + igst + cgst + sgst
-
-        inv_date = getattr(inv, "invoice_date", None) or period_start
-        if isinstance(inv_date, date):
-            dt_str = inv_date.strftime("%d-%m-%Y")
-        else:
-            dt_str = period_start.strftime("%d-%m-%Y")
-
-        pos = getattr(inv, "place_of_supply", None) or ""
-        pos = (pos or "").strip()
-        if not pos and receiver_gstin and len(receiver_gstin) >= 2:
-            pos = receiver_gstin[:2]
-        if not pos:
-            pos = "00"
-
-        item = Gstr1Item(
-            txval=taxable,
-            rt=tax_rate,
-            igst=igst,
-            cgst=cgst,
-            sgst=sgst,
-        )
-
-        invoice_model = Gstr1Invoice(
-            num=getattr(inv, "invoice_number", None) or "NA",
-            dt=dt_str,
-            val=total_amount,
-            pos=pos,
-            itms=[item],
-        )
-
-        if receiver_gstin and len(receiver_gstin) == 15:
-            # B2B
-            ctin = receiver_gstin
-            b2b_index.setdefault(ctin, []).append(invoice_model)
-        else:
-            # B2C
-            b2c_list.append(
-                Gstr1B2CInvoice(
-                    pos=pos,
-                    txval=taxable,
-                    rt=tax_rate,
-                    igst=igst,
-                    cgst=cgst,
-                    sgst=sgst,
-                )
-            )
+    for row in b2b_rows:
+        b2b_index.setdefault(row.ctin, []).append(_b2b_invoice(row, period_start))
 
     b2b_entries = [
         Gstr1B2BEntry(ctin=ctin, inv=inv_list) for ctin, inv_list in b2b_index.items()
@@ -175,6 +161,52 @@ async def prepare_gstr1_payload(
     )
 
 
+async def iter_b2b_invoices(
+    user_id,
+    period_start: date,
+    period_end: date,
+    db,
+    *,
+    fetch_rows: int = 2000,
+) -> AsyncIterator[tuple[str, Gstr1Invoice]]:
+    """Yield ``(ctin, invoice)`` for each B2B invoice, grouped by counterparty.
+
+    Rows come from a server-side cursor, so a streaming encoder can emit the
+    ``b2b`` section without holding the period's invoices in memory.
+    """
+    agg_repo = InvoiceAggregateRepository(db)
+    async for row in agg_repo.stream_b2b_lines(
+        user_id=user_id,
+        start=period_start,
+        end=period_end,
+        fetch_rows=fetch_rows,
+    ):
+        yield row.ctin, _b2b_invoice(row, period_start)
+
+
+async def list_b2c_buckets(user_id, period_start: date, period_end: date, db) -> list[Gstr1B2CInvoice]:
+    """B2CS rows, summed in SQL per (place of supply, rate)."""
+    buckets = await InvoiceAggregateRepository(db).totals_by_rate_and_pos(
+        user_id=user_id,
+        start=period_start,
+        end=period_end,
+        direction="outward",
+        b2c_only=True,
+    )
+    return [
+        Gstr1B2CInvoice(
+            pos=bucket.pos,
+            txval=bucket.taxable_value,
+            rt=bucket.rate,
+            igst=bucket.igst,
+            cgst=bucket.cgst,
+            sgst=bucket.sgst,
+            count=bucket.count,
+        )
+        for bucket in buckets
+    ]
+
+
 # ---------- Local 'form' & WhatsApp text ----------
 
 
@@ -184,7 +216,7 @@ def prepare_gstr1_form(payload: Gstr1Payload) -> dict:
     """
     total_b2b_parties = len(payload.b2b)
     total_b2b_invoices = sum(len(entry.inv) for entry in payload.b2b)
-    total_b2c_invoices = len(payload.b2c)
+    total_b2c_invoices = sum(b2c.count for b2c in payload.b2c)
 
     total_txval = Decimal("0.00")
     for entry in payload.b2b:
@@ -61,32 +61,41 @@ async def import_gstr2b(
         MasterGSTClient,
         MasterGSTError,
     )
-    from app.infrastructure.db.repositories.itc_match_repository import ITCMatchRepository
-
-    result = Gstr2bImportResult(period=period)
-
-    # Convert YYYY-MM to MMYYYY for MasterGST
-    parts = period.split("-")
-    if len(parts) == 2:
-        fp = f"{parts[1]}{parts[0]}"
-    else:
-        fp = period
 
     client = MasterGSTClient()
     try:
         auth_token = await client.authenticate(gstin)
-        gstr2b_resp = await client.get_gstr2b(gstin, fp, auth_token)
+        gstr2b_resp = await client.get_gstr2b(gstin, period_to_fp(period), auth_token)
     except MasterGSTError as e:
         logger.error("MasterGST 2B fetch failed for %s/%s: %s", gstin, period, e)
-        result.errors.append(f"MasterGST error: {e}")
-        return result
+        return Gstr2bImportResult(period=period, errors=[f"MasterGST error: {e}"])
     except Exception as e:
         logger.exception("Unexpected error fetching GSTR-2B")
-        result.errors.append(f"Unexpected error: {e}")
-        return result
+        return Gstr2bImportResult(period=period, errors=[f"Unexpected error: {e}"])
+
+    return await store_gstr2b_matches(
+        _parse_gstr2b_response(gstr2b_resp, period_id), period, period_id, db,
+    )
 
-    # Parse 2B response
-    matches = _parse_gstr2b_response(gstr2b_resp, period_id)
+
+def period_to_fp(period: str) -> str:
+    """Convert YYYY-MM to the MMYYYY return period MasterGST expects."""
+    parts = period.split("-")
+    if len(parts) == 2:
+        return f"{parts[1]}{parts[0]}"
+    return period
+
+
+async def store_gstr2b_matches(
+    matches: list[dict],
+    period: str,
+    period_id: UUID,
+    db: Any,
+) -> Gstr2bImportResult:
+    """Replace the period's ITCMatch records with ``matches`` and summarise them."""
+    from app.infrastructure.db.repositories.itc_match_repository import ITCMatchRepository
+
+    result = Gstr2bImportResult(period=period)
     result.total_entries = len(matches)
 
     # Aggregate totals
@@ -142,7 +151,7 @@ async def import_gstr2b_from_json(
     repo = ITCMatchRepository(db)
     await repo.clear_for_period(period_id)
     if matches:
-        await repo.bulk_create(period_id, matches)
+        await repo.bulk_create(period_id, matches, source="upload")
 
     return result
 
@@ -223,7 +232,7 @@ async def import_gstr2b_from_excel(
     repo = ITCMatchRepository(db)
     await repo.clear_for_period(period_id)
     if matches:
-        await repo.bulk_create(period_id, matches)
+        await repo.bulk_create(period_id, matches, source="upload")
 
     logger.info("GSTR-2B Excel imported: period=%s, entries=%d", period, len(matches))
     return result
@@ -286,7 +295,7 @@ async def import_gstr2b_from_pdf(
     repo = ITCMatchRepository(db)
     await repo.clear_for_period(period_id)
     if matches:
-        await repo.bulk_create(period_id, matches)
+        await repo.bulk_create(period_id, matches, source="upload")
 
     logger.info("GSTR-2B PDF imported: period=%s, entries=%d", period, len(matches))
     return result
@@ -0,0 +1,450 @@
+# app/domain/services/gstr2b_sync.py
+"""
+Scheduled GSTR-2B sync for the whole portfolio.
+
+The portal generates GSTR-2B for a month on ``GSTR2B_SYNC_GENERATION_DAY``
+of the next month.  Until then 2B was only pulled on demand — one GSTIN at a
+time from the WhatsApp credit check or ``import-2b`` — so the run-up to the
+GSTR-3B due date sent every CA's clicks to MasterGST at once.  From the
+generation day to ``GSTR2B_SYNC_LAST_DAY`` the ``gstr2b_sync_job`` cron
+pre-fetches 2B for every active ``UserGSTIN`` and ``BusinessClient``,
+stores it and reconciles the period, so the numbers are ready before anyone
+asks.
+
+Fan-out is bounded twice: ``GSTR2B_SYNC_CONCURRENCY`` GSTINs in flight
+overall, and per provider a ``ProviderBudget`` — ``..._PROVIDER_CONCURRENCY``
+slots plus a token bucket of ``..._PROVIDER_RATE`` API calls per second.
+429 / 5xx / network failures are retried with full-jitter exponential
+backoff; a 429 also pauses the provider's bucket for every GSTIN.
+
+Per GSTIN and period the sync state lives in Redis::
+
+    gstr2b_sync:{period}:{gstin}    hash — payload_hash, synced_at, status, entries
+
+A GSTIN synced within ``GSTR2B_SYNC_REFRESH_HOURS`` is not asked again, and
+a response whose lines hash to the stored ``payload_hash`` is not written
+back or reconciled.
+
+The cron never makes a period's 2B worse than it was:
+
+- a 200 whose body is an error (``status_cd`` != "1"), empty, not JSON or
+  has no ``data`` is an ``UnusableResponse`` and retried like a 5xx;
+- an empty payload does not replace 2B lines the period already has
+  (status ``kept``);
+- periods whose 2B the user uploaded (``ITCMatch.source == "upload"``) are
+  left alone (status ``uploaded``).
+
+None of these save the payload hash, so the next run asks again.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import random
+import time
+from collections.abc import Iterable
+from dataclasses import asdict, dataclass
+from datetime import date
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import select
+
+from app.core.config import settings
+
+logger = logging.getLogger("gstr2b_sync")
+
+_KEY_PREFIX = "gstr2b_sync"
+
+# otprequest + authtoken + gstr2b/all
+_CALLS_PER_FETCH = 3
+
+# Periods past these statuses are filed: their 2B no longer matters
+_CLOSED_STATUSES = ("filed", "closed")
+
+DEFAULT_PROVIDER = "mastergst"
+
+
+class UnusableResponse(Exception):
+    """The provider answered 200 but the body holds no 2B to store."""
+
+
+# ---------------------------------------------------------------------------
+# Data types
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class SyncTarget:
+    """One GSTIN to pull 2B for, and the user its ReturnPeriod belongs to."""
+    gstin: str
+    user_id: UUID
+    provider: str = DEFAULT_PROVIDER
+
+
+@dataclass
+class SyncOutcome:
+    gstin: str
+    status: str                     # imported / unchanged / kept / fresh / filed / uploaded / failed
+    entries: int = 0
+    attempts: int = 0
+    error: str = ""
+
+
+class ProviderBudget:
+    """Concurrency slots plus a token bucket for one GST data provider."""
+
+    def __init__(self, concurrency: int, rate: float, burst: float | None = None) -> None:
+        self.slots = asyncio.Semaphore(max(1, concurrency))
+        self.rate = rate
+        self.capacity = max(burst or rate, float(_CALLS_PER_FETCH))
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._paused_until = 0.0
+        self._lock = asyncio.Lock()
+
+    async def take(self, calls: int = 1) -> None:
+        """Wait until ``calls`` API calls fit in the rate budget."""
+        if self.rate <= 0:
+            return
+        async with self._lock:                  # waiters are served in order
+            while True:
+                now = time.monotonic()
+                if now < self._paused_until:
+                    await asyncio.sleep(self._paused_until - now)
+                    continue
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= calls:
+                    self._tokens -= calls
+                    return
+                await asyncio.sleep((calls - self._tokens) / self.rate)
+
+    def pause(self, seconds: float) -> None:
+        """Hold every caller back for ``seconds`` (the provider said 429)."""
+        self._paused_until = max(self._paused_until, time.monotonic() + seconds)
+
+
+def _new_budget() -> ProviderBudget:
+    return ProviderBudget(settings.GSTR2B_SYNC_PROVIDER_CONCURRENCY, settings.GSTR2B_SYNC_PROVIDER_RATE)
+
+
+# ---------------------------------------------------------------------------
+# Scheduling
+# ---------------------------------------------------------------------------
+
+def due_period(today: date | None = None) -> str | None:
+    """The YYYY-MM period whose 2B should be synced today, or None outside the window."""
+    today = today or date.today()
+    if not settings.GSTR2B_SYNC_GENERATION_DAY <= today.day <= settings.GSTR2B_SYNC_LAST_DAY:
+        return None
+    year, month = (today.year, today.month - 1) if today.month > 1 else (today.year - 1, 12)
+    return f"{year:04d}-{month:02d}"
+
+
+async def list_sync_targets(db: Any) -> list[SyncTarget]:
+    """Active GSTINs across ``UserGSTIN`` and ``BusinessClient``, one target per GSTIN."""
+    from app.infrastructure.db.models import BusinessClient, User, UserGSTIN
+
+    user_gstins = (
+        select(UserGSTIN.gstin, UserGSTIN.user_id)
+        .join(User, User.id == UserGSTIN.user_id)
+        .where(UserGSTIN.is_active.is_(True), User.is_active.is_(True))
+    )
+    # Composition taxpayers claim no ITC; a client's periods belong to the
+    # user behind its WhatsApp number
+    clients = (
+        select(BusinessClient.gstin, User.id)
+        .join(User, User.whatsapp_number == BusinessClient.whatsapp_number)
+        .where(
+            BusinessClient.status == "active",
+            BusinessClient.taxpayer_type != "composition",
+            BusinessClient.gstin.is_not(None),
+            User.is_active.is_(True),
+        )
+    )
+    targets: dict[str, SyncTarget] = {}
+    for stmt in (user_gstins, clients):
+        for gstin, user_id in (await db.execute(stmt)).all():
+            gstin = (gstin or "").strip().upper()
+            if len(gstin) == 15 and gstin not in targets:
+                targets[gstin] = SyncTarget(gstin=gstin, user_id=user_id)
+    return list(targets.values())
+
+
+async def _filed_gstins(period: str, db: Any) -> set[str]:
+    from app.infrastructure.db.models import ReturnPeriod
+
+    stmt = select(ReturnPeriod.gstin).where(
+        ReturnPeriod.period == period, ReturnPeriod.status.in_(_CLOSED_STATUSES),
+    )
+    return {g.upper() for g in (await db.execute(stmt)).scalars().all()}
+
+
+async def _uploaded_gstins(period: str, db: Any) -> set[str]:
+    from app.infrastructure.db.models import ITCMatch, ReturnPeriod
+
+    stmt = (
+        select(ReturnPeriod.gstin).distinct()
+        .join(ITCMatch, ITCMatch.period_id == ReturnPeriod.id)
+        .where(ReturnPeriod.period == period, ITCMatch.source == "upload")
+    )
+    return {g.upper() for g in (await db.execute(stmt)).scalars().all()}
+
+
+# ---------------------------------------------------------------------------
+# Redis state
+# ---------------------------------------------------------------------------
+
+def _key(period: str, gstin: str) -> str:
+    return f"{_KEY_PREFIX}:{period}:{gstin}"
+
+
+async def _load_state(r: Any, period: str, gstin: str) -> dict[str, str]:
+    try:
+        return await r.hgetall(_key(period, gstin)) or {}
+    except Exception:
+        logger.warning("2B sync state read failed for %s/%s", gstin, period, exc_info=True)
+        return {}
+
+
+async def _save_state(r: Any, period: str, gstin: str, mapping: dict) -> None:
+    """Best-effort; losing the state only costs one extra import."""
+    try:
+        pipe = r.pipeline(transaction=False)
+        pipe.hset(_key(period, gstin), mapping=mapping)
+        pipe.expire(_key(period, gstin), settings.GSTR2B_SYNC_STATE_TTL_SECONDS)
+        await pipe.execute()
+    except Exception:
+        logger.warning("2B sync state write failed for %s/%s", gstin, period, exc_info=True)
+
+
+def _is_recent(state: dict[str, str], now: float) -> bool:
+    try:
+        synced_at = float(state.get("synced_at") or 0)
+    except ValueError:
+        return False
+    return now - synced_at < settings.GSTR2B_SYNC_REFRESH_HOURS * 3600
+
+
+async def is_fresh(gstin: str, period: str) -> bool:
+    """True if the scheduler synced this GSTIN's 2B for ``period`` recently."""
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    state = await _load_state(get_redis_client(), period, gstin.strip().upper())
+    return _is_recent(state, time.time())
+
+
+def payload_hash(matches: Iterable[dict]) -> str:
+    """Order-independent hash of parsed 2B lines (ignores the response envelope)."""
+    lines = sorted(
+        json.dumps({k: v for k, v in m.items() if k != "period_id"}, sort_keys=True, default=str)
+        for m in matches
+    )
+    return hashlib.sha256("\n".join(lines).encode()).hexdigest()[:32]
+
+
+# ---------------------------------------------------------------------------
+# Fetching
+# ---------------------------------------------------------------------------
+
+def _unusable(resp: Any) -> str:
+    """Why a 200 response carries no 2B, or "" if it does."""
+    if not isinstance(resp, dict):
+        return "body is not a JSON object"
+    if str(resp.get("status_cd", "")) != "1":
+        error = resp.get("error")
+        if isinstance(error, dict):
+            error = error.get("message") or error.get("error_cd")
+        return f"status_cd={resp.get('status_cd')!r} {error or resp.get('status_desc') or ''}".strip()
+    if resp.get("_empty") or "_raw" in resp:
+        return "empty or non-JSON body"
+    if not isinstance(resp.get("data"), dict):
+        return "no data"
+    return ""
+
+
+def _retryable(exc: Exception) -> bool:
+    import httpx
+
+    if isinstance(exc, UnusableResponse):
+        return True
+    status = getattr(exc, "status_code", 0)
+    return status == 429 or status >= 500 or isinstance(exc.__cause__, httpx.TransportError)
+
+
+def _backoff(attempt: int) -> float:
+    """Full jitter: uniform over [0, base * 2^(attempt-1)], capped at a minute."""
+    return random.uniform(0, min(60.0, settings.GSTR2B_SYNC_BACKOFF_SECONDS * 2 ** (attempt - 1)))
+
+
+async def _fetch(target: SyncTarget, period: str, budget: ProviderBudget, outcome: SyncOutcome) -> dict:
+    from app.domain.services.gstr2b_service import period_to_fp
+    from app.infrastructure.external.mastergst_client import (
+        MasterGSTClient,
+        MasterGSTError,
+    )
+
+    client = MasterGSTClient()
+    attempts = max(1, settings.GSTR2B_SYNC_MAX_ATTEMPTS)
+    async with budget.slots:
+        while True:
+            outcome.attempts += 1
+            await budget.take(_CALLS_PER_FETCH)
+            try:
+                token = await client.authenticate(target.gstin)
+                resp = await client.get_gstr2b(target.gstin, period_to_fp(period), token)
+                problem = _unusable(resp)
+                if not problem:
+                    return resp
+                raise UnusableResponse(f"Unusable 2B response: {problem}")
+            except (MasterGSTError, UnusableResponse) as exc:
+                if outcome.attempts >= attempts or not _retryable(exc):
+                    raise
+                delay = _backoff(outcome.attempts)
+                if getattr(exc, "status_code", 0) == 429:
+                    budget.pause(delay)
+                logger.info("2B fetch for %s failed (%s); retry %d in %.1fs",
+                            target.gstin, exc, outcome.attempts, delay)
+                await asyncio.sleep(delay)
+
+
+# ---------------------------------------------------------------------------
+# Sync
+# ---------------------------------------------------------------------------
+
+async def sync_gstin(
+    target: SyncTarget,
+    period: str,
+    budget: ProviderBudget,
+    *,
+    force: bool = False,
+) -> SyncOutcome:
+    """Pull one GSTIN's 2B for ``period``; store and reconcile it if it changed."""
+    from app.core.db import AsyncSessionLocal
+    from app.domain.services.gst_reconciliation import reconcile_period
+    from app.domain.services.gstr2b_service import (
+        _parse_gstr2b_response,
+        store_gstr2b_matches,
+    )
+    from app.infrastructure.cache.redis_client import get_redis_client
+    from app.infrastructure.db.repositories.itc_match_repository import (
+        ITCMatchRepository,
+    )
+    from app.infrastructure.db.repositories.return_period_repository import (
+        ReturnPeriodRepository,
+    )
+
+    outcome = SyncOutcome(gstin=target.gstin, status="imported")
+    r = get_redis_client()
+    state = await _load_state(r, period, target.gstin)
+    if not force and _is_recent(state, time.time()):
+        outcome.status = "fresh"
+        return outcome
+
+    try:
+        resp = await _fetch(target, period, budget, outcome)
+    except Exception as exc:
+        logger.warning("2B sync failed for %s/%s: %s", target.gstin, period, exc)
+        outcome.status, outcome.error = "failed", str(exc)[:200]
+        return outcome
+
+    matches = _parse_gstr2b_response(resp, None)
+    digest = payload_hash(matches)
+    outcome.entries = len(matches)
+    if not force and digest == state.get("payload_hash"):
+        outcome.status = "unchanged"
+    else:
+        try:
+            async with AsyncSessionLocal() as db:
+                rp = await ReturnPeriodRepository(db).create_or_get(target.user_id, target.gstin, period)
+                stored = await ITCMatchRepository(db).count_by_source(rp.id)
+                if stored.get("upload"):
+                    outcome.status = "uploaded"
+                elif not matches and stored:
+                    outcome.status = "kept"
+                else:
+                    await store_gstr2b_matches(matches, period, rp.id, db)
+                    await reconcile_period(rp.id, db)
+        except Exception as exc:
+            logger.exception("2B sync store/reconcile failed for %s/%s", target.gstin, period)
+            outcome.status, outcome.error = "failed", str(exc)[:200]
+            return outcome
+
+    if outcome.status in ("uploaded", "kept"):
+        logger.info("2B sync %s for %s/%s: existing 2B lines left in place",
+                    outcome.status, target.gstin, period)
+        return outcome
+
+    await _save_state(r, period, target.gstin, {
+        "payload_hash": digest,
+        "synced_at": str(time.time()),
+        "status": outcome.status,
+        "entries": str(outcome.entries),
+    })
+    return outcome
+
+
+async def sync_targets(
+    targets: Iterable[SyncTarget],
+    period: str,
+    *,
+    force: bool = False,
+    concurrency: int | None = None,
+    budgets: dict[str, ProviderBudget] | None = None,
+) -> list[SyncOutcome]:
+    """Sync ``targets`` under the global and per-provider budgets."""
+    sem = asyncio.Semaphore(max(1, concurrency or settings.GSTR2B_SYNC_CONCURRENCY))
+    budgets = {} if budgets is None else budgets
+
+    async def one(target: SyncTarget) -> SyncOutcome:
+        budget = budgets.get(target.provider)
+        if budget is None:
+            budget = budgets[target.provider] = _new_budget()
+        async with sem:
+            try:
+                return await sync_gstin(target, period, budget, force=force)
+            except Exception as exc:
+                logger.exception("2B sync failed for %s/%s", target.gstin, period)
+                return SyncOutcome(gstin=target.gstin, status="failed", error=str(exc)[:200])
+
+    return list(await asyncio.gather(*(one(t) for t in targets)))
+
+
+async def run_sync(
+    period: str | None = None,
+    *,
+    force: bool = False,
+    today: date | None = None,
+) -> dict:
+    """Sync every active GSTIN for ``period`` (default: the period due today)."""
+    from app.core.db import AsyncSessionLocal
+
+    period = period or due_period(today)
+    if period is None:
+        return {"period": None, "counts": {}, "failed": []}
+
+    async with AsyncSessionLocal() as db:
+        targets = await list_sync_targets(db)
+        filed = await _filed_gstins(period, db)
+        uploaded = await _uploaded_gstins(period, db)
+
+    outcomes = [SyncOutcome(gstin=t.gstin, status="filed") for t in targets if t.gstin in filed]
+    outcomes += [
+        SyncOutcome(gstin=t.gstin, status="uploaded")
+        for t in targets if t.gstin in uploaded and t.gstin not in filed
+    ]
+    skip = filed | uploaded
+    outcomes += await sync_targets([t for t in targets if t.gstin not in skip], period, force=force)
+
+    counts: dict[str, int] = {}
+    for o in outcomes:
+        counts[o.status] = counts.get(o.status, 0) + 1
+    logger.info("GSTR-2B sync %s: %d GSTIN(s) %s", period, len(outcomes), counts)
+    return {
+        "period": period,
+        "counts": counts,
+        "failed": [asdict(o) for o in outcomes if o.status == "failed"],
+    }
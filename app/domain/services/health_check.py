@@ -327,6 +327,45 @@ async def _check_whatsapp_queue() -> ComponentHealth:
     )
 
 
+async def _check_webhook_dedupe() -> ComponentHealth:
+    """Report webhook re-deliveries skipped by the idempotency store."""
+    from app.infrastructure.cache.webhook_idempotency import duplicate_hits
+
+    if not settings.WHATSAPP_IDEMPOTENCY_ENABLED:
+        return ComponentHealth(
+            name="Webhook Dedupe",
+            status="not_configured",
+            message="WHATSAPP_IDEMPOTENCY_ENABLED is off",
+        )
+
+    hits = await duplicate_hits()
+    return ComponentHealth(
+        name="Webhook Dedupe",
+        status="healthy",
+        latency_ms=0,
+        message=f"{hits['total']} duplicate deliveries skipped",
+        details={"duplicate_hits": hits["total"], "duplicate_hits_local": hits["local"]},
+    )
+
+
+async def _check_audit_trail() -> ComponentHealth:
+    """Report audit_log rows waiting to be written and any failing flush."""
+    from app.infrastructure.db.write_behind import audit_log_sink
+
+    pending = len(audit_log_sink._buffer)
+    failures = audit_log_sink.consecutive_failures
+    return ComponentHealth(
+        name="Audit Trail",
+        status="degraded" if failures else "healthy",
+        latency_ms=0,
+        message=(
+            f"{pending} rows pending, {failures} failed flushes: {audit_log_sink.last_error}"
+            if failures else f"{pending} rows pending"
+        ),
+        details={"pending": pending, "consecutive_failures": failures},
+    )
+
+
 async def _get_db_stats() -> dict[str, Any]:
     """Get database row counts for key tables."""
     from app.core.db import AsyncSessionLocal
@@ -387,6 +426,8 @@ async def run_health_check() -> SystemHealth:
         _check_openai(),
         _check_ocr(),
         _check_whatsapp_queue(),
+        _check_webhook_dedupe(),
+        _check_audit_trail(),
         return_exceptions=True,
     )
 
@@ -1,12 +1,18 @@
 # app/domain/services/intent_router.py
 
 import logging
+import time
 from dataclasses import dataclass
 
+from app.core.metrics import RESOLVE_INTENT_SECONDS
 from app.infrastructure.external.openai_client import detect_intent
 
 logger = logging.getLogger("intent_router")
 
+_DIGIT_TIMER = RESOLVE_INTENT_SECONDS.labels("digit")
+_NLP_TIMER = RESOLVE_INTENT_SECONDS.labels("nlp")
+_FALLBACK_TIMER = RESOLVE_INTENT_SECONDS.labels("nlp_fallback")
+
 # Maps NLP intents to bot state machine states
 INTENT_STATE_MAP = {
     "gst_services": "GST_MENU",
@@ -58,8 +64,11 @@ async def resolve_intent(
     4. If confidence is low, return target_state=None so the caller
        falls through to the "unknown input" path.
     """
+    start = time.perf_counter()
+
     # Single-digit inputs: let number-based routing handle them
     if text.strip() in {"0", "1", "2", "3", "4", "5", "6", "7", "8", "9"}:
+        _DIGIT_TIMER.observe(time.perf_counter() - start)
         return ResolvedAction(
             target_state=None,
             i18n_key=None,
@@ -74,6 +83,7 @@ async def resolve_intent(
         target_state = INTENT_STATE_MAP.get(result.intent)
         i18n_key = INTENT_SCREEN_MAP.get(result.intent)
 
+        _NLP_TIMER.observe(time.perf_counter() - start)
         return ResolvedAction(
             target_state=target_state,
             i18n_key=i18n_key,
@@ -82,6 +92,7 @@ async def resolve_intent(
         )
 
     # Low confidence or unknown: fall back to number-based routing
+    _FALLBACK_TIMER.observe(time.perf_counter() - start)
     return ResolvedAction(
         target_state=None,
         i18n_key=None,
@@ -0,0 +1,473 @@
+# app/domain/services/invoice_bulk_import.py
+"""
+Bulk invoice ingestion for ERP / Tally sync.
+
+The request body (NDJSON or CSV, optionally gzip-compressed) is spooled to a
+temporary file in fixed-size chunks and imported by a background task, so a
+50k-invoice month is one HTTP call and never sits in memory.  Rows are
+validated in batches of ``INVOICE_BULK_BATCH_SIZE``; each batch is COPY-ed
+into a staging table and merged into ``invoices`` by
+``invoice_bulk_repository.merge_batch``, then committed on its own.
+
+Progress and the per-row error report live in Redis so any web worker can
+answer the client's polling::
+
+    invoice_bulk:{job_id}          hash — user_id, status, format, processed,
+                                   inserted, updated, unchanged, failed, error
+    invoice_bulk:{job_id}:errors   list — one CSV chunk per batch
+"""
+
+from __future__ import annotations
+
+import asyncio
+import csv
+import gzip
+import io
+import json
+import logging
+import os
+import tempfile
+import uuid
+from collections.abc import AsyncIterator, Iterator
+from dataclasses import astuple, dataclass
+from datetime import date
+from decimal import Decimal, InvalidOperation
+from typing import IO, Any
+
+from app.core.config import settings
+from app.domain.services.gstin_pan_validation import is_valid_gstin
+
+logger = logging.getLogger("invoice_bulk_import")
+
+_KEY_PREFIX = "invoice_bulk"
+_GZIP_MAGIC = b"\x1f\x8b"
+_MAX_AMOUNT = Decimal("9999999999.99")          # numeric(12, 2)
+
+FORMATS = ("ndjson", "csv")
+ERROR_COLUMNS = ("row", "invoice_number", "outcome", "reason")
+
+# Background tasks are referenced here so they are not garbage-collected mid-run
+_tasks: set[asyncio.Task] = set()
+
+
+@dataclass
+class BulkRow:
+    """One validated invoice, fields in ``invoice_bulk_repository.STAGE_COLUMNS`` order."""
+    row_num: int
+    id: uuid.UUID
+    invoice_number: str
+    invoice_date: date | None
+    supplier_gstin: str | None
+    receiver_gstin: str | None
+    recipient_gstin: str | None
+    place_of_supply: str | None
+    taxable_value: Decimal
+    total_amount: Decimal | None
+    tax_amount: Decimal
+    cgst_amount: Decimal | None
+    sgst_amount: Decimal | None
+    igst_amount: Decimal | None
+    tax_rate: Decimal | None
+    supplier_gstin_valid: bool | None
+    receiver_gstin_valid: bool | None
+    direction: str
+    itc_eligible: bool
+    reverse_charge: bool
+
+    @property
+    def key(self) -> tuple:
+        return (self.supplier_gstin, self.invoice_number, self.direction)
+
+
+@dataclass
+class RowError:
+    row: int
+    invoice_number: str
+    outcome: str                      # failed / skipped
+    reason: str
+
+
+def _key(job_id: str) -> str:
+    return f"{_KEY_PREFIX}:{job_id}"
+
+
+def _errors_key(job_id: str) -> str:
+    return f"{_KEY_PREFIX}:{job_id}:errors"
+
+
+# ---------------------------------------------------------------------------
+# Parsing / validation
+# ---------------------------------------------------------------------------
+
+def detect_format(content_type: str | None, requested: str | None = None) -> str:
+    """``ndjson`` or ``csv`` from an explicit choice or the request Content-Type."""
+    if requested:
+        if requested not in FORMATS:
+            raise ValueError(f"format must be one of: {', '.join(FORMATS)}")
+        return requested
+    ctype = (content_type or "").lower()
+    if "csv" in ctype:
+        return "csv"
+    if "ndjson" in ctype or "jsonl" in ctype or "json-seq" in ctype:
+        return "ndjson"
+    raise ValueError("Send Content-Type text/csv or application/x-ndjson, or pass ?format=")
+
+
+def open_spooled(path: str) -> IO[str]:
+    """Open a spooled body as text, transparently un-gzipping it."""
+    with open(path, "rb") as fh:
+        magic = fh.read(2)
+    if magic == _GZIP_MAGIC:
+        return gzip.open(path, "rt", encoding="utf-8-sig", newline="")
+    return open(path, encoding="utf-8-sig", newline="")
+
+
+def iter_records(fh: IO[str], fmt: str) -> Iterator[tuple[int, dict[str, Any] | None]]:
+    """Yield ``(row_number, record)``; record is None for an unparseable NDJSON line.
+
+    CSV row numbers count the header as row 1, NDJSON row numbers are line numbers.
+    """
+    if fmt == "csv":
+        reader = csv.DictReader(fh)
+        if "invoice_number" not in (reader.fieldnames or []):
+            raise ValueError("CSV header must include an 'invoice_number' column.")
+        yield from enumerate(reader, start=2)
+        return
+    for line_num, line in enumerate(fh, start=1):
+        if not line.strip():
+            continue
+        try:
+            record = json.loads(line)
+        except ValueError:
+            record = None
+        yield line_num, record if isinstance(record, dict) else None
+
+
+def _text(record: dict[str, Any], name: str, max_len: int, errors: list[str], upper: bool = False) -> str | None:
+    value = record.get(name)
+    if value is None:
+        return None
+    value = str(value).strip()
+    if upper:
+        value = value.upper()
+    if len(value) > max_len:
+        errors.append(f"{name} longer than {max_len} characters")
+    return value or None
+
+
+def _amount(record: dict[str, Any], name: str, errors: list[str], *, max_value: Decimal = _MAX_AMOUNT) -> Decimal | None:
+    value = record.get(name)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return None
+    try:
+        amount = Decimal(str(value).replace(",", "").strip()).quantize(Decimal("0.01"))
+    except (InvalidOperation, ValueError):
+        errors.append(f"{name} is not a number")
+        return None
+    if amount < 0 or amount > max_value:
+        errors.append(f"{name} out of range")
+        return None
+    return amount
+
+
+def _flag(record: dict[str, Any], name: str, errors: list[str]) -> bool:
+    value = record.get(name)
+    if value is None or value == "":
+        return False
+    if isinstance(value, bool):
+        return value
+    text_value = str(value).strip().lower()
+    if text_value in ("1", "true", "yes", "y"):
+        return True
+    if text_value in ("0", "false", "no", "n"):
+        return False
+    errors.append(f"{name} must be true/false")
+    return False
+
+
+def validate_row(row_num: int, record: dict[str, Any] | None) -> BulkRow | RowError:
+    """Normalise one record; returns a ``failed`` RowError if it is invalid."""
+    if record is None:
+        return RowError(row=row_num, invoice_number="", outcome="failed", reason="not a JSON object")
+
+    errors: list[str] = []
+    invoice_number = _text(record, "invoice_number", 50, errors) or ""
+    if not invoice_number:
+        errors.append("invoice_number is required")
+
+    invoice_date = None
+    raw_date = record.get("invoice_date")
+    if raw_date:
+        try:
+            invoice_date = date.fromisoformat(str(raw_date).strip()[:10])
+        except ValueError:
+            errors.append("invoice_date must be YYYY-MM-DD")
+
+    direction = (str(record.get("direction") or "outward")).strip().lower()
+    if direction not in ("outward", "inward"):
+        errors.append("direction must be outward or inward")
+
+    supplier_gstin = _text(record, "supplier_gstin", 20, errors, upper=True)
+    receiver_gstin = _text(record, "receiver_gstin", 20, errors, upper=True)
+    recipient_gstin = _text(record, "recipient_gstin", 15, errors, upper=True)
+    place_of_supply = _text(record, "place_of_supply", 2, errors)
+
+    taxable_value = _amount(record, "taxable_value", errors)
+    if taxable_value is None and "taxable_value is not a number" not in errors:
+        errors.append("taxable_value is required")
+    cgst = _amount(record, "cgst_amount", errors)
+    sgst = _amount(record, "sgst_amount", errors)
+    igst = _amount(record, "igst_amount", errors)
+    tax_amount = _amount(record, "tax_amount", errors)
+    if tax_amount is None:
+        tax_amount = sum((v for v in (cgst, sgst, igst) if v is not None), Decimal("0"))
+
+    row = BulkRow(
+        row_num=row_num,
+        id=uuid.uuid4(),
+        invoice_number=invoice_number,
+        invoice_date=invoice_date,
+        supplier_gstin=supplier_gstin,
+        receiver_gstin=receiver_gstin,
+        recipient_gstin=recipient_gstin,
+        place_of_supply=place_of_supply,
+        taxable_value=taxable_value or Decimal("0"),
+        total_amount=_amount(record, "total_amount", errors),
+        tax_amount=tax_amount,
+        cgst_amount=cgst,
+        sgst_amount=sgst,
+        igst_amount=igst,
+        tax_rate=_amount(record, "tax_rate", errors, max_value=Decimal("100")),
+        supplier_gstin_valid=is_valid_gstin(supplier_gstin) if supplier_gstin else None,
+        receiver_gstin_valid=is_valid_gstin(receiver_gstin) if receiver_gstin else None,
+        direction=direction,
+        itc_eligible=_flag(record, "itc_eligible", errors),
+        reverse_charge=_flag(record, "reverse_charge", errors),
+    )
+    if errors:
+        return RowError(row=row_num, invoice_number=invoice_number, outcome="failed", reason="; ".join(errors))
+    return row
+
+
+def dedupe_batch(rows: list[BulkRow]) -> tuple[list[BulkRow], list[RowError]]:
+    """Keep the last row per natural key; earlier repeats are reported as skipped."""
+    last: dict[tuple, BulkRow] = {}
+    skipped: list[RowError] = []
+    for row in rows:
+        previous = last.get(row.key)
+        if previous is not None:
+            skipped.append(RowError(
+                row=previous.row_num, invoice_number=previous.invoice_number,
+                outcome="skipped", reason=f"superseded by row {row.row_num}",
+            ))
+        last[row.key] = row
+    return sorted(last.values(), key=lambda r: r.row_num), skipped
+
+
+def iter_batches(
+    records: Iterator[tuple[int, dict[str, Any] | None]], batch_size: int
+) -> Iterator[list[tuple[int, dict[str, Any] | None]]]:
+    batch: list[tuple[int, dict[str, Any] | None]] = []
+    for item in records:
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+# ---------------------------------------------------------------------------
+# Job lifecycle
+# ---------------------------------------------------------------------------
+
+async def spool_stream(chunks: AsyncIterator[bytes], max_bytes: int | None = None) -> str:
+    """Copy a request body to a temp file as it arrives (still compressed if gzip).
+
+    Raises ``ValueError`` when the body is larger than ``INVOICE_BULK_MAX_BYTES``.
+    """
+    limit = max_bytes or settings.INVOICE_BULK_MAX_BYTES
+    fd, path = tempfile.mkstemp(prefix="invoice_bulk_")
+    size = 0
+    try:
+        with os.fdopen(fd, "wb") as out:
+            async for chunk in chunks:
+                size += len(chunk)
+                if size > limit:
+                    raise ValueError(f"Body is larger than {limit // (1024 * 1024)} MB.")
+                out.write(chunk)
+    except BaseException:
+        os.unlink(path)
+        raise
+    if size == 0:
+        os.unlink(path)
+        raise ValueError("Empty body.")
+    return path
+
+
+async def start_import(chunks: AsyncIterator[bytes], user_id: uuid.UUID, fmt: str) -> str:
+    """Spool the body, register the job in Redis and run it in the background."""
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    path = await spool_stream(chunks)
+    job_id = uuid.uuid4().hex
+    r = get_redis_client()
+    try:
+        await r.hset(_key(job_id), mapping={
+            "user_id": str(user_id),
+            "status": "queued",
+            "format": fmt,
+            "processed": 0,
+            "inserted": 0,
+            "updated": 0,
+            "unchanged": 0,
+            "failed": 0,
+            "error": "",
+        })
+        await r.expire(_key(job_id), settings.INVOICE_BULK_RESULT_TTL_SECONDS)
+    except BaseException:
+        os.unlink(path)
+        raise
+
+    task = asyncio.create_task(run_import(job_id, user_id, path, fmt))
+    _tasks.add(task)
+    task.add_done_callback(_tasks.discard)
+    return job_id
+
+
+def _errors_csv(errors: list[RowError]) -> str:
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    for err in errors:
+        writer.writerow([err.row, err.invoice_number, err.outcome, err.reason])
+    return buf.getvalue()
+
+
+async def _record(r: Any, job_id: str, processed: int, counts: dict[str, int], errors: list[RowError]) -> None:
+    pipe = r.pipeline(transaction=False)
+    if errors:
+        errors.sort(key=lambda e: e.row)
+        pipe.rpush(_errors_key(job_id), _errors_csv(errors))
+        pipe.expire(_errors_key(job_id), settings.INVOICE_BULK_RESULT_TTL_SECONDS)
+    pipe.hincrby(_key(job_id), "processed", processed)
+    for outcome, n in counts.items():
+        if n:
+            pipe.hincrby(_key(job_id), outcome, n)
+    await pipe.execute()
+
+
+async def import_batch(db: Any, user_id: uuid.UUID, batch: list[tuple[int, dict[str, Any] | None]]) -> tuple[dict[str, int], list[RowError]]:
+    """Validate, dedupe and merge one batch, then commit it.  Returns (counts, row errors)."""
+    from app.infrastructure.db.repositories.invoice_bulk_repository import merge_batch
+    from app.infrastructure.db.repositories.monthly_rollup_repository import (
+        refresh_rollup_for_dates,
+    )
+
+    valid: list[BulkRow] = []
+    errors: list[RowError] = []
+    for row_num, record in batch:
+        parsed = validate_row(row_num, record)
+        if isinstance(parsed, RowError):
+            errors.append(parsed)
+        else:
+            valid.append(parsed)
+    valid, skipped = dedupe_batch(valid)
+    errors.extend(skipped)
+
+    try:
+        merged = await merge_batch(db, user_id, [astuple(row) for row in valid])
+        await db.commit()
+    except Exception:
+        logger.exception("Invoice bulk batch at row %d failed", batch[0][0])
+        await db.rollback()
+        errors.extend(
+            RowError(row=v.row_num, invoice_number=v.invoice_number, outcome="failed", reason="database error")
+            for v in valid
+        )
+        return {"failed": len(errors) - len(skipped)}, errors
+
+    if merged.dates:
+        await refresh_rollup_for_dates(db, user_id, merged.dates)
+    counts = {
+        "inserted": merged.inserted,
+        "updated": merged.updated,
+        "unchanged": merged.unchanged,
+        "failed": len(errors) - len(skipped),
+    }
+    return counts, errors
+
+
+async def run_import(
+    job_id: str,
+    user_id: uuid.UUID,
+    path: str,
+    fmt: str,
+    *,
+    batch_size: int | None = None,
+) -> None:
+    """Import the spooled body at ``path`` batch by batch, then delete it."""
+    from app.core.db import AsyncSessionLocal
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    size = batch_size or settings.INVOICE_BULK_BATCH_SIZE
+    r = get_redis_client()
+    status, error = "done", ""
+    try:
+        await r.hset(_key(job_id), "status", "running")
+        with open_spooled(path) as fh:
+            async with AsyncSessionLocal() as db:
+                for batch in iter_batches(iter_records(fh, fmt), size):
+                    counts, errors = await import_batch(db, user_id, batch)
+                    await _record(r, job_id, len(batch), counts, errors)
+    except (UnicodeDecodeError, gzip.BadGzipFile, EOFError):
+        status, error = "failed", "Could not read the body. Send UTF-8 text, optionally gzip-compressed."
+    except ValueError as exc:
+        status, error = "failed", str(exc)
+    except Exception:
+        logger.exception("Invoice bulk import %s failed", job_id)
+        status, error = "failed", "Unexpected error; rows before this point were imported."
+    finally:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+        try:
+            await r.hset(_key(job_id), mapping={"status": status, "error": error})
+        except Exception:
+            logger.warning("Could not record final status for invoice bulk import %s", job_id)
+    logger.info("Invoice bulk import %s finished: %s", job_id, status)
+
+
+async def get_import_status(job_id: str, user_id: uuid.UUID) -> dict[str, Any] | None:
+    """Progress for a job owned by ``user_id`` (``None`` if unknown or not theirs)."""
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    data = await get_redis_client().hgetall(_key(job_id))
+    if not data or data.get("user_id") != str(user_id):
+        return None
+    status = {
+        "job_id": job_id,
+        "status": data.get("status", ""),
+        "format": data.get("format", ""),
+        "error": data.get("error", ""),
+    }
+    for name in ("processed", "inserted", "updated", "unchanged", "failed"):
+        status[name] = int(data.get(name) or 0)
+    return status
+
+
+async def iter_errors_csv(job_id: str, chunk: int = 50) -> AsyncIterator[str]:
+    """Stream the per-row error report (header first) straight from Redis."""
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    r = get_redis_client()
+    buf = io.StringIO()
+    csv.writer(buf).writerow(ERROR_COLUMNS)
+    yield buf.getvalue()
+    start = 0
+    while True:
+        parts = await r.lrange(_errors_key(job_id), start, start + chunk - 1)
+        if not parts:
+            return
+        yield "".join(parts)
+        start += len(parts)
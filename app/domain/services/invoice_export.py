@@ -0,0 +1,307 @@
+# app/domain/services/invoice_export.py
+"""
+Streaming invoice and return exports (CSV, XLSX, GSTR-1 / GSTR-3B JSON).
+
+Rows are read from a server-side cursor in batches of ``EXPORT_FETCH_ROWS``
+as plain column tuples and pushed through incremental encoders, so memory
+stays flat however many invoices a user has and the first bytes (CSV
+header, XLSX preamble, GSTR-1 opening) go out before the query returns.
+
+Each generator opens its own session: a ``StreamingResponse`` body runs
+after the route returns, when the request-scoped ``get_db`` session may
+already be closed.
+"""
+
+from __future__ import annotations
+
+import csv
+import io
+import logging
+import re
+import uuid
+import zipfile
+from collections.abc import AsyncIterator, Sequence
+from datetime import date
+from typing import Any
+from xml.sax.saxutils import escape
+
+from sqlalchemy import select
+
+from app.core.config import settings
+from app.infrastructure.db.models import Invoice
+
+logger = logging.getLogger("invoice_export")
+
+FORMATS = ("csv", "xlsx")
+MEDIA_TYPES = {
+    "csv": "text/csv",
+    "xlsx": "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
+}
+
+EXPORT_COLUMNS: tuple[str, ...] = (
+    "invoice_number",
+    "invoice_date",
+    "direction",
+    "supplier_gstin",
+    "receiver_gstin",
+    "recipient_gstin",
+    "place_of_supply",
+    "taxable_value",
+    "tax_rate",
+    "cgst_amount",
+    "sgst_amount",
+    "igst_amount",
+    "tax_amount",
+    "total_amount",
+    "itc_eligible",
+    "reverse_charge",
+    "gstr2b_match_status",
+)
+
+
+# ---------------------------------------------------------------------------
+# Rows
+# ---------------------------------------------------------------------------
+
+def invoice_export_stmt(
+    user_id: uuid.UUID,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    direction: str | None = None,
+):
+    """Export columns for one user's invoices, oldest first."""
+    stmt = select(*(getattr(Invoice, c) for c in EXPORT_COLUMNS)).where(Invoice.user_id == user_id)
+    if date_from:
+        stmt = stmt.where(Invoice.invoice_date >= date_from)
+    if date_to:
+        stmt = stmt.where(Invoice.invoice_date <= date_to)
+    if direction:
+        stmt = stmt.where(Invoice.direction == direction)
+    return (
+        stmt.order_by(Invoice.invoice_date, Invoice.created_at)
+        .execution_options(yield_per=settings.EXPORT_FETCH_ROWS)
+    )
+
+
+async def iter_invoice_rows(
+    user_id: uuid.UUID,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    direction: str | None = None,
+) -> AsyncIterator[Sequence[Any]]:
+    """Stream export rows for ``user_id`` from a server-side cursor."""
+    from app.core.db import AsyncSessionLocal
+
+    async with AsyncSessionLocal() as db:
+        stream = await db.stream(invoice_export_stmt(user_id, date_from, date_to, direction))
+        async for row in stream:
+            yield row
+
+
+# ---------------------------------------------------------------------------
+# CSV
+# ---------------------------------------------------------------------------
+
+async def iter_csv(
+    rows: AsyncIterator[Sequence[Any]],
+    columns: Sequence[str] = EXPORT_COLUMNS,
+    *,
+    flush_rows: int | None = None,
+) -> AsyncIterator[str]:
+    """Header first, then one chunk per ``EXPORT_FLUSH_ROWS`` rows."""
+    flush_every = flush_rows or settings.EXPORT_FLUSH_ROWS
+    buf = io.StringIO()
+    writer = csv.writer(buf)
+    writer.writerow(columns)
+    yield buf.getvalue()
+    buf.seek(0)
+    buf.truncate()
+
+    pending = 0
+    async for row in rows:
+        writer.writerow(row)
+        pending += 1
+        if pending >= flush_every:
+            yield buf.getvalue()
+            buf.seek(0)
+            buf.truncate()
+            pending = 0
+    if pending:
+        yield buf.getvalue()
+
+
+# ---------------------------------------------------------------------------
+# XLSX
+#
+# A minimal SpreadsheetML package written through ``zipfile`` onto a
+# non-seekable sink: zipfile then uses data descriptors, so each part is
+# emitted as it is deflated instead of after the archive is complete.
+# Strings are written inline (no shared-strings table to hold in memory).
+# ---------------------------------------------------------------------------
+
+_XLSX_STATIC = {
+    "[Content_Types].xml": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" '
+        'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        "</Types>"
+    ),
+    "_rels/.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" '
+        'Target="xl/workbook.xml"/>'
+        "</Relationships>"
+    ),
+    "xl/_rels/workbook.xml.rels": (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" '
+        'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" '
+        'Target="worksheets/sheet1.xml"/>'
+        "</Relationships>"
+    ),
+}
+
+_WORKBOOK = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+    'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+    '<sheets><sheet name="{name}" sheetId="1" r:id="rId1"/></sheets>'
+    "</workbook>"
+)
+
+_SHEET_OPEN = (
+    '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+    '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+    "<sheetData>"
+)
+_SHEET_CLOSE = "</sheetData></worksheet>"
+
+# Characters XML 1.0 does not allow, even escaped
+_XML_ILLEGAL = re.compile("[\x00-\x08\x0b\x0c\x0e-\x1f]")
+
+
+class _Sink:
+    """Write-only, non-seekable file object that hands back what was written."""
+
+    def __init__(self) -> None:
+        self._parts: list[bytes] = []
+
+    def write(self, data: bytes) -> int:
+        self._parts.append(bytes(data))
+        return len(data)
+
+    def flush(self) -> None:
+        pass
+
+    def drain(self) -> bytes:
+        out = b"".join(self._parts)
+        self._parts.clear()
+        return out
+
+
+def _cell(value: Any) -> str:
+    if value is None:
+        return "<c/>"
+    if isinstance(value, bool):
+        return f'<c t="b"><v>{int(value)}</v></c>'
+    if isinstance(value, (int, float)) or hasattr(value, "as_tuple"):       # Decimal
+        return f"<c><v>{value}</v></c>"
+    text = _XML_ILLEGAL.sub("", str(value))
+    return f'<c t="inlineStr"><is><t>{escape(text)}</t></is></c>'
+
+
+def _xlsx_row(values: Sequence[Any]) -> str:
+    return "<row>" + "".join(_cell(v) for v in values) + "</row>"
+
+
+async def iter_xlsx(
+    rows: AsyncIterator[Sequence[Any]],
+    columns: Sequence[str] = EXPORT_COLUMNS,
+    *,
+    sheet_name: str = "Invoices",
+    flush_rows: int | None = None,
+) -> AsyncIterator[bytes]:
+    """Single-sheet workbook: header row, then ``rows``; dates as ISO text."""
+    flush_every = flush_rows or settings.EXPORT_FLUSH_ROWS
+    sink = _Sink()
+    with zipfile.ZipFile(sink, "w", compression=zipfile.ZIP_DEFLATED) as zf:
+        for name, body in _XLSX_STATIC.items():
+            zf.writestr(name, body)
+        zf.writestr("xl/workbook.xml", _WORKBOOK.format(name=escape(sheet_name[:31])))
+
+        with zf.open("xl/worksheets/sheet1.xml", "w", force_zip64=True) as sheet:
+            sheet.write((_SHEET_OPEN + _xlsx_row(columns)).encode())
+            yield sink.drain()
+
+            pending: list[str] = []
+            async for row in rows:
+                pending.append(_xlsx_row(row))
+                if len(pending) >= flush_every:
+                    sheet.write("".join(pending).encode())
+                    pending.clear()
+                    chunk = sink.drain()
+                    if chunk:
+                        yield chunk
+            sheet.write(("".join(pending) + _SHEET_CLOSE).encode())
+    yield sink.drain()
+
+
+async def iter_invoice_export(
+    fmt: str,
+    user_id: uuid.UUID,
+    date_from: date | None = None,
+    date_to: date | None = None,
+    direction: str | None = None,
+) -> AsyncIterator[str | bytes]:
+    """Encoded export body for ``fmt`` (``csv`` or ``xlsx``)."""
+    rows = iter_invoice_rows(user_id, date_from, date_to, direction)
+    encoder = iter_xlsx if fmt == "xlsx" else iter_csv
+    async for chunk in encoder(rows):
+        yield chunk
+
+
+# ---------------------------------------------------------------------------
+# Return JSON
+# ---------------------------------------------------------------------------
+
+async def iter_gstr1_export(
+    user_id: uuid.UUID,
+    gstin: str,
+    period_start: date,
+    period_end: date,
+) -> AsyncIterator[str]:
+    """Portal-format GSTR-1 JSON for one period, B2B invoices streamed."""
+    from app.core.db import AsyncSessionLocal
+    from app.domain.services.gst_export import iter_gstr1_json
+    from app.domain.services.gstr1_service import iter_b2b_invoices, list_b2c_buckets
+
+    fp = f"{period_start.month:02d}{period_start.year}"
+    async with AsyncSessionLocal() as db:
+        b2c = await list_b2c_buckets(user_id, period_start, period_end, db)
+        b2b = iter_b2b_invoices(
+            user_id, period_start, period_end, db, fetch_rows=settings.EXPORT_FETCH_ROWS,
+        )
+        async for chunk in iter_gstr1_json(gstin, fp, b2b, b2c):
+            yield chunk
+
+
+async def gstr3b_export(db: Any, user_id: uuid.UUID, gstin: str, period_start: date, period_end: date) -> dict:
+    """Portal-format GSTR-3B JSON, summed in SQL (one row per direction)."""
+    from app.domain.services.gst_export import (
+        gstr3b_summary_from_totals,
+        make_gstr3b_json,
+    )
+    from app.infrastructure.db.repositories.invoice_aggregate_repository import (
+        InvoiceAggregateRepository,
+    )
+
+    totals = await InvoiceAggregateRepository(db).totals_by_direction(user_id, period_start, period_end)
+    return make_gstr3b_json(gstin, period_start, gstr3b_summary_from_totals(totals))
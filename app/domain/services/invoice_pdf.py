@@ -312,3 +312,93 @@ def generate_multi_invoice_summary_pdf(invoices: list[dict]) -> bytes:
 
     doc.build(elements)
     return buf.getvalue()
+
+
+def write_invoice_report_pdf(rows_path: str, out_path: str, header: dict) -> int:
+    """
+    Render the CA client invoice report to ``out_path``.
+
+    Rows are read one at a time from ``rows_path`` (JSON lines of
+    ``[invoice_number, invoice_date, taxable, tax, total]``) and drawn page
+    by page, so report size does not depend on holding the invoices in
+    memory.  Runs inside the PDF render pool.
+
+    Args:
+        rows_path: JSON-lines spool written by ``pdf_renderer``.
+        out_path: Destination PDF file.
+        header: name, gstin, pan, whatsapp_number, generated, count.
+
+    Returns:
+        Number of pages written.
+    """
+    import json
+
+    from reportlab.pdfgen import canvas
+
+    p = canvas.Canvas(out_path, pagesize=A4, pageCompression=1)
+    width, height = A4
+    y = height - 50
+    pages = 1
+
+    def line(text: str, step: int = 16):
+        nonlocal y, pages
+        if y < 60:
+            p.showPage()
+            pages += 1
+            y = height - 50
+            p.setFont("Helvetica", 10)
+        p.drawString(50, y, text)
+        y -= step
+
+    def fmt(v):
+        return f"{float(v):,.2f}" if v is not None else "-"
+
+    # Header
+    p.setFont("Helvetica-Bold", 16)
+    line(f"Invoice Report: {header.get('name') or '-'}", step=24)
+
+    p.setFont("Helvetica", 11)
+    line(f"GSTIN: {header.get('gstin') or '-'}")
+    line(f"PAN: {header.get('pan') or '-'}")
+    line(f"WhatsApp: {header.get('whatsapp_number') or '-'}")
+    line(f"Total Invoices: {header.get('count', 0)}")
+    line(f"Generated: {header.get('generated') or datetime.now().date().isoformat()}")
+    line("", step=12)
+
+    if not header.get("count"):
+        line("No invoices found for this client.")
+    else:
+        # Table header
+        p.setFont("Helvetica-Bold", 9)
+        line(
+            f"{'No.':<5} {'Invoice #':<18} {'Date':<12} "
+            f"{'Taxable':>12} {'Tax':>12} {'Total':>12}"
+        )
+        p.setFont("Helvetica", 9)
+        line("-" * 80, step=12)
+
+        total_taxable = total_tax = total_amount = 0.0
+        with open(rows_path, encoding="utf-8") as fh:
+            for i, raw in enumerate(fh, 1):
+                inv_no, inv_date, taxable, tax, total = json.loads(raw)
+                total_taxable += float(taxable or 0)
+                total_tax += float(tax or 0)
+                total_amount += float(total or 0)
+                line(
+                    f"{i:<5} {(inv_no or '-'):<18} {(inv_date or '-'):<12} "
+                    f"{fmt(taxable):>12} {fmt(tax):>12} {fmt(total):>12}"
+                )
+
+        # Totals
+        line("", step=8)
+        line("-" * 80, step=12)
+        p.setFont("Helvetica-Bold", 10)
+        line(
+            f"{'TOTAL':<35} "
+            f"{fmt(total_taxable):>12} {fmt(total_tax):>12} "
+            f"{fmt(total_amount):>12}"
+        )
+
+    p.showPage()
+    p.save()
+    return pages
@@ -153,6 +153,7 @@ class ITRResult:
     new_regime: TaxBreakdown | None = None
     recommended_regime: str = ""
     savings: Decimal = Decimal("0")  # How much you save with recommended regime
+    config_version: str = ""  # ITRSlabConfig.version used; "" = module constants
 
 
 # ---------------------------------------------------------------------------
@@ -476,6 +477,7 @@ def compute_itr1(
         new_regime=new,
         recommended_regime=recommended,
         savings=savings,
+        config_version=slab_config.version if slab_config else "",
     )
 
 
@@ -527,6 +529,7 @@ def compute_itr4(
         new_regime=new,
         recommended_regime=recommended,
         savings=savings,
+        config_version=slab_config.version if slab_config else "",
     )
 
 
@@ -675,6 +678,7 @@ def compute_itr2(
         new_regime=new,
         recommended_regime=recommended,
         savings=savings,
+        config_version=slab_config.version if slab_config else "",
     )
 
 
@@ -10,6 +10,7 @@ suitable for scikit-learn models.  30 features total:
 
 from __future__ import annotations
 
+import hashlib
 import logging
 from dataclasses import dataclass
 from decimal import Decimal
@@ -57,6 +58,13 @@ FEATURE_NAMES: list[str] = [
 
 FEATURE_COUNT: int = len(FEATURE_NAMES)  # 30
 
+# Stamped on cached feature snapshots.  Changes with the layout; bump the
+# revision when the computation of an existing feature changes.
+_FEATURE_REVISION = 1
+FEATURE_VERSION: str = hashlib.sha1(
+    f"{_FEATURE_REVISION}:{','.join(FEATURE_NAMES)}".encode()
+).hexdigest()[:12]
+
 
 @dataclass
 class FeatureVector:
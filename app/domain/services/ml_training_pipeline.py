@@ -3,23 +3,36 @@
 Training pipeline for the ML risk scoring model.
 
 Collects CA-labeled RiskAssessment records, extracts features, trains
-a GradientBoosting model, stores the serialized model in PostgreSQL,
+a gradient-boosting model, stores the serialized model in PostgreSQL,
 and optionally auto-activates if quality exceeds the previous active model.
+
+Feature vectors are built in batches of ``ML_FEATURE_BATCH_SIZE`` periods
+with a fixed number of queries per batch (``_load_risk_metrics_bulk``) and
+cached in ``ml_feature_snapshots``.  A snapshot is reused while its
+``feature_version`` matches, it is newer than the period row, and the
+period is filed/closed or the snapshot is younger than
+``ML_FEATURE_CACHE_TTL_HOURS``.  The candidates in ``ML_RISK_CANDIDATES``
+are compared by parallel k-fold CV and the best one is fitted; wall-clock
+time per stage is logged and stored with the model metrics.
 """
 
 from __future__ import annotations
 
+import asyncio
 import json
 import logging
-from dataclasses import dataclass
-from datetime import datetime, timezone
+import time
+from dataclasses import dataclass, field
+from datetime import datetime, timedelta, timezone
+from uuid import UUID
 
 import numpy as np
-from sqlalchemy import select, func
+from sqlalchemy import func, or_, select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
-from app.infrastructure.db.models import RiskAssessment, ReturnPeriod
+from app.infrastructure.db.models import MLFeatureSnapshot, ReturnPeriod, RiskAssessment
 
 logger = logging.getLogger("ml_training_pipeline")
 
@@ -36,6 +49,9 @@ class TrainingResult:
     f1_macro: float
     feature_importances: dict[str, float]
     auto_activated: bool
+    algorithm: str = "gradient_boosting"
+    cv_scores: list[dict] = field(default_factory=list)
+    stage_seconds: dict[str, float] = field(default_factory=dict)
 
     def to_dict(self) -> dict:
         return {
@@ -48,11 +64,121 @@ class TrainingResult:
                 k: round(v, 6) for k, v in self.feature_importances.items()
             },
             "auto_activated": self.auto_activated,
+            "algorithm": self.algorithm,
+            "cv_scores": self.cv_scores,
+            "stage_seconds": {k: round(v, 3) for k, v in self.stage_seconds.items()},
         }
 
 
+# ── Feature snapshots ─────────────────────────────────────────
+
+def labeled_assessments_stmt():
+    """(period_id, outcome) for every CA-reviewed assessment, newest first."""
+    return (
+        select(RiskAssessment.period_id, RiskAssessment.ca_final_outcome)
+        .where(RiskAssessment.ca_final_outcome.is_not(None))
+        .order_by(RiskAssessment.computed_at.desc())
+    )
+
+
+def cached_features_stmt(period_ids: list[UUID], feature_version: str, now: datetime):
+    """Snapshots for ``period_ids`` that are still valid (see module docstring)."""
+    fresh_after = now - timedelta(hours=settings.ML_FEATURE_CACHE_TTL_HOURS)
+    return (
+        select(MLFeatureSnapshot.period_id, MLFeatureSnapshot.features_json)
+        .join(ReturnPeriod, ReturnPeriod.id == MLFeatureSnapshot.period_id)
+        .where(
+            MLFeatureSnapshot.period_id.in_(period_ids),
+            MLFeatureSnapshot.feature_version == feature_version,
+            MLFeatureSnapshot.computed_at >= ReturnPeriod.updated_at,
+            or_(
+                ReturnPeriod.status.in_(("filed", "closed")),
+                MLFeatureSnapshot.computed_at >= fresh_after,
+            ),
+        )
+    )
+
+
+def upsert_snapshots_stmt(rows: list[dict]):
+    """INSERT ... ON CONFLICT (period_id) DO UPDATE for freshly built vectors."""
+    stmt = pg_insert(MLFeatureSnapshot).values(rows)
+    return stmt.on_conflict_do_update(
+        index_elements=[MLFeatureSnapshot.period_id],
+        set_={
+            "feature_version": stmt.excluded.feature_version,
+            "features_json": stmt.excluded.features_json,
+            "computed_at": stmt.excluded.computed_at,
+        },
+    )
+
+
+def _batches(items: list, size: int):
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+async def load_feature_vectors(
+    period_ids: list[UUID],
+    db: AsyncSession,
+    use_cache: bool = True,
+) -> dict[UUID, list[float]]:
+    """Feature values per period: valid snapshots first, the rest in bulk.
+
+    Newly computed vectors are written back to ``ml_feature_snapshots``.
+    A batch that fails to load is logged and left out.
+    """
+    from app.domain.services.gst_risk_scoring import _load_risk_metrics_bulk
+    from app.domain.services.ml_feature_engineering import (
+        FEATURE_VERSION,
+        metrics_to_features,
+    )
+
+    batch_size = max(1, settings.ML_FEATURE_BATCH_SIZE)
+    now = datetime.now(timezone.utc)
+    vectors: dict[UUID, list[float]] = {}
+
+    if use_cache:
+        for batch in _batches(period_ids, batch_size):
+            result = await db.execute(cached_features_stmt(batch, FEATURE_VERSION, now))
+            for period_id, features_json in result.all():
+                vectors[period_id] = json.loads(features_json)
+    cached = len(vectors)
+
+    missing = [pid for pid in period_ids if pid not in vectors]
+    for batch in _batches(missing, batch_size):
+        try:
+            metrics = await _load_risk_metrics_bulk(batch, db)
+        except Exception:
+            logger.warning(
+                "Failed to extract features for %d periods (first %s)",
+                len(batch), batch[0], exc_info=True,
+            )
+            await db.rollback()
+            continue
+        rows = []
+        for period_id, m in metrics.items():
+            values = [float(v) for v in metrics_to_features(m).values]
+            vectors[period_id] = values
+            rows.append({
+                "period_id": period_id,
+                "feature_version": FEATURE_VERSION,
+                "features_json": json.dumps(values),
+                "computed_at": now,
+            })
+        if rows:
+            await db.execute(upsert_snapshots_stmt(rows))
+            await db.commit()
+
+    logger.info(
+        "ML features: %d periods (%d cached, %d computed)",
+        len(period_ids), cached, len(vectors) - cached,
+    )
+    return vectors
+
+
 async def collect_training_data(
     db: AsyncSession,
+    use_cache: bool = True,
 ) -> tuple[np.ndarray, np.ndarray, list[str]]:
     """Collect labeled training data from CA-reviewed risk assessments.
 
@@ -62,44 +188,29 @@ async def collect_training_data(
     y : np.ndarray  shape (n_samples,) — string labels
     feature_names : list[str]
     """
-    from app.domain.services.gst_risk_scoring import _load_risk_metrics
-    from app.domain.services.ml_feature_engineering import (
-        metrics_to_features,
-        FEATURE_NAMES,
-    )
+    from app.domain.services.ml_feature_engineering import FEATURE_NAMES
 
-    # Query all risk assessments with CA outcomes
-    stmt = (
-        select(RiskAssessment)
-        .where(RiskAssessment.ca_final_outcome.is_not(None))
-        .order_by(RiskAssessment.computed_at.desc())
-    )
-    result = await db.execute(stmt)
-    assessments = list(result.scalars().all())
+    result = await db.execute(labeled_assessments_stmt())
+    labeled = result.all()
 
-    if not assessments:
+    if not labeled:
         return np.empty((0, len(FEATURE_NAMES))), np.empty(0), FEATURE_NAMES
 
+    period_ids = list(dict.fromkeys(period_id for period_id, _ in labeled))
+    vectors = await load_feature_vectors(period_ids, db, use_cache=use_cache)
+
     X_list = []
     y_list = []
-
-    for ra in assessments:
-        try:
-            metrics = await _load_risk_metrics(ra.period_id, db)
-            fv = metrics_to_features(metrics)
-            X_list.append(fv.values)
-            y_list.append(ra.ca_final_outcome)
-        except Exception:
-            logger.warning(
-                "Failed to extract features for assessment %s (period %s)",
-                ra.id, ra.period_id, exc_info=True,
-            )
-            continue
+    for period_id, outcome in labeled:
+        values = vectors.get(period_id)
+        if values is not None:
+            X_list.append(values)
+            y_list.append(outcome)
 
     if not X_list:
         return np.empty((0, len(FEATURE_NAMES))), np.empty(0), FEATURE_NAMES
 
-    X = np.vstack(X_list)
+    X = np.asarray(X_list, dtype=np.float64)
     y = np.array(y_list)
     return X, y, FEATURE_NAMES
 
@@ -143,17 +254,22 @@ async def train_and_store(
     db: AsyncSession,
     auto_activate: bool = True,
 ) -> TrainingResult:
-    """Full training pipeline: collect → train → store → optionally activate.
+    """Full training pipeline: collect → cross-validate → train → store →
+    optionally activate.
 
     Raises
     ------
     ValueError if insufficient labeled data.
     """
-    from app.domain.services.ml_risk_model import RiskMLModel
+    from app.domain.services.ml_risk_model import RiskMLModel, cross_validate_candidates
     from app.infrastructure.db.repositories.ml_model_repository import MLModelRepository
 
+    stage_seconds: dict[str, float] = {}
+    started = time.perf_counter()
+
     # 1. Collect training data
     X, y, feature_names = await collect_training_data(db)
+    stage_seconds["collect"] = time.perf_counter() - started
 
     if len(y) < settings.ML_RISK_MIN_SAMPLES:
         raise ValueError(
@@ -162,10 +278,27 @@ async def train_and_store(
             f"CAs need to review more assessments."
         )
 
-    # 2. Train model
+    # 2. Pick the best candidate by cross-validation (CPU-bound: off the loop)
+    candidates = [
+        a.strip() for a in settings.ML_RISK_CANDIDATES.split(",") if a.strip()
+    ] or ["gradient_boosting"]
+    started = time.perf_counter()
+    cv_scores = await asyncio.to_thread(
+        cross_validate_candidates,
+        X, y, candidates,
+        settings.ML_RISK_N_ESTIMATORS,
+        settings.ML_RISK_MAX_DEPTH,
+        settings.ML_RISK_CV_FOLDS,
+        settings.ML_RISK_N_JOBS,
+    )
+    stage_seconds["cross_validate"] = time.perf_counter() - started
+    algorithm = cv_scores[0].algorithm if cv_scores else candidates[0]
+
+    # 3. Train model
     model = RiskMLModel(
         n_estimators=settings.ML_RISK_N_ESTIMATORS,
         max_depth=settings.ML_RISK_MAX_DEPTH,
+        algorithm=algorithm,
     )
 
     repo = MLModelRepository(db)
@@ -174,23 +307,30 @@ async def train_and_store(
     existing = await repo.list_models(MODEL_NAME, limit=1)
     next_version = (existing[0].version + 1) if existing else 1
 
-    metrics = model.train(
-        X, y, feature_names, model_version=next_version,
+    started = time.perf_counter()
+    metrics = await asyncio.to_thread(
+        model.train, X, y, feature_names, model_version=next_version,
     )
+    stage_seconds["fit"] = time.perf_counter() - started
 
-    # 3. Serialize
+    # 4. Serialize + store
+    started = time.perf_counter()
     model_binary = model.serialize()
-
-    # 4. Store
+    metrics_json = metrics.to_dict() | {
+        "algorithm": algorithm,
+        "cv_scores": [s.to_dict() for s in cv_scores],
+        "stage_seconds": {k: round(v, 3) for k, v in stage_seconds.items()},
+    }
     artifact = await repo.store_model(
         model_name=MODEL_NAME,
         model_binary=model_binary,
         training_samples=metrics.training_samples,
         accuracy=metrics.accuracy,
         f1_macro=metrics.f1_macro,
-        metrics_json=json.dumps(metrics.to_dict()),
+        metrics_json=json.dumps(metrics_json),
         feature_names_json=json.dumps(feature_names),
     )
+    stage_seconds["store"] = time.perf_counter() - started
 
     # 5. Auto-activate if quality exceeds previous
     activated = False
@@ -226,6 +366,9 @@ async def train_and_store(
         f1_macro=metrics.f1_macro,
         feature_importances=metrics.feature_importances,
         auto_activated=activated,
+        algorithm=algorithm,
+        cv_scores=[s.to_dict() for s in cv_scores],
+        stage_seconds=stage_seconds,
     )
 
     logger.info("Training complete: %s", result.to_dict())
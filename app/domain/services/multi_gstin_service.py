@@ -8,10 +8,12 @@ and get consolidated summaries across all their businesses.
 
 from __future__ import annotations
 
+import json
 import logging
+import time
 from typing import Any
 
-from sqlalchemy import select, update, delete
+from sqlalchemy import and_, select, update, delete
 from sqlalchemy.ext.asyncio import AsyncSession
 
 logger = logging.getLogger("multi_gstin_service")
@@ -60,6 +62,7 @@ async def add_gstin(
     db.add(new_gstin)
     await db.commit()
     await db.refresh(new_gstin)
+    await invalidate_consolidated_cache(user_id)
 
     return {"success": True, "gstin": gstin, "label": label, "id": new_gstin.id}
 
@@ -74,6 +77,7 @@ async def remove_gstin(user_id: int, gstin: str, db: AsyncSession) -> bool:
     )
     result = await db.execute(stmt)
     await db.commit()
+    await invalidate_consolidated_cache(user_id)
     return result.rowcount > 0
 
 
@@ -126,9 +130,214 @@ async def set_primary(user_id: int, gstin: str, db: AsyncSession) -> bool:
         .values(is_primary=True)
     )
     await db.commit()
+    await invalidate_consolidated_cache(user_id)
     return result.rowcount > 0
 
 
+# ---------------------------------------------------------------------------
+# Consolidated dashboard
+#
+# One query joins the user's active GSTINs to their ReturnPeriod rows for a
+# set of periods.  Each period's summary is cached briefly in Redis under a
+# per-user hash (field = period); period status transitions and liability
+# recomputation drop the field via ``invalidate_consolidated_cache``.
+# ---------------------------------------------------------------------------
+
+_DASHBOARD_CACHE_PREFIX = "gstin_dash"
+
+
+def _dashboard_key(user_id: Any) -> str:
+    return f"{_DASHBOARD_CACHE_PREFIX}:{user_id}"
+
+
+def _get_redis():
+    """Return the async Redis client, or ``None`` when unavailable."""
+    try:
+        from app.infrastructure.cache.redis_client import get_redis_client
+
+        return get_redis_client()
+    except Exception:
+        return None
+
+
+def consolidated_stmt(user_id: Any, periods: list[str]):
+    """SELECT of (GSTIN, period) rows for the user's active GSTINs.
+
+    GSTINs without a ReturnPeriod in ``periods`` come back once with NULL
+    period columns (LEFT OUTER JOIN), so they still show as not started.
+    """
+    from app.infrastructure.db.models import UserGSTIN, ReturnPeriod
+
+    rp = ReturnPeriod
+    return (
+        select(
+            UserGSTIN.gstin,
+            UserGSTIN.label,
+            UserGSTIN.is_primary,
+            UserGSTIN.is_active,
+            rp.period,
+            rp.status,
+            (rp.output_tax_igst + rp.output_tax_cgst + rp.output_tax_sgst).label("total_tax"),
+            (rp.itc_igst + rp.itc_cgst + rp.itc_sgst).label("total_credit"),
+            (rp.net_payable_igst + rp.net_payable_cgst + rp.net_payable_sgst).label("net_payable"),
+        )
+        .outerjoin(
+            rp,
+            and_(rp.gstin == UserGSTIN.gstin, rp.period.in_(periods)),
+        )
+        .where(
+            UserGSTIN.user_id == user_id,
+            UserGSTIN.is_active.is_(True),
+        )
+        .order_by(UserGSTIN.is_primary.desc(), UserGSTIN.created_at)
+    )
+
+
+def _status_emoji(status: str) -> str:
+    if status in ("filed", "submitted"):
+        return "🟢"
+    if status in ("pending", "draft"):
+        return "🟡"
+    return "🔴"
+
+
+def _build_summaries(rows: list[Any], periods: list[str]) -> dict[str, dict[str, Any]]:
+    """Fold joined rows into one summary dict per period."""
+    gstins: list[dict[str, Any]] = []
+    seen: set[str] = set()
+    by_key: dict[tuple[str, str], Any] = {}
+    for row in rows:
+        if row.gstin not in seen:
+            seen.add(row.gstin)
+            gstins.append({
+                "gstin": row.gstin,
+                "label": row.label or "",
+                "is_primary": row.is_primary,
+                "is_active": row.is_active,
+            })
+        if row.period is not None:
+            by_key[(row.gstin, row.period)] = row
+
+    out: dict[str, dict[str, Any]] = {}
+    for period in periods:
+        summary_items = []
+        status_counts: dict[str, int] = {}
+        total_tax = 0.0
+        total_credit = 0.0
+        net_payable = 0.0
+
+        for g in gstins:
+            gstin = g["gstin"]
+            rp = by_key.get((gstin, period))
+            if rp is not None:
+                status = rp.status or "pending"
+                total_tax += float(rp.total_tax or 0)
+                total_credit += float(rp.total_credit or 0)
+                net_payable += float(rp.net_payable or 0)
+            else:
+                status = "not_started"
+
+            status_counts[status] = status_counts.get(status, 0) + 1
+            label = g.get("label") or gstin[:8] + "..."
+            summary_items.append(
+                f"{_status_emoji(status)} {gstin[:8]}...{gstin[-4:]} ({label}): {status.title()}"
+            )
+
+        out[period] = {
+            "period": period,
+            "gstins": gstins,
+            "summary_text": "\n".join(summary_items) if summary_items else "No GSTINs registered",
+            "total_tax": total_tax,
+            "total_credit": total_credit,
+            "net_payable": net_payable,
+            "status_counts": status_counts,
+            "count": len(gstins),
+        }
+    return out
+
+
+async def _read_cached(user_id: Any, periods: list[str]) -> dict[str, dict[str, Any]]:
+    from app.core.config import settings
+
+    redis = _get_redis()
+    if not redis or not periods:
+        return {}
+    try:
+        raw = await redis.hmget(_dashboard_key(user_id), periods)
+    except Exception:
+        logger.debug("Dashboard cache read failed for user %s", user_id)
+        return {}
+
+    now = time.time()
+    hits: dict[str, dict[str, Any]] = {}
+    for period, value in zip(periods, raw):
+        if not value:
+            continue
+        try:
+            entry = json.loads(value)
+        except ValueError:
+            continue
+        # The hash TTL is refreshed on every write, so age-check each field
+        if now - entry.get("cached_at", 0) <= settings.MULTI_GSTIN_DASHBOARD_CACHE_TTL:
+            hits[period] = entry["summary"]
+    return hits
+
+
+async def _write_cached(user_id: Any, summaries: dict[str, dict[str, Any]]) -> None:
+    from app.core.config import settings
+
+    redis = _get_redis()
+    if not redis or not summaries:
+        return
+    now = time.time()
+    key = _dashboard_key(user_id)
+    try:
+        await redis.hset(
+            key,
+            mapping={
+                period: json.dumps({"cached_at": now, "summary": summary})
+                for period, summary in summaries.items()
+            },
+        )
+        await redis.expire(key, settings.MULTI_GSTIN_DASHBOARD_CACHE_TTL)
+    except Exception:
+        logger.debug("Dashboard cache write failed for user %s", user_id)
+
+
+async def invalidate_consolidated_cache(
+    user_id: Any,
+    period: str | None = None,
+) -> None:
+    """Drop cached dashboard summaries for a user (one period, or all)."""
+    redis = _get_redis()
+    if not redis:
+        return
+    try:
+        if period is None:
+            await redis.delete(_dashboard_key(user_id))
+        else:
+            await redis.hdel(_dashboard_key(user_id), period)
+    except Exception:
+        logger.debug("Dashboard cache invalidation failed for user %s", user_id)
+
+
+async def get_consolidated_summaries(
+    user_id: Any,
+    periods: list[str],
+    db: AsyncSession,
+) -> dict[str, dict[str, Any]]:
+    """Per-period consolidated summaries; cache misses are fetched in one query."""
+    periods = list(dict.fromkeys(periods))
+    summaries = await _read_cached(user_id, periods)
+    missing = [p for p in periods if p not in summaries]
+    if missing:
+        result = await db.execute(consolidated_stmt(user_id, missing))
+        fresh = _build_summaries(list(result.all()), missing)
+        await _write_cached(user_id, fresh)
+        summaries.update(fresh)
+    return {p: summaries[p] for p in periods}
+
+
 async def get_consolidated_summary(
     user_id: int,
     period: str,
@@ -141,53 +350,56 @@ async def get_consolidated_summary(
     dict
         ``{"gstins": [...], "total_tax": float, "total_credit": float}``
     """
-    from app.infrastructure.db.models import UserGSTIN, ReturnPeriod
+    summaries = await get_consolidated_summaries(user_id, [period], db)
+    return summaries[period]
 
-    gstins = await list_gstins(user_id, db)
 
-    summary_items = []
-    total_tax = 0.0
-    total_credit = 0.0
+def trailing_periods(end_period: str, months: int) -> list[str]:
+    """Return ``months`` consecutive 'YYYY-MM' periods ending at ``end_period``."""
+    year, month = (int(p) for p in end_period.split("-")[:2])
+    periods = []
+    for _ in range(max(months, 1)):
+        periods.append(f"{year:04d}-{month:02d}")
+        year, month = (year - 1, 12) if month == 1 else (year, month - 1)
+    return periods[::-1]
 
-    for g in gstins:
-        gstin = g["gstin"]
-        # Try to find filing status for this period
-        rp_stmt = select(ReturnPeriod).where(
-            ReturnPeriod.gstin == gstin,
-            ReturnPeriod.period == period,
-        )
-        rp_result = await db.execute(rp_stmt)
-        rp = rp_result.scalar_one_or_none()
 
-        if rp:
-            status = rp.status or "pending"
-            tax = float(rp.total_tax or 0)
-            credit = float(rp.total_itc or 0)
-        else:
-            status = "not_started"
-            tax = 0.0
-            credit = 0.0
-
-        # Status emoji
-        if status in ("filed", "submitted"):
-            emoji = "🟢"
-        elif status in ("pending", "draft"):
-            emoji = "🟡"
-        else:
-            emoji = "🔴"
-
-        label = g.get("label") or gstin[:8] + "..."
-        summary_items.append(f"{emoji} {gstin[:8]}...{gstin[-4:]} ({label}): {status.title()}")
-        total_tax += tax
-        total_credit += credit
-
-    return {
-        "gstins": gstins,
-        "summary_text": "\n".join(summary_items) if summary_items else "No GSTINs registered",
-        "total_tax": total_tax,
-        "total_credit": total_credit,
-        "count": len(gstins),
-    }
+async def get_consolidated_trend(
+    user_id: Any,
+    end_period: str,
+    db: AsyncSession,
+    *,
+    months: int = 6,
+) -> dict[str, Any]:
+    """Month-by-month totals and filing progress across all GSTINs.
+
+    Returns
+    -------
+    dict
+        ``{"periods": [{"period", "total_tax", "total_credit", "net_payable",
+        "filed", "pending", "not_started"}, ...], "count": int}``
+    """
+    periods = trailing_periods(end_period, months)
+    summaries = await get_consolidated_summaries(user_id, periods, db)
+
+    points = []
+    for period in periods:
+        s = summaries[period]
+        counts = s["status_counts"]
+        filed = sum(counts.get(st, 0) for st in ("filed", "closed", "submitted"))
+        not_started = counts.get("not_started", 0)
+        points.append({
+            "period": period,
+            "total_tax": s["total_tax"],
+            "total_credit": s["total_credit"],
+            "net_payable": s["net_payable"],
+            "filed": filed,
+            "pending": s["count"] - filed - not_started,
+            "not_started": not_started,
+        })
+
+    count = summaries[periods[-1]]["count"] if periods else 0
+    return {"periods": points, "count": count}
 
 
 def format_gstin_list(gstins: list[dict]) -> str:
@@ -1,6 +1,7 @@
 from typing import Protocol
 
 from app.core.config import settings
+from app.core.metrics import OCR_SECONDS, timed
 from app.infrastructure.external.ocr_paddle import extract_text_from_image_bytes
 
 
@@ -11,6 +12,7 @@ class OCRBackend(Protocol):
 
 
 class TesseractOCRBackend:
+    @timed(OCR_SECONDS.labels("paddle"))
     async def extract(self, image_bytes: bytes, session_lang: str | None = None) -> str:
         # sync helper wrapped in async
         return extract_text_from_image_bytes(image_bytes, session_lang=session_lang)
@@ -22,6 +24,7 @@ class GoogleVisionOCRBackend:
 
         self.client = vision.ImageAnnotatorClient()
 
+    @timed(OCR_SECONDS.labels("google_vision"))
     async def extract(self, image_bytes: bytes, session_lang: str | None = None) -> str:
         from google.cloud import vision  # type: ignore
 
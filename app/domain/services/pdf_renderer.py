@@ -0,0 +1,287 @@
+# app/domain/services/pdf_renderer.py
+"""
+Async PDF rendering: worker process pool + content-hash render cache.
+
+ReportLab is CPU-bound and synchronous.  Rendering inline in an async
+handler blocks the event loop for every other request, so all PDF layouts
+(``invoice_pdf`` / ``itr_pdf``) are run through ``render_*`` here:
+
+* Rendering happens in a spawn-context ``ProcessPoolExecutor`` of
+  ``PDF_RENDER_WORKERS`` processes (``0`` renders in a thread instead).
+* Output is cached on disk under ``PDF_CACHE_DIR``, keyed by a SHA-256 of
+  the layout name, the input data and the day, for ``PDF_CACHE_TTL_SECONDS``.
+  Bump ``RENDER_CACHE_VERSION`` when a layout changes.
+* Client invoice reports of any size are spooled from the DB to a
+  JSON-lines temp file (hashed as it is written), rendered from that spool
+  to a file, and streamed back with ``FileResponse``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import dataclasses
+import hashlib
+import json
+import logging
+import multiprocessing
+import os
+import tempfile
+import time
+from collections.abc import AsyncIterable, Callable, Sequence
+from concurrent.futures import ProcessPoolExecutor
+from concurrent.futures.process import BrokenProcessPool
+from datetime import date, datetime
+from decimal import Decimal
+from pathlib import Path
+from typing import Any
+
+from app.core.config import settings
+
+logger = logging.getLogger("pdf_renderer")
+
+RENDER_CACHE_VERSION = 1
+
+_CACHE_PRUNE_INTERVAL_SECONDS = 600
+
+_pool: ProcessPoolExecutor | None = None
+_last_prune: float = 0.0
+
+
+# ── Process pool ──────────────────────────────────────────────
+
+def _get_pool() -> ProcessPoolExecutor:
+    global _pool
+    if _pool is None:
+        _pool = ProcessPoolExecutor(
+            max_workers=settings.PDF_RENDER_WORKERS,
+            mp_context=multiprocessing.get_context("spawn"),
+        )
+    return _pool
+
+
+def shutdown_render_pool() -> None:
+    """Stop the worker processes (called from the app lifespan)."""
+    global _pool
+    if _pool is not None:
+        _pool.shutdown(wait=False, cancel_futures=True)
+        _pool = None
+
+
+async def _run(fn: Callable, *args: Any):
+    if settings.PDF_RENDER_WORKERS <= 0:
+        return await asyncio.to_thread(fn, *args)
+    loop = asyncio.get_running_loop()
+    try:
+        return await loop.run_in_executor(_get_pool(), fn, *args)
+    except BrokenProcessPool:
+        # A worker died (OOM, segfault): drop the pool so the next call gets a fresh one
+        shutdown_render_pool()
+        raise
+
+
+# ── Render cache ──────────────────────────────────────────────
+
+def _jsonable(obj: Any):
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, (Decimal, date, datetime)):
+        return str(obj)
+    raise TypeError(f"Cannot hash {type(obj).__name__} for the PDF cache")
+
+
+def _key_prefix(kind: str) -> str:
+    # The day is part of the key: layouts print a "Generated" date
+    return f"{RENDER_CACHE_VERSION}:{kind}:{date.today().isoformat()}:"
+
+
+def content_key(kind: str, *payload: Any) -> str:
+    """Cache key for rendering ``kind`` from ``payload``."""
+    digest = hashlib.sha256(_key_prefix(kind).encode())
+    digest.update(json.dumps(payload, sort_keys=True, default=_jsonable).encode())
+    return digest.hexdigest()
+
+
+def _cache_dir() -> Path:
+    path = Path(settings.PDF_CACHE_DIR or os.path.join(tempfile.gettempdir(), "gst-itr-pdf-cache"))
+    path.mkdir(parents=True, exist_ok=True)
+    return path
+
+
+def _cached_path(key: str) -> Path | None:
+    path = _cache_dir() / f"{key}.pdf"
+    try:
+        if time.time() - path.stat().st_mtime < settings.PDF_CACHE_TTL_SECONDS:
+            return path
+    except FileNotFoundError:
+        pass
+    return None
+
+
+def _store(key: str, src: Path) -> Path:
+    """Atomically move a rendered file into the cache."""
+    dest = _cache_dir() / f"{key}.pdf"
+    os.replace(src, dest)
+    _prune_cache()
+    return dest
+
+
+def _prune_cache() -> None:
+    """Delete expired entries, at most every ``_CACHE_PRUNE_INTERVAL_SECONDS``.
+
+    Files live at least one prune interval even with a shorter TTL, so a
+    report that is still being streamed to a client is not removed.
+    """
+    global _last_prune
+    now = time.time()
+    if now - _last_prune < _CACHE_PRUNE_INTERVAL_SECONDS:
+        return
+    _last_prune = now
+    max_age = max(settings.PDF_CACHE_TTL_SECONDS, _CACHE_PRUNE_INTERVAL_SECONDS)
+    for path in _cache_dir().glob("*.pdf"):
+        try:
+            if now - path.stat().st_mtime >= max_age:
+                path.unlink()
+        except FileNotFoundError:
+            continue
+
+
+def _new_temp_path(suffix: str) -> Path:
+    fd, name = tempfile.mkstemp(suffix=suffix, dir=_cache_dir())
+    os.close(fd)
+    return Path(name)
+
+
+async def _render_bytes(kind: str, fn: Callable[..., bytes], *args: Any) -> bytes:
+    key = content_key(kind, *args)
+    cached = _cached_path(key)
+    if cached is not None:
+        return cached.read_bytes()
+
+    pdf_bytes = await _run(fn, *args)
+
+    tmp = _new_temp_path(".part")
+    tmp.write_bytes(pdf_bytes)
+    _store(key, tmp)
+    return pdf_bytes
+
+
+# ── Public API ────────────────────────────────────────────────
+
+async def render_invoice_pdf(invoice_data: dict) -> bytes:
+    """``invoice_pdf.generate_invoice_pdf`` off the event loop, cached."""
+    from app.domain.services.invoice_pdf import generate_invoice_pdf
+
+    return await _render_bytes("invoice", generate_invoice_pdf, invoice_data)
+
+
+async def render_invoice_summary_pdf(invoices: list[dict]) -> bytes:
+    """``invoice_pdf.generate_multi_invoice_summary_pdf`` off the event loop, cached."""
+    from app.domain.services.invoice_pdf import generate_multi_invoice_summary_pdf
+
+    return await _render_bytes("invoice_summary", generate_multi_invoice_summary_pdf, invoices)
+
+
+async def render_itr1_pdf(inp, result) -> bytes:
+    """``itr_pdf.generate_itr1_pdf`` off the event loop, cached."""
+    from app.domain.services.itr_pdf import generate_itr1_pdf
+
+    return await _render_bytes("itr1", generate_itr1_pdf, inp, result)
+
+
+async def render_itr4_pdf(inp, result) -> bytes:
+    """``itr_pdf.generate_itr4_pdf`` off the event loop, cached."""
+    from app.domain.services.itr_pdf import generate_itr4_pdf
+
+    return await _render_bytes("itr4", generate_itr4_pdf, inp, result)
+
+
+async def render_invoice_report(
+    header: dict,
+    rows: AsyncIterable[Sequence],
+) -> Path:
+    """Render the CA client invoice report to a cached file and return its path.
+
+    ``rows`` yields ``(invoice_number, invoice_date, taxable, tax, total)``
+    (e.g. from ``AsyncSession.stream``).  They are spooled to disk as they
+    arrive; the spool's running hash is the cache key, so an unchanged
+    invoice set is rendered once per day.
+    """
+    from app.domain.services.invoice_pdf import write_invoice_report_pdf
+
+    digest = hashlib.sha256(_key_prefix("invoice_report").encode())
+    digest.update(json.dumps(header, sort_keys=True, default=_jsonable).encode())
+
+    spool = _new_temp_path(".jsonl")
+    out = None
+    try:
+        count = 0
+        with open(spool, "w", encoding="utf-8") as fh:
+            async for row in rows:
+                line = json.dumps(list(row), default=_jsonable) + "\n"
+                fh.write(line)
+                digest.update(line.encode())
+                count += 1
+        key = digest.hexdigest()
+
+        cached = _cached_path(key)
+        if cached is not None:
+            return cached
+
+        out = _new_temp_path(".part")
+        pages = await _run(
+            write_invoice_report_pdf, str(spool), str(out), {**header, "count": count},
+        )
+        logger.info("Rendered invoice report: %d invoices, %d pages", count, pages)
+        path = _store(key, out)
+        out = None
+        return path
+    finally:
+        spool.unlink(missing_ok=True)
+        if out is not None:
+            out.unlink(missing_ok=True)
+
+
+async def render_client_invoice_report(client, db) -> Path:
+    """Invoice report for a CA's ``BusinessClient``, newest invoice first.
+
+    Invoice rows are streamed from a server-side cursor in batches of
+    ``PDF_REPORT_FETCH_ROWS``; no ORM objects are built.
+    """
+    from sqlalchemy import select
+
+    from app.infrastructure.db.models import Invoice, User
+
+    header = {
+        "name": client.name,
+        "gstin": client.gstin,
+        "pan": client.pan,
+        "whatsapp_number": client.whatsapp_number,
+        "generated": date.today().isoformat(),
+    }
+
+    user_id = None
+    if client.whatsapp_number:
+        result = await db.execute(
+            select(User.id).where(User.whatsapp_number == client.whatsapp_number)
+        )
+        user_id = result.scalar_one_or_none()
+
+    async def rows():
+        if user_id is None:
+            return
+        stream = await db.stream(
+            select(
+                Invoice.invoice_number,
+                Invoice.invoice_date,
+                Invoice.taxable_value,
+                Invoice.tax_amount,
+                Invoice.total_amount,
+            )
+            .where(Invoice.user_id == user_id)
+            .order_by(Invoice.invoice_date.desc())
+            .execution_options(yield_per=settings.PDF_REPORT_FETCH_ROWS)
+        )
+        async for row in stream:
+            yield row
+
+    return await render_invoice_report(header, rows())
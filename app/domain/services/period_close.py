@@ -0,0 +1,582 @@
+# app/domain/services/period_close.py
+"""
+Period-close pipeline: GSTR-2B import → reconcile → liability → risk.
+
+Month-end used to chain ``import_gstr2b``, ``reconcile_period`` and
+``compute_net_liability`` (which in turn ran ``compute_risk_score``) inside a
+single HTTP request or WhatsApp message.  Here the four steps form a small
+DAG that ``period_close_job`` (ARQ) walks for each ``ReturnPeriod``; a
+portfolio of periods is closed concurrently, ``PERIOD_CLOSE_CONCURRENCY``
+at a time, each on its own DB session.
+
+Every step has an input digest — an md5 over the rows it reads, computed in
+Postgres.  After a step runs, the digest of its inputs is stored; the next
+run skips the step while the digest still matches, so re-closing a portfolio
+only redoes periods whose invoices, 2B entries or payments moved.  The 2B
+import reads the GST portal rather than our tables, so its digest is a
+``PERIOD_CLOSE_2B_REFRESH_HOURS`` time bucket.
+
+Progress lives in Redis so the CA dashboard, the v1 API and WhatsApp
+notifications all read the same state::
+
+    period_close:{period_id}        hash — status, job_id, started_at,
+                                    finished_at, step:{name} (JSON outcome),
+                                    digest:{name}
+    period_close:lock:{period_id}   held while a run is in progress
+    period_close:job:{job_id}       hash — owner, period_ids, status
+"""
+
+from __future__ import annotations
+
+import asyncio
+import hashlib
+import json
+import logging
+import time
+import uuid
+from calendar import monthrange
+from collections.abc import Awaitable, Callable, Iterable
+from dataclasses import asdict, dataclass, field
+from datetime import date, datetime, timezone
+from typing import Any
+from uuid import UUID
+
+from sqlalchemy import and_, func, literal_column, select
+from sqlalchemy.dialects.postgresql import aggregate_order_by
+
+from app.core.config import settings
+from app.infrastructure.db.models import Invoice, ITCMatch, PaymentRecord
+
+logger = logging.getLogger("period_close")
+
+_KEY_PREFIX = "period_close"
+
+STEP_LABELS = {
+    "import_2b": "GSTR-2B import",
+    "reconcile": "ITC reconciliation",
+    "liability": "Net liability",
+    "risk": "Risk score",
+}
+
+
+# ---------------------------------------------------------------------------
+# Data types
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class PeriodRef:
+    """The ReturnPeriod fields every step needs."""
+    id: UUID
+    user_id: UUID
+    gstin: str
+    period: str
+    start: date
+    end: date
+
+
+@dataclass(frozen=True)
+class Step:
+    """One node of the close DAG."""
+    name: str
+    after: tuple[str, ...]
+    run: Callable[[PeriodRef, Any], Awaitable[dict]]
+    digest: Callable[[PeriodRef, Any], Awaitable[str]]
+    optional: bool = False          # a failure does not block downstream steps
+
+
+@dataclass
+class StepOutcome:
+    name: str
+    state: str                      # done / skipped / failed / blocked
+    seconds: float = 0.0
+    detail: dict = field(default_factory=dict)
+    error: str = ""
+
+
+@dataclass
+class CloseResult:
+    period_id: str
+    status: str                     # done / failed / busy / missing
+    steps: list[StepOutcome] = field(default_factory=list)
+    period: str = ""                # "2025-01", once the ReturnPeriod is loaded
+
+    def to_dict(self) -> dict:
+        return {
+            "period_id": self.period_id,
+            "period": self.period,
+            "status": self.status,
+            "steps": [asdict(s) for s in self.steps],
+        }
+
+
+ProgressCallback = Callable[[PeriodRef, StepOutcome], Awaitable[None]]
+
+
+# ---------------------------------------------------------------------------
+# Input digests
+# ---------------------------------------------------------------------------
+
+def _md5_agg(row: Any, order_by: Any) -> Any:
+    return func.coalesce(
+        func.md5(func.string_agg(row, aggregate_order_by(literal_column("','"), order_by))),
+        "",
+    )
+
+
+def invoice_digest_stmt(user_id: UUID, start: date, end: date, direction: str | None = None):
+    """Count + md5 of the invoice columns liability and reconciliation read."""
+    row = func.concat_ws(
+        "|",
+        Invoice.id, Invoice.direction, Invoice.invoice_number, Invoice.invoice_date,
+        Invoice.supplier_gstin, Invoice.taxable_value, Invoice.igst_amount,
+        Invoice.cgst_amount, Invoice.sgst_amount, Invoice.itc_eligible,
+        Invoice.reverse_charge, Invoice.blocked_itc_reason, Invoice.gstr2b_match_status,
+    )
+    conds = [Invoice.user_id == user_id, Invoice.invoice_date >= start, Invoice.invoice_date <= end]
+    if direction is not None:
+        conds.append(Invoice.direction == direction)
+    return select(func.count(Invoice.id), _md5_agg(row, Invoice.id)).where(and_(*conds))
+
+
+def itc_digest_stmt(period_id: UUID):
+    """Count + md5 of the period's 2B entries.
+
+    Ordered by content rather than id: a re-import recreates the rows with
+    new ids, and an unchanged 2B must still produce the same digest.
+    """
+    row = func.concat_ws(
+        "|",
+        ITCMatch.gstr2b_supplier_gstin, ITCMatch.gstr2b_invoice_number,
+        ITCMatch.gstr2b_invoice_date, ITCMatch.gstr2b_taxable_value,
+        ITCMatch.gstr2b_igst, ITCMatch.gstr2b_cgst, ITCMatch.gstr2b_sgst,
+        ITCMatch.match_status, ITCMatch.purchase_invoice_id,
+    )
+    return select(func.count(ITCMatch.id), _md5_agg(row, row)).where(ITCMatch.period_id == period_id)
+
+
+def payment_digest_stmt(period_id: UUID):
+    row = func.concat_ws("|", PaymentRecord.id, PaymentRecord.total, PaymentRecord.status)
+    return (
+        select(func.count(PaymentRecord.id), _md5_agg(row, PaymentRecord.id))
+        .where(PaymentRecord.period_id == period_id)
+    )
+
+
+async def _digest(db: Any, *stmts: Any) -> str:
+    parts = []
+    for stmt in stmts:
+        count, md5 = (await db.execute(stmt)).one()
+        parts.append(f"{count}:{md5}")
+    return hashlib.sha256(";".join(parts).encode()).hexdigest()[:16]
+
+
+async def _import_2b_digest(ref: PeriodRef, db: Any) -> str:
+    hours = settings.PERIOD_CLOSE_2B_REFRESH_HOURS
+    if hours <= 0:
+        return uuid.uuid4().hex
+    return f"t{int(time.time() // (hours * 3600))}"
+
+
+async def _reconcile_digest(ref: PeriodRef, db: Any) -> str:
+    return await _digest(
+        db, invoice_digest_stmt(ref.user_id, ref.start, ref.end, "inward"), itc_digest_stmt(ref.id),
+    )
+
+
+async def _liability_digest(ref: PeriodRef, db: Any) -> str:
+    return await _digest(db, invoice_digest_stmt(ref.user_id, ref.start, ref.end))
+
+
+async def _risk_digest(ref: PeriodRef, db: Any) -> str:
+    return await _digest(
+        db,
+        invoice_digest_stmt(ref.user_id, ref.start, ref.end),
+        itc_digest_stmt(ref.id),
+        payment_digest_stmt(ref.id),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Steps
+# ---------------------------------------------------------------------------
+
+async def _run_import_2b(ref: PeriodRef, db: Any) -> dict:
+    from app.domain.services.gstr2b_service import import_gstr2b
+
+    result = await import_gstr2b(
+        user_id=ref.user_id, gstin=ref.gstin, period=ref.period, period_id=ref.id, db=db,
+    )
+    return {
+        "total_entries": result.total_entries,
+        "supplier_count": result.supplier_count,
+        "total_taxable": float(result.total_taxable),
+        "errors": result.errors,
+    }
+
+
+async def _run_reconcile(ref: PeriodRef, db: Any) -> dict:
+    from app.domain.services.gst_reconciliation import reconcile_period
+
+    summary = await reconcile_period(ref.id, db)
+    return {
+        "matched": summary.matched,
+        "value_mismatch": summary.value_mismatch,
+        "missing_in_2b": summary.missing_in_2b,
+        "missing_in_books": summary.missing_in_books,
+        "fuzzy_review": summary.fuzzy_review,
+        "matched_taxable": float(summary.matched_taxable),
+    }
+
+
+async def _run_liability(ref: PeriodRef, db: Any) -> dict:
+    from app.domain.services.gst_liability import compute_net_liability
+
+    comp = await compute_net_liability(ref.id, db, score_risk=False)
+    return {
+        "total_net_payable": float(comp.total_net_payable),
+        "net_igst": float(comp.net_igst),
+        "net_cgst": float(comp.net_cgst),
+        "net_sgst": float(comp.net_sgst),
+        "risk_flags": comp.risk_flags,
+    }
+
+
+async def _run_risk(ref: PeriodRef, db: Any) -> dict:
+    from app.domain.services.gst_risk_scoring import compute_risk_score
+
+    result = await compute_risk_score(ref.id, db)
+    return {
+        "risk_score": result.risk_score,
+        "risk_level": result.risk_level,
+        "category_a_score": result.category_a_score,
+        "category_b_score": result.category_b_score,
+        "category_c_score": result.category_c_score,
+        "category_d_score": result.category_d_score,
+        "category_e_score": result.category_e_score,
+        "flag_count": len(result.risk_flags),
+    }
+
+
+STEPS: tuple[Step, ...] = (
+    Step("import_2b", (), _run_import_2b, _import_2b_digest, optional=True),
+    Step("reconcile", ("import_2b",), _run_reconcile, _reconcile_digest),
+    Step("liability", ("reconcile",), _run_liability, _liability_digest),
+    Step("risk", ("liability",), _run_risk, _risk_digest),
+)
+STEP_NAMES = tuple(s.name for s in STEPS)
+
+
+# ---------------------------------------------------------------------------
+# Redis state
+# ---------------------------------------------------------------------------
+
+def _key(period_id: Any) -> str:
+    return f"{_KEY_PREFIX}:{period_id}"
+
+
+def _lock_key(period_id: Any) -> str:
+    return f"{_KEY_PREFIX}:lock:{period_id}"
+
+
+# Delete the lock only if it still holds our token: a GET then DELETE could
+# remove a lock another run took after ours expired
+_RELEASE_LOCK = """
+if redis.call("get", KEYS[1]) == ARGV[1] then
+    return redis.call("del", KEYS[1])
+end
+return 0
+"""
+
+
+async def _release_lock(r: Any, period_id: Any, token: str) -> None:
+    await r.eval(_RELEASE_LOCK, 1, _lock_key(period_id), token)
+
+
+def _job_key(job_id: str) -> str:
+    return f"{_KEY_PREFIX}:job:{job_id}"
+
+
+def _now() -> str:
+    return datetime.now(timezone.utc).isoformat()
+
+
+async def _save(r: Any, period_id: Any, mapping: dict) -> None:
+    """Best-effort progress write; a Redis hiccup must not fail the close."""
+    try:
+        pipe = r.pipeline(transaction=False)
+        pipe.hset(_key(period_id), mapping=mapping)
+        pipe.expire(_key(period_id), settings.PERIOD_CLOSE_STATE_TTL_SECONDS)
+        await pipe.execute()
+    except Exception:
+        logger.warning("Period close state write failed for %s", period_id, exc_info=True)
+
+
+async def _stored_digests(r: Any, period_id: Any) -> dict[str, str]:
+    try:
+        raw = await r.hgetall(_key(period_id))
+    except Exception:
+        logger.warning("Period close state read failed for %s; running every step", period_id, exc_info=True)
+        return {}
+    return {k[len("digest:"):]: v for k, v in raw.items() if k.startswith("digest:")}
+
+
+async def get_period_status(period_id: Any) -> dict | None:
+    """Progress of the latest close of one period, or None if never closed."""
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    raw = await get_redis_client().hgetall(_key(period_id))
+    if not raw:
+        return None
+    steps = {
+        k[len("step:"):]: json.loads(v) for k, v in raw.items() if k.startswith("step:")
+    }
+    return {
+        "period_id": str(period_id),
+        "status": raw.get("status", ""),
+        "job_id": raw.get("job_id", ""),
+        "started_at": raw.get("started_at") or None,
+        "finished_at": raw.get("finished_at") or None,
+        "steps": [steps[name] for name in STEP_NAMES if name in steps],
+    }
+
+
+async def get_job_status(job_id: str, owner: str) -> dict | None:
+    """Portfolio progress for a job; None if unknown or owned by someone else."""
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    raw = await get_redis_client().hgetall(_job_key(job_id))
+    if not raw or raw.get("owner") != owner:
+        return None
+    period_ids = [p for p in raw.get("period_ids", "").split(",") if p]
+    periods = [await get_period_status(p) for p in period_ids]
+    return {
+        "job_id": job_id,
+        "status": raw.get("status", ""),
+        "total": len(period_ids),
+        "finished": sum(1 for p in periods if p and p["status"] in ("done", "failed")),
+        "periods": [p or {"period_id": pid, "status": "queued"} for pid, p in zip(period_ids, periods)],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Pipeline
+# ---------------------------------------------------------------------------
+
+async def _load_ref(period_id: UUID, db: Any) -> PeriodRef | None:
+    from app.infrastructure.db.repositories.return_period_repository import (
+        ReturnPeriodRepository,
+    )
+
+    rp = await ReturnPeriodRepository(db).get_by_id(period_id)
+    if rp is None:
+        return None
+    year, month = (int(p) for p in rp.period.split("-"))
+    return PeriodRef(
+        id=rp.id, user_id=rp.user_id, gstin=rp.gstin, period=rp.period,
+        start=date(year, month, 1), end=date(year, month, monthrange(year, month)[1]),
+    )
+
+
+async def close_period(
+    period_id: UUID,
+    db: Any,
+    *,
+    force: bool = False,
+    steps: Iterable[str] | None = None,
+    job_id: str = "",
+    on_progress: ProgressCallback | None = None,
+) -> CloseResult:
+    """Run the close DAG for one period.
+
+    ``steps`` restricts the run to a subset of ``STEP_NAMES`` (the rest are
+    left untouched); ``force`` runs them even when their inputs are unchanged.
+    """
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    wanted = set(steps) if steps else set(STEP_NAMES)
+    result = CloseResult(period_id=str(period_id), status="done")
+    ref = await _load_ref(period_id, db)
+    if ref is None:
+        result.status = "missing"
+        return result
+    result.period = ref.period
+
+    r = get_redis_client()
+    lock_token = job_id or uuid.uuid4().hex
+    try:
+        locked = await r.set(
+            _lock_key(period_id), lock_token, nx=True, ex=settings.PERIOD_CLOSE_LOCK_SECONDS,
+        )
+    except Exception:
+        logger.warning("Period close lock unavailable for %s; running unlocked", period_id, exc_info=True)
+        locked = True
+    if not locked:
+        result.status = "busy"
+        return result
+
+    try:
+        stored = {} if force else await _stored_digests(r, period_id)
+        await _save(r, period_id, {
+            "status": "running", "job_id": job_id, "started_at": _now(), "finished_at": "",
+        })
+        blocked: set[str] = set()
+        for step in STEPS:
+            if step.name not in wanted:
+                continue
+            t0 = time.perf_counter()
+            outcome = StepOutcome(name=step.name, state="done")
+            try:
+                if blocked & set(step.after):
+                    outcome.state = "blocked"
+                else:
+                    current = await step.digest(ref, db)
+                    if stored.get(step.name) == current:
+                        outcome.state = "skipped"
+                    else:
+                        await _save(r, period_id, {f"step:{step.name}": json.dumps(
+                            asdict(StepOutcome(name=step.name, state="running")))})
+                        outcome.detail = await step.run(ref, db)
+                        # The step may have rewritten its own inputs (reconcile does)
+                        stored[step.name] = await step.digest(ref, db)
+            except Exception as exc:
+                logger.exception("Period close step %s failed for %s", step.name, period_id)
+                await db.rollback()
+                outcome.state, outcome.error = "failed", str(exc)[:200]
+                stored.pop(step.name, None)
+            outcome.seconds = round(time.perf_counter() - t0, 3)
+
+            if outcome.state == "blocked" or (outcome.state == "failed" and not step.optional):
+                blocked.add(step.name)
+                result.status = "failed"
+            mapping = {f"step:{step.name}": json.dumps(asdict(outcome))}
+            if outcome.state in ("done", "failed"):
+                # A failed step may have committed part of its work: never skip it next time
+                mapping[f"digest:{step.name}"] = stored.get(step.name, "")
+            await _save(r, period_id, mapping)
+            result.steps.append(outcome)
+            if on_progress is not None:
+                try:
+                    await on_progress(ref, outcome)
+                except Exception:
+                    logger.warning("Period close progress callback failed", exc_info=True)
+
+        await _save(r, period_id, {"status": result.status, "finished_at": _now()})
+    finally:
+        try:
+            await _release_lock(r, period_id, lock_token)
+        except Exception:
+            logger.warning("Period close lock release failed for %s", period_id, exc_info=True)
+
+    ran = [s.name for s in result.steps if s.state == "done"]
+    logger.info("Period %s closed: status=%s ran=%s", ref.period, result.status, ran)
+    return result
+
+
+async def close_periods(
+    period_ids: Iterable[UUID],
+    *,
+    force: bool = False,
+    steps: Iterable[str] | None = None,
+    job_id: str = "",
+    concurrency: int | None = None,
+    on_progress: ProgressCallback | None = None,
+) -> list[CloseResult]:
+    """Close independent periods in parallel, each on its own DB session."""
+    from app.core.db import AsyncSessionLocal
+
+    sem = asyncio.Semaphore(max(1, concurrency or settings.PERIOD_CLOSE_CONCURRENCY))
+    steps = list(steps) if steps else None
+
+    async def one(period_id: UUID) -> CloseResult:
+        async with sem:
+            try:
+                async with AsyncSessionLocal() as db:
+                    return await close_period(
+                        period_id, db, force=force, steps=steps, job_id=job_id, on_progress=on_progress,
+                    )
+            except Exception:
+                logger.exception("Period close failed for %s", period_id)
+                return CloseResult(period_id=str(period_id), status="failed")
+
+    return list(await asyncio.gather(*(one(p) for p in period_ids)))
+
+
+# ---------------------------------------------------------------------------
+# Enqueueing
+# ---------------------------------------------------------------------------
+
+async def enqueue_close(
+    period_ids: Iterable[UUID],
+    *,
+    owner: str = "",
+    force: bool = False,
+    steps: Iterable[str] | None = None,
+    notify_wa_id: str | None = None,
+    lang: str = "en",
+) -> str:
+    """Queue ``period_close_job`` for ``period_ids`` and return its job id."""
+    from app.infrastructure.cache.redis_client import get_redis_client
+    from app.infrastructure.queue.whatsapp_queue import get_redis_pool
+
+    ids = [str(p) for p in period_ids]
+    steps = [s for s in steps if s in STEP_NAMES] if steps else None
+    pool = await get_redis_pool()
+    job = await pool.enqueue_job("period_close_job", ids, force, steps, notify_wa_id, lang)
+    job_id = job.job_id
+
+    r = get_redis_client()
+    pipe = r.pipeline(transaction=False)
+    pipe.hset(_job_key(job_id), mapping={
+        "owner": owner, "period_ids": ",".join(ids), "status": "queued", "created_at": _now(),
+    })
+    pipe.expire(_job_key(job_id), settings.PERIOD_CLOSE_STATE_TTL_SECONDS)
+    for pid in ids:
+        pipe.hset(_key(pid), mapping={"status": "queued", "job_id": job_id})
+        pipe.expire(_key(pid), settings.PERIOD_CLOSE_STATE_TTL_SECONDS)
+    await pipe.execute()
+    return job_id
+
+
+async def set_job_status(job_id: str, status: str) -> None:
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.hset(_job_key(job_id), mapping={"status": status})
+        pipe.expire(_job_key(job_id), settings.PERIOD_CLOSE_STATE_TTL_SECONDS)
+        await pipe.execute()
+    except Exception:
+        logger.warning("Period close job status write failed for %s", job_id, exc_info=True)
+
+
+async def schedule_risk_score(
+    period_id: UUID,
+    db: Any,
+    *,
+    owner: str = "",
+    notify_wa_id: str | None = None,
+    lang: str = "en",
+) -> str | None:
+    """Score risk in the background after a liability recompute.
+
+    Falls back to scoring inline when the queue is unavailable, so a
+    liability recompute never leaves the period without a risk score.  If
+    another close holds the period's lock when the job runs, the job
+    re-queues itself (see ``period_close_job``).
+    """
+    try:
+        return await enqueue_close(
+            [period_id], owner=owner, force=True, steps=("risk",), notify_wa_id=notify_wa_id, lang=lang,
+        )
+    except Exception:
+        logger.warning("Could not queue risk scoring for %s; scoring inline", period_id, exc_info=True)
+
+    try:
+        from app.domain.services.gst_risk_scoring import compute_risk_score
+
+        await compute_risk_score(period_id, db)
+    except Exception:
+        logger.warning(
+            "Risk scoring failed for period %s — liability still valid", period_id, exc_info=True,
+        )
+    return None
@@ -104,6 +104,6 @@ async def auto_segment_client(client_id: int, db: AsyncSession) -> str:
 
         # Invalidate feature cache
         from app.domain.services.feature_registry import invalidate_feature_cache
-        await invalidate_feature_cache(client_id)
+        await invalidate_feature_cache(client_id, gstin=client.gstin)
 
     return new_segment
@@ -0,0 +1,371 @@
+# app/domain/services/tax_analytics_columnar.py
+"""
+Columnar execution path for tax analytics.
+
+``tax_analytics.aggregate_invoices`` / ``detect_anomalies`` walk ORM objects
+one at a time (``getattr`` + ``Decimal`` per field).  The dashboards and the
+analytics API only need a dozen columns, so this module selects exactly
+those, lets Postgres do the per-row work that is cheap there (paise
+conversion, B2B test, GSTIN-validity flags) and computes the summary and
+anomaly report with NumPy.
+
+Results are identical to the row-wise functions:
+
+* money columns are ``Numeric(12, 2)``, so they are held as integer paise
+  (int64) and summed exactly; totals go back to ``Decimal`` with two places
+* the tax-rate distribution keeps first-seen key order and ``str(float)`` keys
+* anomaly lists keep row indices and row order of the input
+
+NumPy is imported at module level, so import this module lazily from
+request handlers (the API must not load NumPy at startup).
+"""
+
+from __future__ import annotations
+
+from collections.abc import Iterable, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime
+from decimal import ROUND_FLOOR, Decimal
+from typing import Any
+
+import numpy as np
+from sqlalchemy import BigInteger, Float, and_, cast, func, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.domain.services.tax_analytics import (
+    AnomalyReport,
+    TaxSummary,
+    _to_decimal,
+)
+from app.infrastructure.db.models import Invoice
+
+DEFAULT_VALID_GST_RATES = {0, 0.1, 0.25, 1.5, 3, 5, 6, 7.5, 12, 14, 18, 28}
+
+_AMOUNT_FIELDS = ("taxable", "tax", "total", "cgst", "sgst", "igst")
+
+
+# ---------------------------------------------------------------------------
+# Column container
+# ---------------------------------------------------------------------------
+@dataclass
+class InvoiceColumns:
+    """One NumPy array per analytics column, all of length ``n``."""
+
+    invoice_number: np.ndarray   # object: str | None
+    has_date: np.ndarray         # bool: invoice_date is truthy
+    invoice_date: np.ndarray     # datetime64[D], NaT when missing / not a date
+    supplier_gstin: np.ndarray   # object
+    receiver_gstin: np.ndarray   # object
+    recipient: np.ndarray        # object: recipient_gstin or receiver_gstin
+    is_b2b: np.ndarray           # bool: recipient is a 15-char GSTIN
+    supplier_invalid: np.ndarray  # bool: supplier_gstin set and flagged invalid
+    receiver_invalid: np.ndarray  # bool: receiver_gstin set and flagged invalid
+    taxable: np.ndarray          # int64 paise
+    tax: np.ndarray
+    total: np.ndarray
+    cgst: np.ndarray
+    sgst: np.ndarray
+    igst: np.ndarray
+    tax_rate: np.ndarray         # float64, NaN when missing
+
+    @property
+    def n(self) -> int:
+        return len(self.invoice_number)
+
+    def __len__(self) -> int:
+        return self.n
+
+    @classmethod
+    def from_rows(cls, rows: Sequence[Sequence[Any]]) -> InvoiceColumns:
+        """Build from tuples in ``invoice_columns_stmt`` column order."""
+        cols = list(zip(*rows)) if rows else [()] * 16
+        (number, has_date, inv_date, supplier, receiver, recipient, is_b2b,
+         supplier_invalid, receiver_invalid, *amounts, rate) = cols
+        money = {
+            name: np.fromiter(col, dtype=np.int64, count=len(col))
+            for name, col in zip(_AMOUNT_FIELDS, amounts)
+        }
+        return cls(
+            invoice_number=_objects(number),
+            has_date=np.fromiter(has_date, dtype=bool, count=len(has_date)),
+            invoice_date=_days(inv_date),
+            supplier_gstin=_objects(supplier),
+            receiver_gstin=_objects(receiver),
+            recipient=_objects(recipient),
+            is_b2b=np.fromiter(is_b2b, dtype=bool, count=len(is_b2b)),
+            supplier_invalid=np.fromiter(supplier_invalid, dtype=bool, count=len(supplier_invalid)),
+            receiver_invalid=np.fromiter(receiver_invalid, dtype=bool, count=len(receiver_invalid)),
+            tax_rate=np.array([np.nan if r is None else r for r in rate], dtype=np.float64),
+            **money,
+        )
+
+    @classmethod
+    def from_invoices(cls, invoices: Iterable[Any]) -> InvoiceColumns:
+        """Build from Invoice ORM objects or dicts (same inputs as ``aggregate_invoices``)."""
+        return cls.from_rows([_invoice_row(inv) for inv in invoices])
+
+
+def _objects(values: Sequence[Any]) -> np.ndarray:
+    arr = np.empty(len(values), dtype=object)
+    arr[:] = values
+    return arr
+
+
+_EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+_NAT = np.datetime64("NaT", "D").astype(np.int64)
+
+
+def _days(values: Sequence[date | None]) -> np.ndarray:
+    # date.toordinal() is far cheaper than letting NumPy parse date objects
+    ordinals = np.fromiter(
+        (_NAT if d is None else d.toordinal() - _EPOCH_ORDINAL for d in values),
+        dtype=np.int64,
+        count=len(values),
+    )
+    return ordinals.view("datetime64[D]")
+
+
+def _paise(value: Any) -> int:
+    return int(_to_decimal(value).scaleb(2).to_integral_value())
+
+
+def _invoice_row(inv: Any) -> tuple:
+    get = inv.get if isinstance(inv, dict) else lambda k, d=None: getattr(inv, k, d)
+
+    inv_date = get("invoice_date")
+    day = inv_date.date() if isinstance(inv_date, datetime) else inv_date
+    recipient = get("recipient_gstin") or get("receiver_gstin")
+    supplier = get("supplier_gstin")
+    receiver = get("receiver_gstin")
+    rate = get("tax_rate")
+    return (
+        get("invoice_number"),
+        bool(inv_date),
+        day if isinstance(day, date) else None,
+        supplier,
+        receiver,
+        recipient,
+        bool(recipient) and len(str(recipient)) == 15,
+        bool(supplier) and get("supplier_gstin_valid") is False,
+        bool(receiver) and get("receiver_gstin_valid") is False,
+        _paise(get("taxable_value", 0)),
+        _paise(get("tax_amount", 0)),
+        _paise(get("total_amount", 0)),
+        _paise(get("cgst_amount", 0)),
+        _paise(get("sgst_amount", 0)),
+        _paise(get("igst_amount", 0)),
+        None if rate is None else float(rate),
+    )
+
+
+# ---------------------------------------------------------------------------
+# Loading
+# ---------------------------------------------------------------------------
+def _paise_col(col):
+    return cast(func.coalesce(col, 0) * 100, BigInteger)
+
+
+def invoice_columns_stmt(*criteria, order_by: Sequence = (), limit: int | None = None):
+    """SELECT of just the analytics columns, in ``InvoiceColumns.from_rows`` order."""
+    recipient = func.coalesce(func.nullif(Invoice.recipient_gstin, ""), Invoice.receiver_gstin)
+    stmt = select(
+        Invoice.invoice_number,
+        Invoice.invoice_date.is_not(None).label("has_date"),
+        Invoice.invoice_date,
+        Invoice.supplier_gstin,
+        Invoice.receiver_gstin,
+        recipient.label("recipient"),
+        (func.coalesce(func.length(recipient), 0) == 15).label("is_b2b"),
+        and_(
+            func.coalesce(Invoice.supplier_gstin, "") != "",
+            Invoice.supplier_gstin_valid.is_(False),
+        ).label("supplier_invalid"),
+        and_(
+            func.coalesce(Invoice.receiver_gstin, "") != "",
+            Invoice.receiver_gstin_valid.is_(False),
+        ).label("receiver_invalid"),
+        _paise_col(Invoice.taxable_value).label("taxable"),
+        _paise_col(Invoice.tax_amount).label("tax"),
+        _paise_col(Invoice.total_amount).label("total"),
+        _paise_col(Invoice.cgst_amount).label("cgst"),
+        _paise_col(Invoice.sgst_amount).label("sgst"),
+        _paise_col(Invoice.igst_amount).label("igst"),
+        cast(Invoice.tax_rate, Float).label("tax_rate"),
+    ).where(*criteria)
+    if order_by:
+        stmt = stmt.order_by(*order_by)
+    if limit is not None:
+        stmt = stmt.limit(limit)
+    return stmt
+
+
+async def load_invoice_columns(
+    db: AsyncSession,
+    *criteria,
+    order_by: Sequence = (),
+    limit: int | None = None,
+) -> InvoiceColumns:
+    """Fetch invoices matching ``criteria`` straight into columns (no ORM objects)."""
+    result = await db.execute(invoice_columns_stmt(*criteria, order_by=order_by, limit=limit))
+    return InvoiceColumns.from_rows(result.all())
+
+
+# ---------------------------------------------------------------------------
+# Aggregation
+# ---------------------------------------------------------------------------
+def _money(paise: np.ndarray) -> Decimal:
+    return Decimal(int(paise.sum())).scaleb(-2)
+
+
+def _distinct_truthy(values: np.ndarray) -> int:
+    seen = set(values.tolist())
+    return len(seen) - sum(1 for v in seen if not v)
+
+
+def aggregate_columns(cols: InvoiceColumns) -> TaxSummary:
+    """Columnar equivalent of ``tax_analytics.aggregate_invoices``."""
+    today = date.today()
+    summary = TaxSummary(period_start=today.replace(day=1), period_end=today)
+    n = cols.n
+    if n == 0:
+        return summary
+
+    summary.total_invoices = n
+    summary.total_taxable_value = _money(cols.taxable)
+    summary.total_tax = _money(cols.tax)
+    summary.total_amount = _money(cols.total)
+    summary.total_cgst = _money(cols.cgst)
+    summary.total_sgst = _money(cols.sgst)
+    summary.total_igst = _money(cols.igst)
+
+    summary.b2b_count = int(cols.is_b2b.sum())
+    summary.b2c_count = n - summary.b2b_count
+
+    summary.unique_suppliers = _distinct_truthy(cols.supplier_gstin)
+    receivers = {str(r) for r in set(cols.recipient.tolist()) if r}
+    summary.unique_receivers = len(receivers)
+
+    rates = cols.tax_rate[~np.isnan(cols.tax_rate)]
+    if rates.size:
+        uniq, first, counts = np.unique(rates, return_index=True, return_counts=True)
+        order = np.argsort(first, kind="stable")
+        summary.tax_rate_distribution = {
+            str(float(uniq[k])): int(counts[k]) for k in order
+        }
+
+    dates = cols.invoice_date[~np.isnat(cols.invoice_date)]
+    if dates.size:
+        earliest = dates.min().astype(object)
+        latest = dates.max().astype(object)
+        summary.period_start = min(summary.period_start, earliest)
+        summary.period_end = max(summary.period_end, latest)
+
+    summary.avg_invoice_value = summary.total_amount / summary.total_invoices
+    return summary
+
+
+# ---------------------------------------------------------------------------
+# Anomaly detection
+# ---------------------------------------------------------------------------
+def detect_anomalies_columns(
+    cols: InvoiceColumns,
+    valid_gst_rates: set[float] | None = None,
+) -> AnomalyReport:
+    """Columnar equivalent of ``tax_analytics.detect_anomalies``."""
+    report = AnomalyReport()
+    n = cols.n
+    if n == 0:
+        return report
+    numbers = cols.invoice_number
+
+    # Duplicate invoice numbers, groups in first-seen order
+    has_number = np.array([bool(v) for v in numbers.tolist()], dtype=bool)
+    keys = np.where(has_number, numbers, "").astype(str)
+    uniq, first, inverse, counts = np.unique(
+        keys, return_index=True, return_inverse=True, return_counts=True,
+    )
+    dup_groups = np.flatnonzero((counts > 1) & (uniq != ""))
+    if dup_groups.size:
+        by_group = np.argsort(inverse, kind="stable")
+        starts = np.concatenate(([0], np.cumsum(counts)[:-1]))
+        for g in dup_groups[np.argsort(first[dup_groups], kind="stable")]:
+            indices = by_group[starts[g]:starts[g] + counts[g]]
+            report.duplicate_invoice_numbers.append({
+                "invoice_number": numbers[indices[0]],
+                "count": int(counts[g]),
+                "indices": indices.tolist(),
+            })
+
+    # Invalid GSTINs: supplier before receiver within a row
+    flagged = sorted(
+        [(int(i), 0) for i in np.flatnonzero(cols.supplier_invalid)]
+        + [(int(i), 1) for i in np.flatnonzero(cols.receiver_invalid)]
+    )
+    for i, which in flagged:
+        field_name = "supplier_gstin" if which == 0 else "receiver_gstin"
+        report.invalid_gstins.append({
+            "index": i,
+            "invoice_number": numbers[i],
+            "field": field_name,
+            "value": (cols.supplier_gstin if which == 0 else cols.receiver_gstin)[i],
+        })
+
+    # Missing critical fields
+    no_amounts = (cols.taxable == 0) & (cols.total == 0)
+    missing_mask = ~has_number | ~cols.has_date | no_amounts
+    for i in np.flatnonzero(missing_mask).tolist():
+        missing = []
+        if not has_number[i]:
+            missing.append("invoice_number")
+        if not cols.has_date[i]:
+            missing.append("invoice_date")
+        if no_amounts[i]:
+            missing.append("amounts")
+        report.missing_fields.append({
+            "index": i,
+            "invoice_number": numbers[i] or "N/A",
+            "missing": missing,
+        })
+
+    # Tax rate outliers
+    valid = list(valid_gst_rates or DEFAULT_VALID_GST_RATES)
+    rates = cols.tax_rate
+    with np.errstate(invalid="ignore"):
+        outlier = ~np.isnan(rates) & (rates > 0) & ~np.isin(rates, valid)
+    for i in np.flatnonzero(outlier).tolist():
+        report.tax_rate_outliers.append({
+            "index": i,
+            "invoice_number": numbers[i],
+            "tax_rate": float(rates[i]),
+        })
+
+    # High-value outliers (> 3x the mean), compared exactly in paise
+    mean_val = Decimal(int(cols.total.sum())).scaleb(-2) / n
+    threshold = mean_val * 3
+    if threshold > 0:
+        cutoff = int(threshold.scaleb(2).to_integral_value(rounding=ROUND_FLOOR))
+        for i in np.flatnonzero(cols.total > cutoff).tolist():
+            report.high_value_invoices.append({
+                "index": i,
+                "invoice_number": numbers[i],
+                "total_amount": float(Decimal(int(cols.total[i])).scaleb(-2)),
+                "mean_amount": float(mean_val),
+            })
+
+    report.total_anomalies = (
+        len(report.duplicate_invoice_numbers)
+        + len(report.invalid_gstins)
+        + len(report.high_value_invoices)
+        + len(report.missing_fields)
+        + len(report.tax_rate_outliers)
+    )
+    return report
+
+
+async def detect_anomalies_columns_dynamic(cols: InvoiceColumns) -> AnomalyReport:
+    """Async wrapper — resolves GST rates dynamically, then detects anomalies."""
+    from app.domain.services.tax_rate_service import get_tax_rate_service
+
+    service = get_tax_rate_service()
+    gst_config = await service.get_gst_rates()
+    return detect_anomalies_columns(cols, valid_gst_rates=gst_config.valid_rates)
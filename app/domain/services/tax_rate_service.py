@@ -3,16 +3,24 @@
 Dynamic Tax Rate Service — 3-layer resolution.
 
 Resolution order:
+0. In-process frozen copy (TAX_RATE_LOCAL_TTL_SECONDS, pub/sub invalidated)
 1. Redis (hot cache, 24h TTL)
 2. PostgreSQL (warm, versioned audit trail)
 3. OpenAI GPT-4o (cold, AI fetch with validation)
 4. Hardcoded defaults (final fallback — never fails)
+
+Every write (AI refresh, admin override) publishes the changed Redis key on
+``tax_rate:invalidate``; each API process drops its layer-0 copy when the
+shared listener in ``app.infrastructure.cache.invalidation`` (started from
+the app lifespan) receives it.
+The TTL bounds staleness in processes that do not listen (ARQ worker, scripts).
 """
 
 from __future__ import annotations
 
 import json
 import logging
+import time
 
 import redis.asyncio as aioredis
 
@@ -24,6 +32,7 @@ logger = logging.getLogger("tax_rate_service")
 
 _REDIS_TTL = 24 * 60 * 60  # 24 hours
 _REDIS_KEY_PREFIX = "tax_rate:"
+INVALIDATE_CHANNEL = f"{_REDIS_KEY_PREFIX}invalidate"
 
 
 class TaxRateService:
@@ -31,6 +40,8 @@ class TaxRateService:
 
     def __init__(self) -> None:
         self._redis: aioredis.Redis | None = None
+        # Layer 0: Redis key -> (expires_at, frozen config)
+        self._local: dict[str, tuple[float, ITRSlabConfig | GSTRateConfig]] = {}
 
     async def _get_redis(self) -> aioredis.Redis:
         if self._redis is None:
@@ -49,6 +60,46 @@ class TaxRateService:
     def _gst_key() -> str:
         return f"{_REDIS_KEY_PREFIX}gst:rates"
 
+    # ---- Layer 0: in-process (frozen, shared) ----
+
+    def _get_local(self, key: str):
+        entry = self._local.get(key)
+        if entry is None:
+            return None
+        expires_at, config = entry
+        if time.monotonic() >= expires_at:
+            del self._local[key]
+            return None
+        return config
+
+    def _set_local(self, key: str, config):
+        frozen = config.frozen()
+        self._local[key] = (time.monotonic() + settings.TAX_RATE_LOCAL_TTL_SECONDS, frozen)
+        return frozen
+
+    def invalidate_local(self, key: str | None = None) -> None:
+        """Drop one layer-0 entry, or all of them when ``key`` is None."""
+        if key is None:
+            self._local.clear()
+        else:
+            self._local.pop(key, None)
+
+    async def _publish_invalidation(self, key: str) -> None:
+        self.invalidate_local(key)
+        try:
+            r = await self._get_redis()
+            await r.publish(INVALIDATE_CHANNEL, key)
+        except Exception:
+            logger.exception("Failed to publish tax rate invalidation for %s", key)
+
+    async def listen_for_invalidations(self) -> None:
+        """Drop layer-0 entries as other processes update configs. Runs until cancelled."""
+        from app.infrastructure.cache.invalidation import listen_for_invalidations
+
+        await listen_for_invalidations(
+            {INVALIDATE_CHANNEL: self.invalidate_local}, redis=await self._get_redis(),
+        )
+
     # ---- Layer 1: Redis (hot cache) ----
 
     async def _get_from_redis(self, key: str) -> dict | None:
@@ -126,6 +177,7 @@ class TaxRateService:
                 await self._set_in_redis(self._itr_key(assessment_year), d)
             except Exception:
                 logger.exception("Failed to cache AI ITR config in Redis")
+            await self._publish_invalidation(self._itr_key(assessment_year))
         return config
 
     async def _fetch_from_ai_gst(self) -> GSTRateConfig | None:
@@ -146,17 +198,26 @@ class TaxRateService:
                 await self._set_in_redis(self._gst_key(), d)
             except Exception:
                 logger.exception("Failed to cache AI GST config in Redis")
+            await self._publish_invalidation(self._gst_key())
         return config
 
     # ---- Public API ----
 
     async def get_itr_slabs(self, assessment_year: str = "2025-26") -> ITRSlabConfig:
         """
-        3-layer resolution for ITR slab config.
+        3-layer resolution for ITR slab config, behind the in-process layer 0.
 
-        Never raises — always returns a valid ITRSlabConfig.
+        Never raises — always returns a valid ITRSlabConfig.  The result is
+        a shared frozen copy (tuple slabs, ``version`` set); do not mutate it.
         """
         key = self._itr_key(assessment_year)
+        local = self._get_local(key)
+        if local is not None:
+            return local
+        return self._set_local(key, await self._resolve_itr_slabs(assessment_year))
+
+    async def _resolve_itr_slabs(self, assessment_year: str) -> ITRSlabConfig:
+        key = self._itr_key(assessment_year)
 
         # Layer 1: Redis
         try:
@@ -197,11 +258,18 @@ class TaxRateService:
 
     async def get_gst_rates(self) -> GSTRateConfig:
         """
-        3-layer resolution for GST rate config.
+        3-layer resolution for GST rate config, behind the in-process layer 0.
 
-        Never raises — always returns a valid GSTRateConfig.
+        Never raises — always returns a valid GSTRateConfig (shared, frozen).
         """
         key = self._gst_key()
+        local = self._get_local(key)
+        if local is not None:
+            return local
+        return self._set_local(key, await self._resolve_gst_rates())
+
+    async def _resolve_gst_rates(self) -> GSTRateConfig:
+        key = self._gst_key()
 
         # Layer 1: Redis
         try:
@@ -270,6 +338,7 @@ class TaxRateService:
             await self._set_in_redis(self._itr_key(assessment_year), d)
         except Exception:
             logger.exception("Failed to update Redis after manual ITR override")
+        await self._publish_invalidation(self._itr_key(assessment_year))
 
     async def save_manual_gst_config(
         self,
@@ -289,6 +358,7 @@ class TaxRateService:
             await self._set_in_redis(self._gst_key(), d)
         except Exception:
             logger.exception("Failed to update Redis after manual GST override")
+        await self._publish_invalidation(self._gst_key())
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,202 @@
+# app/domain/services/voice_audio.py
+"""
+Voice-note audio preparation: decode, trim silence, split at pauses.
+
+WhatsApp voice notes are OGG/Opus.  ``prepare_segments`` decodes them with
+ffmpeg (``VOICE_FFMPEG_PATH``, at most ``VOICE_TRANSCODE_WORKERS`` decoder
+processes at a time) to 16 kHz mono PCM — the rate the STT models run at —
+then, in a worker thread, trims leading and trailing silence and cuts long
+notes at the longest pause into segments of at most
+``VOICE_SEGMENT_MAX_SECONDS``.  Each segment is packed as WAV so it can be
+transcribed on its own, concurrently with the others; it also keeps every
+upload inside Sarvam's 30-second limit.
+
+If ffmpeg is missing or cannot decode the note, the original bytes come back
+as a single segment, which is what used to be sent.  16 kHz mono 16-bit WAV
+input needs no ffmpeg.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import logging
+import shutil
+import wave
+from dataclasses import dataclass
+
+from app.core.config import settings
+
+logger = logging.getLogger("voice_audio")
+
+SAMPLE_RATE = 16000
+
+_FRAME_MS = 20
+_PAD_MS = 160           # speech kept either side of the trimmed region
+
+_slots: tuple[asyncio.AbstractEventLoop, asyncio.Semaphore] | None = None
+
+
+@dataclass(frozen=True)
+class AudioSegment:
+    data: bytes
+    filename: str
+    content_type: str
+    start: float = 0.0      # seconds into the decoded note
+    seconds: float = 0.0
+
+
+def _decode_slots() -> asyncio.Semaphore:
+    global _slots
+    loop = asyncio.get_running_loop()
+    if _slots is None or _slots[0] is not loop:
+        _slots = (loop, asyncio.Semaphore(max(1, settings.VOICE_TRANSCODE_WORKERS)))
+    return _slots[1]
+
+
+# ── Decoding ──────────────────────────────────────────────────
+
+def _wav_pcm(audio: bytes) -> bytes | None:
+    """PCM frames of a WAV that is already 16 kHz mono 16-bit, else None."""
+    if audio[:4] != b"RIFF" or audio[8:12] != b"WAVE":
+        return None
+    try:
+        with wave.open(io.BytesIO(audio)) as w:
+            if (w.getnchannels(), w.getsampwidth(), w.getframerate()) == (1, 2, SAMPLE_RATE):
+                return w.readframes(w.getnframes())
+    except (wave.Error, EOFError):
+        pass
+    return None
+
+
+async def decode_pcm(audio: bytes) -> bytes | None:
+    """16 kHz mono s16le PCM for ``audio``, or None if it cannot be decoded here."""
+    pcm = _wav_pcm(audio)
+    if pcm is not None:
+        return pcm
+
+    ffmpeg = shutil.which(settings.VOICE_FFMPEG_PATH)
+    if not ffmpeg:
+        logger.debug("ffmpeg not found; voice note sent as-is")
+        return None
+
+    async with _decode_slots():
+        proc = await asyncio.create_subprocess_exec(
+            ffmpeg, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+            "-ac", "1", "-ar", str(SAMPLE_RATE), "-f", "s16le", "pipe:1",
+            stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+        )
+        try:
+            out, err = await asyncio.wait_for(
+                proc.communicate(audio), settings.VOICE_TRANSCODE_TIMEOUT_SECONDS,
+            )
+        except asyncio.TimeoutError:
+            proc.kill()
+            await proc.wait()
+            logger.warning("ffmpeg timed out decoding a %d-byte voice note", len(audio))
+            return None
+
+    if proc.returncode != 0:
+        logger.warning("ffmpeg could not decode voice note: %s", err[:200].decode(errors="replace"))
+        return None
+    return out
+
+
+# ── Trimming and splitting ────────────────────────────────────
+
+def _longest_pause(voiced, lo: int, hi: int, min_frames: int) -> int | None:
+    """Frame index in the middle of the longest silent run within [lo, hi)."""
+    import numpy as np
+
+    silent = np.concatenate(([False], ~voiced[lo:hi], [False])).astype(np.int8)
+    edges = np.diff(silent)
+    starts, ends = np.flatnonzero(edges == 1), np.flatnonzero(edges == -1)
+    if not starts.size:
+        return None
+    lengths = ends - starts
+    k = int(np.argmax(lengths))
+    if lengths[k] < min_frames:
+        return None
+    return lo + int((starts[k] + ends[k]) // 2)
+
+
+def split_speech(
+    pcm: bytes,
+    *,
+    max_seconds: float,
+    threshold_db: float,
+    min_silence_ms: int,
+) -> list[tuple[int, int]]:
+    """Sample ranges of speech in ``pcm``: ends trimmed, cut at pauses.
+
+    A frame is speech when its RMS level is above ``threshold_db`` dBFS.
+    Ranges longer than ``max_seconds`` are cut in the middle of the longest
+    pause of at least ``min_silence_ms`` in their second half, or hard at
+    ``max_seconds`` if there is none.  Returns [] for silence.
+    """
+    import numpy as np
+
+    samples = np.frombuffer(pcm[: len(pcm) // 2 * 2], dtype="<i2")
+    frame = SAMPLE_RATE * _FRAME_MS // 1000
+    n = len(samples) // frame
+    if n == 0:
+        return []
+    frames = samples[: n * frame].reshape(n, frame).astype(np.float32) / 32768.0
+    rms = np.sqrt(np.mean(frames * frames, axis=1))
+    voiced = 20 * np.log10(np.maximum(rms, 1e-10)) > threshold_db
+
+    speech = np.flatnonzero(voiced)
+    if not speech.size:
+        return []
+    pad = _PAD_MS // _FRAME_MS
+    start, end = max(0, int(speech[0]) - pad), min(n, int(speech[-1]) + 1 + pad)
+
+    max_frames = max(1, int(max_seconds * 1000) // _FRAME_MS)
+    min_frames = max(1, min_silence_ms // _FRAME_MS)
+    ranges = []
+    while end - start > max_frames:
+        cut = _longest_pause(voiced, start + max_frames // 2, start + max_frames, min_frames)
+        cut = cut if cut is not None else start + max_frames
+        ranges.append((start, cut))
+        start = cut
+    ranges.append((start, end))
+    return [(a * frame, min(b * frame, len(samples))) for a, b in ranges]
+
+
+def to_wav(pcm: bytes) -> bytes:
+    buf = io.BytesIO()
+    with wave.open(buf, "wb") as w:
+        w.setnchannels(1)
+        w.setsampwidth(2)
+        w.setframerate(SAMPLE_RATE)
+        w.writeframes(pcm)
+    return buf.getvalue()
+
+
+def _segment_pcm(pcm: bytes) -> list[AudioSegment]:
+    ranges = split_speech(
+        pcm,
+        max_seconds=settings.VOICE_SEGMENT_MAX_SECONDS,
+        threshold_db=settings.VOICE_SILENCE_THRESHOLD_DB,
+        min_silence_ms=settings.VOICE_MIN_SILENCE_MS,
+    )
+    return [
+        AudioSegment(
+            data=to_wav(pcm[a * 2: b * 2]),
+            filename=f"segment{i}.wav",
+            content_type="audio/wav",
+            start=a / SAMPLE_RATE,
+            seconds=(b - a) / SAMPLE_RATE,
+        )
+        for i, (a, b) in enumerate(ranges)
+    ]
+
+
+async def prepare_segments(audio: bytes) -> list[AudioSegment]:
+    """Segments to transcribe, in order; [] if the note is silent."""
+    pcm = await decode_pcm(audio)
+    if pcm is None:
+        return [AudioSegment(data=audio, filename="audio.ogg", content_type="audio/ogg")]
+    return await asyncio.to_thread(_segment_pcm, pcm)
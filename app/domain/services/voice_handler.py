@@ -1,14 +1,42 @@
 # app/domain/services/voice_handler.py
+"""
+Voice-note pipeline: download → prepare audio → STT per segment → translate.
 
+* Transcripts are cached in Redis by a SHA-256 of the audio and the session
+  language for ``VOICE_TRANSCRIPT_CACHE_TTL``: a forwarded or re-sent note
+  is answered without STT.
+* ``voice_audio.prepare_segments`` decodes the note, trims silence and cuts
+  it at pauses; segments are transcribed concurrently,
+  ``VOICE_STT_CONCURRENCY`` at a time.
+* Each segment's translation starts as soon as its own transcript is in,
+  while later segments are still being transcribed.
+* ``translate_with_bhashini`` returns its input when it fails, so a result
+  is cached only if every segment came back translated; a degraded answer
+  is returned once and the next resend translates again.
+* Media download, Sarvam and Bhashini share one keep-alive HTTP client.
+"""
+
+import asyncio
+import hashlib
+import json
 import logging
-from dataclasses import dataclass
+from dataclasses import asdict, dataclass
+
+import httpx
 
-from app.infrastructure.external.whatsapp_media import get_media_url, download_media
+from app.core.config import settings
+from app.domain.services.voice_audio import AudioSegment, prepare_segments
+from app.infrastructure.external import translation_bhashini
 from app.infrastructure.external.stt_sarvam import transcribe_audio_sarvam
 from app.infrastructure.external.translation_bhashini import translate_with_bhashini
+from app.infrastructure.external.whatsapp_media import download_media, get_media_url
 
 logger = logging.getLogger("voice_handler")
 
+_CACHE_PREFIX = "voice:transcript:"
+
+_http: httpx.AsyncClient | None = None
+
 
 @dataclass
 class VoiceResult:
@@ -18,6 +46,89 @@ class VoiceResult:
     error: str | None = None
 
 
+def _get_http() -> httpx.AsyncClient:
+    global _http
+    if _http is None or _http.is_closed:
+        _http = httpx.AsyncClient(
+            timeout=60,
+            limits=httpx.Limits(max_connections=50, max_keepalive_connections=20),
+        )
+    return _http
+
+
+async def close_http_client() -> None:
+    """Close the shared client (called from the app lifespan)."""
+    global _http
+    if _http is not None:
+        await _http.aclose()
+        _http = None
+
+
+# ── Transcript cache ──────────────────────────────────────────
+
+def _cache_key(audio_bytes: bytes, lang: str) -> str:
+    return f"{_CACHE_PREFIX}{hashlib.sha256(audio_bytes).hexdigest()}:{lang or '-'}"
+
+
+async def _cache_get(key: str) -> VoiceResult | None:
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    try:
+        raw = await get_redis_client().get(key)
+    except Exception:
+        logger.warning("Voice transcript cache read failed", exc_info=True)
+        return None
+    return VoiceResult(**json.loads(raw)) if raw else None
+
+
+async def _cache_set(key: str, result: VoiceResult) -> None:
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    try:
+        await get_redis_client().set(
+            key, json.dumps(asdict(result)), ex=settings.VOICE_TRANSCRIPT_CACHE_TTL,
+        )
+    except Exception:
+        logger.warning("Voice transcript cache write failed", exc_info=True)
+
+
+# ── Pipeline ──────────────────────────────────────────────────
+
+async def _transcribe_segments(
+    segments: list[AudioSegment],
+    lang: str,
+    translate: bool,
+    client: httpx.AsyncClient,
+) -> list[tuple[str, str | None]]:
+    """(transcript, translation) per segment, in order."""
+    slots = asyncio.Semaphore(max(1, settings.VOICE_STT_CONCURRENCY))
+
+    async def one(segment: AudioSegment) -> tuple[str, str | None]:
+        async with slots:
+            text = await transcribe_audio_sarvam(
+                segment.data,
+                language=lang,
+                client=client,
+                filename=segment.filename,
+                content_type=segment.content_type,
+            )
+        text = (text or "").strip()
+        if not translate or not text:
+            return text, None
+        # Outside the STT slot: the next segment's upload is not held back
+        return text, await translate_with_bhashini(
+            text, source_lang=lang, target_lang="en", client=client,
+        )
+
+    tasks = [asyncio.ensure_future(one(s)) for s in segments]
+    try:
+        return await asyncio.gather(*tasks)
+    except BaseException:
+        for task in tasks:
+            task.cancel()
+        raise
+
+
 async def process_voice_message(
     media_id: str,
     session_lang: str,
@@ -25,50 +136,66 @@ async def process_voice_message(
     """
     Complete voice message processing pipeline:
     1. Download audio from WhatsApp Media API
-    2. Transcribe via Sarvam STT
-    3. Optionally translate via Bhashini (if configured)
+    2. Serve from the transcript cache, or
+    3. Decode, trim and segment the audio, transcribe segments via Sarvam STT
+    4. Optionally translate each segment via Bhashini (if configured)
     """
     try:
         # Step 1: Download audio
-        media_url = await get_media_url(media_id)
-        audio_bytes = await download_media(media_url)
+        client = _get_http()
+        media_url = await get_media_url(media_id, client=client)
+        audio_bytes = await download_media(media_url, client=client)
 
         if not audio_bytes:
             return VoiceResult(error="download_failed")
 
-        # Step 2: Transcribe via Sarvam STT
+        # Step 2: Same audio, same language → same transcript
+        key = _cache_key(audio_bytes, session_lang)
+        cached = await _cache_get(key)
+        if cached is not None:
+            return cached
+
+        # Step 3: Transcribe via Sarvam STT
+        segments = await prepare_segments(audio_bytes)
+        if not segments:
+            return VoiceResult(error="transcription_empty")
+
+        # Step 4: Optionally translate to English for NLP processing
+        # GPT-4o handles multilingual well, so translation is optional
+        translate = bool(
+            session_lang and session_lang != "en" and translation_bhashini.is_configured()
+        )
         try:
-            transcribed = await transcribe_audio_sarvam(
-                audio_bytes, language=session_lang
-            )
+            pieces = await _transcribe_segments(segments, session_lang, translate, client)
         except RuntimeError:
             # Sarvam not configured
             return VoiceResult(error="stt_not_configured")
 
-        if not transcribed or not transcribed.strip():
+        transcribed = " ".join(text for text, _ in pieces if text)
+        if not transcribed:
             return VoiceResult(error="transcription_empty")
 
-        # Step 3: Optionally translate to English for NLP processing
-        # GPT-4o handles multilingual well, so translation is optional
         translated = None
-        if session_lang and session_lang != "en":
-            try:
-                translated = await translate_with_bhashini(
-                    transcribed,
-                    source_lang=session_lang,
-                    target_lang="en",
-                )
-                # If Bhashini returns the same text, it wasn't configured
-                if translated == transcribed:
-                    translated = None
-            except Exception:
-                logger.debug("Bhashini translation unavailable, using raw transcription")
-
-        return VoiceResult(
-            transcribed_text=transcribed.strip(),
+        # Bhashini returns its input on failure
+        complete = not translate or all(
+            tr and tr.strip() != text for text, tr in pieces if text
+        )
+        if translate:
+            translated = " ".join((tr or text).strip() for text, tr in pieces if text)
+            # If Bhashini returns the same text, it failed
+            if translated == transcribed:
+                translated = None
+
+        result = VoiceResult(
+            transcribed_text=transcribed,
             detected_lang=session_lang,
             translated_text=translated,
         )
+        if complete:
+            await _cache_set(key, result)
+        else:
+            logger.info("Voice translation incomplete; not caching the transcript")
+        return result
 
     except Exception:
         logger.exception("Voice message processing failed")
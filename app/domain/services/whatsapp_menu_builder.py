@@ -21,7 +21,6 @@ from __future__ import annotations
 import logging
 from typing import Any, Dict, Union
 
-from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.core.config import settings
@@ -98,16 +97,16 @@ async def build_gst_menu(
     # Determine segment from session (set during onboarding) or DB
     client_segment = data.get("client_segment", "small")
 
-    # If segment gating is enabled and we have a GSTIN, try to get from DB
+    # If segment gating is enabled and we have a GSTIN, look up the client's
+    # segment (cached; see feature_registry)
     gstin = data.get("gstin")
     if settings.SEGMENT_GATING_ENABLED and gstin and not data.get("gst_onboarded"):
         try:
-            from app.infrastructure.db.models import BusinessClient
-            stmt = select(BusinessClient).where(BusinessClient.gstin == gstin)
-            result = await db.execute(stmt)
-            client = result.scalar_one_or_none()
-            if client:
-                client_segment = getattr(client, "segment", "small") or "small"
+            from app.domain.services.feature_registry import get_client_segment_by_gstin
+
+            segment = await get_client_segment_by_gstin(gstin, db)
+            if segment:
+                client_segment = segment
         except Exception:
             logger.exception("Failed to load segment for gstin=%s", gstin)
 
@@ -0,0 +1,73 @@
+# app/infrastructure/cache/invalidation.py
+"""
+Pub/sub listener for in-process cache invalidations.
+
+Services that keep an in-process copy of Redis data publish the Redis key
+they changed on their own channel (``tax_rate:invalidate``,
+``seg:invalidate``).  ``listen_for_invalidations`` subscribes to a set of
+such channels on one connection and calls the channel's handler with the
+published key.  After every (re)subscribe each handler is called with
+``None`` — "drop everything" — because messages may have been missed while
+the connection was down.  Failures are retried every
+``_LISTEN_RETRY_SECONDS``; the coroutine runs until cancelled.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import logging
+from collections.abc import Callable, Mapping
+from typing import Any
+
+logger = logging.getLogger("cache_invalidation")
+
+_LISTEN_RETRY_SECONDS = 5
+
+# Called with the invalidated key, or None to drop every local entry
+InvalidationHandler = Callable[[str | None], None]
+
+
+async def listen_for_invalidations(
+    handlers: Mapping[str, InvalidationHandler],
+    *,
+    redis: Any = None,
+) -> None:
+    """Dispatch invalidation messages on ``handlers``' channels. Runs until cancelled.
+
+    ``redis`` defaults to the shared client from ``get_redis_client``.
+    """
+    if redis is None:
+        from app.infrastructure.cache.redis_client import get_redis_client
+
+        redis = get_redis_client()
+
+    channels = ", ".join(handlers)
+    while True:
+        pubsub = None
+        try:
+            pubsub = redis.pubsub()
+            await pubsub.subscribe(*handlers)
+            # Messages may have been missed while (re)connecting
+            for handler in handlers.values():
+                handler(None)
+            async for message in pubsub.listen():
+                if message.get("type") != "message":
+                    continue
+                handler = handlers.get(message.get("channel"))
+                if handler is not None:
+                    logger.debug("Invalidated %s (%s)", message["data"], message["channel"])
+                    handler(message["data"])
+        except asyncio.CancelledError:
+            raise
+        except Exception:
+            logger.warning(
+                "Cache invalidation listener on %s failed, retrying in %ss",
+                channels, _LISTEN_RETRY_SECONDS, exc_info=True,
+            )
+            await asyncio.sleep(_LISTEN_RETRY_SECONDS)
+        finally:
+            if pubsub is not None:
+                try:
+                    await pubsub.aclose()
+                except Exception:
+                    pass
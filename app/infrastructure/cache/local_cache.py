@@ -0,0 +1,53 @@
+# app/infrastructure/cache/local_cache.py
+"""
+Bounded in-process cache with a per-entry TTL.
+
+Used as "layer 0" in front of Redis by services that read the same small
+records on every request.  At most ``maxsize`` entries are kept; the least
+recently used one is evicted first, so a process that sees many distinct
+keys (e.g. every GSTIN that ever messaged the bot) does not grow without
+bound.  Not thread-safe — callers run on one event loop.
+"""
+
+from __future__ import annotations
+
+import time
+from collections import OrderedDict
+from typing import Any
+
+
+class TTLCache:
+    """LRU map of key -> value, each entry expiring ``ttl`` seconds after ``put``."""
+
+    def __init__(self, maxsize: int) -> None:
+        self.maxsize = maxsize
+        self._data: OrderedDict[str, tuple[float, Any]] = OrderedDict()
+
+    def get(self, key: str) -> Any | None:
+        item = self._data.get(key)
+        if item is None:
+            return None
+        expires_at, value = item
+        if time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: str, value: Any, ttl: float) -> None:
+        self._data[key] = (time.monotonic() + ttl, value)
+        self._data.move_to_end(key)
+        while len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def pop(self, key: str) -> None:
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __contains__(self, key: str) -> bool:
+        return self.get(key) is not None
+
+    def __len__(self) -> int:
+        return len(self._data)
@@ -0,0 +1,99 @@
+# app/infrastructure/cache/principal_cache.py
+"""
+Short-TTL cache of authenticated CA principals, keyed by access-token ``jti``.
+
+``get_current_ca`` runs on every dashboard request.  Instead of loading the
+``ca_users`` row each time, a snapshot of it is kept in Redis for
+``CA_PRINCIPAL_CACHE_TTL_SECONDS`` and served as a transient ``CAUser``.
+
+Key layout::
+
+    ca:principal:{jti}       JSON snapshot of the CAUser row (no password hash)
+    ca:principal:ca:{ca_id}  set of jtis cached for that CA
+
+Approving, rejecting or (de)activating a CA calls ``invalidate_ca`` so that
+every cached token of that CA goes back to the DB on its next request.
+Redis failures fail open: the caller falls back to the DB lookup.
+"""
+
+from __future__ import annotations
+
+import json
+import logging
+from datetime import datetime
+
+from sqlalchemy import DateTime
+
+from app.core.config import settings
+from app.infrastructure.cache.redis_client import get_redis_client
+from app.infrastructure.db.models import CAUser
+
+logger = logging.getLogger("principal_cache")
+
+_KEY_PREFIX = "ca:principal:"
+_EXCLUDED = frozenset({"password_hash"})
+
+
+def _key(jti: str) -> str:
+    return f"{_KEY_PREFIX}{jti}"
+
+
+def _index_key(ca_id: int) -> str:
+    return f"{_KEY_PREFIX}ca:{ca_id}"
+
+
+def snapshot(ca: CAUser) -> str:
+    """Serialize the cacheable columns of ``ca``."""
+    data = {}
+    for column in CAUser.__table__.columns:
+        if column.key in _EXCLUDED:
+            continue
+        value = getattr(ca, column.key)
+        data[column.key] = value.isoformat() if isinstance(value, datetime) else value
+    return json.dumps(data)
+
+
+def restore(raw: str) -> CAUser:
+    """Rebuild a transient (session-less) ``CAUser`` from ``snapshot`` output."""
+    data = json.loads(raw)
+    for column in CAUser.__table__.columns:
+        if isinstance(column.type, DateTime) and data.get(column.key):
+            data[column.key] = datetime.fromisoformat(data[column.key])
+    return CAUser(**data)
+
+
+async def get(jti: str) -> CAUser | None:
+    """Cached principal for an access token, or None."""
+    if settings.CA_PRINCIPAL_CACHE_TTL_SECONDS <= 0:
+        return None
+    try:
+        raw = await get_redis_client().get(_key(jti))
+    except Exception:
+        logger.warning("Principal cache read failed; using the DB", exc_info=True)
+        return None
+    return restore(raw) if raw else None
+
+
+async def put(jti: str, ca: CAUser) -> None:
+    """Cache an active, approved principal for its token."""
+    ttl = settings.CA_PRINCIPAL_CACHE_TTL_SECONDS
+    if ttl <= 0:
+        return
+    try:
+        pipe = get_redis_client().pipeline(transaction=False)
+        pipe.set(_key(jti), snapshot(ca), ex=ttl)
+        pipe.sadd(_index_key(ca.id), jti)
+        pipe.expire(_index_key(ca.id), ttl)
+        await pipe.execute()
+    except Exception:
+        logger.warning("Principal cache write failed for ca_id=%s", ca.id, exc_info=True)
+
+
+async def invalidate_ca(ca_id: int) -> None:
+    """Drop every cached token of a CA (after approve / reject / toggle-active)."""
+    try:
+        r = get_redis_client()
+        jtis = await r.smembers(_index_key(ca_id))
+        await r.delete(_index_key(ca_id), *(_key(j) for j in jtis))
+    except Exception:
+        logger.exception("Principal cache invalidation failed for ca_id=%s", ca_id)
@@ -4,6 +4,12 @@ from typing import Any, Dict
 
 import redis.asyncio as redis
 
+from app.core.metrics import SESSION_CACHE_SECONDS
+from app.domain.i18n import SUPPORTED_LANGS
+
+_GET_TIMER = SESSION_CACHE_SECONDS.labels("get")
+_SAVE_TIMER = SESSION_CACHE_SECONDS.labels("save")
+
 # ---------------------------------------------------------------------------
 # Session version & TTL constants
 # ---------------------------------------------------------------------------
@@ -12,6 +18,27 @@ SESSION_TTL_SECONDS = 14 * 24 * 60 * 60        # 14 days hard expiry
 SOFT_EXPIRY_SECONDS = 30 * 60                   # 30 min idle → resume prompt
 SENSITIVE_TIMEOUT_SECONDS = 10 * 60             # 10 min for confirm screens
 
+# ---------------------------------------------------------------------------
+# Active-user registry
+# ---------------------------------------------------------------------------
+# One sorted set per language: member = wa_id, score = last_active_ts.
+# Maintained by save_session / clear_session so background jobs (deadline
+# reminders, nudges) can page through active users with ZSCAN instead of
+# SCANning and parsing every session blob.  Members older than
+# SESSION_TTL_SECONDS are pruned with prune_active_users().
+ACTIVE_USERS_PREFIX = "wa:active:"
+ACTIVE_BACKFILL_KEY = "wa:active:backfilled"
+
+
+def active_users_key(lang: str) -> str:
+    return f"{ACTIVE_USERS_PREFIX}{lang}"
+
+
+def registry_lang(session: Dict[str, Any]) -> str:
+    """Language bucket for a session; unknown languages fall back to English."""
+    lang = session.get("lang", "en")
+    return lang if lang in SUPPORTED_LANGS else "en"
+
 
 def _default_session() -> Dict[str, Any]:
     """Return a fresh default session dict (avoids shared mutable state)."""
@@ -68,7 +95,8 @@ class SessionCache:
         return f"wa:session:{wa_id}"
 
     async def get_session(self, wa_id: str) -> Dict[str, Any]:
-        raw = await self._r.get(self._key(wa_id))
+        with _GET_TIMER.time():
+            raw = await self._r.get(self._key(wa_id))
         if not raw:
             return _default_session()
         try:
@@ -83,14 +111,99 @@ class SessionCache:
         session: Dict[str, Any],
         ttl_seconds: int = SESSION_TTL_SECONDS,
     ) -> None:
-        await self._r.set(
-            self._key(wa_id),
-            json.dumps(session),
-            ex=ttl_seconds,
-        )
+        lang = registry_lang(session)
+        with _SAVE_TIMER.time():
+            pipe = self._r.pipeline(transaction=False)
+            pipe.set(self._key(wa_id), json.dumps(session), ex=ttl_seconds)
+            pipe.zadd(
+                active_users_key(lang),
+                {wa_id: session.get("last_active_ts") or time.time()},
+            )
+            # A language switch moves the user between sets
+            for other in SUPPORTED_LANGS:
+                if other != lang:
+                    pipe.zrem(active_users_key(other), wa_id)
+            await pipe.execute()
 
     async def clear_session(self, wa_id: str) -> None:
-        await self._r.delete(self._key(wa_id))
+        pipe = self._r.pipeline(transaction=False)
+        pipe.delete(self._key(wa_id))
+        for lang in SUPPORTED_LANGS:
+            pipe.zrem(active_users_key(lang), wa_id)
+        await pipe.execute()
+
+
+async def prune_active_users(r: redis.Redis, now: float | None = None) -> int:
+    """Drop registry members whose session has hit its hard expiry."""
+    cutoff = (now or time.time()) - SESSION_TTL_SECONDS
+    pipe = r.pipeline(transaction=False)
+    for lang in SUPPORTED_LANGS:
+        pipe.zremrangebyscore(active_users_key(lang), "-inf", cutoff)
+    return sum(await pipe.execute())
+
+
+async def backfill_active_users(r: redis.Redis, batch: int = 500) -> int:
+    """One-off: register sessions saved before the registry existed.
+
+    Runs at most once per Redis (guarded by ``ACTIVE_BACKFILL_KEY``).
+    Returns the number of sessions registered.
+    """
+    if not await r.set(ACTIVE_BACKFILL_KEY, str(time.time()), nx=True):
+        return 0
+    count = 0
+    async for keys in _scan_batches(r, "wa:session:*", batch):
+        values = await r.mget(keys)
+        pipe = r.pipeline(transaction=False)
+        for key, raw in zip(keys, values):
+            if not raw:
+                continue
+            try:
+                session = json.loads(raw)
+            except Exception:
+                continue
+            pipe.zadd(
+                active_users_key(registry_lang(session)),
+                {key.split(":", 2)[-1]: session.get("last_active_ts") or time.time()},
+                nx=True,
+            )
+            count += 1
+        await pipe.execute()
+    return count
+
+
+async def _scan_batches(r: redis.Redis, match: str, batch: int):
+    cursor = 0
+    while True:
+        cursor, keys = await r.scan(cursor=cursor, match=match, count=batch)
+        if keys:
+            yield keys
+        if int(cursor) == 0:
+            break
+
+
+async def iter_active_users(
+    r: redis.Redis,
+    lang: str,
+    batch: int = 500,
+    active_since: float | None = None,
+):
+    """Yield lists of wa_ids registered under ``lang`` (ZSCAN, ~``batch`` each).
+
+    ZSCAN returns every member present for the whole iteration at least once;
+    a user who is re-saved mid-scan may be returned twice.
+    """
+    cursor = 0
+    key = active_users_key(lang)
+    while True:
+        cursor, members = await r.zscan(key, cursor=cursor, count=batch)
+        wa_ids = [
+            wa_id for wa_id, score in members
+            if active_since is None or score >= active_since
+        ]
+        if wa_ids:
+            yield wa_ids
+        if int(cursor) == 0:
+            break
 
 
 # ---------------------------------------------------------------------------
@@ -0,0 +1,97 @@
+# app/infrastructure/cache/webhook_idempotency.py
+"""
+Idempotency store for inbound WhatsApp webhook deliveries.
+
+Meta re-delivers a webhook whenever our endpoint is slow to answer, so the
+same ``messages[].id`` can arrive several times while OCR / LLM work for the
+first delivery is still running.  Each message id is claimed with an atomic
+``SET NX EX``; later deliveries find the key and are answered immediately
+without touching the session or the state machine.
+
+Key layout::
+
+    wa:msg:{message_id}   "pending" while the first delivery is processed,
+                          then the HTTP status it returned (memoised)
+    wa:msg:dup_hits       total duplicate deliveries skipped (all workers)
+
+Redis failures fail open: the message is processed as if it were new.
+"""
+
+from __future__ import annotations
+
+import logging
+
+import redis.asyncio as redis
+
+logger = logging.getLogger("webhook_idempotency")
+
+PENDING = "pending"
+DUP_HITS_KEY = "wa:msg:dup_hits"
+
+# Duplicates skipped by this process (the Redis counter covers all workers)
+local_duplicate_hits = 0
+
+
+class WebhookIdempotencyStore:
+    def __init__(self, redis_url: str, ttl_seconds: int, *, memoize: bool = True):
+        if not redis_url:
+            raise RuntimeError("REDIS_URL is not set")
+        self._r = redis.from_url(redis_url, decode_responses=True)
+        self._ttl = ttl_seconds
+        self._memoize = memoize
+
+    def _key(self, message_id: str) -> str:
+        return f"wa:msg:{message_id}"
+
+    async def claim(self, message_id: str) -> str | None:
+        """Claim a message id for processing.
+
+        Returns ``None`` if this delivery is the first one (caller should
+        process it), otherwise the stored value: ``"pending"`` or the
+        memoised status code as a string.
+        """
+        global local_duplicate_hits
+        key = self._key(message_id)
+        try:
+            if await self._r.set(key, PENDING, nx=True, ex=self._ttl):
+                return None
+            pipe = self._r.pipeline(transaction=False)
+            pipe.get(key)
+            pipe.incr(DUP_HITS_KEY)
+            prior, _ = await pipe.execute()
+        except Exception:
+            logger.warning("Idempotency claim failed for %s", message_id, exc_info=True)
+            return None
+        local_duplicate_hits += 1
+        # Key expired between SET and GET — still a duplicate of a recent delivery
+        return prior or PENDING
+
+    async def remember(self, message_id: str, status_code: int) -> None:
+        """Memoise the status the first delivery returned."""
+        if not self._memoize:
+            return
+        try:
+            await self._r.set(
+                self._key(message_id), str(status_code), xx=True, ex=self._ttl
+            )
+        except Exception:
+            logger.debug("Idempotency memoise failed for %s", message_id)
+
+
+def status_from_claim(prior: str) -> int:
+    """HTTP status to answer a duplicate delivery with."""
+    return int(prior) if prior.isdigit() else 200
+
+
+async def duplicate_hits() -> dict[str, int]:
+    """Duplicate deliveries skipped.
+
+    Returns ``{"total": all workers, "local": this process}``.
+    """
+    from app.infrastructure.cache.redis_client import get_redis_client
+
+    try:
+        total = int(await get_redis_client().get(DUP_HITS_KEY) or 0)
+    except Exception:
+        total = local_duplicate_hits
+    return {"total": total, "local": local_duplicate_hits}
@@ -3,12 +3,15 @@
 import uuid
 
 from sqlalchemy import (
+    BigInteger,
     Boolean,
     Column,
     Date,
     DateTime,
     Float,
     ForeignKey,
+    Identity,
+    Index,
     Integer,
     JSON,
     LargeBinary,
@@ -99,6 +102,56 @@ class Session(Base):
 
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        # Covering index for period aggregates (liability, GSTR-1, books vs portal)
+        Index(
+            "ix_invoices_user_direction_date",
+            "user_id",
+            "direction",
+            "invoice_date",
+            postgresql_include=[
+                "taxable_value",
+                "igst_amount",
+                "cgst_amount",
+                "sgst_amount",
+                "itc_eligible",
+                "reverse_charge",
+                "gstr2b_match_status",
+                "blocked_itc_reason",
+                "tax_rate",
+                "place_of_supply",
+                "receiver_gstin",
+                "recipient_gstin",
+            ],
+        ),
+        # Natural key for bulk ERP sync upserts (not unique: legacy uploads repeat)
+        Index(
+            "ix_invoices_natural_key",
+            "user_id",
+            "invoice_number",
+            "direction",
+            "supplier_gstin",
+        ),
+        # pg_trgm indexes for invoice search (ILIKE '%q%' and similarity)
+        Index(
+            "ix_invoices_invoice_number_trgm",
+            "invoice_number",
+            postgresql_using="gin",
+            postgresql_ops={"invoice_number": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_invoices_supplier_gstin_trgm",
+            "supplier_gstin",
+            postgresql_using="gin",
+            postgresql_ops={"supplier_gstin": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_invoices_receiver_gstin_trgm",
+            "receiver_gstin",
+            postgresql_using="gin",
+            postgresql_ops={"receiver_gstin": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id = Column(
@@ -136,7 +189,7 @@ class Invoice(Base):
     itc_eligible = Column(Boolean, default=False, nullable=False)
     reverse_charge = Column(Boolean, default=False, nullable=False)
     blocked_itc_reason = Column(String(100), nullable=True)
-    gstr2b_match_status = Column(String(20), nullable=True)  # matched / missing_in_2b / mismatch / excess_in_2b
+    gstr2b_match_status = Column(String(20), nullable=True)  # matched / missing_in_2b / mismatch / fuzzy_review / excess_in_2b
     gstr2b_match_id = Column(
         UUID(as_uuid=True),
         ForeignKey("itc_matches.id", ondelete="SET NULL", use_alter=True),
@@ -212,6 +265,33 @@ class CAUser(Base):
 
 class BusinessClient(Base):
     __tablename__ = "business_clients"
+    __table_args__ = (
+        # pg_trgm indexes for client search / typeahead
+        Index(
+            "ix_business_clients_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_business_clients_gstin_trgm",
+            "gstin",
+            postgresql_using="gin",
+            postgresql_ops={"gstin": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_business_clients_pan_trgm",
+            "pan",
+            postgresql_using="gin",
+            postgresql_ops={"pan": "gin_trgm_ops"},
+        ),
+        Index(
+            "ix_business_clients_whatsapp_trgm",
+            "whatsapp_number",
+            postgresql_using="gin",
+            postgresql_ops={"whatsapp_number": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     ca_id = Column(Integer, ForeignKey("ca_users.id", ondelete="CASCADE"), index=True)
@@ -515,6 +595,48 @@ class ReturnPeriod(Base):
     payments = relationship("PaymentRecord", back_populates="period")
 
 
+class MonthlyGstRollup(Base):
+    """Per-month invoice totals so annual returns read 12 rows, not every invoice.
+
+    MonthlyRollupRepository adds each new invoice to its bucket and rebuilds
+    whole (user, period) buckets after bulk imports and period recomputes.
+    """
+
+    __tablename__ = "monthly_gst_rollup"
+    __table_args__ = (
+        UniqueConstraint(
+            "user_id", "gstin", "period", "direction",
+            name="uq_monthly_gst_rollup_key",
+        ),
+        Index("ix_monthly_gst_rollup_user_period", "user_id", "period"),
+    )
+
+    id = Column(Integer, primary_key=True)
+    user_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("users.id", ondelete="CASCADE"),
+        nullable=False,
+    )
+    gstin = Column(String(20), nullable=False, default="")  # "" when invoice has none
+    period = Column(String(7), nullable=False)       # "2025-01" (YYYY-MM)
+    direction = Column(String(10), nullable=False)   # "outward" / "inward"
+
+    invoice_count = Column(Integer, default=0, nullable=False)
+    taxable_value = Column(Numeric(16, 2), default=0, nullable=False)
+    igst = Column(Numeric(16, 2), default=0, nullable=False)
+    cgst = Column(Numeric(16, 2), default=0, nullable=False)
+    sgst = Column(Numeric(16, 2), default=0, nullable=False)
+    itc_eligible_taxable = Column(Numeric(16, 2), default=0, nullable=False)
+    credit_note_taxable = Column(Numeric(16, 2), default=0, nullable=False)  # abs(sum of negatives)
+    exempt_nil_taxable = Column(Numeric(16, 2), default=0, nullable=False)   # rate 0, taxable > 0
+
+    refreshed_at = Column(
+        DateTime(timezone=True),
+        server_default=text("CURRENT_TIMESTAMP"),
+        nullable=False,
+    )
+
+
 class ITCMatch(Base):
     """GSTR-2B entry matched against purchase invoices for ITC reconciliation."""
 
@@ -541,9 +663,10 @@ class ITCMatch(Base):
     gstr2b_igst = Column(Numeric(12, 2), default=0, nullable=False)
     gstr2b_cgst = Column(Numeric(12, 2), default=0, nullable=False)
     gstr2b_sgst = Column(Numeric(12, 2), default=0, nullable=False)
+    source = Column(String(10), default="portal", server_default="portal", nullable=False)  # portal (MasterGST) / upload (user file)
 
     # Reconciliation result
-    match_status = Column(String(20), nullable=False)  # matched / missing_in_books / missing_in_2b / value_mismatch / unmatched
+    match_status = Column(String(20), nullable=False)  # matched / missing_in_books / missing_in_2b / value_mismatch / fuzzy_review / unmatched
     mismatch_details = Column(Text, nullable=True)  # JSON: {"field": "taxable_value", "books": 5000, "2b": 4800}
 
     created_at = Column(
@@ -831,6 +954,43 @@ class MLModelArtifact(Base):
     )
 
 
+class MLFeatureSnapshot(Base):
+    """Cached ML feature vector for a return period (training data).
+
+    Rebuilt when the feature layout changes, when the period row is updated
+    after the snapshot, or — for periods not yet filed — after
+    ``ML_FEATURE_CACHE_TTL_HOURS``.
+    """
+
+    __tablename__ = "ml_feature_snapshots"
+
+    period_id = Column(
+        UUID(as_uuid=True),
+        ForeignKey("return_periods.id", ondelete="CASCADE"),
+        primary_key=True,
+    )
+    feature_version = Column(String(16), nullable=False)
+    features_json = Column(Text, nullable=False)        # JSON list, FEATURE_NAMES order
+    computed_at = Column(DateTime(timezone=True), nullable=False)
+
+
+class GstinDirectoryEntry(Base):
+    """Last provider answer for a GSTIN (legal name, state, status).
+
+    Third tier of ``gstin_lookup`` behind the in-process LRU and Redis.
+    ``found=False`` records that the provider does not know the GSTIN.
+    """
+
+    __tablename__ = "gstin_directory"
+
+    gstin = Column(String(15), primary_key=True)
+    found = Column(Boolean, nullable=False)
+    legal_name = Column(String(255), nullable=True)
+    state = Column(String(100), nullable=True)
+    status = Column(String(50), nullable=True)          # "Active" / "Cancelled" / ...
+    fetched_at = Column(DateTime(timezone=True), nullable=False)
+
+
 class Feature(Base):
     """Feature registry for segment-based gating (Phase 4)."""
 
@@ -1006,3 +1166,39 @@ class NotificationSchedule(Base):
         server_default=text("CURRENT_TIMESTAMP"),
         nullable=False,
     )
+
+
+# ========================
+# Audit trail
+# ========================
+class AuditLog(Base):
+    """Append-only record of who accessed which client's data.
+
+    Range-partitioned by month on ``created_at`` (partitions are named
+    ``audit_log_YYYYMM`` and managed by ``audit_service``), so retention is a
+    ``DROP TABLE`` of whole months rather than a bulk DELETE.  The primary
+    key has to include the partition column.
+    """
+
+    __tablename__ = "audit_log"
+    __table_args__ = (
+        Index("ix_audit_log_gstin_created", "client_gstin", "created_at"),
+        Index("ix_audit_log_actor_created", "actor_id", "created_at"),
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
+
+    id = Column(BigInteger, Identity(), primary_key=True)
+    created_at = Column(
+        DateTime(timezone=True),
+        primary_key=True,
+        server_default=text("CURRENT_TIMESTAMP"),
+        nullable=False,
+    )
+    actor_type = Column(String(20), nullable=False)      # ca / admin / system / user
+    actor_id = Column(String(255), nullable=False)
+    action = Column(String(30), nullable=False)          # view / edit / delete / export / file / access
+    resource_type = Column(String(30), nullable=False)   # client / invoice / filing / notice / refund
+    resource_id = Column(String(100), nullable=False)
+    client_gstin = Column(String(20), nullable=True)
+    details = Column(Text, nullable=True)
+    ip_address = Column(String(45), nullable=True)
@@ -1,11 +1,13 @@
 from .annual_return_repository import AnnualReturnRepository
 from .ca_repository import BusinessClientRepository, CAUserRepository
 from .filing_repository import FilingRepository
+from .invoice_aggregate_repository import InvoiceAggregateRepository
 from .invoice_repository import InvoiceRepository
 from .itc_match_repository import ITCMatchRepository
 from .knowledge_repository import KnowledgeRepository
 from .feature_repository import FeatureRepository
 from .ml_model_repository import MLModelRepository
+from .monthly_rollup_repository import MonthlyRollupRepository
 from .payment_repository import PaymentRepository
 from .return_period_repository import ReturnPeriodRepository
 from .risk_assessment_repository import RiskAssessmentRepository
@@ -21,6 +23,7 @@ __all__ = [
     "UserRepository",
     "SessionRepository",
     "InvoiceRepository",
+    "InvoiceAggregateRepository",
     "FilingRepository",
     "WhatsAppDeadLetterRepository",
     "WhatsAppMessageLogRepository",
@@ -34,5 +37,6 @@ __all__ = [
     "AnnualReturnRepository",
     "KnowledgeRepository",
     "MLModelRepository",
+    "MonthlyRollupRepository",
     "FeatureRepository",
 ]
@@ -6,11 +6,13 @@ Data-access layer for CA users and their business clients.
 from __future__ import annotations
 
 from datetime import datetime, timezone
+from typing import Any
 
-from sqlalchemy import func, or_, select, update
+from sqlalchemy import func, select, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.infrastructure.db.models import BusinessClient, CAUser
+from app.infrastructure.db.repositories.trigram_search import trgm_match, trgm_rank
 
 
 # ---------------------------------------------------------------------------
@@ -194,24 +196,57 @@ class BusinessClientRepository:
         result = await self.db.execute(stmt)
         return result.scalar_one() or 0
 
+    @staticmethod
+    def search_stmt(ca_id: int, query: str, *columns: Any):
+        """Clients of ``ca_id`` matching ``query``, best match first (``columns`` to select a subset)."""
+        searched = (
+            BusinessClient.name,
+            BusinessClient.gstin,
+            BusinessClient.whatsapp_number,
+            BusinessClient.pan,
+        )
+        return (
+            select(*(columns or (BusinessClient,)))
+            .where(BusinessClient.ca_id == ca_id)
+            .where(trgm_match(query, *searched, fuzzy=(BusinessClient.name,)))
+            .order_by(trgm_rank(query, *searched).desc(), BusinessClient.name.asc())
+        )
+
     async def search(self, ca_id: int, query: str) -> list[BusinessClient]:
-        """Search clients by name, GSTIN, or WhatsApp number."""
-        pattern = f"%{query}%"
+        """Search clients by name, GSTIN, PAN or WhatsApp number, best match first."""
+        result = await self.db.execute(self.search_stmt(ca_id, query))
+        return list(result.scalars().all())
+
+    async def search_page(
+        self, ca_id: int, query: str, limit: int, offset: int = 0
+    ) -> tuple[list[BusinessClient], int]:
+        """One page of ``search`` results plus the total match count."""
         stmt = (
-            select(BusinessClient)
-            .where(BusinessClient.ca_id == ca_id)
-            .where(
-                or_(
-                    BusinessClient.name.ilike(pattern),
-                    BusinessClient.gstin.ilike(pattern),
-                    BusinessClient.whatsapp_number.ilike(pattern),
-                    BusinessClient.pan.ilike(pattern),
-                )
-            )
-            .order_by(BusinessClient.name.asc())
+            self.search_stmt(ca_id, query, BusinessClient, func.count().over())
+            .limit(limit)
+            .offset(offset)
         )
+        rows = (await self.db.execute(stmt)).all()
+        if not rows and offset:
+            total = await self.db.scalar(
+                select(func.count()).select_from(self.search_stmt(ca_id, query).subquery())
+            )
+            return [], int(total or 0)
+        return [row[0] for row in rows], int(rows[0][1]) if rows else 0
+
+    async def typeahead(self, ca_id: int, query: str, limit: int = 10) -> list[Any]:
+        """Top ``limit`` matches as light (id, name, gstin, pan, whatsapp_number) rows."""
+        stmt = self.search_stmt(
+            ca_id,
+            query,
+            BusinessClient.id,
+            BusinessClient.name,
+            BusinessClient.gstin,
+            BusinessClient.pan,
+            BusinessClient.whatsapp_number,
+        ).limit(limit)
         result = await self.db.execute(stmt)
-        return list(result.scalars().all())
+        return list(result.all())
 
     async def transfer_client(
         self, client_id: int, new_ca_id: int
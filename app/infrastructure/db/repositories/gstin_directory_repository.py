@@ -0,0 +1,46 @@
+# app/infrastructure/db/repositories/gstin_directory_repository.py
+"""Repository for the persistent GSTIN directory (``gstin_directory``)."""
+
+from __future__ import annotations
+
+from collections.abc import Sequence
+
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.infrastructure.db.models import GstinDirectoryEntry
+
+
+class GstinDirectoryRepository:
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    async def get_many(self, gstins: Sequence[str]) -> list[GstinDirectoryEntry]:
+        """Stored answers for ``gstins`` (missing GSTINs are simply absent)."""
+        if not gstins:
+            return []
+        result = await self.db.execute(
+            select(GstinDirectoryEntry).where(GstinDirectoryEntry.gstin.in_(list(gstins)))
+        )
+        return list(result.scalars().all())
+
+    @staticmethod
+    def upsert_stmt(rows: list[dict]):
+        """INSERT ... ON CONFLICT (gstin) DO UPDATE with the newer answer."""
+        stmt = pg_insert(GstinDirectoryEntry).values(rows)
+        return stmt.on_conflict_do_update(
+            index_elements=[GstinDirectoryEntry.gstin],
+            set_={
+                "found": stmt.excluded.found,
+                "legal_name": stmt.excluded.legal_name,
+                "state": stmt.excluded.state,
+                "status": stmt.excluded.status,
+                "fetched_at": stmt.excluded.fetched_at,
+            },
+        )
+
+    async def upsert_many(self, rows: list[dict]) -> None:
+        """Store provider answers. Does not commit."""
+        if rows:
+            await self.db.execute(self.upsert_stmt(rows))
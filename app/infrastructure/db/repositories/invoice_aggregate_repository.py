@@ -0,0 +1,343 @@
+# app/infrastructure/db/repositories/invoice_aggregate_repository.py
+"""
+Set-based invoice aggregates.
+
+Liability, GSTR-1 and books-vs-portal used to load every ``Invoice`` ORM
+object for a period and sum tax heads in Python.  The queries here push
+that work into Postgres with ``GROUP BY`` so only one row per group comes
+back.  All queries filter on (user_id, direction, invoice_date), which is
+served by the ``ix_invoices_user_direction_date`` covering index; every
+column the aggregates read is in its INCLUDE list, so they are index-only
+scans.  The line listings also read invoice_number, total_amount and
+created_at and go to the heap.
+
+Line-level rows are still available (``list_b2b_lines`` / ``list_lines``)
+but as lightweight column tuples rather than ORM entities.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections.abc import AsyncIterator
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import and_, case, func, literal_column, select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.infrastructure.db.models import Invoice
+
+ZERO = Decimal("0")
+
+
+# ---------------------------------------------------------------------------
+# Result rows
+# ---------------------------------------------------------------------------
+
+@dataclass(frozen=True)
+class DirectionTotals:
+    """Aggregated tax heads for one invoice direction in a date range."""
+    count: int = 0
+    taxable_value: Decimal = ZERO
+    igst: Decimal = ZERO
+    cgst: Decimal = ZERO
+    sgst: Decimal = ZERO
+    # Eligible ITC: itc_eligible AND 2B-matched AND not blocked
+    itc_igst: Decimal = ZERO
+    itc_cgst: Decimal = ZERO
+    itc_sgst: Decimal = ZERO
+    # Reverse charge invoices
+    rcm_igst: Decimal = ZERO
+    rcm_cgst: Decimal = ZERO
+    rcm_sgst: Decimal = ZERO
+    rcm_taxable_value: Decimal = ZERO
+
+
+@dataclass(frozen=True)
+class RatePosTotals:
+    """Aggregated values for one (place_of_supply, rate) bucket."""
+    pos: str
+    rate: Decimal
+    count: int
+    taxable_value: Decimal
+    igst: Decimal
+    cgst: Decimal
+    sgst: Decimal
+
+
+# ---------------------------------------------------------------------------
+# SQL expressions shared by the queries below.  They mirror the Python
+# fallbacks in gstr1_service so the aggregated payload is unchanged.
+# ---------------------------------------------------------------------------
+
+# receiver_gstin wins, recipient_gstin is the fallback ("" counts as missing)
+_counterparty = func.coalesce(
+    func.nullif(Invoice.receiver_gstin, ""), Invoice.recipient_gstin
+)
+_is_b2b = func.coalesce(func.length(_counterparty), 0) == 15
+
+_tax_sum = (
+    func.coalesce(Invoice.igst_amount, 0)
+    + func.coalesce(Invoice.cgst_amount, 0)
+    + func.coalesce(Invoice.sgst_amount, 0)
+)
+
+# Missing/zero rate → infer from tax / taxable (rounded to 2dp for grouping)
+_effective_rate = case(
+    (
+        and_(
+            func.coalesce(Invoice.tax_rate, 0) <= 0,
+            Invoice.taxable_value > 0,
+            _tax_sum > 0,
+        ),
+        func.round(_tax_sum * 100 / Invoice.taxable_value, 2),
+    ),
+    else_=func.coalesce(Invoice.tax_rate, 0),
+)
+
+# place_of_supply → counterparty state code → "00"
+_effective_pos = func.coalesce(
+    func.nullif(func.trim(Invoice.place_of_supply), ""),
+    case(
+        (func.length(_counterparty) >= 2, func.substr(_counterparty, 1, 2)),
+        else_=None,
+    ),
+    "00",
+)
+
+_itc_filter = and_(
+    Invoice.itc_eligible.is_(True),
+    Invoice.gstr2b_match_status == "matched",
+    func.coalesce(Invoice.blocked_itc_reason, "") == "",
+)
+_rcm_filter = Invoice.reverse_charge.is_(True)
+
+
+def _sum(expr: Any) -> Any:
+    return func.coalesce(func.sum(expr), 0)
+
+
+def _sum_where(expr: Any, cond: Any) -> Any:
+    return func.coalesce(func.sum(expr).filter(cond), 0)
+
+
+def _period_filter(
+    user_id: uuid.UUID, start: date, end: date, direction: str | None = None
+) -> Any:
+    conds = [
+        Invoice.user_id == user_id,
+        Invoice.invoice_date >= start,
+        Invoice.invoice_date <= end,
+    ]
+    if direction is not None:
+        conds.append(Invoice.direction == direction)
+    return and_(*conds)
+
+
+def _dec(val: Any) -> Decimal:
+    if val is None:
+        return ZERO
+    if isinstance(val, Decimal):
+        return val
+    return Decimal(str(val))
+
+
+class InvoiceAggregateRepository:
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    # ---------- statements (kept separate so they can be inspected) ----------
+
+    @staticmethod
+    def totals_by_direction_stmt(user_id: uuid.UUID, start: date, end: date):
+        return (
+            select(
+                Invoice.direction,
+                func.count(),
+                _sum(Invoice.taxable_value),
+                _sum(Invoice.igst_amount),
+                _sum(Invoice.cgst_amount),
+                _sum(Invoice.sgst_amount),
+                _sum_where(Invoice.igst_amount, _itc_filter),
+                _sum_where(Invoice.cgst_amount, _itc_filter),
+                _sum_where(Invoice.sgst_amount, _itc_filter),
+                _sum_where(Invoice.igst_amount, _rcm_filter),
+                _sum_where(Invoice.cgst_amount, _rcm_filter),
+                _sum_where(Invoice.sgst_amount, _rcm_filter),
+                _sum_where(Invoice.taxable_value, _rcm_filter),
+            )
+            .where(_period_filter(user_id, start, end))
+            .group_by(Invoice.direction)
+        )
+
+    @staticmethod
+    def rate_pos_stmt(
+        user_id: uuid.UUID,
+        start: date,
+        end: date,
+        direction: str,
+        *,
+        b2c_only: bool = False,
+    ):
+        where = _period_filter(user_id, start, end, direction)
+        if b2c_only:
+            where = and_(where, ~_is_b2b)
+        # Group by output-column name: the expressions carry bind parameters,
+        # which Postgres would not recognise as equal if repeated verbatim.
+        pos, rate = literal_column("pos"), literal_column("rate")
+        return (
+            select(
+                _effective_pos.label("pos"),
+                _effective_rate.label("rate"),
+                func.count(),
+                _sum(Invoice.taxable_value),
+                _sum(Invoice.igst_amount),
+                _sum(Invoice.cgst_amount),
+                _sum(Invoice.sgst_amount),
+            )
+            .where(where)
+            .group_by(pos, rate)
+            .order_by(pos, rate)
+        )
+
+    @staticmethod
+    def b2b_lines_stmt(
+        user_id: uuid.UUID,
+        start: date,
+        end: date,
+        direction: str = "outward",
+        *,
+        by_counterparty: bool = False,
+    ):
+        order = [Invoice.invoice_date, Invoice.created_at]
+        if by_counterparty:
+            # Sort on the output column rather than recomputing the coalesce
+            order.insert(0, literal_column("ctin"))
+        return (
+            select(
+                _counterparty.label("ctin"),
+                Invoice.invoice_number,
+                Invoice.invoice_date,
+                Invoice.place_of_supply,
+                Invoice.taxable_value,
+                Invoice.total_amount,
+                Invoice.igst_amount,
+                Invoice.cgst_amount,
+                Invoice.sgst_amount,
+                Invoice.tax_rate,
+            )
+            .where(and_(_period_filter(user_id, start, end, direction), _is_b2b))
+            .order_by(*order)
+        )
+
+    # ---------- aggregates ----------
+
+    async def totals_by_direction(
+        self,
+        user_id: uuid.UUID,
+        start: date,
+        end: date,
+    ) -> dict[str, DirectionTotals]:
+        """Return {direction: DirectionTotals} for invoices in [start, end]."""
+        result = await self.db.execute(
+            self.totals_by_direction_stmt(user_id, start, end)
+        )
+        out: dict[str, DirectionTotals] = {}
+        for row in result.all():
+            out[row[0]] = DirectionTotals(
+                count=int(row[1] or 0),
+                taxable_value=_dec(row[2]),
+                igst=_dec(row[3]),
+                cgst=_dec(row[4]),
+                sgst=_dec(row[5]),
+                itc_igst=_dec(row[6]),
+                itc_cgst=_dec(row[7]),
+                itc_sgst=_dec(row[8]),
+                rcm_igst=_dec(row[9]),
+                rcm_cgst=_dec(row[10]),
+                rcm_sgst=_dec(row[11]),
+                rcm_taxable_value=_dec(row[12]),
+            )
+        return out
+
+    async def totals_by_rate_and_pos(
+        self,
+        user_id: uuid.UUID,
+        start: date,
+        end: date,
+        direction: str,
+        *,
+        b2c_only: bool = False,
+    ) -> list[RatePosTotals]:
+        """Per (place_of_supply, rate) sums; ``b2c_only`` drops GSTIN-bearing rows."""
+        result = await self.db.execute(
+            self.rate_pos_stmt(user_id, start, end, direction, b2c_only=b2c_only)
+        )
+        return [
+            RatePosTotals(
+                pos=row[0],
+                rate=_dec(row[1]),
+                count=int(row[2] or 0),
+                taxable_value=_dec(row[3]),
+                igst=_dec(row[4]),
+                cgst=_dec(row[5]),
+                sgst=_dec(row[6]),
+            )
+            for row in result.all()
+        ]
+
+    # ---------- line-level (column tuples, not ORM objects) ----------
+
+    async def list_b2b_lines(
+        self,
+        user_id: uuid.UUID,
+        start: date,
+        end: date,
+        direction: str = "outward",
+    ) -> list[Any]:
+        """B2B invoices with the columns GSTR-1 needs, ordered like list_for_period."""
+        result = await self.db.execute(self.b2b_lines_stmt(user_id, start, end, direction))
+        return list(result.all())
+
+    async def stream_b2b_lines(
+        self,
+        user_id: uuid.UUID,
+        start: date,
+        end: date,
+        *,
+        fetch_rows: int,
+        direction: str = "outward",
+    ) -> AsyncIterator[Any]:
+        """Same rows as ``list_b2b_lines`` grouped by counterparty, from a server-side cursor."""
+        stmt = self.b2b_lines_stmt(
+            user_id, start, end, direction, by_counterparty=True
+        ).execution_options(yield_per=fetch_rows)
+        stream = await self.db.stream(stmt)
+        async for row in stream:
+            yield row
+
+    async def list_lines(
+        self,
+        user_id: uuid.UUID,
+        start: date,
+        end: date,
+        direction: str,
+    ) -> list[Any]:
+        """Invoice number, counterparties and tax heads for comparison screens."""
+        stmt = (
+            select(
+                Invoice.invoice_number,
+                Invoice.supplier_gstin,
+                Invoice.recipient_gstin,
+                Invoice.taxable_value,
+                Invoice.igst_amount,
+                Invoice.cgst_amount,
+                Invoice.sgst_amount,
+            )
+            .where(_period_filter(user_id, start, end, direction))
+            .order_by(Invoice.invoice_date, Invoice.created_at)
+        )
+        result = await self.db.execute(stmt)
+        return list(result.all())
@@ -0,0 +1,162 @@
+# app/infrastructure/db/repositories/invoice_bulk_repository.py
+"""
+Set-based invoice upsert for bulk ERP / Tally sync.
+
+A batch of validated rows is ``COPY``-ed into a session-local staging table
+and merged into ``invoices`` with two statements:
+
+* ``UPDATE ... FROM`` for rows whose natural key already exists and whose
+  values changed (unchanged rows are not touched, so re-sending a month is
+  a no-op);
+* ``INSERT ... SELECT ... WHERE NOT EXISTS`` for the rest.
+
+The natural key is (user_id, supplier_gstin, invoice_number, direction),
+served by ``ix_invoices_natural_key``.  It is not a unique constraint —
+historical WhatsApp uploads contain duplicates — so concurrent syncs for one
+user are serialised with a transaction-scoped advisory lock instead.
+"""
+
+from __future__ import annotations
+
+import uuid
+from collections.abc import Sequence
+from dataclasses import dataclass, field
+from datetime import date
+from typing import Any
+
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+
+STAGE_TABLE = "invoice_bulk_stage"
+
+# Staged columns, in COPY order.  ``row_num`` maps a merged row back to the file.
+STAGE_COLUMNS: tuple[str, ...] = (
+    "row_num",
+    "id",
+    "invoice_number",
+    "invoice_date",
+    "supplier_gstin",
+    "receiver_gstin",
+    "recipient_gstin",
+    "place_of_supply",
+    "taxable_value",
+    "total_amount",
+    "tax_amount",
+    "cgst_amount",
+    "sgst_amount",
+    "igst_amount",
+    "tax_rate",
+    "supplier_gstin_valid",
+    "receiver_gstin_valid",
+    "direction",
+    "itc_eligible",
+    "reverse_charge",
+)
+
+# Columns an update may change (everything except the key and ids)
+_VALUE_COLUMNS = tuple(
+    c for c in STAGE_COLUMNS
+    if c not in ("row_num", "id", "invoice_number", "supplier_gstin", "direction")
+)
+
+CREATE_STAGE_SQL = f"""
+CREATE TEMP TABLE IF NOT EXISTS {STAGE_TABLE} (
+    row_num integer NOT NULL,
+    id uuid NOT NULL,
+    invoice_number varchar(50) NOT NULL,
+    invoice_date date,
+    supplier_gstin varchar(20),
+    receiver_gstin varchar(20),
+    recipient_gstin varchar(15),
+    place_of_supply varchar(2),
+    taxable_value numeric(12, 2) NOT NULL,
+    total_amount numeric(12, 2),
+    tax_amount numeric(12, 2) NOT NULL,
+    cgst_amount numeric(12, 2),
+    sgst_amount numeric(12, 2),
+    igst_amount numeric(12, 2),
+    tax_rate numeric(5, 2),
+    supplier_gstin_valid boolean,
+    receiver_gstin_valid boolean,
+    direction varchar(10) NOT NULL,
+    itc_eligible boolean NOT NULL,
+    reverse_charge boolean NOT NULL
+) ON COMMIT DELETE ROWS
+"""
+
+_KEY_MATCH = """
+    i.user_id = :user_id
+    AND i.invoice_number = s.invoice_number
+    AND i.direction = s.direction
+    AND i.supplier_gstin IS NOT DISTINCT FROM s.supplier_gstin
+"""
+
+UPDATE_SQL = f"""
+UPDATE invoices AS t
+SET {", ".join(f"{c} = m.{c}" for c in _VALUE_COLUMNS)}
+FROM (
+    SELECT s.*, i.id AS target_id, i.invoice_date AS old_date
+    FROM {STAGE_TABLE} AS s
+    JOIN invoices AS i ON {_KEY_MATCH}
+) AS m
+WHERE t.id = m.target_id
+  AND ({", ".join(f"t.{c}" for c in _VALUE_COLUMNS)})
+      IS DISTINCT FROM ({", ".join(f"m.{c}" for c in _VALUE_COLUMNS)})
+RETURNING m.row_num, m.old_date
+"""
+
+_INSERT_COLUMNS = tuple(c for c in STAGE_COLUMNS if c != "row_num")
+
+INSERT_SQL = f"""
+INSERT INTO invoices (user_id, {", ".join(_INSERT_COLUMNS)})
+SELECT :user_id, {", ".join(f"s.{c}" for c in _INSERT_COLUMNS)}
+FROM {STAGE_TABLE} AS s
+WHERE NOT EXISTS (SELECT 1 FROM invoices AS i WHERE {_KEY_MATCH})
+RETURNING id
+"""
+
+
+@dataclass
+class MergeCounts:
+    inserted: int = 0
+    updated: int = 0
+    unchanged: int = 0
+    # Invoice dates touched (new and previous), for rollup refresh
+    dates: set[date] = field(default_factory=set)
+
+
+async def merge_batch(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    records: Sequence[tuple[Any, ...]],
+) -> MergeCounts:
+    """COPY ``records`` (tuples in ``STAGE_COLUMNS`` order) and merge them into invoices.
+
+    Rows must already be unique on the natural key.  Does not commit.
+    """
+    counts = MergeCounts()
+    if not records:
+        return counts
+
+    await db.execute(
+        text("SELECT pg_advisory_xact_lock(hashtext(:key))"),
+        {"key": f"invoice_bulk:{user_id}"},
+    )
+    await db.execute(text(CREATE_STAGE_SQL))
+
+    conn = await db.connection()
+    raw = await conn.get_raw_connection()
+    await raw.driver_connection.copy_records_to_table(
+        STAGE_TABLE, records=records, columns=list(STAGE_COLUMNS),
+    )
+
+    updated = (await db.execute(text(UPDATE_SQL), {"user_id": user_id})).all()
+    inserted = (await db.execute(text(INSERT_SQL), {"user_id": user_id})).all()
+
+    counts.updated = len({row.row_num for row in updated})
+    counts.inserted = len(inserted)
+    counts.unchanged = len(records) - counts.updated - counts.inserted
+    counts.dates.update(row.old_date for row in updated if row.old_date)
+    date_idx = STAGE_COLUMNS.index("invoice_date")
+    counts.dates.update(r[date_idx] for r in records if r[date_idx])
+    return counts
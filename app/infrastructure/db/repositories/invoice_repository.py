@@ -2,12 +2,17 @@ import re
 import uuid
 from datetime import date
 from decimal import Decimal, InvalidOperation
+from typing import Any
 
 from sqlalchemy import and_, select
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from app.domain.services.invoice_parser import ParsedInvoice
 from app.infrastructure.db.models import Invoice
+from app.infrastructure.db.repositories.monthly_rollup_repository import (
+    add_invoice_to_rollup,
+)
+from app.infrastructure.db.repositories.trigram_search import trgm_match, trgm_rank
 
 
 class InvoiceRepository:
@@ -179,6 +184,8 @@ class InvoiceRepository:
         self.db.add(invoice)
         await self.db.commit()
         await self.db.refresh(invoice)
+
+        await add_invoice_to_rollup(self.db, invoice)
         return invoice
 
     async def list_for_period(
@@ -223,6 +230,33 @@ class InvoiceRepository:
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
 
+    # ---------- search ----------
+
+    @staticmethod
+    def search_stmt(user_id: uuid.UUID, query: str, limit: int):
+        """Invoices matching ``query`` on number or counterparty GSTIN, best match first."""
+        searched = (Invoice.invoice_number, Invoice.supplier_gstin, Invoice.receiver_gstin)
+        return (
+            select(
+                Invoice.id,
+                Invoice.invoice_number,
+                Invoice.invoice_date,
+                Invoice.direction,
+                Invoice.supplier_gstin,
+                Invoice.receiver_gstin,
+                Invoice.total_amount,
+            )
+            .where(Invoice.user_id == user_id)
+            .where(trgm_match(query, *searched, fuzzy=(Invoice.invoice_number,)))
+            .order_by(trgm_rank(query, *searched).desc(), Invoice.invoice_date.desc())
+            .limit(limit)
+        )
+
+    async def search(self, user_id: uuid.UUID, query: str, limit: int = 10) -> list[Any]:
+        """Typeahead lookup by invoice number or counterparty GSTIN (light rows)."""
+        result = await self.db.execute(self.search_stmt(user_id, query, limit))
+        return list(result.all())
+
     # ---------- monthly compliance helpers ----------
 
     async def list_for_period_by_direction(
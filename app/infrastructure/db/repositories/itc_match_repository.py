@@ -21,8 +21,13 @@ class ITCMatchRepository:
         self,
         period_id: uuid.UUID,
         matches: list[dict],
+        source: str = "portal",
     ) -> int:
-        """Batch insert ITCMatch records from 2B import. Returns count inserted."""
+        """Batch insert ITCMatch records from 2B import. Returns count inserted.
+
+        ``source`` is "portal" for MasterGST pulls and "upload" for files the
+        user sent; the scheduled sync never overwrites uploaded lines.
+        """
         if not matches:
             return 0
 
@@ -40,6 +45,7 @@ class ITCMatchRepository:
                 gstr2b_cgst=m.get("gstr2b_cgst", Decimal("0")),
                 gstr2b_sgst=m.get("gstr2b_sgst", Decimal("0")),
                 match_status=m.get("match_status", "unmatched"),
+                source=source,
                 mismatch_details=(
                     json.dumps(m["mismatch_details"])
                     if m.get("mismatch_details")
@@ -65,6 +71,15 @@ class ITCMatchRepository:
         result = await self.db.execute(stmt)
         return list(result.scalars().all())
 
+    async def count_by_source(self, period_id: uuid.UUID) -> dict[str, int]:
+        """Number of the period's 2B lines per ``source``."""
+        stmt = (
+            select(ITCMatch.source, func.count())
+            .where(ITCMatch.period_id == period_id)
+            .group_by(ITCMatch.source)
+        )
+        return {source: count for source, count in (await self.db.execute(stmt)).all()}
+
     async def get_summary(self, period_id: uuid.UUID) -> dict:
         """Return aggregated counts and amounts grouped by match_status.
 
@@ -0,0 +1,364 @@
+# app/infrastructure/db/repositories/monthly_rollup_repository.py
+"""
+Repository for the ``monthly_gst_rollup`` table.
+
+Each row holds one month of invoice totals for (user, GSTIN, direction),
+so readers (GSTR-9, turnover reconciliation) never scan the invoice table
+themselves.
+
+* A single invoice write adds its own amounts to its bucket with one
+  ``INSERT ... ON CONFLICT DO UPDATE SET x = x + EXCLUDED.x`` (O(1)).
+* Bulk imports, period recomputes and ``scripts/rebuild_gst_rollup.py``
+  recompute whole months with ``DELETE`` + ``INSERT ... SELECT ... GROUP BY``.
+"""
+
+from __future__ import annotations
+
+import logging
+import uuid
+from collections.abc import Iterable
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from typing import Any
+
+from sqlalchemy import (
+    and_,
+    case,
+    delete,
+    func,
+    literal_column,
+    or_,
+    select,
+    true,
+)
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.infrastructure.db.models import Invoice, MonthlyGstRollup
+
+logger = logging.getLogger("monthly_rollup")
+
+ZERO = Decimal("0")
+
+
+@dataclass(frozen=True)
+class RollupTotals:
+    """Totals for one (period, direction), summed across GSTINs."""
+    period: str
+    direction: str
+    invoice_count: int = 0
+    taxable_value: Decimal = ZERO
+    igst: Decimal = ZERO
+    cgst: Decimal = ZERO
+    sgst: Decimal = ZERO
+    itc_eligible_taxable: Decimal = ZERO
+    credit_note_taxable: Decimal = ZERO
+    exempt_nil_taxable: Decimal = ZERO
+
+
+def period_of(d: date) -> str:
+    """'YYYY-MM' bucket for an invoice date."""
+    return f"{d.year:04d}-{d.month:02d}"
+
+
+def _period_start(period: str) -> date:
+    year, month = (int(p) for p in period.split("-")[:2])
+    return date(year, month, 1)
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + 1, 1, 1) if d.month == 12 else date(d.year, d.month + 1, 1)
+
+
+# Taxpayer GSTIN of the invoice: supplier for sales, receiver for purchases
+_own_gstin = case(
+    (Invoice.direction == "outward", func.coalesce(Invoice.supplier_gstin, "")),
+    else_=func.coalesce(
+        func.nullif(Invoice.receiver_gstin, ""), Invoice.recipient_gstin, ""
+    ),
+)
+
+
+def _rollup_select(where: Any):
+    """SELECT producing monthly_gst_rollup rows for invoices matching ``where``."""
+    gstin = _own_gstin.label("rollup_gstin")
+    period = func.to_char(Invoice.invoice_date, "YYYY-MM").label("rollup_period")
+    taxable = Invoice.taxable_value
+
+    return (
+        select(
+            Invoice.user_id,
+            gstin,
+            period,
+            Invoice.direction,
+            func.count(Invoice.id),
+            func.coalesce(func.sum(taxable), 0),
+            func.coalesce(func.sum(Invoice.igst_amount), 0),
+            func.coalesce(func.sum(Invoice.cgst_amount), 0),
+            func.coalesce(func.sum(Invoice.sgst_amount), 0),
+            func.coalesce(func.sum(taxable).filter(Invoice.itc_eligible.is_(True)), 0),
+            func.abs(func.coalesce(func.sum(taxable).filter(taxable < 0), 0)),
+            func.coalesce(
+                func.sum(taxable).filter(and_(Invoice.tax_rate == 0, taxable > 0)), 0
+            ),
+        )
+        .where(and_(where, Invoice.invoice_date.is_not(None)))
+        # Output-column names: the expressions carry bind parameters
+        .group_by(
+            Invoice.user_id,
+            literal_column("rollup_gstin"),
+            literal_column("rollup_period"),
+            Invoice.direction,
+        )
+    )
+
+
+_INSERT_COLUMNS = [
+    "user_id",
+    "gstin",
+    "period",
+    "direction",
+    "invoice_count",
+    "taxable_value",
+    "igst",
+    "cgst",
+    "sgst",
+    "itc_eligible_taxable",
+    "credit_note_taxable",
+    "exempt_nil_taxable",
+]
+
+
+def _upsert(select_stmt: Any):
+    """INSERT ... SELECT that overwrites a bucket a concurrent refresh already wrote."""
+    stmt = insert(MonthlyGstRollup).from_select(_INSERT_COLUMNS, select_stmt)
+    return stmt.on_conflict_do_update(
+        constraint="uq_monthly_gst_rollup_key",
+        set_={
+            col: getattr(stmt.excluded, col)
+            for col in _INSERT_COLUMNS[4:]
+        } | {"refreshed_at": func.now()},
+    )
+
+
+def _invoice_row(invoice: Invoice, sign: int) -> dict[str, Any] | None:
+    """One invoice's contribution to its bucket (``sign`` -1 to take it out)."""
+    if invoice.invoice_date is None:
+        return None
+    if invoice.direction == "outward":
+        gstin = invoice.supplier_gstin or ""
+    else:
+        gstin = invoice.receiver_gstin or invoice.recipient_gstin or ""
+    taxable = _dec(invoice.taxable_value)
+    rate = invoice.tax_rate
+    amounts = {
+        "taxable_value": taxable,
+        "igst": _dec(invoice.igst_amount),
+        "cgst": _dec(invoice.cgst_amount),
+        "sgst": _dec(invoice.sgst_amount),
+        "itc_eligible_taxable": taxable if invoice.itc_eligible is True else ZERO,
+        "credit_note_taxable": -taxable if taxable < 0 else ZERO,
+        "exempt_nil_taxable": (
+            taxable if rate is not None and _dec(rate) == 0 and taxable > 0 else ZERO
+        ),
+    }
+    return {
+        "user_id": invoice.user_id,
+        "gstin": gstin,
+        "period": period_of(invoice.invoice_date),
+        "direction": invoice.direction,
+        "invoice_count": sign,
+    } | {col: sign * val for col, val in amounts.items()}
+
+
+def _delta_upsert(row: dict[str, Any]):
+    """INSERT of one invoice's amounts that adds onto an existing bucket."""
+    stmt = insert(MonthlyGstRollup).values(**row)
+    table = MonthlyGstRollup.__table__.c
+    return stmt.on_conflict_do_update(
+        constraint="uq_monthly_gst_rollup_key",
+        set_={
+            col: table[col] + getattr(stmt.excluded, col)
+            for col in _INSERT_COLUMNS[4:]
+        } | {"refreshed_at": func.now()},
+    )
+
+
+def _dec(val: Any) -> Decimal:
+    if val is None:
+        return ZERO
+    if isinstance(val, Decimal):
+        return val
+    return Decimal(str(val))
+
+
+class MonthlyRollupRepository:
+    def __init__(self, db: AsyncSession) -> None:
+        self.db = db
+
+    # ---------- maintenance ----------
+
+    async def apply_invoice(
+        self,
+        invoice: Invoice,
+        *,
+        sign: int = 1,
+        commit: bool = True,
+    ) -> None:
+        """Add (``sign=1``) or remove (``sign=-1``) one invoice's amounts."""
+        row = _invoice_row(invoice, sign)
+        if row is None:
+            return
+        await self.db.execute(_delta_upsert(row))
+        if commit:
+            await self.db.commit()
+
+    async def refresh_periods(
+        self,
+        user_id: uuid.UUID,
+        periods: Iterable[str],
+        *,
+        commit: bool = True,
+    ) -> None:
+        """Recompute the rollup buckets for ``periods`` ('YYYY-MM') of one user."""
+        periods = sorted({p for p in periods if p})
+        if not periods:
+            return
+
+        date_conds = []
+        for p in periods:
+            start = _period_start(p)
+            date_conds.append(
+                and_(Invoice.invoice_date >= start, Invoice.invoice_date < _next_month(start))
+            )
+
+        await self.db.execute(
+            delete(MonthlyGstRollup).where(
+                and_(
+                    MonthlyGstRollup.user_id == user_id,
+                    MonthlyGstRollup.period.in_(periods),
+                )
+            )
+        )
+        await self.db.execute(
+            _upsert(_rollup_select(and_(Invoice.user_id == user_id, or_(*date_conds))))
+        )
+        if commit:
+            await self.db.commit()
+
+    async def refresh_for_dates(
+        self,
+        user_id: uuid.UUID,
+        dates: Iterable[date | None],
+        *,
+        commit: bool = True,
+    ) -> None:
+        """Convenience wrapper: refresh the months touched by these invoice dates."""
+        await self.refresh_periods(
+            user_id, {period_of(d) for d in dates if d}, commit=commit
+        )
+
+    async def rebuild(self, user_id: uuid.UUID | None = None) -> int:
+        """Drop and rebuild every bucket (optionally for one user). Returns row count."""
+        where_rollup = (
+            MonthlyGstRollup.user_id == user_id if user_id is not None else None
+        )
+        del_stmt = delete(MonthlyGstRollup)
+        if where_rollup is not None:
+            del_stmt = del_stmt.where(where_rollup)
+        await self.db.execute(del_stmt)
+
+        inv_where = Invoice.user_id == user_id if user_id is not None else true()
+        await self.db.execute(_upsert(_rollup_select(inv_where)))
+        await self.db.commit()
+
+        count_stmt = select(func.count(MonthlyGstRollup.id))
+        if where_rollup is not None:
+            count_stmt = count_stmt.where(where_rollup)
+        return int((await self.db.execute(count_stmt)).scalar() or 0)
+
+    # ---------- reads ----------
+
+    async def totals_by_period(
+        self,
+        user_id: uuid.UUID,
+        periods: Iterable[str],
+        direction: str | None = None,
+    ) -> dict[tuple[str, str], RollupTotals]:
+        """Return {(period, direction): RollupTotals} summed across GSTINs."""
+        periods = list(periods)
+        if not periods:
+            return {}
+
+        conds = [
+            MonthlyGstRollup.user_id == user_id,
+            MonthlyGstRollup.period.in_(periods),
+        ]
+        if direction is not None:
+            conds.append(MonthlyGstRollup.direction == direction)
+
+        r = MonthlyGstRollup
+        stmt = (
+            select(
+                r.period,
+                r.direction,
+                func.sum(r.invoice_count),
+                func.sum(r.taxable_value),
+                func.sum(r.igst),
+                func.sum(r.cgst),
+                func.sum(r.sgst),
+                func.sum(r.itc_eligible_taxable),
+                func.sum(r.credit_note_taxable),
+                func.sum(r.exempt_nil_taxable),
+            )
+            .where(and_(*conds))
+            .group_by(r.period, r.direction)
+        )
+        result = await self.db.execute(stmt)
+        return {
+            (row[0], row[1]): RollupTotals(
+                period=row[0],
+                direction=row[1],
+                invoice_count=int(row[2] or 0),
+                taxable_value=_dec(row[3]),
+                igst=_dec(row[4]),
+                cgst=_dec(row[5]),
+                sgst=_dec(row[6]),
+                itc_eligible_taxable=_dec(row[7]),
+                credit_note_taxable=_dec(row[8]),
+                exempt_nil_taxable=_dec(row[9]),
+            )
+            for row in result.all()
+        }
+
+
+async def add_invoice_to_rollup(db: AsyncSession, invoice: Invoice) -> None:
+    """Add a newly saved invoice to its rollup bucket; never fails the caller.
+
+    A missed delta is corrected by the next full recompute of that month
+    (period computation, bulk import or ``scripts/rebuild_gst_rollup.py``).
+    """
+    try:
+        await MonthlyRollupRepository(db).apply_invoice(invoice)
+    except Exception:
+        logger.warning("Rollup delta failed for invoice %s", invoice.id, exc_info=True)
+        await db.rollback()
+
+
+async def refresh_rollup_for_dates(
+    db: AsyncSession,
+    user_id: uuid.UUID,
+    dates: Iterable[date | None],
+) -> None:
+    """Refresh rollup buckets after an invoice write; never fails the caller.
+
+    Used by bulk imports and period recomputes.  A bucket missed here is
+    corrected by the next liability computation for that month or
+    ``scripts/rebuild_gst_rollup.py``.
+    """
+    try:
+        await MonthlyRollupRepository(db).refresh_for_dates(user_id, dates)
+    except Exception:
+        logger.warning("Rollup refresh failed for user %s", user_id, exc_info=True)
+        await db.rollback()
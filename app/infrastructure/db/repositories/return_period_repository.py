@@ -121,6 +121,8 @@ class ReturnPeriodRepository:
         computation: dict[str, Any],
     ) -> ReturnPeriod | None:
         """Store computed tax values from the liability computation."""
+        from app.domain.services.gst_workflow import on_period_status_changed
+
         rp = await self.get_by_id(period_id)
         if not rp:
             return None
@@ -141,6 +143,7 @@ class ReturnPeriodRepository:
         rp.computed_at = datetime.now(timezone.utc)
         await self.db.commit()
         await self.db.refresh(rp)
+        await on_period_status_changed(rp.user_id, rp.period)
         return rp
 
     async def update_status(
@@ -149,7 +152,10 @@ class ReturnPeriodRepository:
         new_status: str,
     ) -> ReturnPeriod | None:
         """Update status with transition validation."""
-        from app.domain.services.gst_workflow import validate_period_transition
+        from app.domain.services.gst_workflow import (
+            on_period_status_changed,
+            validate_period_transition,
+        )
 
         rp = await self.get_by_id(period_id)
         if not rp:
@@ -159,6 +165,7 @@ class ReturnPeriodRepository:
         rp.status = new_status
         await self.db.commit()
         await self.db.refresh(rp)
+        await on_period_status_changed(rp.user_id, rp.period)
         return rp
 
     async def link_filing(
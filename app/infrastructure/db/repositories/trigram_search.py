@@ -0,0 +1,47 @@
+# app/infrastructure/db/repositories/trigram_search.py
+"""
+Shared predicates for ``pg_trgm``-backed search.
+
+Every searchable column has a GIN ``gin_trgm_ops`` index (migration
+``b8c9d0e1f2a3``), which serves both ``ILIKE '%q%'`` and the word-similarity
+operator ``q <% column``.  Substring hits and near-misses ("shrma traders")
+therefore come from index scans, and results are ordered by similarity so
+callers can apply a small LIMIT.
+
+Trigram indexes need at least three characters to narrow anything down;
+shorter queries still work but fall back to the caller's other filters.
+"""
+
+from __future__ import annotations
+
+from typing import Any
+
+from sqlalchemy import func, literal, or_
+
+_LIKE_ESCAPE = "\\"
+
+
+def like_pattern(query: str) -> str:
+    """``%query%`` with LIKE wildcards in the user's text escaped."""
+    escaped = (
+        query.replace(_LIKE_ESCAPE, _LIKE_ESCAPE * 2)
+        .replace("%", _LIKE_ESCAPE + "%")
+        .replace("_", _LIKE_ESCAPE + "_")
+    )
+    return f"%{escaped}%"
+
+
+def trgm_match(query: str, *columns: Any, fuzzy: tuple[Any, ...] = ()) -> Any:
+    """Substring match on ``columns``, plus word-similarity on ``fuzzy`` columns."""
+    pattern = like_pattern(query)
+    q = literal(query)
+    return or_(
+        *(col.ilike(pattern, escape=_LIKE_ESCAPE) for col in columns),
+        *(q.op("<%")(col) for col in fuzzy),
+    )
+
+
+def trgm_rank(query: str, *columns: Any) -> Any:
+    """Best word-similarity of ``query`` against any of ``columns`` (NULLs ignored)."""
+    q = literal(query)
+    return func.greatest(*(func.word_similarity(q, col) for col in columns))
@@ -0,0 +1,396 @@
+# app/infrastructure/db/write_behind.py
+"""
+Batched write-behind sinks for append-only log tables.
+
+Outbound message logs, dead letters, analytics events and audit-trail
+entries are append-only rows.  Callers ``add()`` a row dict to an
+in-process buffer; a background task writes the buffer with one multi-row
+``INSERT`` every ``WRITE_BEHIND_FLUSH_INTERVAL_SECONDS`` or as soon as
+``WRITE_BEHIND_BATCH_SIZE`` rows are waiting, whichever comes first.
+
+The buffer is bounded (``WRITE_BEHIND_MAX_QUEUE``).  When it is full new
+rows are dropped and counted (``write_behind_rows_total{outcome=
+"dropped_overflow"}``) rather than blocking the caller, and a failed flush
+loses its batch — acceptable for logs, never for business data.
+
+A ``durable`` sink (the audit trail) does not lose rows silently:
+
+- rows beyond ``WRITE_BEHIND_MAX_QUEUE`` are kept with a warning, up to the
+  hard ceiling ``WRITE_BEHIND_DURABLE_MAX_QUEUE``;
+- a batch that fails on the connection (database down, pool timeout) goes
+  back to the head of the buffer and is retried with backoff;
+- a batch that the database rejects (constraint, type error) is split in
+  halves until the offending rows are isolated; the rest are written.
+
+Rows that cannot be kept — poison rows, rows over the ceiling, rows still
+buffered at shutdown — are logged at CRITICAL one per line
+(``WRITE_BEHIND_UNWRITTEN {sink} {json}``) so they can be replayed, and
+counted as ``failed``.
+
+``close_all_sinks()`` flushes what is left and is called from the FastAPI
+lifespan and the ARQ ``on_shutdown``.
+"""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import logging
+from datetime import datetime, timezone
+from typing import Any
+
+from sqlalchemy import Table, column, insert, table
+from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.sql.expression import TableClause
+
+from app.core.config import settings
+from app.core.metrics import Counter, Gauge
+from app.infrastructure.db.models import (
+    AuditLog,
+    WhatsAppDeadLetter,
+    WhatsAppMessageLog,
+)
+
+logger = logging.getLogger("write_behind")
+
+ROWS_TOTAL = Counter(
+    "write_behind_rows_total",
+    "Rows handled by write-behind sinks by outcome "
+    "(written, dropped_overflow, failed, retried).",
+    ("sink", "outcome"),
+)
+FLUSHES_TOTAL = Counter(
+    "write_behind_flushes_total",
+    "Batch flushes by trigger (size, interval, shutdown).",
+    ("sink", "trigger"),
+)
+QUEUE_DEPTH = Gauge(
+    "write_behind_queue_depth",
+    "Rows buffered and not yet written.",
+    ("sink",),
+)
+
+_SINKS: list[WriteBehindSink] = []
+
+_MAX_BACKOFF_SECONDS = 30.0
+_SHUTDOWN_ATTEMPTS = 3
+
+
+class WriteBehindSink:
+    """Bounded in-memory buffer flushed to one table in multi-row INSERTs."""
+
+    def __init__(
+        self,
+        name: str,
+        target: Table | TableClause,
+        *,
+        batch_size: int | None = None,
+        flush_interval: float | None = None,
+        max_queue: int | None = None,
+        durable: bool = False,
+    ) -> None:
+        self.name = name
+        self.target = target
+        self.batch_size = batch_size or settings.WRITE_BEHIND_BATCH_SIZE
+        self.flush_interval = (
+            flush_interval or settings.WRITE_BEHIND_FLUSH_INTERVAL_SECONDS
+        )
+        self.max_queue = max_queue or settings.WRITE_BEHIND_MAX_QUEUE
+        self.durable = durable
+        self.hard_max_queue = max(
+            self.max_queue, settings.WRITE_BEHIND_DURABLE_MAX_QUEUE,
+        )
+        self._over_ceiling = False
+        self.consecutive_failures = 0
+        self.last_error: str | None = None
+
+        self._buffer: list[dict[str, Any]] = []
+        self._task: asyncio.Task | None = None
+        self._wakeup: asyncio.Event | None = None
+        self._loop: asyncio.AbstractEventLoop | None = None
+
+        self._written = ROWS_TOTAL.labels(name, "written")
+        self._dropped = ROWS_TOTAL.labels(name, "dropped_overflow")
+        self._failed = ROWS_TOTAL.labels(name, "failed")
+        self._retried = ROWS_TOTAL.labels(name, "retried")
+        self._by_trigger = {
+            t: FLUSHES_TOTAL.labels(name, t) for t in ("size", "interval", "shutdown")
+        }
+        QUEUE_DEPTH.labels(name).set_function(lambda: len(self._buffer))
+        _SINKS.append(self)
+
+    # ---------- producer side ----------
+
+    def add(self, row: dict[str, Any]) -> bool:
+        """Buffer one row. Returns False if it was not buffered (buffer full)."""
+        if len(self._buffer) >= self.max_queue:
+            if not self.durable:
+                self._dropped.inc()
+                return False
+            if len(self._buffer) >= self.hard_max_queue:
+                if not self._over_ceiling:
+                    self._over_ceiling = True
+                    logger.critical(
+                        "Write-behind %s backlog reached %d rows; logging new rows "
+                        "instead of keeping them", self.name, self.hard_max_queue,
+                    )
+                self._unwritten([row])
+                return False
+            self._over_ceiling = False
+            if len(self._buffer) == self.max_queue:
+                logger.warning(
+                    "Write-behind %s backlog reached %d rows; keeping new rows",
+                    self.name, self.max_queue,
+                )
+        self._buffer.append(row)
+        self._ensure_worker()
+        if len(self._buffer) >= self.batch_size and self._wakeup is not None:
+            self._wakeup.set()
+        return True
+
+    # ---------- flushing ----------
+
+    def _ensure_worker(self) -> None:
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # Synchronous caller (script, test): rows wait for the next
+            # add() from inside a loop, or for close()
+            return
+        if self._task is not None and not self._task.done() and self._loop is loop:
+            return
+        # First use, or the previous loop has gone away (tests, worker restarts)
+        self._loop = loop
+        self._wakeup = asyncio.Event()
+        self._task = loop.create_task(self._run(), name=f"write-behind:{self.name}")
+
+    async def _run(self) -> None:
+        wakeup = self._wakeup
+        while True:
+            if self.consecutive_failures:
+                # Durable sink after a failed flush: back off before retrying
+                await asyncio.sleep(min(
+                    self.flush_interval * 2 ** self.consecutive_failures,
+                    _MAX_BACKOFF_SECONDS,
+                ))
+            try:
+                await asyncio.wait_for(wakeup.wait(), timeout=self.flush_interval)
+                trigger = "size"
+            except asyncio.TimeoutError:
+                trigger = "interval"
+            wakeup.clear()
+            while self._buffer:
+                if not await self.flush(trigger):
+                    break
+                if len(self._buffer) < self.batch_size:
+                    break
+
+    async def flush(self, trigger: str = "interval") -> int:
+        """Write up to one batch now. Returns the number of rows written."""
+        if not self._buffer:
+            return 0
+        batch = self._buffer[: self.batch_size]
+        del self._buffer[: self.batch_size]
+
+        try:
+            await self._insert(batch)
+        except asyncio.CancelledError:
+            # Cancelled mid-write (shutdown): keep the rows for close()
+            self._buffer[:0] = batch
+            raise
+        except Exception as exc:
+            self.last_error = repr(exc)
+            if not self.durable:
+                self._failed.inc(len(batch))
+                logger.error(
+                    "Write-behind flush failed for %s (%d rows lost)",
+                    self.name, len(batch), exc_info=True,
+                )
+                return 0
+            if _is_transient(exc):
+                self._requeue(batch)
+                return 0
+            written = await self._write_isolating(batch, exc)
+        else:
+            written = len(batch)
+            self.consecutive_failures = 0
+        self._written.inc(written)
+        self._by_trigger[trigger].inc()
+        return written
+
+    async def _insert(self, rows: list[dict[str, Any]]) -> None:
+        from app.core.db import engine
+
+        async with engine.begin() as conn:
+            await conn.execute(insert(self.target), rows)
+
+    async def _write_isolating(
+        self, batch: list[dict[str, Any]], exc: Exception,
+    ) -> int:
+        """Write a batch the database rejected (with ``exc``) by halves.
+
+        Rows that are rejected on their own are set aside.  A connection
+        failure part-way puts the rows not yet written back at the head of
+        the buffer.  Returns the number of rows written.
+        """
+        if len(batch) == 1:
+            self._unwritten(batch, f"rejected: {exc!r}")
+            self.consecutive_failures = 0
+            return 0
+        written = 0
+        mid = len(batch) // 2
+        pending = [batch[mid:], batch[:mid]]    # stack; the last entry comes first
+        while pending:
+            rows = pending.pop()
+            try:
+                await self._insert(rows)
+            except asyncio.CancelledError:
+                self._buffer[:0] = rows + _flatten(reversed(pending))
+                raise
+            except Exception as err:
+                self.last_error = repr(err)
+                if _is_transient(err):
+                    self._requeue(rows + _flatten(reversed(pending)))
+                    return written
+                if len(rows) == 1:
+                    self._unwritten(rows, f"rejected: {err!r}")
+                    continue
+                mid = len(rows) // 2
+                pending += [rows[mid:], rows[:mid]]
+            else:
+                written += len(rows)
+        self.consecutive_failures = 0
+        return written
+
+    def _requeue(self, rows: list[dict[str, Any]]) -> None:
+        """Put rows back at the head of the buffer after a connection failure."""
+        self._buffer[:0] = rows
+        self.consecutive_failures += 1
+        self._retried.inc(len(rows))
+        logger.error(
+            "Write-behind flush failed for %s (attempt %d, %d rows kept for retry)",
+            self.name, self.consecutive_failures, len(self._buffer), exc_info=True,
+        )
+
+    def _unwritten(self, rows: list[dict[str, Any]], reason: str | None = None) -> None:
+        """Give up on ``rows``: one replayable CRITICAL line each."""
+        if reason:
+            logger.critical(
+                "Write-behind %s gave up on %d rows (%s)", self.name, len(rows), reason,
+            )
+        for row in rows:
+            logger.critical(
+                "WRITE_BEHIND_UNWRITTEN %s %s",
+                self.name, json.dumps(row, default=str, sort_keys=True),
+            )
+        self._failed.inc(len(rows))
+
+    async def close(self) -> None:
+        """Stop the background task and write everything still buffered."""
+        if self._task is not None and not self._task.done():
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+        self._task = None
+        attempts = 0
+        while self._buffer:
+            before = len(self._buffer)
+            await self.flush("shutdown")
+            if len(self._buffer) < before:     # written or set aside
+                continue
+            attempts += 1
+            if not self.durable or attempts >= _SHUTDOWN_ATTEMPTS:
+                break
+            await asyncio.sleep(self.flush_interval)
+        if self.durable and self._buffer:
+            self._unwritten(self._buffer, f"shutdown, last error {self.last_error}")
+            self._buffer.clear()
+
+
+def _flatten(parts) -> list[dict[str, Any]]:
+    return [row for part in parts for row in part]
+
+
+def _is_transient(exc: Exception) -> bool:
+    """True for failures of the connection rather than of the rows."""
+    from sqlalchemy import exc as sa_exc
+
+    if isinstance(exc, sa_exc.DBAPIError) and exc.connection_invalidated:
+        return True
+    return isinstance(exc, (
+        OSError,
+        asyncio.TimeoutError,
+        sa_exc.DisconnectionError,
+        sa_exc.InterfaceError,
+        sa_exc.OperationalError,
+        sa_exc.TimeoutError,
+    ))
+
+
+async def close_all_sinks() -> None:
+    """Flush every sink; call once on application / worker shutdown."""
+    for sink in _SINKS:
+        try:
+            await sink.close()
+        except Exception:
+            logger.exception("Failed to close write-behind sink %s", sink.name)
+
+
+def _now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+# ---------------------------------------------------------------------------
+# Sinks
+# ---------------------------------------------------------------------------
+
+# analytics_events has no ORM model; describe just the columns we insert
+analytics_events = table(
+    "analytics_events",
+    column("wa_id"),
+    column("event_name"),
+    column("state"),
+    column("meta", JSONB),
+)
+
+message_log_sink = WriteBehindSink(
+    "whatsapp_message_logs", WhatsAppMessageLog.__table__
+)
+dead_letter_sink = WriteBehindSink(
+    "whatsapp_dead_letters", WhatsAppDeadLetter.__table__
+)
+analytics_event_sink = WriteBehindSink("analytics_events", analytics_events)
+audit_log_sink = WriteBehindSink("audit_log", AuditLog.__table__, durable=True)
+
+
+def log_message(
+    to_number: str, text: str, status: str, error: str | None = None
+) -> None:
+    """Buffer a ``whatsapp_message_logs`` row (created_at = enqueue time)."""
+    message_log_sink.add({
+        "to_number": to_number,
+        "text": text,
+        "status": status,
+        "error": error,
+        "created_at": _now(),
+    })
+
+
+def log_dead_letter(
+    to_number: str,
+    text: str,
+    failure_reason: str,
+    last_error: str | None,
+    retry_count: int,
+) -> None:
+    """Buffer a ``whatsapp_dead_letters`` row (created_at = enqueue time)."""
+    dead_letter_sink.add({
+        "to_number": to_number,
+        "text": text,
+        "failure_reason": failure_reason,
+        "last_error": last_error,
+        "retry_count": retry_count,
+        "created_at": _now(),
+    })
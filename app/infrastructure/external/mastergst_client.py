@@ -23,11 +23,13 @@ Required query param for every call:
 from __future__ import annotations
 
 import logging
+import time
 from typing import Any, Dict, Optional
 
 import httpx
 
 from app.core.config import settings
+from app.core.metrics import GST_API_SECONDS
 
 logger = logging.getLogger("mastergst_client")
 
@@ -102,6 +104,26 @@ class MasterGSTClient:
         headers: Dict[str, str],
         params: Dict[str, str] | None = None,
         json_body: dict | None = None,
+    ) -> Dict[str, Any]:
+        """Make an HTTP request to MasterGST API, timed per endpoint."""
+        start = time.perf_counter()
+        outcome = "error"
+        try:
+            data = await self._send_request(method, path, headers, params, json_body)
+            outcome = "ok"
+            return data
+        finally:
+            GST_API_SECONDS.labels("mastergst", path, outcome).observe(
+                time.perf_counter() - start
+            )
+
+    async def _send_request(
+        self,
+        method: str,
+        path: str,
+        headers: Dict[str, str],
+        params: Dict[str, str] | None = None,
+        json_body: dict | None = None,
     ) -> Dict[str, Any]:
         """Make an HTTP request to MasterGST API."""
         url = f"{self.base}{path}"
@@ -4,22 +4,28 @@ import base64
 import json
 import logging
 from dataclasses import dataclass
-
-from openai import AsyncOpenAI
+from typing import TYPE_CHECKING
 
 from app.config.settings import settings
+from app.core.metrics import OPENAI_SECONDS, timed
+
+if TYPE_CHECKING:
+    from openai import AsyncOpenAI
 
 logger = logging.getLogger("openai_client")
 
 # ---------------------------------------------------------------------------
-# Singleton client (lazy init)
+# Singleton client (lazy init — the SDK itself is imported on first use,
+# it adds ~0.7s to API startup otherwise)
 # ---------------------------------------------------------------------------
-_client: AsyncOpenAI | None = None
+_client: "AsyncOpenAI | None" = None
 
 
-def _get_client() -> AsyncOpenAI:
+def _get_client() -> "AsyncOpenAI":
     global _client
     if _client is None:
+        from openai import AsyncOpenAI
+
         _client = AsyncOpenAI(
             api_key=settings.OPENAI_API_KEY,
             timeout=settings.OPENAI_TIMEOUT,
@@ -99,6 +105,7 @@ If the message is a single number (0-9), classify as unknown so number-based rou
 """
 
 
+@timed(OPENAI_SECONDS.labels("detect_intent"))
 async def detect_intent(text: str, lang: str) -> IntentResult:
     """Classify user message into a bot intent using OpenAI function calling."""
     if not settings.OPENAI_API_KEY:
@@ -203,6 +210,7 @@ Rules:
 """
 
 
+@timed(OPENAI_SECONDS.labels("parse_invoice_vision"))
 async def parse_invoice_vision(image_bytes: bytes, mime_type: str = "image/jpeg") -> dict:
     """
     PRIMARY parser: Send raw invoice image to GPT-4o Vision for extraction.
@@ -251,6 +259,7 @@ async def parse_invoice_vision(image_bytes: bytes, mime_type: str = "image/jpeg"
         return {}
 
 
+@timed(OPENAI_SECONDS.labels("parse_invoice_llm"))
 async def parse_invoice_llm(ocr_text: str) -> dict:
     """FALLBACK parser: Use GPT-4o to extract from OCR text when Vision unavailable."""
     if not settings.OPENAI_API_KEY:
@@ -300,6 +309,7 @@ Rules:
 """
 
 
+@timed(OPENAI_SECONDS.labels("tax_qa"))
 async def tax_qa(
     question: str,
     lang: str,
@@ -358,6 +368,7 @@ Rules:
 """
 
 
+@timed(OPENAI_SECONDS.labels("lookup_hsn"))
 async def lookup_hsn(product_description: str, lang: str = "en") -> dict:
     """Look up HSN/SAC code for a product/service description using GPT-4o."""
     if not settings.OPENAI_API_KEY:
@@ -578,11 +589,13 @@ async def _parse_tax_document_text(
 
 # --- Form 16 ---
 
+@timed(OPENAI_SECONDS.labels("parse_form16_vision"))
 async def parse_form16_vision(image_bytes: bytes, mime_type: str = "image/jpeg") -> dict:
     """Parse Form 16 image using GPT-4o Vision."""
     return await _parse_tax_document_vision(image_bytes, mime_type, FORM16_VISION_PROMPT, "Form16")
 
 
+@timed(OPENAI_SECONDS.labels("parse_form16_text"))
 async def parse_form16_text(ocr_text: str) -> dict:
     """Parse Form 16 OCR text using GPT-4o."""
     return await _parse_tax_document_text(ocr_text, FORM16_VISION_PROMPT, "Form16")
@@ -590,11 +603,13 @@ async def parse_form16_text(ocr_text: str) -> dict:
 
 # --- Form 26AS ---
 
+@timed(OPENAI_SECONDS.labels("parse_form26as_vision"))
 async def parse_form26as_vision(image_bytes: bytes, mime_type: str = "image/jpeg") -> dict:
     """Parse Form 26AS image using GPT-4o Vision."""
     return await _parse_tax_document_vision(image_bytes, mime_type, FORM26AS_VISION_PROMPT, "Form26AS")
 
 
+@timed(OPENAI_SECONDS.labels("parse_form26as_text"))
 async def parse_form26as_text(ocr_text: str) -> dict:
     """Parse Form 26AS OCR text using GPT-4o."""
     return await _parse_tax_document_text(ocr_text, FORM26AS_VISION_PROMPT, "Form26AS")
@@ -602,11 +617,13 @@ async def parse_form26as_text(ocr_text: str) -> dict:
 
 # --- AIS ---
 
+@timed(OPENAI_SECONDS.labels("parse_ais_vision"))
 async def parse_ais_vision(image_bytes: bytes, mime_type: str = "image/jpeg") -> dict:
     """Parse AIS image using GPT-4o Vision."""
     return await _parse_tax_document_vision(image_bytes, mime_type, AIS_VISION_PROMPT, "AIS")
 
 
+@timed(OPENAI_SECONDS.labels("parse_ais_text"))
 async def parse_ais_text(ocr_text: str) -> dict:
     """Parse AIS OCR text using GPT-4o."""
     return await _parse_tax_document_text(ocr_text, AIS_VISION_PROMPT, "AIS")
@@ -32,7 +32,12 @@ _LANG_MAP = {
 
 
 async def transcribe_audio_sarvam(
-    audio_bytes: bytes, language: str | None = None
+    audio_bytes: bytes,
+    language: str | None = None,
+    *,
+    client: httpx.AsyncClient | None = None,
+    filename: str = "audio.ogg",
+    content_type: str = "audio/ogg",
 ) -> str:
     """Transcribe audio using Sarvam AI STT.
 
@@ -42,6 +47,10 @@ async def transcribe_audio_sarvam(
         Raw audio data (OGG/WAV/MP3 from WhatsApp).
     language : str | None
         ISO-639-1 language hint (e.g. "hi", "en"). Optional.
+    client : httpx.AsyncClient | None
+        Shared client to reuse connections; a one-off client if omitted.
+    filename, content_type : str
+        How the audio is labelled in the upload (e.g. "seg0.wav", "audio/wav").
 
     Returns
     -------
@@ -59,6 +68,19 @@ async def transcribe_audio_sarvam(
             "Set SARVAM_API_KEY and SARVAM_STT_URL in your .env file."
         )
 
+    if client is None:
+        async with httpx.AsyncClient(timeout=60) as own_client:
+            return await _transcribe(own_client, audio_bytes, language, filename, content_type)
+    return await _transcribe(client, audio_bytes, language, filename, content_type)
+
+
+async def _transcribe(
+    client: httpx.AsyncClient,
+    audio_bytes: bytes,
+    language: str | None,
+    filename: str,
+    content_type: str,
+) -> str:
     sarvam_lang = _LANG_MAP.get(language or "", "hi-IN")
 
     headers = {
@@ -67,24 +89,23 @@ async def transcribe_audio_sarvam(
 
     # Sarvam expects multipart form data with the audio file
     files = {
-        "file": ("audio.ogg", audio_bytes, "audio/ogg"),
+        "file": (filename, audio_bytes, content_type),
     }
     form_data = {
         "language_code": sarvam_lang,
         "model": "saarika:v2",
     }
 
-    async with httpx.AsyncClient(timeout=60) as client:
-        resp = await client.post(
-            settings.SARVAM_STT_URL,
-            headers=headers,
-            files=files,
-            data=form_data,
-        )
-        resp.raise_for_status()
-        data = resp.json()
+    resp = await client.post(
+        settings.SARVAM_STT_URL,
+        headers=headers,
+        files=files,
+        data=form_data,
+    )
+    resp.raise_for_status()
+    data = resp.json()
 
-    # Sarvam API returns {"transcript": "..."} 
+    # Sarvam API returns {"transcript": "..."}
     transcript = data.get("transcript", "")
     if not transcript:
         logger.warning("Sarvam STT returned empty transcript: %s", data)
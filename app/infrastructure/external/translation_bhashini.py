@@ -11,9 +11,14 @@ Requires environment variables:
     BHASHINI_PIPELINE_BASE_URL         — base URL (default: https://meity-auth.ulcacontrib.org/ulca/apis)
 
 If not configured, returns original text (graceful fallback).
+
+The pipeline config (inference endpoint, key and service id) depends only on
+the language pair, so it is fetched once per pair and kept for
+``_PIPELINE_CONFIG_TTL_SECONDS``; each translation is then one request.
 """
 
 import logging
+import time
 
 import httpx
 
@@ -31,11 +36,31 @@ _LANG_MAP = {
     "kn": "kn",
 }
 
+_PIPELINE_CONFIG_TTL_SECONDS = 3600
+
+# (src, tgt) -> (expires_at, (inference_url, inference_key, service_id))
+_pipeline_cache: dict[tuple[str, str], tuple[float, tuple[str, str, str]]] = {}
+
+
+def is_configured() -> bool:
+    """True if Bhashini credentials are set (otherwise translation is a no-op)."""
+    return bool(
+        settings.BHASHINI_USER_ID
+        and settings.BHASHINI_ULCA_API_KEY
+        and settings.BHASHINI_TRANSLATION_PIPELINE_ID
+    )
+
+
+def clear_pipeline_cache() -> None:
+    _pipeline_cache.clear()
+
 
 async def translate_with_bhashini(
     text: str,
     source_lang: str = "auto",
     target_lang: str = "en",
+    *,
+    client: httpx.AsyncClient | None = None,
 ) -> str:
     """Translate text using Bhashini ULCA NMT pipeline.
 
@@ -47,6 +72,8 @@ async def translate_with_bhashini(
         Source language code (e.g. "hi", "ta"). Use "auto" for auto-detect.
     target_lang : str
         Target language code (default "en").
+    client : httpx.AsyncClient | None
+        Shared client to reuse connections; a one-off client if omitted.
 
     Returns
     -------
@@ -54,20 +81,37 @@ async def translate_with_bhashini(
         Translated text. Returns original text if Bhashini is not configured
         or if translation fails.
     """
-    user_id = settings.BHASHINI_USER_ID
-    api_key = settings.BHASHINI_ULCA_API_KEY
-    pipeline_id = settings.BHASHINI_TRANSLATION_PIPELINE_ID
-    base_url = settings.BHASHINI_PIPELINE_BASE_URL
-
-    if not user_id or not api_key or not pipeline_id:
+    if not is_configured():
         # Not configured — return original text silently
         return text
 
     src = _LANG_MAP.get(source_lang, source_lang)
     tgt = _LANG_MAP.get(target_lang, target_lang)
 
+    try:
+        if client is None:
+            async with httpx.AsyncClient(timeout=30) as own_client:
+                return await _translate(own_client, text, src, tgt)
+        return await _translate(client, text, src, tgt)
+
+    except httpx.HTTPStatusError as e:
+        logger.warning("Bhashini HTTP error %d: %s", e.response.status_code, e)
+        return text
+    except Exception:
+        logger.exception("Bhashini translation failed")
+        return text
+
+
+async def _pipeline_config(
+    client: httpx.AsyncClient, src: str, tgt: str,
+) -> tuple[str, str, str] | None:
+    """(inference_url, inference_key, service_id) for a language pair, cached."""
+    cached = _pipeline_cache.get((src, tgt))
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
     # Step 1: Get pipeline config (compute endpoint + service ID)
-    config_url = f"{base_url}/v0/model/getModelsPipeline"
+    config_url = f"{settings.BHASHINI_PIPELINE_BASE_URL}/v0/model/getModelsPipeline"
     config_payload = {
         "pipelineTasks": [
             {
@@ -81,87 +125,90 @@ async def translate_with_bhashini(
             }
         ],
         "pipelineRequestConfig": {
-            "pipelineId": pipeline_id,
+            "pipelineId": settings.BHASHINI_TRANSLATION_PIPELINE_ID,
         },
     }
     config_headers = {
         "Content-Type": "application/json",
-        "userID": user_id,
-        "ulcaApiKey": api_key,
+        "userID": settings.BHASHINI_USER_ID,
+        "ulcaApiKey": settings.BHASHINI_ULCA_API_KEY,
     }
 
-    try:
-        async with httpx.AsyncClient(timeout=30) as client:
-            # Get pipeline compute config
-            config_resp = await client.post(
-                config_url, json=config_payload, headers=config_headers
-            )
-            config_resp.raise_for_status()
-            config_data = config_resp.json()
-
-            # Extract compute endpoint and service ID
-            pipeline_config = config_data.get("pipelineResponseConfig", [{}])
-            if not pipeline_config:
-                logger.warning("Empty pipeline config from Bhashini")
-                return text
-
-            inference_url = config_data.get("pipelineInferenceAPIEndPoint", {}).get(
-                "callbackUrl", ""
-            )
-            inference_key = config_data.get("pipelineInferenceAPIEndPoint", {}).get(
-                "inferenceApiKey", {}
-            ).get("value", "")
-
-            if not inference_url:
-                logger.warning("No inference URL from Bhashini pipeline config")
-                return text
-
-            service_id = pipeline_config[0].get("config", [{}])[0].get("serviceId", "")
-
-            # Step 2: Call the inference endpoint
-            inference_payload = {
-                "pipelineTasks": [
-                    {
-                        "taskType": "translation",
-                        "config": {
-                            "language": {
-                                "sourceLanguage": src,
-                                "targetLanguage": tgt,
-                            },
-                            "serviceId": service_id,
-                        },
-                    }
-                ],
-                "inputData": {
-                    "input": [{"source": text}],
+    config_resp = await client.post(
+        config_url, json=config_payload, headers=config_headers
+    )
+    config_resp.raise_for_status()
+    config_data = config_resp.json()
+
+    # Extract compute endpoint and service ID
+    pipeline_config = config_data.get("pipelineResponseConfig", [{}])
+    if not pipeline_config:
+        logger.warning("Empty pipeline config from Bhashini")
+        return None
+
+    inference_url = config_data.get("pipelineInferenceAPIEndPoint", {}).get(
+        "callbackUrl", ""
+    )
+    inference_key = config_data.get("pipelineInferenceAPIEndPoint", {}).get(
+        "inferenceApiKey", {}
+    ).get("value", "")
+
+    if not inference_url:
+        logger.warning("No inference URL from Bhashini pipeline config")
+        return None
+
+    service_id = pipeline_config[0].get("config", [{}])[0].get("serviceId", "")
+    config = (inference_url, inference_key, service_id)
+    _pipeline_cache[(src, tgt)] = (time.monotonic() + _PIPELINE_CONFIG_TTL_SECONDS, config)
+    return config
+
+
+async def _translate(client: httpx.AsyncClient, text: str, src: str, tgt: str) -> str:
+    config = await _pipeline_config(client, src, tgt)
+    if config is None:
+        return text
+    inference_url, inference_key, service_id = config
+
+    # Step 2: Call the inference endpoint
+    inference_payload = {
+        "pipelineTasks": [
+            {
+                "taskType": "translation",
+                "config": {
+                    "language": {
+                        "sourceLanguage": src,
+                        "targetLanguage": tgt,
+                    },
+                    "serviceId": service_id,
                 },
             }
-            inference_headers = {
-                "Content-Type": "application/json",
-                "Authorization": inference_key,
-            }
-
-            infer_resp = await client.post(
-                inference_url, json=inference_payload, headers=inference_headers
-            )
-            infer_resp.raise_for_status()
-            infer_data = infer_resp.json()
-
-            # Extract translated text
-            outputs = infer_data.get("pipelineResponse", [{}])
-            if outputs:
-                output_list = outputs[0].get("output", [{}])
-                if output_list:
-                    translated = output_list[0].get("target", "")
-                    if translated:
-                        return translated
-
-            logger.warning("Bhashini returned no translation: %s", infer_data)
-            return text
+        ],
+        "inputData": {
+            "input": [{"source": text}],
+        },
+    }
+    inference_headers = {
+        "Content-Type": "application/json",
+        "Authorization": inference_key,
+    }
 
-    except httpx.HTTPStatusError as e:
-        logger.warning("Bhashini HTTP error %d: %s", e.response.status_code, e)
-        return text
-    except Exception:
-        logger.exception("Bhashini translation failed")
-        return text
+    infer_resp = await client.post(
+        inference_url, json=inference_payload, headers=inference_headers
+    )
+    if infer_resp.status_code in (401, 403):
+        # The cached inference key may have been rotated
+        _pipeline_cache.pop((src, tgt), None)
+    infer_resp.raise_for_status()
+    infer_data = infer_resp.json()
+
+    # Extract translated text
+    outputs = infer_data.get("pipelineResponse", [{}])
+    if outputs:
+        output_list = outputs[0].get("output", [{}])
+        if output_list:
+            translated = output_list[0].get("target", "")
+            if translated:
+                return translated
+
+    logger.warning("Bhashini returned no translation: %s", infer_data)
+    return text
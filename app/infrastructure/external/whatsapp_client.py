@@ -7,8 +7,7 @@ from dataclasses import dataclass
 import httpx
 
 from app.core.config import settings
-from app.core.db import AsyncSessionLocal
-from app.infrastructure.db.models import WhatsAppDeadLetter, WhatsAppMessageLog
+from app.infrastructure.db.write_behind import log_dead_letter, log_message
 
 logger = logging.getLogger("whatsapp_client")
 
@@ -148,6 +147,11 @@ async def send_whatsapp_text(to_number: str, text: str) -> None:
     await _outgoing_queue.put(msg)
 
 
+def outgoing_queue_depth() -> int:
+    """Messages enqueued in this process and not yet picked up by the sender."""
+    return _outgoing_queue.qsize()
+
+
 async def start_whatsapp_sender_worker() -> None:
     """
     Call this once at startup (FastAPI lifespan).
@@ -508,19 +512,7 @@ async def _log_dead_letter(
     last_error: str | None,
     retry_count: int,
 ) -> None:
-    try:
-        async with AsyncSessionLocal() as session:
-            dl = WhatsAppDeadLetter(
-                to_number=to_number,
-                text=text,
-                failure_reason=failure_reason,
-                last_error=last_error,
-                retry_count=retry_count,
-            )
-            session.add(dl)
-            await session.commit()
-    except Exception as e:
-        logger.error("Failed to log dead-letter for %s: %r", to_number, e)
+    log_dead_letter(to_number, text, failure_reason, last_error, retry_count)
 
 
 async def send_whatsapp_document(
@@ -623,15 +615,4 @@ async def _log_message(
     status: str,
     error: str | None = None,
 ) -> None:
-    try:
-        async with AsyncSessionLocal() as session:
-            row = WhatsAppMessageLog(
-                to_number=to_number,
-                text=text,
-                status=status,
-                error=error,
-            )
-            session.add(row)
-            await session.commit()
-    except Exception as e:
-        logger.error("Failed to log message for %s: %r", to_number, e)
+    log_message(to_number, text, status, error)
@@ -17,31 +17,39 @@ def _wa_token() -> str:
     return token
 
 
-async def get_media_url(media_id: str) -> str:
+async def get_media_url(media_id: str, client: Optional[httpx.AsyncClient] = None) -> str:
     """
     1) GET /{media_id} -> returns {"url": "..."}
+
+    Pass ``client`` to reuse a shared connection pool.
     """
     url = f"{GRAPH_BASE}/{GRAPH_VERSION}/{media_id}"
     headers = {"Authorization": f"Bearer {_wa_token()}"}
-    async with httpx.AsyncClient(timeout=30) as client:
+    if client is None:
+        async with httpx.AsyncClient(timeout=30) as own_client:
+            r = await own_client.get(url, headers=headers)
+    else:
         r = await client.get(url, headers=headers)
-        r.raise_for_status()
-        data = r.json()
-        media_url = data.get("url")
-        if not media_url:
-            raise RuntimeError(f"WhatsApp media url not found for media_id={media_id}")
-        return media_url
+    r.raise_for_status()
+    data = r.json()
+    media_url = data.get("url")
+    if not media_url:
+        raise RuntimeError(f"WhatsApp media url not found for media_id={media_id}")
+    return media_url
 
 
-async def download_media(media_url: str) -> bytes:
+async def download_media(media_url: str, client: Optional[httpx.AsyncClient] = None) -> bytes:
     """
     2) GET bytes from returned media URL (still requires Authorization header)
     """
     headers = {"Authorization": f"Bearer {_wa_token()}"}
-    async with httpx.AsyncClient(timeout=60) as client:
+    if client is None:
+        async with httpx.AsyncClient(timeout=60) as own_client:
+            r = await own_client.get(media_url, headers=headers)
+    else:
         r = await client.get(media_url, headers=headers)
-        r.raise_for_status()
-        return r.content
+    r.raise_for_status()
+    return r.content
 
 
 async def whatsapp_send_text(
@@ -2,12 +2,14 @@ import io
 import logging
 from typing import Optional
 
-import pytesseract
-from PIL import Image
-from pdf2image import convert_from_bytes
+from app.core.metrics import OCR_SECONDS, timed
 
 logger = logging.getLogger(__name__)
 
+# pytesseract / PIL / pdf2image are imported inside the helpers below:
+# pytesseract pulls in pandas + numpy when they are installed, which the
+# API process should not pay for until the first OCR request.
+
 SUPPORTED_IMAGE_TYPES = {
     "image/jpeg",
     "image/jpg",
@@ -16,6 +18,7 @@ SUPPORTED_IMAGE_TYPES = {
 }
 
 
+@timed(OCR_SECONDS.labels("tesseract"))
 async def extract_text_from_invoice_bytes(
     file_bytes: bytes,
     mime_type: Optional[str] = None,
@@ -57,6 +60,9 @@ def _extract_from_pdf(file_bytes: bytes) -> str:
     """
     Convert PDF to images and OCR each page.
     """
+    import pytesseract
+    from pdf2image import convert_from_bytes
+
     text_chunks = []
 
     images = convert_from_bytes(
@@ -77,6 +83,9 @@ def _extract_from_image(file_bytes: bytes) -> str:
     """
     OCR directly from image bytes.
     """
+    import pytesseract
+    from PIL import Image
+
     image = Image.open(io.BytesIO(file_bytes))
     text = pytesseract.image_to_string(image)
     return text.strip() if text else ""
\ No newline at end of file
@@ -8,6 +8,9 @@ from app.core.config import settings
 from app.infrastructure.queue.whatsapp_jobs import send_whatsapp_job
 from app.infrastructure.queue.embedding_jobs import ingest_document_job
 from app.infrastructure.queue.ml_retrain_job import ml_retrain_job
+from app.infrastructure.queue.audit_jobs import audit_partition_job
+from app.infrastructure.queue.period_close_jobs import period_close_job
+from app.infrastructure.queue.gstr2b_sync_jobs import gstr2b_sync_job
 
 
 class WorkerSettings:
@@ -20,11 +23,23 @@ class WorkerSettings:
     redis_settings = RedisSettings.from_dsn(settings.REDIS_URL)
 
     # Jobs this worker can execute
-    functions = [send_whatsapp_job, ingest_document_job, ml_retrain_job]
+    functions = [
+        send_whatsapp_job,
+        ingest_document_job,
+        ml_retrain_job,
+        audit_partition_job,
+        period_close_job,
+        gstr2b_sync_job,
+    ]
 
-    # Cron jobs (weekly ML retrain — Sundays at 02:00 UTC)
+    # Cron jobs (weekly ML retrain — Sundays at 02:00 UTC;
+    # audit_log partition roll-forward / retention — daily at 01:30 UTC;
+    # GSTR-2B portfolio sync — every 6 hours, a no-op outside the 2B window)
     cron_jobs = [
         cron(ml_retrain_job, weekday={6}, hour={2}, minute={0}),
+        cron(audit_partition_job, hour={1}, minute={30}),
+        # A large portfolio at the provider's rate takes well over ARQ's default 5 minutes
+        cron(gstr2b_sync_job, hour={0, 6, 12, 18}, minute={15}, timeout=5 * 3600),
     ]
 
     # Optional tuning
@@ -43,5 +58,9 @@ class WorkerSettings:
     async def on_shutdown(ctx):
         """
         Called once when the worker is shutting down.
+        Flushes buffered message logs / dead letters before exit.
         """
+        from app.infrastructure.db.write_behind import close_all_sinks
+
+        await close_all_sinks()
         logger.info("ARQ worker shutting down")
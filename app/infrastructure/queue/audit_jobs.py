@@ -0,0 +1,35 @@
+# app/infrastructure/queue/audit_jobs.py
+"""
+ARQ job for audit_log partition maintenance.
+
+Creates the monthly ``audit_log`` partitions a few months ahead and drops
+whole partitions that have aged out of the retention window.  Runs as a
+daily cron; both steps are idempotent.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger("audit_jobs")
+
+
+async def audit_partition_job(ctx: dict) -> dict:
+    """Roll audit_log partitions forward and enforce retention."""
+    from app.core.db import AsyncSessionLocal
+    from app.domain.services.audit_service import (
+        drop_expired_partitions,
+        ensure_partitions,
+    )
+
+    async with AsyncSessionLocal() as db:
+        created = await ensure_partitions(db, settings.AUDIT_LOG_PARTITIONS_AHEAD)
+        dropped = await drop_expired_partitions(db, settings.AUDIT_LOG_RETENTION_MONTHS)
+
+    logger.info(
+        "audit_log partitions: ensured %s, dropped %d",
+        ", ".join(created), len(dropped),
+    )
+    return {"ensured": created, "dropped": dropped}
@@ -0,0 +1,26 @@
+# app/infrastructure/queue/gstr2b_sync_jobs.py
+"""
+ARQ job for the scheduled GSTR-2B sync (see ``app.domain.services.gstr2b_sync``).
+
+Runs as a cron a few times a day; outside the window between the portal's
+2B generation day and the GSTR-3B due date it returns without doing
+anything.  GSTINs synced within ``GSTR2B_SYNC_REFRESH_HOURS`` are skipped, so
+the repeated runs only pick up GSTINs that failed or were added since.
+"""
+
+from __future__ import annotations
+
+import logging
+
+from app.core.config import settings
+
+logger = logging.getLogger("gstr2b_sync_jobs")
+
+
+async def gstr2b_sync_job(ctx: dict, period: str | None = None, force: bool = False) -> dict:
+    """Pre-fetch GSTR-2B for every active GSTIN; ``period`` defaults to the one due today."""
+    from app.domain.services.gstr2b_sync import run_sync
+
+    if not settings.GSTR2B_SYNC_ENABLED and period is None:
+        return {"period": None, "counts": {}, "failed": []}
+    return await run_sync(period, force=force)
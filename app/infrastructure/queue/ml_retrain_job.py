@@ -73,9 +73,11 @@ async def ml_retrain_job(ctx: dict) -> dict:
         try:
             result = await train_and_store(db, auto_activate=True)
             logger.info(
-                "ML retrain complete: v%d, accuracy=%.4f, f1=%.4f, activated=%s",
-                result.version, result.accuracy, result.f1_macro,
-                result.auto_activated,
+                "ML retrain complete: v%d (%s), accuracy=%.4f, f1=%.4f, "
+                "activated=%s, stages=%s",
+                result.version, result.algorithm, result.accuracy,
+                result.f1_macro, result.auto_activated,
+                {k: round(v, 2) for k, v in result.stage_seconds.items()},
             )
             return {
                 "action": "trained",
@@ -84,6 +86,10 @@ async def ml_retrain_job(ctx: dict) -> dict:
                 "f1_macro": result.f1_macro,
                 "training_samples": result.training_samples,
                 "auto_activated": result.auto_activated,
+                "algorithm": result.algorithm,
+                "stage_seconds": {
+                    k: round(v, 3) for k, v in result.stage_seconds.items()
+                },
             }
         except ValueError as exc:
             logger.warning("ML retrain failed: %s", exc)
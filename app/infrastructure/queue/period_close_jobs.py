@@ -0,0 +1,94 @@
+# app/infrastructure/queue/period_close_jobs.py
+"""
+ARQ job for the period-close pipeline (see ``app.domain.services.period_close``).
+
+One job closes a list of return periods — a single period from WhatsApp or
+the v1 API, or a CA's whole portfolio for a month.  When ``notify_wa_id`` is
+set, each step that runs is reported to that WhatsApp number through
+``send_whatsapp_job``.
+
+A period whose close lock is held by another run comes back ``busy``; it is
+re-queued after ``PERIOD_CLOSE_BUSY_RETRY_SECONDS``, up to
+``PERIOD_CLOSE_BUSY_RETRIES`` times, and the WhatsApp user is told if it
+still could not run.
+"""
+
+from __future__ import annotations
+
+import logging
+from typing import Any
+from uuid import UUID
+
+from app.core.config import settings
+
+logger = logging.getLogger("period_close_jobs")
+
+
+def _step_message(period: str, outcome: Any, lang: str) -> str:
+    from app.domain.i18n import t
+    from app.domain.services.period_close import STEP_LABELS
+
+    step = STEP_LABELS[outcome.name]
+    if outcome.name == "risk" and outcome.state == "done":
+        step = f"{step} {outcome.detail['risk_score']}/100 ({outcome.detail['risk_level']})"
+    key = "GST_CLOSE_STEP_DONE" if outcome.state == "done" else "GST_CLOSE_STEP_FAILED"
+    return t(key, lang, period=period, step=step, error=outcome.error)
+
+
+async def period_close_job(
+    ctx: dict,
+    period_ids: list[str],
+    force: bool = False,
+    steps: list[str] | None = None,
+    notify_wa_id: str | None = None,
+    lang: str = "en",
+    attempt: int = 0,
+) -> dict:
+    """Close ``period_ids`` with bounded concurrency; returns per-period outcomes."""
+    from app.domain.services import period_close
+
+    job_id = ctx.get("job_id", "")
+    on_progress = None
+    if notify_wa_id:
+        redis = ctx["redis"]
+
+        async def on_progress(ref, outcome):
+            if outcome.state in ("done", "failed"):
+                await redis.enqueue_job(
+                    "send_whatsapp_job", notify_wa_id, _step_message(ref.period, outcome, lang),
+                )
+
+    await period_close.set_job_status(job_id, "running")
+    results = await period_close.close_periods(
+        [UUID(p) for p in period_ids],
+        force=force,
+        steps=steps,
+        job_id=job_id,
+        on_progress=on_progress,
+    )
+    await period_close.set_job_status(job_id, "done")
+
+    counts: dict[str, int] = {}
+    for res in results:
+        counts[res.status] = counts.get(res.status, 0) + 1
+
+    busy = [r for r in results if r.status == "busy"]
+    if busy:
+        redis = ctx["redis"]
+        if attempt < settings.PERIOD_CLOSE_BUSY_RETRIES:
+            await redis.enqueue_job(
+                "period_close_job", [r.period_id for r in busy], force, steps, notify_wa_id, lang,
+                attempt + 1, _defer_by=settings.PERIOD_CLOSE_BUSY_RETRY_SECONDS,
+            )
+            counts["requeued"] = len(busy)
+        else:
+            logger.warning("Period close gave up on %d busy period(s) after %d retries", len(busy), attempt)
+            if notify_wa_id:
+                from app.domain.i18n import t
+
+                for res in busy:
+                    await redis.enqueue_job(
+                        "send_whatsapp_job", notify_wa_id, t("GST_CLOSE_BUSY", lang, period=res.period),
+                    )
+    logger.info("Period close job %s: %d period(s) %s", job_id, len(results), counts)
+    return {"job_id": job_id, "counts": counts, "periods": [r.to_dict() for r in results]}
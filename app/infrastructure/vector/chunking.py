@@ -11,12 +11,13 @@ from __future__ import annotations
 
 import re
 from dataclasses import dataclass, field
-from typing import List
-
-import tiktoken
+from typing import TYPE_CHECKING, List
 
 from app.core.config import settings
 
+if TYPE_CHECKING:
+    import tiktoken
+
 # ── tokenizer singleton ────────────────────────────────────────────
 
 _encoder: tiktoken.Encoding | None = None
@@ -25,6 +26,8 @@ _encoder: tiktoken.Encoding | None = None
 def _get_encoder() -> tiktoken.Encoding:
     global _encoder
     if _encoder is None:
+        import tiktoken  # deferred: only RAG ingestion needs the tokenizer
+
         _encoder = tiktoken.get_encoding("cl100k_base")
     return _encoder
 
@@ -13,6 +13,8 @@ from app.core.db import db_ping
 from app.api.routes import api_router
 from app.infrastructure.external.whatsapp_client import start_whatsapp_sender_worker
 from app.domain.services.deadline_scheduler import start_deadline_reminder_loop
+from app.domain.services import feature_registry, tax_rate_service
+from app.infrastructure.cache.invalidation import listen_for_invalidations
 
 logger = logging.getLogger("app.main")
 
@@ -37,13 +39,22 @@ async def lifespan(app: FastAPI):
     # Start background workers
     sender_task = asyncio.create_task(start_whatsapp_sender_worker())
     reminder_task = asyncio.create_task(start_deadline_reminder_loop())
-    logger.info("Background workers started (WhatsApp sender + deadline reminders)")
+    # One pub/sub connection drops stale in-process tax rate / segment copies
+    invalidation_task = asyncio.create_task(listen_for_invalidations({
+        tax_rate_service.INVALIDATE_CHANNEL: tax_rate_service.get_tax_rate_service().invalidate_local,
+        feature_registry.INVALIDATE_CHANNEL: feature_registry.invalidate_local,
+    }))
+    logger.info(
+        "Background workers started "
+        "(WhatsApp sender + deadline reminders + tax rate / segment cache invalidation)"
+    )
 
     yield
 
     # Cancel background tasks on shutdown
     sender_task.cancel()
     reminder_task.cancel()
+    invalidation_task.cancel()
     try:
         await sender_task
     except asyncio.CancelledError:
@@ -52,6 +63,17 @@ async def lifespan(app: FastAPI):
         await reminder_task
     except asyncio.CancelledError:
         pass
+    try:
+        await invalidation_task
+    except asyncio.CancelledError:
+        pass
+    from app.infrastructure.db.write_behind import close_all_sinks
+    from app.domain.services.pdf_renderer import shutdown_render_pool
+    from app.domain.services.voice_handler import close_http_client
+
+    await close_all_sinks()
+    shutdown_render_pool()
+    await close_http_client()
     logger.info("Application shutdown")
 
 
@@ -88,6 +110,11 @@ app.add_middleware(
     allow_headers=["*"],
 )
 
+if settings.METRICS_ENABLED:
+    from app.core.metrics import MetricsMiddleware
+
+    app.add_middleware(MetricsMiddleware)
+
 app.mount("/static", StaticFiles(directory=str(_STATIC_DIR)), name="static")
 app.include_router(api_router)
 
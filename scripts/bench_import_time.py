@@ -0,0 +1,149 @@
+# scripts/bench_import_time.py
+"""
+Startup import-time budget and per-process RSS report.
+
+Usage:
+    python scripts/bench_import_time.py                     # all entry points
+    python scripts/bench_import_time.py --target api        # one entry point
+    python scripts/bench_import_time.py --budget-ms 2000 --repeat 5 --top 25
+
+Each entry point is imported in a fresh interpreter under ``-X importtime``.
+The report shows the median import wall time, peak / current RSS after
+import and the slowest modules by cumulative import time.  Exits non-zero
+when the API import is over budget or pulls in a module that must stay
+lazy (OCR, PDF, ML, OpenAI, tokenizer) — use it as a CI regression gate.
+"""
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from loguru import logger
+
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+
+# Entry point name → statement that imports it without starting it
+TARGETS = {
+    "api": "import app.main",
+    "arq-worker": "import app.infrastructure.queue.arq_settings",
+    "dramatiq-worker": "import runpy; runpy.run_path('start_worker.py', run_name='bench')",
+}
+
+# Heavy packages only specific requests / workers need; the API must not
+# import them at startup.
+API_LAZY_MODULES = (
+    "openai",
+    "pytesseract",
+    "pdf2image",
+    "PIL",
+    "pandas",
+    "numpy",
+    "reportlab",
+    "tiktoken",
+    "sklearn",
+    "joblib",
+)
+
+DEFAULT_API_BUDGET_MS = 3000
+
+_PROBE = """
+import json, resource, sys, time
+t0 = time.perf_counter()
+{stmt}
+elapsed = time.perf_counter() - t0
+with open('/proc/self/statm') as fh:
+    rss_pages = int(fh.read().split()[1])
+import os
+print(json.dumps({{
+    "import_ms": elapsed * 1000,
+    "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    "rss_mb": rss_pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024),
+    "lazy_loaded": sorted(m for m in {lazy!r} if m in sys.modules),
+}}))
+"""
+
+
+def _parse_importtime(stderr: str) -> list[tuple[int, str]]:
+    """(cumulative_us, module) for every line of ``-X importtime`` output."""
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        try:
+            _, cumulative, name = line[len("import time:"):].split("|")
+            rows.append((int(cumulative), name.strip()))
+        except ValueError:
+            continue
+    return rows
+
+
+def probe(stmt: str) -> tuple[dict | None, list[tuple[int, str]], str]:
+    """Import ``stmt`` in a fresh interpreter; returns (stats, importtime rows, error)."""
+    code = _PROBE.format(stmt=stmt, lazy=API_LAZY_MODULES)
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+    )
+    if proc.returncode != 0:
+        err = proc.stderr.strip().splitlines()
+        return None, [], err[-1] if err else f"exit {proc.returncode}"
+    stats = json.loads(proc.stdout.strip().splitlines()[-1])
+    return stats, _parse_importtime(proc.stderr), ""
+
+
+def run(targets: list[str], repeat: int, top: int, budget_ms: float) -> int:
+    failures = 0
+    for name in targets:
+        samples, last_rows, error = [], [], ""
+        for _ in range(repeat):
+            stats, rows, error = probe(TARGETS[name])
+            if stats is None:
+                break
+            samples.append(stats)
+            last_rows = rows
+        if not samples:
+            logger.warning("{}: could not import ({})", name, error)
+            continue
+
+        median_ms = statistics.median(s["import_ms"] for s in samples)
+        last = samples[-1]
+        logger.info(
+            "{}: import {:.0f} ms (median of {}), RSS {:.1f} MB, peak RSS {:.1f} MB",
+            name, median_ms, len(samples), last["rss_mb"], last["maxrss_mb"],
+        )
+        for cumulative, module in sorted(last_rows, reverse=True)[:top]:
+            logger.info("    {:>8.1f} ms  {}", cumulative / 1000, module)
+
+        if name != "api":
+            continue
+        if last["lazy_loaded"]:
+            failures += 1
+            logger.error("api: imports modules that must stay lazy: {}", ", ".join(last["lazy_loaded"]))
+        if median_ms > budget_ms:
+            failures += 1
+            logger.error("api: import time {:.0f} ms exceeds budget {:.0f} ms", median_ms, budget_ms)
+
+    if failures:
+        return 1
+    logger.success("✅ Startup import budget OK")
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--target", choices=sorted(TARGETS), action="append")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--top", type=int, default=15)
+    parser.add_argument(
+        "--budget-ms",
+        type=float,
+        default=float(os.getenv("IMPORT_BUDGET_MS", DEFAULT_API_BUDGET_MS)),
+    )
+    args = parser.parse_args()
+    sys.exit(run(args.target or list(TARGETS), args.repeat, args.top, args.budget_ms))
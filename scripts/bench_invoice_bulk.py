@@ -0,0 +1,124 @@
+# scripts/bench_invoice_bulk.py
+"""
+Benchmark: invoice ingestion rows/sec, per-row ORM inserts vs COPY + set-based merge.
+
+Usage:
+    python scripts/bench_invoice_bulk.py                       # 50k rows, 2k via ORM
+    python scripts/bench_invoice_bulk.py --rows 200000 --batch 10000
+    python scripts/bench_invoice_bulk.py --orm-rows 0           # bulk path only
+
+Needs the Postgres at ``DATABASE_URL`` (``make up`` first).  A throwaway user
+is created for the run and deleted afterwards, cascading to its invoices.
+
+``orm`` is what an ERP sync had to do before: one ``POST /invoices`` per
+row, i.e. an ORM insert and commit each.  ``bulk`` runs the same rows
+through ``invoice_bulk_import.import_batch`` (validate, COPY into the
+staging table, UPDATE/INSERT merge, commit per batch).  ``resync`` sends
+the bulk rows again, which must update nothing.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+import uuid
+from datetime import date, timedelta
+
+from loguru import logger
+
+# Ensure project root (the folder containing 'app') is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from sqlalchemy import delete  # noqa: E402
+
+from app.core.db import AsyncSessionLocal  # noqa: E402
+from app.domain.services import invoice_bulk_import as bulk  # noqa: E402
+from app.infrastructure.db.models import Invoice, User  # noqa: E402
+
+STATES = ["29", "27", "07", "36", "33"]
+RATES = [5, 12, 18, 28]
+
+
+def make_records(n: int, seed: int, prefix: str) -> list[dict]:
+    rng = random.Random(seed)
+    start = date(2025, 1, 1)
+    records = []
+    for i in range(n):
+        taxable = rng.randint(100, 5_000_000) / 100
+        rate = rng.choice(RATES)
+        tax = round(taxable * rate / 100, 2)
+        records.append({
+            "invoice_number": f"{prefix}-{i}",
+            "invoice_date": (start + timedelta(days=rng.randint(0, 30))).isoformat(),
+            "supplier_gstin": f"{rng.choice(STATES)}AABCU{rng.randint(1000, 9999)}R1ZM",
+            "direction": rng.choice(("inward", "outward")),
+            "taxable_value": f"{taxable:.2f}",
+            "igst_amount": f"{tax:.2f}",
+            "tax_rate": rate,
+            "itc_eligible": True,
+        })
+    return records
+
+
+def _report(mode: str, rows: int, elapsed: float, extra: str = "") -> None:
+    logger.info("{:<6}: {:8,} rows  {:7.2f} s  {:10,.0f} rows/sec  {}", mode, rows, elapsed, rows / elapsed, extra)
+
+
+async def run_orm(user_id: uuid.UUID, records: list[dict]) -> None:
+    t0 = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        for n, record in enumerate(records, start=1):
+            row = bulk.validate_row(n, record)
+            db.add(Invoice(
+                user_id=user_id, invoice_number=row.invoice_number, invoice_date=row.invoice_date,
+                supplier_gstin=row.supplier_gstin, taxable_value=row.taxable_value,
+                tax_amount=row.tax_amount, igst_amount=row.igst_amount, tax_rate=row.tax_rate,
+                direction=row.direction, itc_eligible=row.itc_eligible,
+            ))
+            await db.commit()
+    _report("orm", len(records), time.perf_counter() - t0)
+
+
+async def run_bulk(mode: str, user_id: uuid.UUID, records: list[dict], batch: int) -> None:
+    totals: dict[str, int] = {}
+    t0 = time.perf_counter()
+    async with AsyncSessionLocal() as db:
+        numbered = list(enumerate(records, start=1))
+        for part in bulk.iter_batches(iter(numbered), batch):
+            counts, _ = await bulk.import_batch(db, user_id, part)
+            for k, v in counts.items():
+                totals[k] = totals.get(k, 0) + v
+    _report(mode, len(records), time.perf_counter() - t0, str(totals))
+
+
+async def main(rows: int, orm_rows: int, batch: int, seed: int) -> None:
+    async with AsyncSessionLocal() as db:
+        user = User(whatsapp_number=f"bench{uuid.uuid4().hex[:12]}", name="bench_invoice_bulk")
+        db.add(user)
+        await db.commit()
+        user_id = user.id
+    try:
+        if orm_rows:
+            await run_orm(user_id, make_records(orm_rows, seed, "ORM"))
+        records = make_records(rows, seed, "BULK")
+        await run_bulk("bulk", user_id, records, batch)
+        await run_bulk("resync", user_id, records, batch)
+    finally:
+        async with AsyncSessionLocal() as db:
+            await db.execute(delete(User).where(User.id == user_id))
+            await db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=50_000)
+    parser.add_argument("--orm-rows", type=int, default=2_000, help="rows for the per-row ORM baseline")
+    parser.add_argument("--batch", type=int, default=5_000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.orm_rows, args.batch, args.seed))
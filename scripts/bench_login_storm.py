@@ -0,0 +1,87 @@
+# scripts/bench_login_storm.py
+"""
+Benchmark: event-loop stall during a CA login storm, inline vs pooled bcrypt.
+
+Usage:
+    python scripts/bench_login_storm.py                    # 20 logins, cost 12
+    python scripts/bench_login_storm.py --logins 50 --workers 4
+    python scripts/bench_login_storm.py --rounds 10
+
+``--logins`` password checks start at once, as in a morning rush.  While
+they run, a probe coroutine stands in for WhatsApp webhooks: it wakes every
+5 ms and records how late it was.  ``inline`` is the previous behaviour
+(``verify_password`` called directly in the route); ``pooled`` uses
+``verify_password_async`` on a ``PASSWORD_HASH_WORKERS`` thread pool.
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import sys
+import time
+
+import bcrypt
+from loguru import logger
+
+# Ensure project root (the folder containing 'app') is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from app.core.config import settings  # noqa: E402
+from app.domain.services import ca_auth  # noqa: E402
+
+PROBE_INTERVAL = 0.005
+
+
+async def _probe(stop: asyncio.Event, lags: list[float]) -> None:
+    while not stop.is_set():
+        t0 = time.perf_counter()
+        await asyncio.sleep(PROBE_INTERVAL)
+        lags.append(time.perf_counter() - t0 - PROBE_INTERVAL)
+
+
+async def _inline_login(password: str, hashed: str) -> bool:
+    return ca_auth.verify_password(password, hashed)
+
+
+async def storm(mode: str, logins: int, hashed: str) -> None:
+    login = _inline_login if mode == "inline" else ca_auth.verify_password_async
+    stop, lags = asyncio.Event(), []
+    probe = asyncio.create_task(_probe(stop, lags))
+    await asyncio.sleep(PROBE_INTERVAL * 2)
+
+    t0 = time.perf_counter()
+    results = await asyncio.gather(*(login("correct horse", hashed) for _ in range(logins)))
+    elapsed = time.perf_counter() - t0
+    stop.set()
+    await probe
+
+    assert all(results)
+    lags_ms = sorted(lag * 1000 for lag in lags)
+    p99 = lags_ms[min(len(lags_ms) - 1, int(len(lags_ms) * 0.99))]
+    logger.info(
+        "{:<7}: {:6.1f} logins/sec  {:6.2f} s  webhook probe ticks {:4d}  "
+        "lag p50 {:7.1f} ms  p99 {:7.1f} ms  max {:7.1f} ms",
+        mode, logins / elapsed, elapsed, len(lags_ms),
+        statistics.median(lags_ms), p99, lags_ms[-1],
+    )
+
+
+def main(logins: int, rounds: int, workers: int) -> None:
+    settings.PASSWORD_HASH_WORKERS = workers
+    hashed = bcrypt.hashpw(b"correct horse", bcrypt.gensalt(rounds)).decode()
+    logger.info("CPU cores: {}  bcrypt cost: {}  pool workers: {}", os.cpu_count(), rounds, workers)
+    for mode in ("inline", "pooled"):
+        asyncio.run(storm(mode, logins, hashed))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--logins", type=int, default=20)
+    parser.add_argument("--rounds", type=int, default=12, help="bcrypt cost factor (gensalt default is 12)")
+    parser.add_argument("--workers", type=int, default=settings.PASSWORD_HASH_WORKERS)
+    args = parser.parse_args()
+    main(args.logins, args.rounds, args.workers)
@@ -0,0 +1,188 @@
+# scripts/bench_pdf_render.py
+"""
+Benchmark: invoice report PDFs/sec and peak RSS, in-memory vs spooled.
+
+Usage:
+    python scripts/bench_pdf_render.py                      # 10, 1k, 50k invoices
+    python scripts/bench_pdf_render.py --sizes 10 1000 --repeat 5
+    python scripts/bench_pdf_render.py --workers 4 --single 200
+
+Each report is rendered in a fresh interpreter so peak RSS is per case.
+``in-memory`` is the previous CA dashboard export (all invoice objects
+loaded, canvas built in a BytesIO); ``spooled`` is ``pdf_renderer``'s path
+(rows spooled to JSON lines, rendered to a temp file).  The single-invoice
+section compares inline rendering with the worker pool (cache disabled).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import subprocess
+import sys
+import time
+from datetime import date, timedelta
+from decimal import Decimal
+from types import SimpleNamespace
+
+from loguru import logger
+
+# Ensure project root (the folder containing 'app') is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+HEADER = {"name": "Bench Traders", "gstin": "36AABCU9603R1ZM", "pan": "AABCU9603R",
+          "whatsapp_number": "919876543210", "generated": date.today().isoformat()}
+
+
+def _invoices(n: int):
+    start = date(2024, 4, 1)
+    for i in range(n):
+        taxable = Decimal(1000 + i % 9000) + Decimal("0.50")
+        tax = (taxable * Decimal("0.18")).quantize(Decimal("0.01"))
+        yield SimpleNamespace(
+            invoice_number=f"INV/{i:07d}",
+            invoice_date=start + timedelta(days=i % 365),
+            taxable_value=taxable,
+            tax_amount=tax,
+            total_amount=taxable + tax,
+        )
+
+
+def _in_memory(n: int) -> int:
+    """Previous ca_dashboard.client_invoices_pdf body."""
+    from io import BytesIO
+
+    from reportlab.lib.pagesizes import A4
+    from reportlab.pdfgen import canvas
+
+    invoices = list(_invoices(n))
+    buffer = BytesIO()
+    p = canvas.Canvas(buffer, pagesize=A4)
+    width, height = A4
+    y = height - 50
+
+    def line(text, step=16):
+        nonlocal y
+        if y < 60:
+            p.showPage()
+            y = height - 50
+            p.setFont("Helvetica", 10)
+        p.drawString(50, y, text)
+        y -= step
+
+    def fmt(v):
+        return f"{float(v):,.2f}" if v is not None else "-"
+
+    p.setFont("Helvetica-Bold", 16)
+    line(f"Invoice Report: {HEADER['name']}", step=24)
+    p.setFont("Helvetica", 9)
+    for i, inv in enumerate(invoices, 1):
+        line(f"{i:<5} {inv.invoice_number:<18} {inv.invoice_date.isoformat():<12} "
+             f"{fmt(inv.taxable_value):>12} {fmt(inv.tax_amount):>12} {fmt(inv.total_amount):>12}")
+    total = sum(float(inv.total_amount or 0) for inv in invoices)
+    line(f"{'TOTAL':<35} {fmt(total):>12}")
+    p.showPage()
+    p.save()
+    return len(buffer.getvalue())
+
+
+def _spooled(n: int) -> int:
+    from app.domain.services import pdf_renderer
+
+    async def rows():
+        for inv in _invoices(n):
+            yield (inv.invoice_number, inv.invoice_date, inv.taxable_value,
+                   inv.tax_amount, inv.total_amount)
+
+    path = asyncio.run(pdf_renderer.render_invoice_report({**HEADER, "n": n}, rows()))
+    size = path.stat().st_size
+    path.unlink()
+    return size
+
+
+def child(mode: str, n: int) -> None:
+    import resource
+
+    # Import outside the timed region: both paths pay reportlab, spooled also app config
+    import reportlab.pdfgen.canvas  # noqa: F401
+    if mode == "spooled":
+        import app.domain.services.invoice_pdf  # noqa: F401
+        import app.domain.services.pdf_renderer  # noqa: F401
+
+    fn = _in_memory if mode == "in-memory" else _spooled
+    base_mb = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+    t0 = time.perf_counter()
+    size = fn(n)
+    elapsed = time.perf_counter() - t0
+    print(json.dumps({
+        "seconds": elapsed,
+        "bytes": size,
+        "base_mb": base_mb,
+        "maxrss_mb": resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024,
+    }))
+
+
+def run_case(mode: str, n: int) -> dict:
+    env = {**os.environ, "PDF_RENDER_WORKERS": "0", "PDF_CACHE_TTL_SECONDS": "0"}
+    proc = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), "--child", mode, str(n)],
+        cwd=PROJECT_ROOT, env=env, capture_output=True, text=True, check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+async def single_invoices(count: int, workers: int) -> None:
+    from app.core.config import settings
+    from app.domain.services import pdf_renderer
+    from app.domain.services.invoice_pdf import generate_invoice_pdf
+
+    docs = [{"invoice_number": f"INV-{i}", "invoice_date": "2025-01-05", "taxable_value": 1000 + i,
+             "tax_amount": 180, "total_amount": 1180 + i} for i in range(count)]
+
+    t0 = time.perf_counter()
+    for d in docs:
+        generate_invoice_pdf(d)
+    inline = time.perf_counter() - t0
+
+    settings.PDF_RENDER_WORKERS = workers
+    settings.PDF_CACHE_TTL_SECONDS = 0
+    await pdf_renderer.render_invoice_pdf(docs[0])          # start the workers
+    t0 = time.perf_counter()
+    await asyncio.gather(*(pdf_renderer.render_invoice_pdf(d) for d in docs))
+    pooled = time.perf_counter() - t0
+    pdf_renderer.shutdown_render_pool()
+
+    logger.info("single invoice, inline       : {:8.1f} PDFs/sec (event loop blocked)", count / inline)
+    logger.info("single invoice, {} worker(s)  : {:8.1f} PDFs/sec (event loop free)", workers, count / pooled)
+
+
+def main(sizes: list[int], repeat: int, workers: int, single: int) -> None:
+    logger.info("CPU cores: {}", os.cpu_count())
+    for n in sizes:
+        for mode in ("in-memory", "spooled"):
+            runs = [run_case(mode, n) for _ in range(repeat)]
+            best = min(r["seconds"] for r in runs)
+            peak = max(r["maxrss_mb"] for r in runs)
+            logger.info(
+                "{:>6} invoices {:<10}: {:8.2f} PDFs/sec  {:7.3f} s  peak RSS {:6.1f} MB "
+                "(+{:5.1f} MB over imports)  {:,} bytes",
+                n, mode, 1 / best, best, peak, peak - runs[-1]["base_mb"], runs[-1]["bytes"],
+            )
+    if single:
+        asyncio.run(single_invoices(single, workers))
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 4 and sys.argv[1] == "--child":
+        child(sys.argv[2], int(sys.argv[3]))
+        sys.exit(0)
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--sizes", type=int, nargs="+", default=[10, 1000, 50000])
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1)
+    parser.add_argument("--single", type=int, default=200, help="single-invoice PDFs for the pool test; 0 to skip")
+    args = parser.parse_args()
+    main(args.sizes, args.repeat, args.workers, args.single)
@@ -0,0 +1,158 @@
+# scripts/bench_search.py
+"""
+Benchmark: CA client typeahead latency on pg_trgm indexes.
+
+Usage:
+    python scripts/bench_search.py                          # 1M clients, one CA
+    python scripts/bench_search.py --rows 200000 --queries 500
+    python scripts/bench_search.py --keep                    # leave the data for EXPLAIN
+
+Needs the Postgres at ``DATABASE_URL`` with migrations applied (``make
+db-upgrade``).  Seeds ``--rows`` business clients under a throwaway CA with
+COPY — all under one CA, the worst case, so the trigram indexes rather
+than ``ca_id`` do the narrowing — then times
+``BusinessClientRepository.typeahead`` for name fragments, GSTIN / PAN /
+WhatsApp fragments and misspelt names.  The CA and its clients are deleted
+afterwards unless ``--keep`` is given.
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import statistics
+import string
+import sys
+import time
+import uuid
+
+from loguru import logger
+
+# Ensure project root (the folder containing 'app') is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from sqlalchemy import delete, text  # noqa: E402
+
+from app.core.db import AsyncSessionLocal  # noqa: E402
+from app.infrastructure.db.models import BusinessClient, CAUser  # noqa: E402
+from app.infrastructure.db.repositories.ca_repository import BusinessClientRepository  # noqa: E402
+
+FIRST = ["Sharma", "Patel", "Reddy", "Iyer", "Gupta", "Khan", "Singh", "Nair", "Mehta", "Rao",
+         "Joshi", "Das", "Kulkarni", "Agarwal", "Bose", "Menon", "Chopra", "Verma", "Pillai", "Shah"]
+SECOND = ["Traders", "Enterprises", "Textiles", "Foods", "Steels", "Pharma", "Motors", "Agencies",
+          "Exports", "Builders", "Electricals", "Jewellers", "Logistics", "Chemicals", "Plastics"]
+STATES = ["29", "27", "07", "36", "33", "24", "09", "19"]
+
+
+def _pan(rng: random.Random) -> str:
+    letters = string.ascii_uppercase
+    return (
+        "".join(rng.choice(letters) for _ in range(3)) + "P" + rng.choice(letters)
+        + f"{rng.randint(0, 9999):04d}" + rng.choice(letters)
+    )
+
+
+def make_clients(ca_id: int, n: int, seed: int) -> list[tuple]:
+    rng = random.Random(seed)
+    run = uuid.uuid4().hex[:6]
+    rows = []
+    for i in range(n):
+        pan = _pan(rng)
+        name = f"{rng.choice(FIRST)} {rng.choice(SECOND)} {rng.randint(1, 999)}"
+        gstin = f"{rng.choice(STATES)}{pan}{rng.randint(1, 9)}Z{rng.choice(string.ascii_uppercase)}"
+        wa = f"9{run}{i:09d}"[:20]
+        rows.append((ca_id, name, gstin, pan, wa, "active", "regular", "small", 1, False, False))
+    return rows
+
+
+def make_queries(rows: list[tuple], n: int, seed: int) -> list[str]:
+    rng = random.Random(seed + 1)
+    queries = []
+    for _ in range(n):
+        _, name, gstin, pan, wa, *_ = rng.choice(rows)
+        kind = rng.randrange(5)
+        if kind == 0:
+            queries.append(name.split()[0][: rng.randint(3, 6)])
+        elif kind == 1:
+            start = rng.randint(0, 8)
+            queries.append(gstin[start:start + rng.randint(4, 7)])
+        elif kind == 2:
+            queries.append(pan[: rng.randint(5, 10)])
+        elif kind == 3:
+            queries.append(wa[-rng.randint(5, 8):])
+        else:                                   # drop one letter: "Sharma Tradrs"
+            word = " ".join(name.split()[:2])
+            cut = rng.randrange(1, len(word) - 1)
+            queries.append(word[:cut] + word[cut + 1:])
+    return queries
+
+
+async def main(rows: int, queries: int, limit: int, seed: int, keep: bool) -> None:
+    async with AsyncSessionLocal() as db:
+        ca = CAUser(email=f"bench-{uuid.uuid4().hex[:8]}@example.invalid", password_hash="-",
+                    name="bench_search", approved=True)
+        db.add(ca)
+        await db.commit()
+        ca_id = ca.id
+
+    try:
+        clients = make_clients(ca_id, rows, seed)
+        t0 = time.perf_counter()
+        async with AsyncSessionLocal() as db:
+            conn = await db.connection()
+            raw = await conn.get_raw_connection()
+            await raw.driver_connection.copy_records_to_table(
+                "business_clients",
+                records=clients,
+                columns=["ca_id", "name", "gstin", "pan", "whatsapp_number", "status",
+                         "taxpayer_type", "segment", "gstin_count", "is_exporter", "segment_override"],
+            )
+            await db.commit()
+            await db.execute(text("ANALYZE business_clients"))
+            await db.commit()
+        logger.info("Seeded {:,} clients in {:.1f} s", rows, time.perf_counter() - t0)
+
+        sample = make_queries(clients, queries, seed)
+        async with AsyncSessionLocal() as db:
+            repo = BusinessClientRepository(db)
+            conn = await db.connection()
+            stmt = repo.search_stmt(ca_id, sample[0], BusinessClient.id).limit(limit)
+            sql = stmt.compile(dialect=conn.dialect, compile_kwargs={"literal_binds": True})
+            plan = await conn.exec_driver_sql(f"EXPLAIN {sql}")
+            logger.info("Plan for {!r}:\n{}", sample[0], "\n".join(r[0] for r in plan))
+
+            for q in sample[:20]:                  # warm the buffer cache
+                await repo.typeahead(ca_id, q, limit)
+            timings, hits = [], 0
+            for q in sample:
+                t0 = time.perf_counter()
+                found = await repo.typeahead(ca_id, q, limit)
+                timings.append((time.perf_counter() - t0) * 1000)
+                hits += bool(found)
+
+        timings.sort()
+        logger.info(
+            "typeahead: {} queries  hit rate {:.0%}  p50 {:.2f} ms  p95 {:.2f} ms  p99 {:.2f} ms  max {:.2f} ms",
+            len(timings), hits / len(timings), statistics.median(timings),
+            timings[int(len(timings) * 0.95)], timings[min(len(timings) - 1, int(len(timings) * 0.99))],
+            timings[-1],
+        )
+    finally:
+        if not keep:
+            async with AsyncSessionLocal() as db:
+                await db.execute(delete(CAUser).where(CAUser.id == ca_id))
+                await db.commit()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--rows", type=int, default=1_000_000)
+    parser.add_argument("--queries", type=int, default=1000)
+    parser.add_argument("--limit", type=int, default=10)
+    parser.add_argument("--seed", type=int, default=7)
+    parser.add_argument("--keep", action="store_true", help="keep the seeded CA and clients")
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.queries, args.limit, args.seed, args.keep))
@@ -0,0 +1,218 @@
+# scripts/bench_voice.py
+"""
+Benchmark: voice-note latency, serial STT + translation vs the segmented pipeline.
+
+Usage:
+    python scripts/bench_voice.py                          # 10 / 30 / 60 s notes, 5 runs each
+    python scripts/bench_voice.py --notes 20,90 --runs 3 --opus
+
+Local stub servers stand in for the WhatsApp media API, Sarvam STT and
+Bhashini (aiohttp, on 127.0.0.1).  The STT stub answers after
+``--stt-base`` + ``--stt-rtf`` x audio seconds, and the translation stubs
+after ``--config-latency`` (pipeline config) and ``--translate-latency``
+(inference) — rough shapes of the real services, not their numbers.
+
+Each synthetic note is speech-like bursts between short pauses, with
+silence at both ends.  ``serial`` is the previous ``process_voice_message``:
+new HTTP clients per call, the whole note in one STT call, then a Bhashini
+config + inference round trip.  ``pipeline`` is the current one end to end:
+decode / trim / segment, concurrent STT per segment, per-segment
+translation, shared client.  ``cached`` is the same note again (the
+transcript cache, here an in-process stand-in for Redis).  ``--opus``
+encodes the notes as OGG/Opus with ffmpeg, as WhatsApp sends them;
+otherwise they are 16 kHz WAV and no ffmpeg is needed.
+"""
+
+import argparse
+import asyncio
+import io
+import os
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import time
+import wave
+
+import numpy as np
+from aiohttp import web
+from loguru import logger
+
+# Ensure project root (the folder containing 'app') is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from app.core.config import settings  # noqa: E402
+from app.domain.services import voice_audio, voice_handler  # noqa: E402
+from app.infrastructure.external import translation_bhashini, whatsapp_media  # noqa: E402
+from app.infrastructure.external.stt_sarvam import transcribe_audio_sarvam  # noqa: E402
+
+RATE = voice_audio.SAMPLE_RATE
+OPUS_BYTES_PER_SECOND = 2000        # ~16 kbit/s, what WhatsApp voice notes use
+
+
+def make_note(seconds: float, rng: random.Random) -> bytes:
+    """16 kHz mono WAV: tone bursts of 1-4 s between 0.3-0.8 s pauses."""
+    parts, total = [np.zeros(int(0.8 * RATE))], 0.0
+    while total < seconds:
+        burst = min(rng.uniform(1.0, 4.0), seconds - total + 0.1)
+        t = np.arange(int(burst * RATE)) / RATE
+        parts.append(0.3 * np.sin(2 * np.pi * rng.uniform(120, 300) * t))
+        pause = rng.uniform(0.3, 0.8)
+        parts.append(np.zeros(int(pause * RATE)))
+        total += burst + pause
+    parts.append(np.zeros(int(0.8 * RATE)))
+    return voice_audio.to_wav((np.concatenate(parts) * 32767).astype("<i2").tobytes())
+
+
+def to_opus(wav: bytes) -> bytes:
+    return subprocess.run(
+        [settings.VOICE_FFMPEG_PATH, "-hide_banner", "-loglevel", "error", "-i", "pipe:0",
+         "-c:a", "libopus", "-b:a", "16k", "-f", "ogg", "pipe:1"],
+        input=wav, capture_output=True, check=True,
+    ).stdout
+
+
+def _audio_seconds(data: bytes) -> float:
+    try:
+        with wave.open(io.BytesIO(data)) as w:
+            return w.getnframes() / w.getframerate()
+    except (wave.Error, EOFError):
+        return len(data) / OPUS_BYTES_PER_SECOND
+
+
+async def start_stubs(args, media: dict[str, bytes]) -> tuple[web.AppRunner, str]:
+    base = ""
+
+    async def media_url(request):
+        return web.json_response({"url": f"{base}/download/{request.match_info['media_id']}"})
+
+    async def download(request):
+        return web.Response(body=media[request.match_info["media_id"]])
+
+    async def stt(request):
+        form = await request.post()
+        seconds = _audio_seconds(form["file"].file.read())
+        await asyncio.sleep(args.stt_base + args.stt_rtf * seconds)
+        return web.json_response({"transcript": " ".join(["shabd"] * max(1, int(seconds * 2)))})
+
+    async def pipeline_config(request):
+        await asyncio.sleep(args.config_latency)
+        return web.json_response({
+            "pipelineResponseConfig": [{"config": [{"serviceId": "stub"}]}],
+            "pipelineInferenceAPIEndPoint": {"callbackUrl": f"{base}/infer", "inferenceApiKey": {"value": "k"}},
+        })
+
+    async def infer(request):
+        body = await request.json()
+        await asyncio.sleep(args.translate_latency)
+        source = body["inputData"]["input"][0]["source"]
+        return web.json_response({"pipelineResponse": [{"output": [{"target": source.replace("shabd", "word")}]}]})
+
+    app = web.Application(client_max_size=64 * 1024 * 1024)
+    app.router.add_get("/v20.0/{media_id}", media_url)
+    app.router.add_get("/download/{media_id}", download)
+    app.router.add_post("/stt", stt)
+    app.router.add_post("/bhashini/v0/model/getModelsPipeline", pipeline_config)
+    app.router.add_post("/infer", infer)
+    runner = web.AppRunner(app, access_log=None)
+    await runner.setup()
+    site = web.TCPSite(runner, "127.0.0.1", 0)
+    await site.start()
+    base = f"http://127.0.0.1:{site._server.sockets[0].getsockname()[1]}"
+    return runner, base
+
+
+async def serial(media_id: str, lang: str) -> str:
+    """The previous pipeline: fresh clients, one STT call, then translate."""
+    translation_bhashini.clear_pipeline_cache()      # it fetched the config on every call
+    url = await whatsapp_media.get_media_url(media_id)
+    audio = await whatsapp_media.download_media(url)
+    text = await transcribe_audio_sarvam(audio, language=lang)
+    return await translation_bhashini.translate_with_bhashini(text, source_lang=lang, target_lang="en")
+
+
+class _MemoryRedis:
+    def __init__(self):
+        self.data: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+async def main(args) -> int:
+    rng = random.Random(args.seed)
+    lengths = [float(n) for n in args.notes.split(",")]
+    opus = args.opus and shutil.which(settings.VOICE_FFMPEG_PATH)
+    if args.opus and not opus:
+        logger.warning("ffmpeg not found; using WAV notes")
+
+    media = {}
+    for n in lengths:
+        wav = make_note(n, rng)
+        media[f"note{int(n)}"] = to_opus(wav) if opus else wav
+
+    runner, base = await start_stubs(args, media)
+    memory = _MemoryRedis()
+    whatsapp_media.GRAPH_BASE = base
+    for name, value in {
+        "WHATSAPP_ACCESS_TOKEN": "bench", "SARVAM_API_KEY": "bench", "SARVAM_STT_URL": f"{base}/stt",
+        "BHASHINI_USER_ID": "bench", "BHASHINI_ULCA_API_KEY": "bench",
+        "BHASHINI_TRANSLATION_PIPELINE_ID": "bench", "BHASHINI_PIPELINE_BASE_URL": f"{base}/bhashini",
+    }.items():
+        setattr(settings, name, value)
+
+    import app.infrastructure.cache.redis_client as redis_client
+    redis_client.get_redis_client = lambda: memory
+
+    logger.info("{} notes, STT {:.2f} s + {:.2f} x audio, translate {:.2f} s (+{:.2f} s config), concurrency {}",
+                "OGG/Opus" if opus else "WAV", args.stt_base, args.stt_rtf, args.translate_latency,
+                args.config_latency, settings.VOICE_STT_CONCURRENCY)
+    try:
+        for n in lengths:
+            media_id = f"note{int(n)}"
+            segments = await voice_audio.prepare_segments(media[media_id])
+            timings = {"serial": [], "pipeline": [], "cached": []}
+            for _ in range(args.runs):
+                t0 = time.perf_counter()
+                await serial(media_id, "hi")
+                timings["serial"].append(time.perf_counter() - t0)
+
+                memory.data.clear()
+                t0 = time.perf_counter()
+                result = await voice_handler.process_voice_message(media_id, "hi")
+                timings["pipeline"].append(time.perf_counter() - t0)
+                assert result.error is None, result.error
+
+                t0 = time.perf_counter()
+                await voice_handler.process_voice_message(media_id, "hi")
+                timings["cached"].append(time.perf_counter() - t0)
+
+            p50 = {k: statistics.median(v) for k, v in timings.items()}
+            logger.info(
+                "{:>4.0f} s note ({} segments): serial {:6.2f} s   pipeline {:6.2f} s ({:.1f}x)   cached {:6.3f} s",
+                n, len(segments), p50["serial"], p50["pipeline"], p50["serial"] / p50["pipeline"], p50["cached"],
+            )
+    finally:
+        await voice_handler.close_http_client()
+        await runner.cleanup()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--notes", default="10,30,60", help="comma-separated note lengths in seconds")
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--opus", action="store_true", help="encode notes as OGG/Opus (needs ffmpeg)")
+    parser.add_argument("--stt-base", type=float, default=0.4)
+    parser.add_argument("--stt-rtf", type=float, default=0.15)
+    parser.add_argument("--translate-latency", type=float, default=0.12)
+    parser.add_argument("--config-latency", type=float, default=0.2)
+    parser.add_argument("--seed", type=int, default=7)
+    sys.exit(asyncio.run(main(parser.parse_args())))
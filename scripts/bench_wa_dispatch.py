@@ -0,0 +1,95 @@
+# scripts/bench_wa_dispatch.py
+"""
+Micro-benchmark: per-message WhatsApp state dispatch overhead.
+
+Usage:
+    python scripts/bench_wa_dispatch.py                 # 20k messages
+    python scripts/bench_wa_dispatch.py --messages 100000
+
+Compares the old linear walk (await every wa_handlers module's ``handle()``
+until the owner is reached) with the ``STATE_ROUTER`` dict lookup.  Only
+the selection overhead is measured: the owner's own work is identical in
+both paths, so it is not run.  States are drawn uniformly from every routed
+state plus a few states handled inline in ``whatsapp.py`` (which the old
+walk had to pass through all 19 modules to reach).
+"""
+
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+from loguru import logger
+
+# Ensure project root (the folder containing 'app') is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from app.api.routes.wa_handlers import HANDLER_CHAIN, STATE_ROUTER  # noqa: E402
+
+INLINE_STATES = ["MAIN_MENU", "WAIT_INVOICE_UPLOAD", "TAX_QA", "INSIGHTS_MENU", "CHOOSE_LANG"]
+
+
+async def _noop(*args, **kwargs):
+    return None
+
+
+KWARGS = dict(
+    session_cache=None,
+    send=_noop,
+    send_buttons=_noop,
+    send_menu_result=_noop,
+    t=lambda s, key, **kw: key,
+    push_state=lambda s, st: None,
+    pop_state=lambda s: "MAIN_MENU",
+    state_to_screen_key=lambda st: st,
+    get_lang=lambda s: "en",
+)
+
+
+async def linear_walk(states: list[str]) -> float:
+    session = {"state": "", "data": {}}
+    start = time.perf_counter()
+    for state in states:
+        owner = STATE_ROUTER.get(state)
+        for mod in HANDLER_CHAIN:
+            if mod is owner:
+                break
+            await mod.handle(state, "1", "919999999999", session, **KWARGS)
+    return time.perf_counter() - start
+
+
+async def router_lookup(states: list[str]) -> float:
+    router = STATE_ROUTER
+    start = time.perf_counter()
+    for state in states:
+        router.get(state)
+    return time.perf_counter() - start
+
+
+async def main(messages: int, seed: int) -> None:
+    rng = random.Random(seed)
+    pool = sorted(STATE_ROUTER) + INLINE_STATES
+    states = [rng.choice(pool) for _ in range(messages)]
+    logger.info(
+        "{} messages over {} routed + {} inline states, {} handler modules",
+        messages, len(STATE_ROUTER), len(INLINE_STATES), len(HANDLER_CHAIN),
+    )
+
+    walk = await linear_walk(states)
+    lookup = await router_lookup(states)
+    logger.info("linear walk   : {:8.2f} µs/message", walk / messages * 1e6)
+    logger.info("STATE_ROUTER  : {:8.3f} µs/message", lookup / messages * 1e6)
+    logger.success("✅ dispatch overhead {:.0f}x lower", walk / lookup if lookup else float("inf"))
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--messages", type=int, default=20000)
+    parser.add_argument("--seed", type=int, default=7)
+    args = parser.parse_args()
+    asyncio.run(main(args.messages, args.seed))
@@ -0,0 +1,43 @@
+# scripts/rebuild_gst_rollup.py
+"""
+Rebuild the monthly_gst_rollup table from invoices.
+
+Usage:
+    python scripts/rebuild_gst_rollup.py                 # every user
+    python scripts/rebuild_gst_rollup.py --user-id UUID  # one user
+"""
+
+import argparse
+import asyncio
+import os
+import sys
+import uuid
+
+from loguru import logger
+
+# Ensure project root (the folder containing 'app') is on sys.path
+CURRENT_DIR = os.path.dirname(os.path.abspath(__file__))
+PROJECT_ROOT = os.path.dirname(CURRENT_DIR)
+if PROJECT_ROOT not in sys.path:
+    sys.path.append(PROJECT_ROOT)
+
+from app.core.db import AsyncSessionLocal, close_db  # noqa: E402
+from app.infrastructure.db.repositories.monthly_rollup_repository import (  # noqa: E402
+    MonthlyRollupRepository,
+)
+
+
+async def rebuild(user_id: uuid.UUID | None) -> None:
+    scope = f"user {user_id}" if user_id else "all users"
+    logger.info("Rebuilding monthly_gst_rollup for {}...", scope)
+    async with AsyncSessionLocal() as db:
+        rows = await MonthlyRollupRepository(db).rebuild(user_id)
+    await close_db()
+    logger.success("✅ monthly_gst_rollup rebuilt: {} rows ({})", rows, scope)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[1])
+    parser.add_argument("--user-id", type=uuid.UUID, default=None)
+    args = parser.parse_args()
+    asyncio.run(rebuild(args.user_id))
@@ -54,3 +54,58 @@ def sample_itr1_input() -> dict:
         "section_80tta": Decimal("10000"),
         "tds_total": Decimal("80000"),
     }
+
+
+class SyncSessionAdapter:
+    """The awaitable subset of ``AsyncSession`` that routes use, over a sync session."""
+
+    def __init__(self, session) -> None:
+        self.session = session
+
+    async def execute(self, stmt, *args, **kwargs):
+        return self.session.execute(stmt, *args, **kwargs)
+
+    async def scalar(self, stmt, *args, **kwargs):
+        return self.session.scalar(stmt, *args, **kwargs)
+
+    async def get(self, *args, **kwargs):
+        return self.session.get(*args, **kwargs)
+
+    def add(self, obj) -> None:
+        self.session.add(obj)
+
+    async def flush(self) -> None:
+        self.session.flush()
+
+    async def commit(self) -> None:
+        self.session.commit()
+
+    async def rollback(self) -> None:
+        self.session.rollback()
+
+
+@pytest.fixture
+def ownership_db():
+    """In-memory SQLite with the tables that decide which CA owns which return period.
+
+    Yields a sync ``Session`` for arranging rows; wrap it in
+    ``SyncSessionAdapter`` to hand it to a route.
+    """
+    from sqlalchemy import create_engine
+    from sqlalchemy.orm import Session
+
+    from app.infrastructure.db.models import (
+        Base,
+        BusinessClient,
+        CAUser,
+        ITCMatch,
+        ReturnPeriod,
+        User,
+    )
+
+    engine = create_engine("sqlite://")
+    tables = [m.__table__ for m in (User, CAUser, BusinessClient, ReturnPeriod, ITCMatch)]
+    Base.metadata.create_all(engine, tables=tables)
+    with Session(engine, expire_on_commit=False) as session:
+        yield session
+    engine.dispose()
@@ -1,14 +1,28 @@
 # tests/test_audit_service.py
 """Tests for the audit trail service."""
 
+import asyncio
+from datetime import date, datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
 import pytest
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.schema import CreateTable
 
+from app.domain.services import audit_service as audit
 from app.domain.services.audit_service import (
-    clear_buffer,
     get_access_summary,
     get_recent_audit_entries,
     log_access,
 )
+from app.infrastructure.db.models import AuditLog
+from app.infrastructure.db.write_behind import audit_log_sink
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect(),
+                            compile_kwargs={"literal_binds": True})).upper()
 
 
 def _make_entry(**overrides):
@@ -25,14 +39,19 @@ def _make_entry(**overrides):
     return log_access(**defaults)
 
 
+@pytest.fixture(autouse=True)
+def _empty_sink():
+    audit_log_sink._buffer.clear()
+    yield
+    audit_log_sink._buffer.clear()
+
+
 # --------------------------------------------------------------------------- #
-# Tests
+# Writing
 # --------------------------------------------------------------------------- #
 
 def test_log_access_creates_entry():
-    """log_access should return an AuditEntry and add it to the buffer."""
-    clear_buffer()
-
+    """log_access should return an AuditEntry and queue a row for audit_log."""
     entry = log_access(
         actor_type="admin",
         actor_id="admin@example.com",
@@ -46,99 +65,165 @@ def test_log_access_creates_entry():
 
     assert entry.actor_type == "admin"
     assert entry.actor_id == "admin@example.com"
-    assert entry.action == "view"
-    assert entry.resource_type == "invoice"
     assert entry.resource_id == "INV-100"
     assert entry.client_gstin == "07AAACR5055K1Z4"
-    assert entry.details == "Viewed invoice details"
-    assert entry.ip_address == "10.0.0.1"
     assert entry.timestamp  # non-empty ISO string
 
-    # Should also appear in the buffer
-    entries = get_recent_audit_entries(limit=10)
-    assert len(entries) == 1
-    assert entries[0]["actor_id"] == "admin@example.com"
-
-
-def test_get_recent_entries_with_limit():
-    """get_recent_audit_entries should respect the limit parameter."""
-    clear_buffer()
-
-    for i in range(10):
-        _make_entry(resource_id=f"CLI-{i:03d}")
-
-    entries = get_recent_audit_entries(limit=5)
-    assert len(entries) == 5
-    # Most recent first (CLI-009 through CLI-005)
-    assert entries[0]["resource_id"] == "CLI-009"
-    assert entries[4]["resource_id"] == "CLI-005"
-
-
-def test_filter_by_actor_type():
-    """get_recent_audit_entries should filter by actor_type."""
-    clear_buffer()
-
-    _make_entry(actor_type="ca", actor_id="ca@firm.com")
-    _make_entry(actor_type="admin", actor_id="admin@firm.com")
-    _make_entry(actor_type="system", actor_id="gst_sync")
-    _make_entry(actor_type="ca", actor_id="ca2@firm.com")
-
-    ca_entries = get_recent_audit_entries(actor_type="ca")
-    assert len(ca_entries) == 2
-    assert all(e["actor_type"] == "ca" for e in ca_entries)
-
-    admin_entries = get_recent_audit_entries(actor_type="admin")
-    assert len(admin_entries) == 1
-    assert admin_entries[0]["actor_id"] == "admin@firm.com"
+    assert audit_log_sink.durable       # audit rows are never dropped
+    assert len(audit_log_sink._buffer) == 1
+    row = audit_log_sink._buffer[0]
+    assert row["actor_id"] == "admin@example.com"
+    assert row["ip_address"] == "10.0.0.1"
+    assert isinstance(row["created_at"], datetime)
+    assert set(row) <= set(AuditLog.__table__.columns.keys())
+
+
+def test_model_is_partitioned_and_indexed():
+    ddl = str(CreateTable(AuditLog.__table__).compile(dialect=postgresql.dialect()))
+    assert "PARTITION BY RANGE (created_at)" in ddl
+    assert "PRIMARY KEY (id, created_at)" in ddl
+    index_cols = {
+        ix.name: [c.name for c in ix.columns] for ix in AuditLog.__table__.indexes
+    }
+    assert index_cols["ix_audit_log_gstin_created"] == ["client_gstin", "created_at"]
+    assert index_cols["ix_audit_log_actor_created"] == ["actor_id", "created_at"]
 
 
-def test_filter_by_gstin():
-    """get_recent_audit_entries should filter by client_gstin."""
-    clear_buffer()
+# --------------------------------------------------------------------------- #
+# Queries
+# --------------------------------------------------------------------------- #
 
-    _make_entry(client_gstin="29ABCDE1234F1Z5")
-    _make_entry(client_gstin="07AAACR5055K1Z4")
-    _make_entry(client_gstin="29ABCDE1234F1Z5")
+def test_recent_entries_stmt_filters_and_orders():
+    sql = _sql(audit.recent_entries_stmt(
+        limit=5, client_gstin="29ABCDE1234F1Z5", actor_id="ca@firm.com",
+    ))
+    assert "AUDIT_LOG.CLIENT_GSTIN = '29ABCDE1234F1Z5'" in sql
+    assert "AUDIT_LOG.ACTOR_ID = 'CA@FIRM.COM'" in sql
+    assert "ORDER BY AUDIT_LOG.CREATED_AT DESC, AUDIT_LOG.ID DESC" in sql
+    assert "LIMIT 5" in sql
+
+
+def test_recent_entries_stmt_omits_unset_filters():
+    sql = _sql(audit.recent_entries_stmt(actor_type="ca"))
+    assert "AUDIT_LOG.ACTOR_TYPE = 'CA'" in sql
+    assert "CLIENT_GSTIN =" not in sql
+    assert "ACTOR_ID =" not in sql
+
+
+def test_get_recent_entries_maps_rows():
+    ts = datetime(2026, 10, 1, 9, 30, tzinfo=timezone.utc)
+    row = AuditLog(id=1, created_at=ts, actor_type="ca", actor_id="ca@firm.com",
+                   action="view", resource_type="client", resource_id="CLI-1",
+                   client_gstin="29ABCDE1234F1Z5")
+    result = MagicMock()
+    result.scalars.return_value.all.return_value = [row]
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+
+    entries = asyncio.run(get_recent_audit_entries(db, limit=10, actor_type="ca"))
+    assert entries == [{
+        "timestamp": ts.isoformat(),
+        "actor_type": "ca",
+        "actor_id": "ca@firm.com",
+        "action": "view",
+        "resource_type": "client",
+        "resource_id": "CLI-1",
+        "client_gstin": "29ABCDE1234F1Z5",
+        "details": None,
+        "ip_address": None,
+    }]
 
-    entries = get_recent_audit_entries(client_gstin="29ABCDE1234F1Z5")
-    assert len(entries) == 2
-    assert all(e["client_gstin"] == "29ABCDE1234F1Z5" for e in entries)
 
-    entries_other = get_recent_audit_entries(client_gstin="07AAACR5055K1Z4")
-    assert len(entries_other) == 1
+def test_access_summary_stmt_groups_by_actor():
+    sql = _sql(audit.access_summary_stmt("29ABCDE1234F1Z5"))
+    assert "WHERE AUDIT_LOG.CLIENT_GSTIN = '29ABCDE1234F1Z5'" in sql
+    assert "GROUP BY AUDIT_LOG.ACTOR_TYPE, AUDIT_LOG.ACTOR_ID" in sql
+    assert "MIN(AUDIT_LOG.CREATED_AT)" in sql
+    assert "COUNT(*)" in sql
 
 
 def test_get_access_summary():
     """get_access_summary should aggregate accesses per actor for a GSTIN."""
-    clear_buffer()
-
     gstin = "29ABCDE1234F1Z5"
-    _make_entry(actor_type="ca", actor_id="ca@firm.com", client_gstin=gstin)
-    _make_entry(actor_type="ca", actor_id="ca@firm.com", client_gstin=gstin)
-    _make_entry(actor_type="admin", actor_id="admin@firm.com", client_gstin=gstin)
-    _make_entry(client_gstin="07AAACR5055K1Z4")  # different GSTIN, should be excluded
-
-    summary = get_access_summary(gstin)
+    t1 = datetime(2026, 9, 1, tzinfo=timezone.utc)
+    t2 = datetime(2026, 10, 1, tzinfo=timezone.utc)
+    result = MagicMock()
+    result.all.return_value = [
+        SimpleNamespace(actor_type="ca", actor_id="ca@firm.com",
+                        first_access=t1, last_access=t2, count=2),
+        SimpleNamespace(actor_type="admin", actor_id="admin@firm.com",
+                        first_access=t2, last_access=t2, count=1),
+    ]
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+
+    summary = asyncio.run(get_access_summary(gstin, db))
     assert summary["client_gstin"] == gstin
     assert summary["total_accesses"] == 3
     assert summary["unique_actors"] == 2
+    assert summary["actors"]["ca:ca@firm.com"] == {
+        "first_access": t1.isoformat(),
+        "last_access": t2.isoformat(),
+        "count": 2,
+    }
+    assert summary["actors"]["admin:admin@firm.com"]["count"] == 1
 
-    ca_key = "ca:ca@firm.com"
-    assert ca_key in summary["actors"]
-    assert summary["actors"][ca_key]["count"] == 2
-
-    admin_key = "admin:admin@firm.com"
-    assert admin_key in summary["actors"]
-    assert summary["actors"][admin_key]["count"] == 1
-
-
-def test_clear_buffer():
-    """clear_buffer should remove all entries from the in-memory buffer."""
-    clear_buffer()
 
-    _make_entry()
-    _make_entry()
-    assert len(get_recent_audit_entries()) == 2
+# --------------------------------------------------------------------------- #
+# Partitions
+# --------------------------------------------------------------------------- #
 
-    clear_buffer()
-    assert len(get_recent_audit_entries()) == 0
+def test_partition_ddl_covers_one_month():
+    sql = audit.create_partition_sql(date(2026, 12, 17))
+    assert sql.startswith("CREATE TABLE IF NOT EXISTS audit_log_202612 PARTITION OF audit_log")
+    assert "FROM ('2026-12-01 00:00:00+00') TO ('2027-01-01 00:00:00+00')" in sql
+
+
+def _listing(*names):
+    result = MagicMock()
+    result.all.return_value = [(n,) for n in names]
+    return result
+
+
+def test_ensure_partitions_creates_current_and_ahead():
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=_listing("audit_log_202611"))
+    db.commit = AsyncMock()
+    names = asyncio.run(audit.ensure_partitions(db, 2, today=date(2026, 11, 5)))
+    assert names == ["audit_log_202611", "audit_log_202612", "audit_log_202701"]
+    created = [str(c.args[0]) for c in db.execute.await_args_list[1:]]
+    assert [s.split()[5] for s in created] == ["audit_log_202612", "audit_log_202701"]
+
+
+def test_ensure_partitions_splits_rows_out_of_default():
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=_listing("audit_log_default", "audit_log_202611"))
+    db.commit = AsyncMock()
+    asyncio.run(audit.ensure_partitions(db, 1, today=date(2026, 11, 5)))
+
+    stmts = [str(c.args[0]) for c in db.execute.await_args_list[1:]]
+    assert stmts[0] == "ALTER TABLE audit_log DETACH PARTITION audit_log_default"
+    assert stmts[1].startswith("CREATE TABLE IF NOT EXISTS audit_log_202612 PARTITION OF audit_log")
+    assert "DELETE FROM audit_log_default WHERE created_at >= '2026-12-01 00:00:00+00'" in stmts[2]
+    assert stmts[2].endswith("INSERT INTO audit_log_202612 SELECT * FROM moved")
+    assert stmts[3] == "ALTER TABLE audit_log ATTACH PARTITION audit_log_default DEFAULT"
+    db.commit.assert_awaited_once()
+
+
+def test_drop_expired_partitions_keeps_retention_window():
+    listing = MagicMock()
+    listing.all.return_value = [
+        ("audit_log_default",), ("audit_log_202508",), ("audit_log_202509",),
+        ("audit_log_202510",), ("audit_log_202610",),
+    ]
+    db = MagicMock()
+    db.execute = AsyncMock(side_effect=[listing, None, None])
+    db.commit = AsyncMock()
+
+    dropped = asyncio.run(
+        audit.drop_expired_partitions(db, retention_months=12, today=date(2026, 10, 18))
+    )
+    assert dropped == ["audit_log_202508", "audit_log_202509"]
+    drops = [str(c.args[0]) for c in db.execute.await_args_list[1:]]
+    assert drops == ["DROP TABLE IF EXISTS audit_log_202508",
+                     "DROP TABLE IF EXISTS audit_log_202509"]
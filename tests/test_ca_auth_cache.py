@@ -0,0 +1,153 @@
+# tests/test_ca_auth_cache.py
+"""Tests for off-loop bcrypt hashing and the CA principal cache."""
+
+from __future__ import annotations
+
+import asyncio
+import threading
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import bcrypt
+import pytest
+from fastapi import HTTPException
+from jose import jwt
+
+from app.domain.services import ca_auth
+from app.infrastructure.cache import principal_cache
+from app.infrastructure.db.models import CAUser
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.strings: dict[str, str] = {}
+        self.sets: dict[str, set[str]] = {}
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def smembers(self, key):
+        return set(self.sets.get(key, set()))
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.strings.pop(key, None)
+            self.sets.pop(key, None)
+
+    def pipeline(self, transaction=True):
+        fake, ops = self, []
+
+        class _Pipe:
+            def set(self, key, value, ex=None):
+                ops.append(lambda: fake.strings.__setitem__(key, value))
+
+            def sadd(self, key, member):
+                ops.append(lambda: fake.sets.setdefault(key, set()).add(member))
+
+            def expire(self, key, ttl):
+                ops.append(lambda: None)
+
+            async def execute(self):
+                return [op() for op in ops]
+
+        return _Pipe()
+
+
+def _ca(**overrides):
+    fields = dict(
+        id=7, email="ca@example.com", password_hash="$2b$secret", name="A Sharma",
+        phone=None, membership_number="123456", active=True, approved=True,
+        approved_at=datetime(2025, 1, 2, 10, 0, tzinfo=timezone.utc),
+        created_at=datetime(2025, 1, 1, tzinfo=timezone.utc), last_login=None,
+    )
+    fields.update(overrides)
+    return CAUser(**fields)
+
+
+def _request(token):
+    return SimpleNamespace(cookies={"ca_token": token}, headers={})
+
+
+@pytest.fixture
+def redis():
+    fake = _FakeRedis()
+    with patch.object(principal_cache, "get_redis_client", return_value=fake):
+        yield fake
+
+
+@pytest.fixture
+def repo():
+    instance = MagicMock()
+    instance.get_by_id = AsyncMock(return_value=_ca())
+    with patch.object(ca_auth, "CAUserRepository", return_value=instance):
+        yield instance
+
+
+class TestPasswordHashing:
+    def test_async_helpers_run_on_the_bcrypt_pool(self):
+        threads = []
+        real_checkpw, real_gensalt = bcrypt.checkpw, bcrypt.gensalt
+
+        def checkpw(*args):
+            threads.append(threading.current_thread().name)
+            return real_checkpw(*args)
+
+        with patch.object(ca_auth._bcrypt, "gensalt", lambda: real_gensalt(4)), \
+                patch.object(ca_auth._bcrypt, "checkpw", checkpw):
+            hashed = asyncio.run(ca_auth.hash_password_async("s3cret!"))
+            ok = asyncio.run(ca_auth.verify_password_async("s3cret!", hashed))
+            bad = asyncio.run(ca_auth.verify_password_async("wrong", hashed))
+
+        assert ok and not bad
+        assert all(name.startswith("bcrypt") for name in threads)
+
+
+class TestPrincipalCache:
+    def test_snapshot_round_trip_drops_password_hash(self):
+        restored = principal_cache.restore(principal_cache.snapshot(_ca()))
+        assert restored.id == 7 and restored.email == "ca@example.com"
+        assert restored.approved_at == datetime(2025, 1, 2, 10, 0, tzinfo=timezone.utc)
+        assert restored.password_hash is None
+
+    def test_access_tokens_carry_unique_jti(self):
+        payloads = [ca_auth.decode_token(ca_auth.create_access_token(7, "ca@example.com")) for _ in range(2)]
+        assert payloads[0]["jti"] != payloads[1]["jti"]
+
+    def test_second_request_skips_the_db(self, redis, repo):
+        token = ca_auth.create_access_token(7, "ca@example.com")
+        first = asyncio.run(ca_auth.get_current_ca(_request(token), db=MagicMock()))
+        second = asyncio.run(ca_auth.get_current_ca(_request(token), db=MagicMock()))
+        assert repo.get_by_id.await_count == 1
+        assert first.id == second.id == 7
+        assert second.name == "A Sharma"
+
+    def test_invalidate_forces_db_check(self, redis, repo):
+        token = ca_auth.create_access_token(7, "ca@example.com")
+        asyncio.run(ca_auth.get_current_ca(_request(token), db=MagicMock()))
+
+        repo.get_by_id.return_value = _ca(active=False)
+        asyncio.run(principal_cache.invalidate_ca(7))
+
+        assert not redis.strings
+        with pytest.raises(HTTPException) as exc:
+            asyncio.run(ca_auth.get_current_ca(_request(token), db=MagicMock()))
+        assert exc.value.status_code == 401
+
+    def test_tokens_without_jti_always_hit_the_db(self, redis, repo):
+        legacy = jwt.encode(
+            {"sub": "7", "type": "access", "exp": 4102444800},
+            ca_auth.settings.CA_JWT_SECRET, algorithm=ca_auth.settings.CA_JWT_ALGORITHM,
+        )
+        for _ in range(2):
+            asyncio.run(ca_auth.get_current_ca(_request(legacy), db=MagicMock()))
+        assert repo.get_by_id.await_count == 2 and not redis.strings
+
+    def test_redis_outage_falls_back_to_db(self, repo):
+        broken = MagicMock()
+        broken.get = AsyncMock(side_effect=ConnectionError("down"))
+        broken.pipeline.side_effect = ConnectionError("down")
+        token = ca_auth.create_access_token(7, "ca@example.com")
+        with patch.object(principal_cache, "get_redis_client", return_value=broken):
+            ca = asyncio.run(ca_auth.get_current_ca(_request(token), db=MagicMock()))
+        assert ca.id == 7 and repo.get_by_id.await_count == 1
@@ -0,0 +1,82 @@
+# tests/test_cache_invalidation.py
+"""Tests for the shared pub/sub cache invalidation listener."""
+
+from __future__ import annotations
+
+import asyncio
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.infrastructure.cache import invalidation
+from app.infrastructure.cache.local_cache import TTLCache
+
+
+class _PubSub:
+    def __init__(self, messages, fail=False):
+        self.messages = messages
+        self.fail = fail
+        self.channels = ()
+        self.closed = False
+
+    async def subscribe(self, *channels):
+        if self.fail:
+            raise ConnectionError("redis down")
+        self.channels = channels
+
+    async def listen(self):
+        for message in self.messages:
+            yield message
+        raise asyncio.CancelledError
+
+    async def aclose(self):
+        self.closed = True
+
+
+class _Redis:
+    def __init__(self, *pubsubs):
+        self.pubsubs = list(pubsubs)
+        self.opened = []
+
+    def pubsub(self):
+        ps = self.pubsubs.pop(0)
+        self.opened.append(ps)
+        return ps
+
+
+def test_one_connection_dispatches_per_channel_and_retries():
+    calls = []
+    handlers = {
+        "a:invalidate": lambda key: calls.append(("a", key)),
+        "b:invalidate": lambda key: calls.append(("b", key)),
+    }
+    redis = _Redis(
+        _PubSub([], fail=True),
+        _PubSub([
+            {"type": "subscribe", "channel": "a:invalidate", "data": 1},
+            {"type": "message", "channel": "b:invalidate", "data": "b:1"},
+            {"type": "message", "channel": "other", "data": "x"},
+            {"type": "message", "channel": "a:invalidate", "data": "a:2"},
+        ]),
+    )
+    with patch.object(invalidation.asyncio, "sleep", AsyncMock()) as sleep:
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(invalidation.listen_for_invalidations(handlers, redis=redis))
+
+    sleep.assert_awaited_once_with(invalidation._LISTEN_RETRY_SECONDS)
+    assert redis.opened[1].channels == ("a:invalidate", "b:invalidate")
+    assert all(ps.closed for ps in redis.opened)
+    # Everything dropped after the successful subscribe, then per-key messages
+    assert calls == [("a", None), ("b", None), ("b", "b:1"), ("a", "a:2")]
+
+
+def test_ttl_cache_evicts_least_recently_used_and_expires():
+    cache = TTLCache(2)
+    cache.put("a", 1, 60)
+    cache.put("b", 2, 60)
+    assert cache.get("a") == 1          # "b" is now least recently used
+    cache.put("c", 3, 60)
+    assert "b" not in cache and cache.get("a") == 1 and cache.get("c") == 3
+
+    cache.put("d", 4, 0)
+    assert cache.get("d") is None and len(cache) == 1
@@ -0,0 +1,249 @@
+# tests/test_client_import.py
+"""Tests for the streaming CA bulk client import job."""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import os
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.domain.services import client_import as ci
+
+CA_ID = 7
+WA_1, WA_2 = "919876543210", "919876543211"
+GSTIN_1 = "36AABCU9603R1ZM"
+_GET_REDIS = "app.infrastructure.cache.redis_client.get_redis_client"
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect())).upper()
+
+
+def _row(n, name="Acme", wa=None, gstin=None):
+    return ci.ImportRow(row=n, name=name, whatsapp_number=wa, gstin=gstin,
+                        pan=None, email=None, business_type=None)
+
+
+def _result(rows):
+    res = MagicMock()
+    res.all.return_value = rows
+    return res
+
+
+class _FakeRedis:
+    """Hash / list subset of redis.asyncio used by the import job."""
+
+    def __init__(self):
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.lists: dict[str, list[str]] = {}
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        h = self.hashes.setdefault(key, {})
+        if mapping:
+            h.update({k: str(v) for k, v in mapping.items()})
+        if field is not None:
+            h[field] = str(value)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def expire(self, key, ttl):
+        return True
+
+    async def lrange(self, key, start, end):
+        return self.lists.get(key, [])[start:end + 1]
+
+    def pipeline(self, transaction=True):
+        fake, ops = self, []
+
+        class _Pipe:
+            def rpush(self, key, value):
+                ops.append(lambda: fake.lists.setdefault(key, []).append(value))
+
+            def hincrby(self, key, field, n):
+                def _incr():
+                    h = fake.hashes.setdefault(key, {})
+                    h[field] = str(int(h.get(field, 0)) + n)
+                ops.append(_incr)
+
+            def expire(self, key, ttl):
+                ops.append(lambda: None)
+
+            async def execute(self):
+                return [op() for op in ops]
+
+        return _Pipe()
+
+
+class _Upload:
+    def __init__(self, data: bytes):
+        self._buf = io.BytesIO(data)
+
+    async def read(self, n=-1):
+        return self._buf.read(n)
+
+
+# ---------------------------------------------------------------------------
+# Parsing
+# ---------------------------------------------------------------------------
+
+class TestParsing:
+    def test_validate_row_normalises(self):
+        parsed = ci.validate_row(2, {"name": " Acme ", "whatsapp_number": "9876543210",
+                                     "gstin": GSTIN_1.lower(), "email": "A@B.COM"})
+        assert isinstance(parsed, ci.ImportRow)
+        assert parsed.whatsapp_number == WA_1
+        assert parsed.gstin == GSTIN_1
+        assert parsed.email == "a@b.com"
+
+    def test_validate_row_collects_errors(self):
+        parsed = ci.validate_row(3, {"name": "", "gstin": "BAD", "pan": "X"})
+        assert isinstance(parsed, ci.RowResult)
+        assert parsed.outcome == "failed"
+        assert parsed.reason == "name is required; invalid GSTIN; invalid PAN"
+
+    def test_iter_batches_numbers_rows_after_header(self):
+        batches = list(ci.iter_batches([{"n": i} for i in range(5)], 2))
+        assert [len(b) for b in batches] == [2, 2, 1]
+        assert batches[0][0][0] == 2
+        assert batches[-1][0][0] == 6
+
+
+# ---------------------------------------------------------------------------
+# Statements
+# ---------------------------------------------------------------------------
+
+class TestStatements:
+    def test_existing_lookup_is_one_set_based_select(self):
+        sql = _sql(ci.existing_clients_stmt(CA_ID, [WA_1, WA_2], [GSTIN_1]))
+        assert sql.count("SELECT") == 1
+        assert "BUSINESS_CLIENTS.WHATSAPP_NUMBER IN" in sql
+        assert "BUSINESS_CLIENTS.GSTIN IN" in sql
+        assert " OR " in sql
+
+    def test_insert_skips_conflicts_and_returns_ids(self):
+        sql = _sql(ci.insert_clients_stmt(CA_ID, [_row(2, wa=WA_1), _row(3)]))
+        assert "ON CONFLICT (WHATSAPP_NUMBER) DO NOTHING" in sql
+        assert "RETURNING BUSINESS_CLIENTS.ID" in sql
+
+
+# ---------------------------------------------------------------------------
+# Batch import
+# ---------------------------------------------------------------------------
+
+class TestImportBatch:
+    def test_dedupes_against_db_and_file(self):
+        db = MagicMock()
+        db.commit = AsyncMock()
+        existing = [SimpleNamespace(ca_id=99, whatsapp_number=WA_1, gstin=None)]
+        created = [
+            SimpleNamespace(id=11, name="New", whatsapp_number=WA_2, gstin=None),
+            SimpleNamespace(id=12, name="NoWa", whatsapp_number=None, gstin=None),
+        ]
+        db.execute = AsyncMock(side_effect=[_result(existing), _result(created)])
+
+        rows = [_row(2, "Old", wa=WA_1), _row(3, "New", wa=WA_2),
+                _row(4, "Again", wa=WA_2), _row(5, "NoWa")]
+        results = asyncio.run(ci.import_batch(db, CA_ID, rows, ci._SeenInFile()))
+
+        by_row = {r.row: r for r in results}
+        assert by_row[2].outcome == "skipped"
+        assert "already registered" in by_row[2].reason
+        assert by_row[3].outcome == "added" and by_row[3].client_id == 11
+        assert by_row[4].outcome == "skipped" and "repeats row 3" in by_row[4].reason
+        assert by_row[5].client_id == 12
+        assert db.execute.await_count == 2
+        db.commit.assert_awaited_once()
+
+    def test_gstin_conflict_only_counts_for_same_ca(self):
+        db = MagicMock()
+        db.commit = AsyncMock()
+        existing = [SimpleNamespace(ca_id=CA_ID, whatsapp_number=None, gstin=GSTIN_1)]
+        db.execute = AsyncMock(return_value=_result(existing))
+
+        results = asyncio.run(
+            ci.import_batch(db, CA_ID, [_row(2, gstin=GSTIN_1)], ci._SeenInFile())
+        )
+        assert results[0].outcome == "skipped"
+        assert db.execute.await_count == 1   # nothing left to insert
+
+    def test_lost_conflict_race_is_reported_as_skipped(self):
+        db = MagicMock()
+        db.commit = AsyncMock()
+        db.execute = AsyncMock(side_effect=[_result([]), _result([])])
+        results = asyncio.run(
+            ci.import_batch(db, CA_ID, [_row(2, wa=WA_1)], ci._SeenInFile())
+        )
+        assert results[0].outcome == "skipped"
+
+
+# ---------------------------------------------------------------------------
+# Job lifecycle
+# ---------------------------------------------------------------------------
+
+class TestJob:
+    def test_spool_counts_rows_and_enforces_limit(self):
+        upload = _Upload(b"name\na\nb")
+        path, rows = asyncio.run(ci.spool_upload(upload, max_bytes=1024))
+        try:
+            assert rows == 2
+        finally:
+            os.unlink(path)
+        with pytest.raises(ValueError):
+            asyncio.run(ci.spool_upload(_Upload(b"x" * 2048), max_bytes=1024))
+
+    def test_run_import_records_progress_and_results(self, tmp_path):
+        path = tmp_path / "clients.csv"
+        path.write_text(
+            "name,whatsapp_number,gstin\nAcme,9876543210,\n,,\nBeta,,\n",
+            encoding="utf-8",
+        )
+        redis = _FakeRedis()
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=MagicMock())
+        session.__aexit__ = AsyncMock(return_value=False)
+
+        async def fake_batch(db, ca_id, rows, seen):
+            return [
+                ci.RowResult(
+                    row=r.row, name=r.name, outcome="added", client_id=r.row * 10
+                )
+                for r in rows
+            ]
+
+        async def run():
+            await ci.run_import("job1", CA_ID, "ca@x.in", str(path), batch_size=2)
+            return [part async for part in ci.iter_results_csv("job1")]
+
+        with patch(_GET_REDIS, return_value=redis), \
+                patch("app.core.db.AsyncSessionLocal", return_value=session), \
+                patch.object(ci, "import_batch", side_effect=fake_batch), \
+                patch("app.infrastructure.audit.log_ca_action") as audit:
+            redis.hashes["client_import:job1"] = {"ca_id": str(CA_ID)}
+            parts = asyncio.run(run())
+            status = asyncio.run(ci.get_import_status("job1", CA_ID))
+            other = asyncio.run(ci.get_import_status("job1", CA_ID + 1))
+
+        assert status["status"] == "done"
+        assert (status["processed"], status["added"], status["failed"]) == (3, 2, 1)
+        assert other is None
+        assert audit.call_count == 2
+        lines = "".join(parts).splitlines()
+        assert lines[0] == ",".join(ci.RESULT_COLUMNS)
+        assert lines[1].startswith("2,Acme,") and lines[1].endswith(",added,20,")
+        assert ",failed,," in lines[2]
+        assert not path.exists()
+
+    def test_missing_name_column_fails_job(self, tmp_path):
+        path = tmp_path / "bad.csv"
+        path.write_text("client,phone\nAcme,1\n", encoding="utf-8")
+        redis = _FakeRedis()
+        with patch(_GET_REDIS, return_value=redis):
+            asyncio.run(ci.run_import("job2", CA_ID, "", str(path)))
+        assert redis.hashes["client_import:job2"]["status"] == "failed"
+        assert "name" in redis.hashes["client_import:job2"]["error"]
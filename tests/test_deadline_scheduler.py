@@ -0,0 +1,210 @@
+# tests/test_deadline_scheduler.py
+"""Tests for the active-user registry and the batched deadline reminder run."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, patch
+
+from app.domain.services import deadline_scheduler as ds
+from app.infrastructure.cache import session_cache as sc
+
+
+class _FakeRedis:
+    """String / sorted-set subset of redis.asyncio used by the registry."""
+
+    def __init__(self):
+        self.strings: dict[str, str] = {}
+        self.zsets: dict[str, dict[str, float]] = {}
+        self.round_trips = 0
+
+    # -- commands (sync bodies, shared by pipeline) --
+    def _set(self, key, value, ex=None, nx=False):
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = value
+        return True
+
+    def _exists(self, key):
+        return int(key in self.strings)
+
+    def _zadd(self, key, mapping, nx=False):
+        z = self.zsets.setdefault(key, {})
+        added = 0
+        for member, score in mapping.items():
+            if nx and member in z:
+                continue
+            added += member not in z
+            z[member] = float(score)
+        return added
+
+    def _zrem(self, key, member):
+        return int(self.zsets.get(key, {}).pop(member, None) is not None)
+
+    def _zremrangebyscore(self, key, lo, hi):
+        z = self.zsets.get(key, {})
+        gone = [m for m, s in z.items() if s <= hi]
+        for m in gone:
+            del z[m]
+        return len(gone)
+
+    def _delete(self, key):
+        return int(self.strings.pop(key, None) is not None)
+
+    # -- async API --
+    async def set(self, key, value, ex=None, nx=False):
+        self.round_trips += 1
+        return self._set(key, value, ex, nx)
+
+    async def mget(self, keys):
+        self.round_trips += 1
+        return [self.strings.get(k) for k in keys]
+
+    async def scan(self, cursor=0, match="*", count=10):
+        self.round_trips += 1
+        prefix = match.rstrip("*")
+        return 0, [k for k in self.strings if k.startswith(prefix)]
+
+    async def zscan(self, key, cursor=0, count=10):
+        self.round_trips += 1
+        items = sorted(self.zsets.get(key, {}).items())
+        page = items[int(cursor):int(cursor) + count]
+        nxt = int(cursor) + count
+        return (nxt if nxt < len(items) else 0), page
+
+    async def aclose(self):
+        pass
+
+    def pipeline(self, transaction=True):
+        fake, ops = self, []
+
+        class _Pipe:
+            def __getattr__(self, name):
+                fn = getattr(fake, f"_{name}")
+                return lambda *a, **kw: ops.append(lambda: fn(*a, **kw))
+
+            async def execute(self):
+                fake.round_trips += 1
+                return [op() for op in ops]
+
+        return _Pipe()
+
+
+def _cache(redis):
+    cache = sc.SessionCache.__new__(sc.SessionCache)
+    cache._r = redis
+    return cache
+
+
+def _deadline(form, days):
+    return SimpleNamespace(form_name=form, period="Jan 2025", due_date=date(2025, 2, 20),
+                           days_remaining=days)
+
+
+# ---------------------------------------------------------------------------
+# Registry
+# ---------------------------------------------------------------------------
+
+class TestActiveUserRegistry:
+    def test_save_registers_and_moves_between_languages(self):
+        r = _FakeRedis()
+        cache = _cache(r)
+        asyncio.run(cache.save_session("911", {"lang": "hi", "last_active_ts": 100.0}))
+        assert r.zsets[sc.active_users_key("hi")] == {"911": 100.0}
+        assert r.round_trips == 1
+
+        asyncio.run(cache.save_session("911", {"lang": "ta", "last_active_ts": 200.0}))
+        assert "911" not in r.zsets[sc.active_users_key("hi")]
+        assert r.zsets[sc.active_users_key("ta")] == {"911": 200.0}
+
+        asyncio.run(cache.clear_session("911"))
+        assert not any(r.zsets.values()) and "wa:session:911" not in r.strings
+
+    def test_unknown_language_falls_back_to_english(self):
+        assert sc.registry_lang({"lang": "xx"}) == "en"
+        assert sc.registry_lang({}) == "en"
+
+    def test_prune_and_backfill(self):
+        r = _FakeRedis()
+        now = time.time()
+        r.zsets[sc.active_users_key("en")] = {"old": now - sc.SESSION_TTL_SECONDS - 5, "new": now}
+        assert asyncio.run(sc.prune_active_users(r, now)) == 1
+
+        r.strings["wa:session:912"] = json.dumps({"lang": "gu", "last_active_ts": now})
+        assert asyncio.run(sc.backfill_active_users(r)) == 1
+        assert "912" in r.zsets[sc.active_users_key("gu")]
+        assert asyncio.run(sc.backfill_active_users(r)) == 0      # runs once
+
+    def test_iter_active_users_pages_and_filters(self):
+        r = _FakeRedis()
+        r.zsets[sc.active_users_key("en")] = {f"9{i:02d}": float(i) for i in range(25)}
+
+        async def collect():
+            return [b async for b in sc.iter_active_users(r, "en", batch=10, active_since=5)]
+
+        batches = asyncio.run(collect())
+        assert [len(b) for b in batches] == [5, 10, 5]
+        assert sum(batches, [])[0] == "905"
+
+
+# ---------------------------------------------------------------------------
+# Reminder run
+# ---------------------------------------------------------------------------
+
+class TestSendDeadlineReminders:
+    def _run(self, r, deadlines, fn=ds.send_deadline_reminders, batch=2):
+        send = AsyncMock()
+        with patch.object(ds.settings, "REDIS_URL", "redis://fake"), \
+                patch.object(ds.redis, "from_url", return_value=r), \
+                patch.object(ds, "get_filing_deadlines", return_value=deadlines), \
+                patch.object(ds, "send_whatsapp_text", send), \
+                patch.object(ds, "REMINDER_BATCH_SIZE", batch):
+            count = asyncio.run(fn())
+        return count, send
+
+    def test_batches_markers_and_skips_already_sent(self):
+        r = _FakeRedis()
+        r.strings[sc.ACTIVE_BACKFILL_KEY] = "1"
+        now = time.time()
+        r.zsets[sc.active_users_key("en")] = {"901": now, "902": now, "903": now}
+        r.zsets[sc.active_users_key("hi")] = {"904": now}
+        dl = _deadline("GSTR-3B", 2)
+        r.strings[ds._reminder_key("902", dl.form_name, dl.due_date)] = "1"
+
+        count, send = self._run(r, [dl, _deadline("GSTR-1", 20)])
+
+        assert count == 3
+        assert sorted(c.args[0] for c in send.await_args_list) == ["901", "903", "904"]
+        assert ds._reminder_key("904", dl.form_name, dl.due_date) in r.strings
+        # 3 batches × (zscan + EXISTS pipeline + SET pipeline) + prune + backfill guard
+        assert r.round_trips <= 3 * 3 + len(ds.SUPPORTED_LANGS) + 2
+
+        count, _ = self._run(r, [dl])
+        assert count == 0
+
+    def test_nil_nudges_only_gstin_without_invoices(self):
+        r = _FakeRedis()
+        r.strings[sc.ACTIVE_BACKFILL_KEY] = "1"
+        now = time.time()
+        r.zsets[sc.active_users_key("en")] = {"901": now, "902": now}
+        r.strings["wa:session:901"] = json.dumps({"data": {"gstin": "36AABCU9603R1ZM"}})
+        r.strings["wa:session:902"] = json.dumps(
+            {"data": {"gstin": "36AABCU9603R1ZM", "uploaded_invoices": [1]}}
+        )
+
+        count, send = self._run(r, [_deadline("GSTR-3B", 3)], fn=ds.send_nil_filing_nudges)
+
+        assert count == 1
+        assert send.await_args.args[0] == "901"
+
+    def test_producer_waits_for_outbound_queue_to_drain(self):
+        depths = iter([ds.MAX_PENDING_OUTBOUND + 10, ds.MAX_PENDING_OUTBOUND, 0])
+        sleep = AsyncMock()
+        with patch.object(ds, "outgoing_queue_depth", lambda: next(depths)), \
+                patch.object(ds.asyncio, "sleep", sleep):
+            asyncio.run(ds._wait_for_outbound_capacity())
+        assert sleep.await_count == 2
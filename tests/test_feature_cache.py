@@ -0,0 +1,154 @@
+# tests/test_feature_cache.py
+"""Tests for the two-level segment / feature-gating cache and GST menu lookups."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.domain.services import feature_registry as fr
+from app.domain.services.whatsapp_menu_builder import build_gst_menu
+
+GSTIN = "29AABCU9603R1ZM"
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data: dict[str, str] = {}
+        self.ttls: dict[str, int] = {}
+        self.gets = 0
+        self.published: list[tuple[str, str]] = []
+
+    async def get(self, key):
+        self.gets += 1
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+        self.ttls[key] = ex
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.data.pop(key, None)
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+
+
+def _feature(code, order):
+    return SimpleNamespace(code=code, name=code.title(), display_order=order,
+                           whatsapp_state=None, i18n_key=None, category="gst")
+
+
+def _result(first=None, scalars=()):
+    res = MagicMock()
+    res.first.return_value = first
+    res.scalar_one_or_none.return_value = first
+    res.scalars.return_value.all.return_value = list(scalars)
+    return res
+
+
+@pytest.fixture
+def redis():
+    fr.clear_local_cache()
+    fake = _FakeRedis()
+    with patch("app.infrastructure.cache.redis_client.get_redis_client", return_value=fake):
+        yield fake
+    fr.clear_local_cache()
+
+
+class TestMenuSegment:
+    def test_gst_menu_needs_no_queries_once_warm(self, redis):
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=_result(first=SimpleNamespace(id=5, segment="medium")))
+
+        def build():
+            session = {"lang": "en", "data": {"gstin": GSTIN}}
+            menu = asyncio.run(build_gst_menu("91999", session, db))
+            return menu, session["data"]["client_segment"]
+
+        menu, segment = build()
+        assert segment == "medium" and menu["type"] == "list"
+        assert db.execute.await_count == 1
+
+        gets = redis.gets
+        assert build()[1] == "medium"                   # in-process copy: no DB, no Redis
+        assert db.execute.await_count == 1 and redis.gets == gets
+
+        fr.clear_local_cache()                          # e.g. another worker: served by Redis
+        assert build()[1] == "medium"
+        assert db.execute.await_count == 1 and redis.gets == gets + 1
+
+    def test_unknown_gstin_is_cached_briefly(self, redis):
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=_result(first=None))
+        assert asyncio.run(fr.get_client_segment_by_gstin(GSTIN, db)) is None
+        assert asyncio.run(fr.get_client_segment_by_gstin(GSTIN, db)) is None
+        assert db.execute.await_count == 1
+        assert redis.ttls[f"seg:gstin:{GSTIN}"] == fr._NEGATIVE_TTL
+
+
+class TestFeatureGating:
+    def test_client_features_compose_segment_and_addons(self, redis):
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[
+            _result(first="small"),                                         # client segment
+            _result(scalars=[_feature("e_invoice", 50)]),                   # addons
+            _result(scalars=[_feature("nil_return", 30), _feature("enter_gstin", 10)]),  # segment
+        ])
+        codes = [f["code"] for f in asyncio.run(fr.get_cached_features(5, db))]
+        assert codes == ["enter_gstin", "nil_return", "e_invoice"]
+        assert asyncio.run(fr.is_feature_enabled(5, "e_invoice", db))
+        assert db.execute.await_count == 3
+
+    def test_segment_edit_only_reloads_the_segment(self, redis):
+        redis.data["seg:client:5"] = json.dumps({"segment": "small", "addons": []})
+        redis.data["seg:segment:small"] = json.dumps([fr._feature_to_dict(_feature("nil_return", 30))])
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=_result(scalars=[_feature("risk_scoring", 80)]))
+
+        assert [f["code"] for f in asyncio.run(fr.get_cached_features(5, db))] == ["nil_return"]
+        asyncio.run(fr.invalidate_segment_cache("small"))
+        assert [f["code"] for f in asyncio.run(fr.get_cached_features(5, db))] == ["risk_scoring"]
+        assert db.execute.await_count == 1
+        assert (fr.INVALIDATE_CHANNEL, "seg:segment:small") in redis.published
+
+    def test_client_invalidation_drops_client_and_gstin_keys(self, redis):
+        asyncio.run(fr._cache_set("seg:client:5", {"segment": "small", "addons": []}))
+        asyncio.run(fr._cache_set(f"seg:gstin:{GSTIN}", {"client_id": 5, "segment": "small"}))
+        asyncio.run(fr.invalidate_feature_cache(5, gstin=GSTIN))
+        assert not redis.data and len(fr._local) == 0
+        assert [m for _, m in redis.published] == ["seg:client:5", f"seg:gstin:{GSTIN}"]
+
+    def test_listener_drops_local_copies(self, redis):
+        fr._local.put("seg:client:5", {"segment": "small", "addons": []}, 60)
+        fr._local.put("seg:client:6", {"segment": "small", "addons": []}, 60)
+
+        class _PubSub:
+            async def subscribe(self, *channels):
+                assert channels == (fr.INVALIDATE_CHANNEL,)
+
+            async def listen(self):
+                fr._local.put("seg:client:6", {}, 60)      # cached after the reconnect
+                yield {"type": "subscribe", "channel": fr.INVALIDATE_CHANNEL, "data": 1}
+                yield {"type": "message", "channel": fr.INVALIDATE_CHANNEL, "data": "seg:client:6"}
+                raise asyncio.CancelledError
+
+            async def aclose(self):
+                pass
+
+        redis.pubsub = lambda: _PubSub()
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(fr.listen_for_invalidations())
+        assert len(fr._local) == 0
+
+    def test_local_copies_are_bounded(self, redis):
+        with patch.object(fr, "_local", fr.TTLCache(2)):
+            for client_id in range(5):
+                asyncio.run(fr._cache_set(fr._client_key(client_id), {"segment": "small", "addons": []}))
+            assert len(fr._local) == 2
+            assert "seg:client:4" in fr._local and "seg:client:0" not in fr._local
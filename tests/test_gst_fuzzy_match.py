@@ -0,0 +1,217 @@
+# tests/test_gst_fuzzy_match.py
+"""Tests for the fuzzy second pass of ITC (GSTR-2B vs books) reconciliation."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.domain.services import gst_fuzzy_match as fm
+from app.domain.services import gst_reconciliation as recon
+
+GSTIN = "36AABCU9603R1ZM"
+GSTIN_OCR = "36AABCU96O3R1ZM"      # 0 read as O
+
+
+def _line(ref, number, value="10000", day=10, gstin=GSTIN):
+    return fm.FuzzyLine(ref, gstin, number, date(2025, 1, day) if day else None, Decimal(value))
+
+
+class TestNormalisation:
+    def test_invoice_number(self):
+        assert fm.normalize_invoice_number("inv-0012") == "INV12"
+        assert fm.normalize_invoice_number("2024-25/0012") == "12"
+        assert fm.normalize_invoice_number("INV/12/FY24-25") == "INV12"
+        assert fm.normalize_invoice_number("2024-25") == "202425"     # nothing else left: keep it
+
+    def test_bounded_levenshtein(self):
+        assert fm.bounded_levenshtein("INV12", "INV12A", 2) == 1
+        assert fm.bounded_levenshtein("INV12", "INV21", 2) == 2
+        assert fm.bounded_levenshtein("ABCDEFG", "XYZ", 2) == 3
+        assert fm.bounded_levenshtein("ABCDEF", "UVWXYZ", 2) == 3
+
+
+class TestMatchResiduals:
+    def test_typo_fy_prefix_and_gstin_ocr_are_paired(self):
+        twob = [_line("a", "INV-0012"), _line("b", "2024-25/0456", "5000"),
+                _line("c", "T-789", "777", gstin=GSTIN_OCR)]
+        books = [_line("x", "INV-012A", day=12), _line("y", "456", "5000.50"),
+                 _line("z", "T-789", "777")]
+        pairs = {(m.twob, m.book) for m in fm.match_residuals(twob, books)}
+        assert pairs == {("a", "x"), ("b", "y"), ("c", "z")}
+
+    def test_blocking_rejects_far_amounts_dates_and_gstins(self):
+        twob = [_line("a", "INV-1001"), _line("b", "INV-2002"), _line("c", "INV-3003")]
+        books = [
+            _line("x", "INV-1001A", "12000"),                     # amount 20% off
+            _line("y", "INV-2002A", day=25),                      # 15 days apart
+            _line("z", "INV-3003A", gstin="27AAACR5055K1Z5"),     # different supplier
+        ]
+        assert fm.match_residuals(twob, books) == []
+
+    def test_each_line_is_used_once_and_details_are_serialisable(self):
+        twob = [_line("a", "INV-500"), _line("b", "INV-500")]
+        books = [_line("x", "INV-500A")]
+        matches = fm.match_residuals(twob, books)
+        assert len(matches) == 1
+        details = json.loads(json.dumps(matches[0].details()))
+        assert details["method"] == "fuzzy" and details["number_distance"] == 1
+
+    def test_small_blocks_are_assigned_optimally(self):
+        edges = [(0.95, 0, 0), (0.9, 0, 1), (0.9, 1, 0)]
+        assert sorted(fm._assign(edges, optimal_max=8)) == [(0.9, 0, 1), (0.9, 1, 0)]
+        assert fm._assign(edges, optimal_max=0) == [(0.95, 0, 0)]
+
+
+class TestReconcilePeriod:
+    def test_fuzzy_pass_runs_on_exact_pass_residuals(self):
+        period_id = uuid.uuid4()
+
+        def book(n, value):
+            return SimpleNamespace(id=uuid.uuid4(), supplier_gstin=GSTIN, invoice_number=n,
+                                   invoice_date=date(2025, 1, 10), taxable_value=Decimal(value),
+                                   igst_amount=0, cgst_amount=0, sgst_amount=0,
+                                   gstr2b_match_status=None, gstr2b_match_id=None)
+
+        def entry(n, value, gstin=GSTIN):
+            return SimpleNamespace(id=uuid.uuid4(), gstr2b_supplier_gstin=gstin,
+                                   gstr2b_invoice_number=n, gstr2b_invoice_date=date(2025, 1, 11),
+                                   gstr2b_taxable_value=Decimal(value), gstr2b_igst=Decimal("0"),
+                                   gstr2b_cgst=Decimal("0"), gstr2b_sgst=Decimal("0"),
+                                   match_status=None, mismatch_details=None, purchase_invoice_id=None)
+
+        books = [book("A-1", "100"), book("INV-0012", "1000"), book("ZZ-9", "50")]
+        twob = [entry("A/1", "100"), entry("INV/0012", "1000", GSTIN_OCR), entry("Q-77", "80")]
+
+        period_repo = MagicMock()
+        period_repo.get_by_id = AsyncMock(return_value=SimpleNamespace(period="2025-01", user_id=uuid.uuid4()))
+        period_repo.update_status = AsyncMock()
+        inv_repo = MagicMock()
+        inv_repo.list_for_period_by_direction = AsyncMock(return_value=books)
+        match_repo = MagicMock()
+        match_repo.list_for_period = AsyncMock(return_value=twob)
+        db = MagicMock()
+        db.commit = AsyncMock()
+
+        base = "app.infrastructure.db.repositories"
+        with patch(f"{base}.return_period_repository.ReturnPeriodRepository", return_value=period_repo), \
+                patch(f"{base}.invoice_repository.InvoiceRepository", return_value=inv_repo), \
+                patch(f"{base}.itc_match_repository.ITCMatchRepository", return_value=match_repo):
+            summary = asyncio.run(recon.reconcile_period(period_id, db))
+
+        # The fuzzy pair is held for CA review, out of eligible ITC
+        assert (summary.matched, summary.fuzzy_matched, summary.fuzzy_review) == (1, 1, 1)
+        assert (summary.missing_in_books, summary.missing_in_2b) == (1, 1)
+        assert twob[1].purchase_invoice_id == books[1].id
+        assert twob[1].match_status == books[1].gstr2b_match_status == recon.FUZZY_REVIEW
+        assert json.loads(twob[1].mismatch_details)["match"]["gstin_exact"] is False
+        assert twob[0].mismatch_details is None
+        assert books[2].gstr2b_match_status == "missing_in_2b"
+
+
+class TestFuzzyReview:
+    @staticmethod
+    def _pair(status=None, details=None):
+        book = SimpleNamespace(id=uuid.uuid4(), taxable_value=Decimal("1000"), igst_amount=0,
+                               cgst_amount=0, sgst_amount=0, gstr2b_match_status=status,
+                               gstr2b_match_id=None)
+        entry = SimpleNamespace(id=uuid.uuid4(), gstr2b_taxable_value=Decimal("1000"),
+                                gstr2b_igst=Decimal("0"), gstr2b_cgst=Decimal("0"),
+                                gstr2b_sgst=Decimal("0"), match_status=status,
+                                mismatch_details=details, purchase_invoice_id=None)
+        return entry, book
+
+    def test_confirmation_makes_the_pair_matched_and_survives_a_rerun(self):
+        entry, book = self._pair()
+        summary = recon.ReconciliationSummary()
+        recon._apply_match(entry, book, summary, fuzzy={"method": "fuzzy", "gstin_exact": False})
+        assert summary.fuzzy_review == 1 and summary.matched == 0
+
+        result = MagicMock()
+        result.scalar_one_or_none.return_value = entry
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=result)
+        db.get = AsyncMock(return_value=book)
+        db.commit = AsyncMock()
+        confirmed = asyncio.run(recon.confirm_fuzzy_match(uuid.uuid4(), entry.id, db, "ca@firm.in"))
+        assert confirmed is entry
+        assert entry.match_status == book.gstr2b_match_status == "matched"
+        assert json.loads(entry.mismatch_details)["match"]["confirmed_by"] == "ca@firm.in"
+        assert asyncio.run(recon.confirm_fuzzy_match(uuid.uuid4(), entry.id, db, "x")) is None
+
+        rerun = recon.ReconciliationSummary()
+        recon._apply_match(entry, book, rerun, fuzzy={"method": "fuzzy", "gstin_exact": False})
+        assert (rerun.matched, rerun.fuzzy_review) == (1, 0)
+        assert json.loads(entry.mismatch_details)["match"]["confirmed_by"] == "ca@firm.in"
+
+        # Confirmation belongs to the pair: another book line goes back to review
+        _, other = self._pair()
+        again = recon.ReconciliationSummary()
+        recon._apply_match(entry, other, again, fuzzy={"method": "fuzzy", "gstin_exact": False})
+        assert again.fuzzy_review == 1 and entry.match_status == recon.FUZZY_REVIEW
+
+
+class TestConfirmRoute:
+    """POST /ca/itc-matches/{id}/confirm needs the CA to own the period's user."""
+
+    def _arrange(self, session):
+        from app.infrastructure.db.models import (
+            BusinessClient,
+            CAUser,
+            ITCMatch,
+            ReturnPeriod,
+            User,
+        )
+
+        owner_ca = CAUser(id=1, email="a@firm.in", password_hash="x", name="A")
+        foreign_ca = CAUser(id=2, email="b@firm.in", password_hash="x", name="B")
+        owner = User(id=uuid.uuid4(), whatsapp_number="919800000001")
+        rp = ReturnPeriod(
+            id=uuid.uuid4(), user_id=owner.id, gstin=GSTIN,
+            fy="2024-25", period="2025-01",
+        )
+        match = ITCMatch(
+            id=uuid.uuid4(), period_id=rp.id, gstr2b_supplier_gstin=GSTIN_OCR,
+            gstr2b_invoice_number="INV-12", gstr2b_taxable_value=Decimal("10000"),
+            match_status=recon.FUZZY_REVIEW,
+        )
+        session.add_all([owner_ca, foreign_ca, owner, rp, match])
+        session.add_all([
+            BusinessClient(
+                name="Owner", ca_id=1, gstin=GSTIN,
+                whatsapp_number=owner.whatsapp_number,
+            ),
+            # The foreign CA typed in the same GSTIN without the owner's number
+            BusinessClient(name="Copy", ca_id=2, gstin=GSTIN),
+        ])
+        session.commit()
+        return owner_ca, foreign_ca, match
+
+    def test_foreign_ca_with_the_same_gstin_gets_404(self, ownership_db):
+        from fastapi import HTTPException
+
+        from app.api.v1.routes import ca_reviews
+        from tests.conftest import SyncSessionAdapter
+
+        owner_ca, foreign_ca, match = self._arrange(ownership_db)
+        db = SyncSessionAdapter(ownership_db)
+        entry = SimpleNamespace(id=match.id, match_status="matched")
+        confirm = AsyncMock(return_value=entry)
+        with patch.object(recon, "confirm_fuzzy_match", confirm), \
+                patch.object(ca_reviews, "log_ca_action"):
+            with pytest.raises(HTTPException) as exc:
+                asyncio.run(
+                    ca_reviews.confirm_itc_match(match.id, ca=foreign_ca, db=db)
+                )
+            assert exc.value.status_code == 404
+            confirm.assert_not_awaited()
+
+            asyncio.run(ca_reviews.confirm_itc_match(match.id, ca=owner_ca, db=db))
+        assert confirm.await_args.args[:2] == (match.period_id, match.id)
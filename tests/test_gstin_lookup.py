@@ -0,0 +1,247 @@
+# tests/test_gstin_lookup.py
+"""Tests for the tiered GSTIN directory (LRU -> Redis -> Postgres -> provider)."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import time
+from datetime import datetime, timezone
+from types import SimpleNamespace
+from unittest.mock import patch
+
+import httpx
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.core.config import settings
+from app.domain.services import gstin_lookup as gl
+from app.infrastructure.db.repositories.gstin_directory_repository import (
+    GstinDirectoryRepository,
+)
+
+
+def _gstin(n: int) -> str:
+    return f"29AABCU{n:04d}R1ZM"
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data: dict[str, str] = {}
+        self.ttls: dict[str, int] = {}
+        self.mgets = 0
+
+    async def mget(self, keys):
+        self.mgets += 1
+        return [self.data.get(k) for k in keys]
+
+    def pipeline(self, transaction=True):
+        fake = self
+
+        class _Pipe:
+            def set(self, key, value, ex=None):
+                fake.data[key] = value
+                fake.ttls[key] = ex
+
+            async def execute(self):
+                return []
+
+        return _Pipe()
+
+
+def _entry(found=True, age=0.0, name="Acme"):
+    entry = {"found": found, "fetched_at": time.time() - age}
+    if found:
+        entry.update(legal_name=name, state="Karnataka", status="Active")
+    return entry
+
+
+@pytest.fixture
+def tiers():
+    """Patch Redis, the directory table and the provider; yields the fakes."""
+    gl.clear_local_cache()
+    redis = _FakeRedis()
+    db_rows: dict[str, dict] = {}
+    calls: list[str] = []
+    provider: dict[str, dict | None] = {}
+
+    async def db_get(gstins, now):
+        entries = {g: db_rows[g] for g in gstins if g in db_rows}
+        return {g: e for g, e in entries.items() if not gl._is_expired_negative(e, now)}
+
+    async def db_save(entries):
+        db_rows.update(entries)
+
+    async def call(gstin, client):
+        calls.append(gstin)
+        await asyncio.sleep(0)
+        return provider.get(gstin, _entry(name=f"Biz {gstin}"))
+
+    with patch("app.infrastructure.cache.redis_client.get_redis_client", return_value=redis), \
+            patch.object(gl, "_db_get_many", side_effect=db_get), \
+            patch.object(gl, "_db_save_many", side_effect=db_save), \
+            patch.object(gl, "_call_gst_api", side_effect=call), \
+            patch.object(settings, "MASTERGST_CLIENT_ID", "cid"), \
+            patch.object(settings, "MASTERGST_CLIENT_SECRET", "secret"):
+        yield SimpleNamespace(redis=redis, db=db_rows, calls=calls, provider=provider)
+    gl.clear_local_cache()
+
+
+def _run(coro):
+    async def main():
+        out = await coro
+        await asyncio.gather(*list(gl._tasks))       # let background refreshes finish
+        return out
+    return asyncio.run(main())
+
+
+class TestTiers:
+    def test_miss_goes_to_provider_and_fills_every_tier(self, tiers):
+        g = _gstin(1)
+        assert _run(gl.lookup_gstin_details(g.lower()))["legal_name"] == f"Biz {g}"
+        assert tiers.calls == [g]
+        assert g in tiers.db and json.loads(tiers.redis.data[f"gstin:details:{g}"])["found"] is True
+
+        # Second call is served in-process: no Redis round trip, no provider call
+        mgets = tiers.redis.mgets
+        assert _run(gl.lookup_gstin_details(g))["state"] == "Karnataka"
+        assert tiers.redis.mgets == mgets and tiers.calls == [g]
+
+    def test_lookup_many_reads_each_tier_once(self, tiers):
+        gs = [_gstin(n) for n in range(1, 5)]
+        tiers.redis.data[f"gstin:details:{gs[0]}"] = json.dumps(_entry(name="From redis"))
+        tiers.db[gs[1]] = _entry(name="From db")
+
+        out = _run(gl.lookup_many(gs + [gs[0], "BADGSTIN", ""]))
+
+        assert list(out) == gs + ["BADGSTIN"]
+        assert out[gs[0]]["legal_name"] == "From redis"
+        assert out[gs[1]]["legal_name"] == "From db"
+        assert out["BADGSTIN"] is None
+        assert sorted(tiers.calls) == gs[2:]
+        assert tiers.redis.mgets == 1
+        assert f"gstin:details:{gs[1]}" in tiers.redis.data        # db hit written back to Redis
+
+    def test_provider_fan_out_is_bounded(self, tiers):
+        active = peak = 0
+
+        async def slow(gstin, client):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return _entry()
+
+        with patch.object(gl, "_call_gst_api", side_effect=slow), \
+                patch.object(settings, "GSTIN_DIRECTORY_CONCURRENCY", 3):
+            out = _run(gl.lookup_many(_gstin(n) for n in range(20)))
+        assert len(out) == 20 and all(out.values())
+        assert peak == 3
+
+    def test_provider_bound_is_shared_by_concurrent_callers(self, tiers):
+        active = peak = 0
+
+        async def slow(gstin, client):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return _entry()
+
+        async def callers():
+            return await asyncio.gather(*(
+                gl.lookup_many(_gstin(n) for n in range(k * 10, k * 10 + 10)) for k in range(4)
+            ))
+
+        with patch.object(gl, "_call_gst_api", side_effect=slow), \
+                patch.object(settings, "GSTIN_DIRECTORY_CONCURRENCY", 3):
+            assert all(len(out) == 10 for out in _run(callers()))
+        assert peak == 3
+
+    def test_no_mastergst_credentials_skips_the_provider(self, tiers):
+        with patch.object(settings, "MASTERGST_CLIENT_ID", ""):
+            assert _run(gl.lookup_gstin_details(_gstin(13))) is None
+        assert tiers.calls == []
+
+    def test_concurrent_lookups_share_one_provider_call(self, tiers):
+        async def both():
+            return await asyncio.gather(gl.lookup_gstin_details(_gstin(7)),
+                                        gl.lookup_gstin_details(_gstin(7)))
+        first, second = _run(both())
+        assert first == second and first is not None
+        assert tiers.calls == [_gstin(7)]
+
+
+class TestNegativeAndStale:
+    def test_unknown_gstin_is_negatively_cached(self, tiers):
+        g = _gstin(9)
+        tiers.provider[g] = _entry(found=False)
+        assert _run(gl.lookup_gstin_details(g)) is None
+        gl.clear_local_cache()
+        assert _run(gl.lookup_gstin_details(g)) is None
+        assert tiers.calls == [g]
+        assert tiers.redis.ttls[f"gstin:details:{g}"] == settings.GSTIN_DIRECTORY_NEGATIVE_TTL_SECONDS
+
+    def test_expired_negative_answer_is_asked_again(self, tiers):
+        g = _gstin(10)
+        tiers.db[g] = _entry(found=False, age=settings.GSTIN_DIRECTORY_NEGATIVE_TTL_SECONDS + 1)
+        assert _run(gl.lookup_gstin_details(g))["legal_name"] == f"Biz {g}"
+        assert tiers.calls == [g]
+
+    def test_failures_are_not_cached(self, tiers):
+        g = _gstin(11)
+        tiers.provider[g] = None
+        assert _run(gl.lookup_gstin_details(g)) is None
+        assert g not in tiers.db and not tiers.redis.data
+
+    def test_stale_answer_is_served_then_refreshed(self, tiers):
+        g = _gstin(12)
+        tiers.db[g] = _entry(name="Old name", age=settings.GSTIN_DIRECTORY_REFRESH_AFTER_SECONDS + 5)
+        assert _run(gl.lookup_gstin_details(g))["legal_name"] == "Old name"
+        assert tiers.calls == [g]                                   # background refresh ran
+        assert tiers.db[g]["legal_name"] == f"Biz {g}"
+        assert _run(gl.lookup_gstin_details(g))["legal_name"] == f"Biz {g}"
+
+
+class TestProvider:
+    def _call(self, handler):
+        from app.infrastructure.external import mastergst_client
+
+        real = httpx.AsyncClient
+
+        def client(**kw):
+            return real(transport=httpx.MockTransport(handler), **kw)
+
+        with patch.object(mastergst_client.httpx, "AsyncClient", client):
+            return asyncio.run(gl._call_gst_api(_gstin(1), mastergst_client.MasterGSTClient()))
+
+    def test_parses_details_via_public_search(self):
+        seen = []
+        body = {"status_cd": "1", "data": {"lgnm": "Acme Pvt Ltd", "sts": "Active",
+                                          "pradr": {"addr": {"stcd": "Karnataka"}}}}
+
+        def handler(req):
+            seen.append(req)
+            return httpx.Response(200, json=body)
+
+        entry = self._call(handler)
+        assert entry["found"] is True and entry["legal_name"] == "Acme Pvt Ltd"
+        assert seen[0].url.path == "/public/search" and seen[0].url.params["gstin"] == _gstin(1)
+
+    def test_not_found_versus_failure(self):
+        not_found = {"status_cd": "0", "error": {"message": "Invalid GSTIN / UID"}}
+        assert self._call(lambda req: httpx.Response(200, json=not_found))["found"] is False
+        assert self._call(lambda req: httpx.Response(200, json={"error": True, "message": "Invalid API key"})) is None
+        assert self._call(lambda req: httpx.Response(200, text="")) is None         # _empty body
+        assert self._call(lambda req: httpx.Response(503)) is None
+
+
+def test_upsert_statement():
+    sql = str(GstinDirectoryRepository.upsert_stmt([{
+        "gstin": _gstin(1), "found": True, "legal_name": "A", "state": "KA", "status": "Active",
+        "fetched_at": datetime.now(timezone.utc),
+    }]).compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (gstin) DO UPDATE" in sql
+    assert "fetched_at = excluded.fetched_at" in sql
@@ -0,0 +1,261 @@
+# tests/test_gstr2b_sync.py
+"""Tests for the scheduled portfolio GSTR-2B sync."""
+
+from __future__ import annotations
+
+import asyncio
+import time
+import uuid
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import httpx
+import pytest
+
+from app.core.config import settings
+from app.domain.services import gstr2b_sync as sync
+from app.infrastructure.external.mastergst_client import MasterGSTError
+
+PERIOD = "2025-01"
+
+
+def _gstin(n: int) -> str:
+    return f"29AABCU{n:04d}R1ZM"
+
+
+def _resp(*lines):
+    return {"status_cd": "1", "data": {"docdata": {"b2b": [
+        {"ctin": ctin, "inv": [{"inum": inum, "idt": "05-01-2025", "itms": [{"txval": val, "igst": 18}]}]}
+        for ctin, inum, val in lines
+    ]}}}
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.hashes: dict[str, dict[str, str]] = {}
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    def pipeline(self, transaction=True):
+        fake = self
+
+        class _Pipe:
+            def hset(self, key, mapping=None):
+                fake.hashes.setdefault(key, {}).update({k: str(v) for k, v in mapping.items()})
+
+            def expire(self, key, ttl):
+                pass
+
+            async def execute(self):
+                return []
+
+        return _Pipe()
+
+
+class _Portal:
+    """Fake MasterGST: per-GSTIN responses or errors, with call and concurrency counts."""
+
+    def __init__(self):
+        self.responses: dict[str, list] = {}
+        self.fetches: list[str] = []
+        self.active = self.peak = 0
+
+    def client(self):
+        portal = self
+
+        class _Client:
+            async def authenticate(self, gstin):
+                return "token"
+
+            async def get_gstr2b(self, gstin, fp, token):
+                assert fp == "012025"
+                portal.fetches.append(gstin)
+                portal.active += 1
+                portal.peak = max(portal.peak, portal.active)
+                await asyncio.sleep(0.005)
+                portal.active -= 1
+                queued = portal.responses.get(gstin) or [_resp(("27AAACR5055K1Z5", "A-1", 1000))]
+                item = queued.pop(0) if len(queued) > 1 else queued[0]
+                if isinstance(item, Exception):
+                    raise item
+                return item
+
+        return _Client()
+
+
+class _Session:
+    async def __aenter__(self):
+        return MagicMock()
+
+    async def __aexit__(self, *exc):
+        return False
+
+
+@pytest.fixture
+def env():
+    redis, portal = _FakeRedis(), _Portal()
+    store, reconcile = AsyncMock(), AsyncMock()
+    repo = MagicMock()
+    repo.create_or_get = AsyncMock(return_value=SimpleNamespace(id=uuid.uuid4()))
+    itc_repo = MagicMock()
+    itc_repo.count_by_source = AsyncMock(return_value={})
+    base = "app.infrastructure"
+    with patch(f"{base}.cache.redis_client.get_redis_client", return_value=redis), \
+            patch(f"{base}.external.mastergst_client.MasterGSTClient", side_effect=portal.client), \
+            patch(f"{base}.db.repositories.return_period_repository.ReturnPeriodRepository", return_value=repo), \
+            patch(f"{base}.db.repositories.itc_match_repository.ITCMatchRepository", return_value=itc_repo), \
+            patch("app.domain.services.gstr2b_service.store_gstr2b_matches", store), \
+            patch("app.domain.services.gst_reconciliation.reconcile_period", reconcile), \
+            patch("app.core.db.AsyncSessionLocal", _Session), \
+            patch.object(settings, "GSTR2B_SYNC_BACKOFF_SECONDS", 0.001):
+        yield SimpleNamespace(redis=redis, portal=portal, store=store, reconcile=reconcile, itc_repo=itc_repo)
+
+
+def _targets(n):
+    return [sync.SyncTarget(gstin=_gstin(i), user_id=uuid.uuid4()) for i in range(n)]
+
+
+def _run(targets, budget=None, **kwargs):
+    budget = budget or sync.ProviderBudget(concurrency=4, rate=0)
+    return asyncio.run(sync.sync_targets(targets, PERIOD, budgets={sync.DEFAULT_PROVIDER: budget}, **kwargs))
+
+
+class TestScheduling:
+    def test_due_period_window(self):
+        assert sync.due_period(date(2025, 2, 13)) is None
+        assert sync.due_period(date(2025, 2, 14)) == "2025-01"
+        assert sync.due_period(date(2025, 1, 20)) == "2024-12"
+        assert sync.due_period(date(2025, 1, 21)) is None
+
+    def test_targets_are_deduplicated_across_sources(self):
+        u1, u2 = uuid.uuid4(), uuid.uuid4()
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[
+            MagicMock(all=lambda: [(_gstin(1).lower(), u1), ("bad", u1)]),
+            MagicMock(all=lambda: [(_gstin(1), u2), (_gstin(2), u2), (None, u2)]),
+        ])
+        targets = asyncio.run(sync.list_sync_targets(db))
+        assert [(t.gstin, t.user_id) for t in targets] == [(_gstin(1), u1), (_gstin(2), u2)]
+
+
+class TestPayloadHash:
+    def test_ignores_line_order_and_period(self):
+        a = {"gstr2b_invoice_number": "A-1", "gstr2b_taxable_value": Decimal("10"), "period_id": 1}
+        b = {"gstr2b_invoice_number": "B-2", "gstr2b_taxable_value": Decimal("20"), "period_id": 2}
+        assert sync.payload_hash([a, b]) == sync.payload_hash([dict(b, period_id=None), a])
+        assert sync.payload_hash([a]) != sync.payload_hash([dict(a, gstr2b_taxable_value=Decimal("11"))])
+
+
+class TestSync:
+    def test_import_then_fresh_then_unchanged(self, env):
+        target = _targets(1)
+        assert [o.status for o in _run(target)] == ["imported"]
+        assert env.store.await_count == 1 and env.reconcile.await_count == 1
+
+        assert [o.status for o in _run(target)] == ["fresh"]          # within the refresh window
+        assert env.portal.fetches == [_gstin(0)]
+
+        key = f"gstr2b_sync:{PERIOD}:{_gstin(0)}"
+        env.redis.hashes[key]["synced_at"] = str(time.time() - settings.GSTR2B_SYNC_REFRESH_HOURS * 3600 - 1)
+        assert [o.status for o in _run(target)] == ["unchanged"]      # same lines: no rewrite
+        assert env.store.await_count == 1 and env.reconcile.await_count == 1
+
+        env.redis.hashes[key]["synced_at"] = "0"
+        env.portal.responses[_gstin(0)] = [_resp(("27AAACR5055K1Z5", "A-1", 1200))]
+        assert [o.status for o in _run(target)] == ["imported"]
+        assert env.store.await_count == 2
+
+    def test_force_reimports(self, env):
+        _run(_targets(1))
+        assert [o.status for o in _run(_targets(1), force=True)] == ["imported"]
+        assert env.store.await_count == 2
+
+    def test_provider_and_global_concurrency_are_bounded(self, env):
+        _run(_targets(20), budget=sync.ProviderBudget(concurrency=3, rate=0))
+        assert env.portal.peak == 3 and len(env.portal.fetches) == 20
+
+        env.portal.peak = 0
+        _run(_targets(20), budget=sync.ProviderBudget(concurrency=10, rate=0), force=True, concurrency=2)
+        assert env.portal.peak == 2
+
+    def test_rate_budget_spaces_out_calls(self, env):
+        started = time.perf_counter()
+        _run(_targets(10), budget=sync.ProviderBudget(concurrency=10, rate=200, burst=3))
+        # 30 calls, a bucket of 3: the remaining 27 arrive at 200/s
+        assert time.perf_counter() - started >= 27 / 200 * 0.9
+
+    def test_transient_errors_are_retried_and_others_are_not(self, env):
+        timeout = MasterGSTError("MasterGST API timeout")
+        timeout.__cause__ = httpx.ReadTimeout("slow")
+        env.portal.responses[_gstin(0)] = [MasterGSTError("busy", status_code=429), timeout, _resp()]
+        env.portal.responses[_gstin(1)] = [MasterGSTError("denied", status_code=401)]
+        env.portal.responses[_gstin(2)] = [MasterGSTError("down", status_code=503)]
+
+        budget = sync.ProviderBudget(concurrency=4, rate=0)
+        with patch.object(settings, "GSTR2B_SYNC_MAX_ATTEMPTS", 3):
+            outcomes = {o.gstin: o for o in _run(_targets(3), budget=budget)}
+
+        assert (outcomes[_gstin(0)].status, outcomes[_gstin(0)].attempts) == ("imported", 3)
+        assert (outcomes[_gstin(1)].status, outcomes[_gstin(1)].attempts) == ("failed", 1)
+        assert (outcomes[_gstin(2)].status, outcomes[_gstin(2)].attempts) == ("failed", 3)
+        assert f"gstr2b_sync:{PERIOD}:{_gstin(1)}" not in env.redis.hashes     # failures are retried next run
+
+    def test_error_bodies_are_retried_not_stored(self, env):
+        env.portal.responses[_gstin(0)] = [
+            {"status_cd": "0", "error": {"message": "Return not generated", "error_cd": "RET2B1016"}},
+            {"status_cd": "1", "status_desc": "Success (empty body)", "_empty": True},
+            {"status_cd": "1", "status_desc": "Success (non-JSON)", "_raw": "<html>"},
+            {"status_cd": "1"},
+        ]
+        with patch.object(settings, "GSTR2B_SYNC_MAX_ATTEMPTS", 4):
+            (outcome,) = _run(_targets(1))
+
+        assert (outcome.status, outcome.attempts) == ("failed", 4)
+        assert "no data" in outcome.error
+        assert env.store.await_count == 0 and env.reconcile.await_count == 0
+        assert not env.redis.hashes
+
+    def test_empty_payload_keeps_existing_lines(self, env):
+        target = _targets(1)
+        _run(target)
+        key = f"gstr2b_sync:{PERIOD}:{_gstin(0)}"
+        digest = env.redis.hashes[key]["payload_hash"]
+
+        env.redis.hashes[key]["synced_at"] = "0"
+        env.portal.responses[_gstin(0)] = [_resp()]
+        env.itc_repo.count_by_source.return_value = {"portal": 1}
+        assert [o.status for o in _run(target)] == ["kept"]
+        assert env.store.await_count == 1 and env.reconcile.await_count == 1
+        assert env.redis.hashes[key]["payload_hash"] == digest      # next run asks again
+
+    def test_uploaded_2b_is_left_alone(self, env):
+        env.itc_repo.count_by_source.return_value = {"upload": 12}
+        assert [o.status for o in _run(_targets(1))] == ["uploaded"]
+        assert env.store.await_count == 0 and env.reconcile.await_count == 0
+        assert not env.redis.hashes
+
+
+class TestRunSync:
+    def test_filed_periods_are_skipped_and_window_respected(self, env):
+        targets = _targets(3)
+        with patch.object(sync, "list_sync_targets", AsyncMock(return_value=targets)), \
+                patch.object(sync, "_filed_gstins", AsyncMock(return_value={_gstin(1)})), \
+                patch.object(sync, "_uploaded_gstins", AsyncMock(return_value=set())):
+            out = asyncio.run(sync.run_sync(today=date(2025, 2, 15)))
+            assert asyncio.run(sync.run_sync(today=date(2025, 2, 2)))["period"] is None
+
+        assert out["period"] == PERIOD
+        assert out["counts"] == {"filed": 1, "imported": 2} and out["failed"] == []
+        assert sorted(env.portal.fetches) == [_gstin(0), _gstin(2)]
+
+    def test_uploaded_periods_are_not_fetched(self, env):
+        with patch.object(sync, "list_sync_targets", AsyncMock(return_value=_targets(2))), \
+                patch.object(sync, "_filed_gstins", AsyncMock(return_value=set())), \
+                patch.object(sync, "_uploaded_gstins", AsyncMock(return_value={_gstin(0)})):
+            out = asyncio.run(sync.run_sync(PERIOD))
+
+        assert out["counts"] == {"uploaded": 1, "imported": 1}
+        assert env.portal.fetches == [_gstin(1)]
@@ -0,0 +1,246 @@
+# tests/test_invoice_aggregates.py
+"""Tests for set-based invoice aggregates (liability, GSTR-1, books vs portal)."""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.domain.services.books_vs_portal import _period_bounds, compare_sales
+from app.domain.services.gstr1_service import prepare_gstr1_form, prepare_gstr1_payload
+from app.infrastructure.db.repositories.invoice_aggregate_repository import (
+    DirectionTotals,
+    InvoiceAggregateRepository,
+    RatePosTotals,
+)
+
+USER = uuid.uuid4()
+START, END = date(2025, 1, 1), date(2025, 1, 31)
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect())).upper()
+
+
+# ---------------------------------------------------------------------------
+# Statement shape
+# ---------------------------------------------------------------------------
+
+class TestStatements:
+    def test_direction_totals_groups_in_sql(self):
+        sql = _sql(InvoiceAggregateRepository.totals_by_direction_stmt(USER, START, END))
+        assert "GROUP BY INVOICES.DIRECTION" in sql
+        assert "SUM(" in sql
+        assert "FILTER (WHERE" in sql
+
+    def test_rate_pos_groups_by_pos_and_rate(self):
+        sql = _sql(
+            InvoiceAggregateRepository.rate_pos_stmt(
+                USER, START, END, "outward", b2c_only=True
+            )
+        )
+        assert "GROUP BY POS, RATE" in sql
+        assert "INVOICES.DIRECTION =" in sql
+        assert "LENGTH(" in sql
+
+    def test_covering_index_declared(self):
+        from app.infrastructure.db.models import Invoice
+
+        idx = {i.name: i for i in Invoice.__table__.indexes}
+        assert "ix_invoices_user_direction_date" in idx
+        cols = [c.name for c in idx["ix_invoices_user_direction_date"].columns]
+        assert cols == ["user_id", "direction", "invoice_date"]
+
+    def test_aggregates_read_only_indexed_columns(self):
+        from sqlalchemy.sql import visitors
+
+        from app.infrastructure.db.models import Invoice
+
+        idx = {i.name: i for i in Invoice.__table__.indexes}
+        index = idx["ix_invoices_user_direction_date"]
+        covered = {c.name for c in index.columns}
+        covered |= set(index.dialect_options["postgresql"]["include"])
+        for stmt in (
+            InvoiceAggregateRepository.totals_by_direction_stmt(USER, START, END),
+            InvoiceAggregateRepository.rate_pos_stmt(USER, START, END, "outward"),
+            InvoiceAggregateRepository.rate_pos_stmt(
+                USER, START, END, "outward", b2c_only=True
+            ),
+        ):
+            read = {
+                el.name for el in visitors.iterate(stmt)
+                if getattr(el, "table", None) is Invoice.__table__
+            }
+            assert read <= covered, read - covered
+
+
+# ---------------------------------------------------------------------------
+# Service wiring
+# ---------------------------------------------------------------------------
+
+class TestLiabilityFromAggregates:
+    def test_compute_net_liability_uses_direction_totals(self):
+        from app.domain.services.gst_liability import compute_net_liability
+
+        period_rec = SimpleNamespace(id=uuid.uuid4(), user_id=USER, period="2025-01")
+        period_repo = MagicMock()
+        period_repo.get_by_id = AsyncMock(return_value=period_rec)
+        period_repo.update_computation = AsyncMock()
+        period_repo.update_status = AsyncMock()
+
+        totals = {
+            "outward": DirectionTotals(
+                count=3, igst=Decimal("1800"), cgst=Decimal("900"), sgst=Decimal("900")
+            ),
+            "inward": DirectionTotals(
+                count=2,
+                igst=Decimal("700"),
+                itc_igst=Decimal("500"),
+                rcm_cgst=Decimal("50"),
+                rcm_sgst=Decimal("50"),
+            ),
+        }
+
+        with patch(
+            "app.infrastructure.db.repositories.return_period_repository.ReturnPeriodRepository",
+            return_value=period_repo,
+        ), patch.object(
+            InvoiceAggregateRepository,
+            "totals_by_direction",
+            AsyncMock(return_value=totals),
+        ), patch(
+            "app.domain.services.gst_risk_scoring.compute_risk_score",
+            AsyncMock(side_effect=RuntimeError("skip")),
+        ), patch(
+            "app.infrastructure.db.repositories.monthly_rollup_repository.refresh_rollup_for_dates",
+            AsyncMock(),
+        ):
+            comp = asyncio.run(compute_net_liability(period_rec.id, MagicMock()))
+
+        assert comp.outward_count == 3
+        assert comp.inward_count == 2
+        assert comp.itc_igst == Decimal("500")
+        assert comp.net_igst == Decimal("1300")
+        assert comp.net_cgst == Decimal("950")
+        assert comp.net_sgst == Decimal("950")
+        assert "RCM_PRESENT" in comp.risk_flags
+
+    def test_empty_period_yields_zeroes(self):
+        from app.domain.services.gst_liability import compute_net_liability
+
+        period_rec = SimpleNamespace(id=uuid.uuid4(), user_id=USER, period="2025-02")
+        period_repo = MagicMock()
+        period_repo.get_by_id = AsyncMock(return_value=period_rec)
+        period_repo.update_computation = AsyncMock()
+        period_repo.update_status = AsyncMock()
+
+        with patch(
+            "app.infrastructure.db.repositories.return_period_repository.ReturnPeriodRepository",
+            return_value=period_repo,
+        ), patch.object(
+            InvoiceAggregateRepository, "totals_by_direction", AsyncMock(return_value={})
+        ), patch(
+            "app.domain.services.gst_risk_scoring.compute_risk_score",
+            AsyncMock(side_effect=RuntimeError("skip")),
+        ), patch(
+            "app.infrastructure.db.repositories.monthly_rollup_repository.refresh_rollup_for_dates",
+            AsyncMock(),
+        ):
+            comp = asyncio.run(compute_net_liability(period_rec.id, MagicMock()))
+
+        assert comp.outward_count == 0
+        assert comp.total_net_payable == Decimal("0")
+
+
+class TestGstr1FromAggregates:
+    def test_b2b_lines_and_b2c_buckets(self):
+        b2b_row = SimpleNamespace(
+            ctin="27AADCB2230M1ZP",
+            invoice_number="INV-1",
+            invoice_date=date(2025, 1, 5),
+            place_of_supply=None,
+            taxable_value=Decimal("1000"),
+            total_amount=None,
+            igst_amount=Decimal("180"),
+            cgst_amount=None,
+            sgst_amount=None,
+            tax_rate=None,
+        )
+        bucket = RatePosTotals(
+            pos="36",
+            rate=Decimal("18.00"),
+            count=4,
+            taxable_value=Decimal("4000"),
+            igst=Decimal("0"),
+            cgst=Decimal("360"),
+            sgst=Decimal("360"),
+        )
+        repo = SimpleNamespace(db=MagicMock())
+
+        with patch.object(
+            InvoiceAggregateRepository, "list_b2b_lines", AsyncMock(return_value=[b2b_row])
+        ), patch.object(
+            InvoiceAggregateRepository,
+            "totals_by_rate_and_pos",
+            AsyncMock(return_value=[bucket]),
+        ):
+            payload = asyncio.run(
+                prepare_gstr1_payload(USER, "36AABCU9603R1ZM", START, END, repo)
+            )
+
+        assert payload.fp == "012025"
+        assert len(payload.b2b) == 1
+        inv = payload.b2b[0].inv[0]
+        assert inv.pos == "27"
+        assert inv.val == Decimal("1180")
+        assert inv.itms[0].rt == Decimal("18")
+        assert payload.b2c[0].count == 4
+
+        form = prepare_gstr1_form(payload)
+        assert form["b2b_invoices"] == 1
+        assert form["b2c_invoices"] == 4
+        assert form["total_txval"] == 5000.0
+
+
+class TestBooksVsPortal:
+    def test_period_bounds(self):
+        assert _period_bounds("2024-02") == (date(2024, 2, 1), date(2024, 2, 29))
+        assert _period_bounds("bad") is None
+
+    def test_compare_sales_uses_projected_rows(self):
+        rows = [
+            SimpleNamespace(
+                invoice_number=" inv-1 ",
+                supplier_gstin=None,
+                recipient_gstin="27AADCB2230M1ZP",
+                taxable_value=Decimal("100"),
+                igst_amount=Decimal("18"),
+                cgst_amount=None,
+                sgst_amount=None,
+            ),
+            SimpleNamespace(
+                invoice_number="",
+                supplier_gstin=None,
+                recipient_gstin=None,
+                taxable_value=Decimal("50"),
+                igst_amount=None,
+                cgst_amount=None,
+                sgst_amount=None,
+            ),
+        ]
+        with patch.object(
+            InvoiceAggregateRepository, "list_lines", AsyncMock(return_value=rows)
+        ) as list_lines:
+            summary = asyncio.run(compare_sales(USER, "", "2025-01", MagicMock()))
+
+        args = list_lines.await_args.args
+        assert args[1:] == (START, END, "outward")
+        assert summary.total_books_count == 1
+        assert summary.items[0].invoice_number == "INV-1"
+        assert summary.total_books_value == 100.0
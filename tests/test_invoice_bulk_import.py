@@ -0,0 +1,258 @@
+# tests/test_invoice_bulk_import.py
+"""Tests for bulk invoice ingestion (NDJSON / CSV, COPY + set-based merge)."""
+
+from __future__ import annotations
+
+import asyncio
+import gzip
+import json
+import os
+import uuid
+from dataclasses import astuple
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.domain.services import invoice_bulk_import as bi
+from app.infrastructure.db.repositories import invoice_bulk_repository as repo
+
+USER_ID = uuid.uuid4()
+GSTIN_1 = "36AABCU9603R1ZM"
+
+
+def _record(n="INV-1", **overrides):
+    rec = {"invoice_number": n, "invoice_date": "2025-01-15", "supplier_gstin": GSTIN_1,
+           "direction": "inward", "taxable_value": "1000", "cgst_amount": "90", "sgst_amount": "90"}
+    rec.update(overrides)
+    return rec
+
+
+def _result(rows):
+    res = MagicMock()
+    res.all.return_value = rows
+    return res
+
+
+class _FakeRedis:
+    """Hash / list subset of redis.asyncio used by the import job."""
+
+    def __init__(self):
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.lists: dict[str, list[str]] = {}
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        h = self.hashes.setdefault(key, {})
+        if mapping:
+            h.update({k: str(v) for k, v in mapping.items()})
+        if field is not None:
+            h[field] = str(value)
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def expire(self, key, ttl):
+        return True
+
+    async def lrange(self, key, start, end):
+        return self.lists.get(key, [])[start:end + 1]
+
+    def pipeline(self, transaction=True):
+        fake, ops = self, []
+
+        class _Pipe:
+            def rpush(self, key, value):
+                ops.append(lambda: fake.lists.setdefault(key, []).append(value))
+
+            def hincrby(self, key, field, n):
+                def _incr():
+                    h = fake.hashes.setdefault(key, {})
+                    h[field] = str(int(h.get(field, 0)) + n)
+                ops.append(_incr)
+
+            def expire(self, key, ttl):
+                ops.append(lambda: None)
+
+            async def execute(self):
+                return [op() for op in ops]
+
+        return _Pipe()
+
+
+async def _chunks(*parts: bytes):
+    for part in parts:
+        yield part
+
+
+# ---------------------------------------------------------------------------
+# Parsing / validation
+# ---------------------------------------------------------------------------
+
+class TestParsing:
+    def test_detect_format(self):
+        assert bi.detect_format("application/x-ndjson") == "ndjson"
+        assert bi.detect_format("text/csv; charset=utf-8") == "csv"
+        assert bi.detect_format("application/octet-stream", "csv") == "csv"
+        with pytest.raises(ValueError):
+            bi.detect_format("application/json")
+
+    def test_validate_row_normalises(self):
+        row = bi.validate_row(2, _record(supplier_gstin=GSTIN_1.lower(), itc_eligible="yes"))
+        assert isinstance(row, bi.BulkRow)
+        assert row.supplier_gstin == GSTIN_1 and row.supplier_gstin_valid is True
+        assert row.invoice_date == date(2025, 1, 15)
+        assert row.tax_amount == Decimal("180.00")
+        assert row.itc_eligible is True and row.reverse_charge is False
+        assert len(astuple(row)) == len(repo.STAGE_COLUMNS)
+
+    def test_validate_row_collects_errors(self):
+        err = bi.validate_row(3, _record(n="", invoice_date="15/01/2025", direction="sideways",
+                                         taxable_value="abc", igst_amount="1e12"))
+        assert isinstance(err, bi.RowError) and err.outcome == "failed"
+        assert "invoice_number is required" in err.reason
+        assert "invoice_date must be YYYY-MM-DD" in err.reason
+        assert "direction must be outward or inward" in err.reason
+        assert "taxable_value is not a number" in err.reason
+        assert "igst_amount out of range" in err.reason
+
+    def test_ndjson_bad_lines_become_row_errors(self, tmp_path):
+        path = tmp_path / "in.ndjson"
+        path.write_text(json.dumps(_record()) + "\n\n{oops\n[1]\n", encoding="utf-8")
+        with bi.open_spooled(str(path)) as fh:
+            records = list(bi.iter_records(fh, "ndjson"))
+        assert [n for n, _ in records] == [1, 3, 4]
+        assert records[1][1] is None and records[2][1] is None
+        assert bi.validate_row(3, None).reason == "not a JSON object"
+
+    def test_gzip_csv_is_read_transparently(self, tmp_path):
+        path = tmp_path / "in.csv.gz"
+        path.write_bytes(gzip.compress(b"invoice_number,taxable_value\nA-1,10\nA-2,20\n"))
+        with bi.open_spooled(str(path)) as fh:
+            records = list(bi.iter_records(fh, "csv"))
+        assert [(n, r["invoice_number"]) for n, r in records] == [(2, "A-1"), (3, "A-2")]
+
+    def test_dedupe_keeps_last_row_per_key(self):
+        rows = [bi.validate_row(n, _record(taxable_value=str(n))) for n in (2, 3, 4)]
+        rows.append(bi.validate_row(5, _record(direction="outward")))
+        kept, skipped = bi.dedupe_batch(rows)
+        assert [r.row_num for r in kept] == [4, 5]
+        assert [(s.row, s.outcome) for s in skipped] == [(2, "skipped"), (3, "skipped")]
+        assert skipped[0].reason == "superseded by row 3"
+
+
+# ---------------------------------------------------------------------------
+# Merge statements
+# ---------------------------------------------------------------------------
+
+class TestMerge:
+    def test_statements_are_set_based_on_the_natural_key(self):
+        assert "ON COMMIT DELETE ROWS" in repo.CREATE_STAGE_SQL
+        for sql in (repo.UPDATE_SQL, repo.INSERT_SQL):
+            assert "i.supplier_gstin IS NOT DISTINCT FROM s.supplier_gstin" in sql
+            assert f"FROM {repo.STAGE_TABLE}" in sql
+        assert "IS DISTINCT FROM" in repo.UPDATE_SQL.replace("IS NOT DISTINCT FROM", "")
+        assert "WHERE NOT EXISTS" in repo.INSERT_SQL
+
+    def test_merge_batch_copies_then_counts(self):
+        driver = MagicMock()
+        driver.copy_records_to_table = AsyncMock()
+        conn = MagicMock()
+        conn.get_raw_connection = AsyncMock(return_value=SimpleNamespace(driver_connection=driver))
+        db = MagicMock()
+        db.connection = AsyncMock(return_value=conn)
+        updated = [SimpleNamespace(row_num=3, old_date=date(2024, 12, 31))]
+        inserted = [SimpleNamespace(id=uuid.uuid4())]
+        db.execute = AsyncMock(side_effect=[MagicMock(), MagicMock(), _result(updated), _result(inserted)])
+
+        rows = [astuple(bi.validate_row(n, _record(n=f"INV-{n}"))) for n in (2, 3, 4)]
+        counts = asyncio.run(repo.merge_batch(db, USER_ID, rows))
+
+        assert (counts.inserted, counts.updated, counts.unchanged) == (1, 1, 1)
+        assert counts.dates == {date(2024, 12, 31), date(2025, 1, 15)}
+        kwargs = driver.copy_records_to_table.await_args.kwargs
+        assert kwargs["columns"] == list(repo.STAGE_COLUMNS) and len(kwargs["records"]) == 3
+        assert "pg_advisory_xact_lock" in str(db.execute.await_args_list[0].args[0])
+
+    def test_import_batch_rolls_back_whole_batch_on_db_error(self):
+        db = MagicMock()
+        db.commit = AsyncMock()
+        db.rollback = AsyncMock()
+        batch = [(2, _record(n="A")), (3, _record(n="", taxable_value="1")), (4, _record(n="B"))]
+        with patch.object(repo, "merge_batch", AsyncMock(side_effect=RuntimeError("boom"))):
+            counts, errors = asyncio.run(bi.import_batch(db, USER_ID, batch))
+        assert counts == {"failed": 3}
+        assert {e.row for e in errors} == {2, 3, 4}
+        db.rollback.assert_awaited_once()
+        db.commit.assert_not_awaited()
+
+
+# ---------------------------------------------------------------------------
+# Job lifecycle
+# ---------------------------------------------------------------------------
+
+class TestJob:
+    def test_spool_enforces_limit(self):
+        path = asyncio.run(bi.spool_stream(_chunks(b"a" * 10, b"b" * 10), max_bytes=64))
+        with open(path, "rb") as fh:
+            assert fh.read() == b"a" * 10 + b"b" * 10
+        os.unlink(path)
+        with pytest.raises(ValueError):
+            asyncio.run(bi.spool_stream(_chunks(b"x" * 100), max_bytes=64))
+        with pytest.raises(ValueError):
+            asyncio.run(bi.spool_stream(_chunks()))
+
+    def test_run_import_records_counts_and_errors(self, tmp_path):
+        lines = [_record(n="A"), _record(n="B"), _record(n="A", taxable_value="5"), {"invoice_number": "C"}]
+        path = tmp_path / "body"
+        path.write_bytes(gzip.compress("\n".join(json.dumps(r) for r in lines).encode()))
+        redis = _FakeRedis()
+        redis.hashes["invoice_bulk:job1"] = {"user_id": str(USER_ID)}
+        session = MagicMock()
+        db = MagicMock()
+        db.commit = AsyncMock()
+        session.__aenter__ = AsyncMock(return_value=db)
+        session.__aexit__ = AsyncMock(return_value=False)
+        merged = []
+
+        async def fake_merge(db, user_id, records):
+            merged.append([r[0] for r in records])
+            return repo.MergeCounts(inserted=len(records), dates={date(2025, 1, 15)})
+
+        async def run():
+            await bi.run_import("job1", USER_ID, str(path), "ndjson", batch_size=10)
+            return [part async for part in bi.iter_errors_csv("job1")]
+
+        with patch("app.infrastructure.cache.redis_client.get_redis_client", return_value=redis), \
+                patch("app.core.db.AsyncSessionLocal", return_value=session), \
+                patch.object(repo, "merge_batch", side_effect=fake_merge), \
+                patch("app.infrastructure.db.repositories.monthly_rollup_repository.refresh_rollup_for_dates",
+                      AsyncMock()) as rollup:
+            parts = asyncio.run(run())
+            status = asyncio.run(bi.get_import_status("job1", USER_ID))
+            other = asyncio.run(bi.get_import_status("job1", uuid.uuid4()))
+
+        assert merged == [[2, 3]]          # row 1 superseded by row 3, row 4 invalid
+        assert status["status"] == "done"
+        assert (status["processed"], status["inserted"], status["failed"]) == (4, 2, 1)
+        assert other is None
+        rollup.assert_awaited_once()
+        out = "".join(parts).splitlines()
+        assert out[0] == ",".join(bi.ERROR_COLUMNS)
+        assert out[1] == "1,A,skipped,superseded by row 3"
+        assert out[2].startswith("4,C,failed,")
+        assert not path.exists()
+
+    def test_missing_invoice_number_column_fails_job(self, tmp_path):
+        path = tmp_path / "bad.csv"
+        path.write_text("number,amount\nA,1\n", encoding="utf-8")
+        redis = _FakeRedis()
+        session = MagicMock()
+        session.__aenter__ = AsyncMock(return_value=MagicMock())
+        session.__aexit__ = AsyncMock(return_value=False)
+        with patch("app.infrastructure.cache.redis_client.get_redis_client", return_value=redis), \
+                patch("app.core.db.AsyncSessionLocal", return_value=session):
+            asyncio.run(bi.run_import("job2", USER_ID, str(path), "csv"))
+        assert redis.hashes["invoice_bulk:job2"]["status"] == "failed"
+        assert "invoice_number" in redis.hashes["invoice_bulk:job2"]["error"]
@@ -0,0 +1,189 @@
+# tests/test_invoice_export.py
+"""Tests for streaming invoice / return exports (CSV, XLSX, GSTR-1/3B JSON)."""
+
+from __future__ import annotations
+
+import asyncio
+import io
+import json
+import uuid
+import zipfile
+from datetime import date
+from decimal import Decimal
+from xml.etree import ElementTree
+
+from sqlalchemy.dialects import postgresql
+
+from app.domain.services import invoice_export as ex
+from app.domain.services.gst_export import (
+    gstr3b_summary_from_totals,
+    iter_gstr1_json,
+    make_gstr1_json,
+)
+from app.domain.services.gstr1_service import (
+    Gstr1B2BEntry,
+    Gstr1B2CInvoice,
+    Gstr1Invoice,
+    Gstr1Item,
+    Gstr1Payload,
+)
+from app.infrastructure.db.repositories.invoice_aggregate_repository import (
+    DirectionTotals,
+    InvoiceAggregateRepository,
+)
+
+USER = uuid.uuid4()
+NS = {"m": "http://schemas.openxmlformats.org/spreadsheetml/2006/main"}
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect())).upper()
+
+
+class _Rows:
+    """Async row source that records how many rows were pulled."""
+
+    def __init__(self, rows):
+        self.rows = list(rows)
+        self.pulled = 0
+
+    def __aiter__(self):
+        return self._gen()
+
+    async def _gen(self):
+        for row in self.rows:
+            self.pulled += 1
+            yield row
+
+
+def _collect(agen):
+    async def run():
+        return [chunk async for chunk in agen]
+    return asyncio.run(run())
+
+
+def _first_chunk(agen):
+    async def run():
+        chunk = await agen.__anext__()
+        await agen.aclose()
+        return chunk
+    return asyncio.run(run())
+
+
+def _row(n):
+    return (f"INV-{n}", date(2025, 1, n), "outward", "36AABCU9603R1ZM", None, None, "36",
+            Decimal("100.00"), Decimal("18.00"), Decimal("9.00"), Decimal("9.00"), None,
+            Decimal("18.00"), Decimal("118.00"), False, False, None)
+
+
+class TestStatements:
+    def test_export_stmt_filters_and_uses_server_side_cursor(self):
+        stmt = ex.invoice_export_stmt(USER, date(2025, 1, 1), date(2025, 1, 31), "outward")
+        sql = _sql(stmt)
+        assert "INVOICES.INVOICE_DATE >=" in sql and "INVOICES.DIRECTION =" in sql
+        assert "ORDER BY INVOICES.INVOICE_DATE, INVOICES.CREATED_AT" in sql
+        assert stmt.get_execution_options()["yield_per"] > 0
+        assert len(stmt.selected_columns) == len(ex.EXPORT_COLUMNS)
+
+    def test_b2b_stream_is_grouped_by_counterparty(self):
+        sql = _sql(InvoiceAggregateRepository.b2b_lines_stmt(
+            USER, date(2025, 1, 1), date(2025, 1, 31), by_counterparty=True))
+        assert "ORDER BY CTIN, INVOICES.INVOICE_DATE" in sql
+
+
+class TestCsv:
+    def test_header_is_sent_before_any_row_is_read(self):
+        rows = _Rows(_row(n) for n in range(1, 4))
+        assert _first_chunk(ex.iter_csv(rows)).startswith("invoice_number,invoice_date,")
+        assert rows.pulled == 0
+
+    def test_rows_are_flushed_in_chunks(self):
+        chunks = _collect(ex.iter_csv(_Rows(_row(n) for n in range(1, 6)), flush_rows=2))
+        assert len(chunks) == 4                 # header, 2, 2, 1
+        lines = "".join(chunks).splitlines()
+        assert len(lines) == 6
+        assert lines[1].startswith("INV-1,2025-01-01,outward,36AABCU9603R1ZM,,,36,100.00,")
+
+
+class TestXlsx:
+    def test_workbook_is_valid(self):
+        rows = _Rows([_row(1), ("A<&>\x01B", None, True)])
+        chunks = _collect(ex.iter_xlsx(rows, flush_rows=1))
+
+        with zipfile.ZipFile(io.BytesIO(b"".join(chunks))) as zf:
+            assert zf.testzip() is None
+            sheet = ElementTree.fromstring(zf.read("xl/worksheets/sheet1.xml"))
+            ElementTree.fromstring(zf.read("xl/workbook.xml"))
+
+        rendered = sheet.findall(".//m:row", NS)
+        assert len(rendered) == 3
+        header = [c.find(".//m:t", NS).text for c in rendered[0].findall("m:c", NS)]
+        assert header == list(ex.EXPORT_COLUMNS)
+        cells = rendered[2].findall("m:c", NS)
+        assert cells[0].find(".//m:t", NS).text == "A<&>B"
+        assert cells[2].get("t") == "b" and cells[2].find("m:v", NS).text == "1"
+        assert rendered[1].findall("m:c", NS)[7].find("m:v", NS).text == "100.00"
+
+    def test_sheet_is_emitted_while_rows_are_read(self):
+        rows = _Rows((f"INV-{n}-{uuid.uuid4().hex}", n) for n in range(20000))
+        seen = []
+
+        async def run():
+            async for chunk in ex.iter_xlsx(rows, columns=("number", "n"), flush_rows=500):
+                seen.append(rows.pulled)
+        asyncio.run(run())
+
+        assert len(seen) > 3
+        assert seen[1] < len(rows.rows)          # output began before the cursor was drained
+
+    def test_preamble_is_sent_before_any_row_is_read(self):
+        rows = _Rows([_row(1)])
+        assert _first_chunk(ex.iter_xlsx(rows)).startswith(b"PK")
+        assert rows.pulled == 0
+
+
+class TestReturnJson:
+    def _payload(self):
+        item = Gstr1Item(txval=Decimal("100"), rt=Decimal("18"), igst=Decimal("0"),
+                         cgst=Decimal("9"), sgst=Decimal("9"))
+
+        def inv(num):
+            return Gstr1Invoice(num=num, dt="05-01-2025", val=Decimal("118"), pos="36", itms=[item])
+
+        return Gstr1Payload(
+            gstin="36AABCU9603R1ZM", fp="012025",
+            b2b=[Gstr1B2BEntry(ctin="27AAACR5055K1Z5", inv=[inv("1"), inv("2")]),
+                 Gstr1B2BEntry(ctin="29AABCT1332L1ZU", inv=[inv("3")])],
+            b2c=[Gstr1B2CInvoice(pos="36", txval=Decimal("50"), rt=Decimal("5"),
+                                 igst=Decimal("0"), cgst=Decimal("1.25"), sgst=Decimal("1.25"))],
+        )
+
+    def test_streamed_gstr1_matches_in_memory_builder(self):
+        payload = self._payload()
+
+        async def b2b():
+            for entry in payload.b2b:
+                for inv in entry.inv:
+                    yield entry.ctin, inv
+
+        streamed = json.loads("".join(_collect(iter_gstr1_json(payload.gstin, payload.fp, b2b(), payload.b2c))))
+        assert streamed == make_gstr1_json(payload)
+
+    def test_streamed_gstr1_with_no_invoices(self):
+        async def b2b():
+            return
+            yield
+
+        doc = json.loads("".join(_collect(iter_gstr1_json("36AABCU9603R1ZM", "012025", b2b(), []))))
+        assert doc["b2b"] == [] and doc["b2cs"] == [] and doc["gt"] == 0.0
+
+    def test_gstr3b_summary_from_sql_totals(self):
+        summary = gstr3b_summary_from_totals({
+            "outward": DirectionTotals(count=3, taxable_value=Decimal("1000"), igst=Decimal("180")),
+            "inward": DirectionTotals(itc_cgst=Decimal("45"), rcm_taxable_value=Decimal("200"),
+                                      rcm_igst=Decimal("36")),
+        })
+        assert summary.outward_taxable_supplies.igst == Decimal("180")
+        assert summary.inward_reverse_charge.taxable_value == Decimal("200")
+        assert summary.itc_eligible.cgst == Decimal("45")
+        assert summary.total_invoices == 3
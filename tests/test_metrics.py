@@ -0,0 +1,113 @@
+# tests/test_metrics.py
+"""Tests for the in-process metrics registry and /metrics exposition."""
+
+import asyncio
+from unittest.mock import patch
+
+import pytest
+from sqlalchemy import create_engine, text
+
+from app.core import metrics
+from app.core.metrics import (
+    Counter,
+    Gauge,
+    Histogram,
+    MetricsMiddleware,
+    instrument_engine,
+)
+
+
+class TestHistogram:
+    def test_buckets_are_cumulative_in_output(self):
+        h = Histogram(
+            "t_latency_seconds", "test", ("op",), buckets=(0.1, 1.0), register=False
+        )
+        child = h.labels("get")
+        for v in (0.05, 0.5, 0.5, 5.0):
+            child.observe(v)
+        out = h.render()
+        assert 't_latency_seconds_bucket{op="get",le="0.1"} 1' in out
+        assert 't_latency_seconds_bucket{op="get",le="1"} 3' in out
+        assert 't_latency_seconds_bucket{op="get",le="+Inf"} 4' in out
+        assert 't_latency_seconds_count{op="get"} 4' in out
+        assert 't_latency_seconds_sum{op="get"} 6.05' in out
+
+    def test_labels_child_is_cached(self):
+        h = Histogram("t_cached_seconds", "test", ("a", "b"), register=False)
+        assert h.labels("x", "y") is h.labels("x", "y")
+
+    def test_wrong_label_count_rejected(self):
+        h = Histogram("t_bad_seconds", "test", ("a",), register=False)
+        with pytest.raises(ValueError):
+            h.labels("x", "y")
+
+    def test_timed_decorator_observes_even_on_error(self):
+        h = Histogram("t_timed_seconds", "test", register=False)
+
+        @metrics.timed(h.labels())
+        async def boom():
+            raise RuntimeError("x")
+
+        with pytest.raises(RuntimeError):
+            asyncio.run(boom())
+        assert h.labels().count == 1
+
+
+class TestCounterGauge:
+    def test_label_values_escaped(self):
+        c = Counter("t_total", "test", ("path",), register=False)
+        c.labels('a"b').inc()
+        assert 't_total{path="a\\"b"} 1' in c.render()
+
+    def test_gauge_function_read_at_render(self):
+        g = Gauge("t_depth", "test", register=False)
+        depth = [3]
+        g.set_function(lambda: depth[0])
+        depth[0] = 7
+        assert "t_depth 7" in g.render()
+
+
+class TestRequestInstrumentation:
+    def test_db_queries_counted_per_request(self):
+        engine = create_engine("sqlite://")
+        instrument_engine(engine)
+
+        async def app(scope, receive, send):
+            with engine.connect() as conn:
+                conn.execute(text("SELECT 1"))
+                conn.execute(text("SELECT 2"))
+
+        route = type("R", (), {"path": "/t/q"})()
+        scope = {"type": "http", "method": "GET", "route": route}
+        asyncio.run(MetricsMiddleware(app)(scope, None, None))
+
+        child = metrics.DB_QUERIES_PER_REQUEST.labels("/t/q")
+        assert child.count == 1
+        assert child.sum == 2
+        assert metrics.HTTP_REQUEST_SECONDS.labels("GET", "/t/q").count == 1
+        assert metrics.DB_QUERY_SECONDS.labels("SELECT").count >= 2
+
+    def test_render_includes_hot_path_metrics(self):
+        out = metrics.render()
+        for name in (
+            "whatsapp_webhook_signature_seconds",
+            "session_cache_seconds",
+            "whatsapp_handler_seconds",
+            "resolve_intent_seconds",
+            "openai_call_seconds",
+            "gst_api_seconds",
+            "arq_queue_depth",
+        ):
+            assert f"# TYPE {name} " in out
+
+
+def test_metrics_route_renders_text():
+    from app.api.routes import metrics as metrics_route
+
+    async def _no_arq():
+        metrics.ARQ_QUEUE_DEPTH.set(0)
+
+    with patch.object(metrics_route, "_refresh_arq_depth", _no_arq):
+        resp = asyncio.run(metrics_route.prometheus_metrics())
+    assert resp.media_type.startswith("text/plain")
+    assert b"whatsapp_outgoing_queue_depth 0" in resp.body
@@ -0,0 +1,206 @@
+# tests/test_ml_training_pipeline.py
+"""Tests for bulk feature extraction, snapshot caching and candidate CV."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from datetime import date, datetime, timezone
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import numpy as np
+from sqlalchemy.dialects import postgresql
+
+from app.domain.services import ml_training_pipeline as pipeline
+from app.domain.services.gst_risk_scoring import (
+    RiskMetrics,
+    _load_risk_metrics_bulk,
+    bulk_metric_stmts,
+)
+from app.domain.services.ml_feature_engineering import (
+    FEATURE_COUNT,
+    FEATURE_NAMES,
+    FEATURE_VERSION,
+)
+from app.domain.services.ml_risk_model import (
+    OUTCOME_CLASSES,
+    CandidateScore,
+    RiskMLModel,
+    cross_validate_candidates,
+)
+
+USER = uuid.uuid4()
+P1, P2 = uuid.uuid4(), uuid.uuid4()
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect())).upper()
+
+
+def _result(rows=(), scalars=None):
+    res = MagicMock()
+    res.all.return_value = list(rows)
+    res.scalars.return_value.all.return_value = list(scalars or [])
+    return res
+
+
+def _period(pid, period, status="draft", **tax):
+    fields = dict(
+        id=pid, user_id=USER, gstin="36AABCU9603R1ZM", period=period, status=status,
+        filing_mode="monthly", outward_count=4, inward_count=2, due_date_gstr3b=date(2025, 2, 20),
+    )
+    for head in ("net_payable", "rcm", "itc", "output_tax"):
+        for part in ("igst", "cgst", "sgst"):
+            fields[f"{head}_{part}"] = tax.get(f"{head}_{part}", Decimal("0"))
+    return SimpleNamespace(**fields)
+
+
+def _history(period, output, itc):
+    return SimpleNamespace(
+        user_id=USER, gstin="36AABCU9603R1ZM", period=period,
+        output_tax_igst=Decimal(output), output_tax_cgst=Decimal("0"), output_tax_sgst=Decimal("0"),
+        itc_igst=Decimal(itc), itc_cgst=Decimal("0"), itc_sgst=Decimal("0"),
+    )
+
+
+def _training_data(n=90):
+    rng = np.random.RandomState(42)
+    return rng.rand(n, FEATURE_COUNT), rng.choice(OUTCOME_CLASSES, size=n)
+
+
+# ---------------------------------------------------------------------------
+# Bulk metric extraction
+# ---------------------------------------------------------------------------
+
+class TestBulkMetrics:
+    def test_statements_are_set_based(self):
+        stmts = bulk_metric_stmts([P1, P2], [USER])
+        assert "HAVING COUNT(INVOICES.ID) >" in _sql(stmts["duplicates"])
+        counts = _sql(stmts["invoice_counts"])
+        assert counts.count("FILTER (WHERE") == 2
+        assert "GROUP BY INVOICES.USER_ID" in counts
+        assert "ITC_MATCHES.PERIOD_ID IN" in _sql(stmts["matches"])
+        assert "GROUP BY PAYMENT_RECORDS.PERIOD_ID" in _sql(stmts["payments"])
+
+    def test_assembles_metrics_per_period(self):
+        jan = _period(P1, "2025-01", output_tax_igst=Decimal("1000"), itc_igst=Decimal("400"))
+        feb = _period(P2, "2025-02", status="filed", output_tax_igst=Decimal("500"))
+        db = MagicMock()
+        db.execute = AsyncMock(side_effect=[
+            _result(scalars=[jan, feb]),
+            _result([(USER, 3)]),
+            _result([SimpleNamespace(user_id=USER, missing_gstin_b2b=2, blocked_itc=1)]),
+            _result([(P1, "matched", 5), (P1, "missing_in_2b", 1)]),
+            _result([SimpleNamespace(period_id=P2, cnt=1, total=Decimal("900"))]),
+            _result([_history("2024-11", "300", "100"), _history("2024-12", "600", "200"),
+                     _history("2025-01", "1000", "400"), _history("2025-02", "500", "0")]),
+            _result([("36AABCU9603R1ZM", "composition"), ("36AABCU9603R1ZM", "regular")]),
+        ])
+
+        out = asyncio.run(_load_risk_metrics_bulk([P1, P2], db, today=date(2025, 3, 10)))
+
+        assert db.execute.await_count == 7
+        m1, m2 = out[P1], out[P2]
+        assert m1.duplicate_invoice_count == m2.duplicate_invoice_count == 3
+        assert m1.missing_gstin_b2b_count == 2 and m1.blocked_itc_count == 1
+        assert m1.has_2b_data and m1.total_2b_entries == 6 and m1.missing_in_2b_count == 1
+        assert not m2.has_2b_data
+        assert m2.payment_count == 1 and m2.total_paid == Decimal("900")
+        assert m1.itc_ratio == 0.4
+        assert m1.days_past_due == 18 and m2.days_past_due == 0
+        assert m1.avg_turnover_3 == Decimal("450")                 # Nov + Dec
+        assert m2.avg_turnover_3 == Decimal("1900") / 3            # Nov..Jan
+        assert m1.taxpayer_type == "composition"                   # oldest client wins
+
+    def test_unknown_periods_get_default_metrics(self):
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=_result(scalars=[]))
+        out = asyncio.run(_load_risk_metrics_bulk([P1], db))
+        assert isinstance(out[P1], RiskMetrics)
+        assert db.execute.await_count == 1
+
+
+# ---------------------------------------------------------------------------
+# Feature snapshots
+# ---------------------------------------------------------------------------
+
+class TestFeatureSnapshots:
+    def test_cache_query_checks_version_staleness_and_ttl(self):
+        sql = _sql(pipeline.cached_features_stmt([P1], FEATURE_VERSION, datetime.now(timezone.utc)))
+        assert "ML_FEATURE_SNAPSHOTS.FEATURE_VERSION =" in sql
+        assert "ML_FEATURE_SNAPSHOTS.COMPUTED_AT >= RETURN_PERIODS.UPDATED_AT" in sql
+        assert "RETURN_PERIODS.STATUS IN" in sql
+
+    def test_upsert_overwrites_on_period_conflict(self):
+        sql = _sql(pipeline.upsert_snapshots_stmt([{
+            "period_id": P1, "feature_version": FEATURE_VERSION,
+            "features_json": "[]", "computed_at": datetime.now(timezone.utc),
+        }]))
+        assert "ON CONFLICT (PERIOD_ID) DO UPDATE" in sql
+
+    def test_only_uncached_periods_are_computed(self):
+        cached = [0.5] * FEATURE_COUNT
+        db = MagicMock()
+        db.commit = AsyncMock()
+        db.execute = AsyncMock(side_effect=[
+            _result([(P1, "ok"), (P2, "ok")]),               # labeled assessments
+            _result([(P1, json.dumps(cached))]),             # valid snapshots
+            _result(),                                       # snapshot upsert
+        ])
+        bulk = AsyncMock(return_value={P2: RiskMetrics()})
+
+        with patch("app.domain.services.gst_risk_scoring._load_risk_metrics_bulk", bulk):
+            X, y, names = asyncio.run(pipeline.collect_training_data(db))
+
+        bulk.assert_awaited_once()
+        assert bulk.await_args.args[0] == [P2]
+        assert X.shape == (2, FEATURE_COUNT) and list(X[0]) == cached
+        assert list(y) == ["ok", "ok"] and names == FEATURE_NAMES
+        assert "ON CONFLICT" in _sql(db.execute.await_args_list[-1].args[0])
+        db.commit.assert_awaited_once()
+
+
+# ---------------------------------------------------------------------------
+# Candidates and timings
+# ---------------------------------------------------------------------------
+
+class TestCandidates:
+    def test_hist_gradient_boosting_trains_with_importances(self):
+        X, y = _training_data()
+        model = RiskMLModel(n_estimators=10, max_depth=3, algorithm="hist_gradient_boosting")
+        metrics = model.train(X, y, FEATURE_NAMES)
+        assert len(metrics.feature_importances) == FEATURE_COUNT
+
+        restored = RiskMLModel.deserialize(model.serialize())
+        assert restored.algorithm == "hist_gradient_boosting"
+        pred = restored.predict(X[0])
+        assert pred.predicted_outcome in OUTCOME_CLASSES
+        assert pred.feature_importances == metrics.feature_importances
+
+    def test_cross_validation_ranks_candidates(self):
+        X, y = _training_data()
+        scores = cross_validate_candidates(
+            X, y, ["gradient_boosting", "hist_gradient_boosting"],
+            n_estimators=5, max_depth=2, folds=3, n_jobs=1,
+        )
+        assert {s.algorithm for s in scores} == {"gradient_boosting", "hist_gradient_boosting"}
+        assert scores[0].f1_macro_mean >= scores[1].f1_macro_mean
+        assert all(isinstance(s, CandidateScore) and s.fit_seconds > 0 for s in scores)
+
+    def test_cross_validation_skips_single_sample_classes(self):
+        X, y = _training_data(20)
+        y[0] = "rare"
+        assert cross_validate_candidates(X, y, folds=5) == []
+
+    def test_training_result_reports_stage_seconds(self):
+        result = pipeline.TrainingResult(
+            model_id="m", version=2, training_samples=90, accuracy=0.5, f1_macro=0.4,
+            feature_importances={}, auto_activated=False, algorithm="hist_gradient_boosting",
+            stage_seconds={"collect": 1.23456, "fit": 0.5},
+        )
+        d = result.to_dict()
+        assert d["algorithm"] == "hist_gradient_boosting"
+        assert d["stage_seconds"] == {"collect": 1.235, "fit": 0.5}
@@ -0,0 +1,179 @@
+# tests/test_monthly_rollup.py
+"""Tests for the monthly_gst_rollup table and its readers (GSTR-9, turnover recon)."""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from sqlalchemy.dialects import postgresql
+
+from app.infrastructure.db.models import Invoice
+from app.infrastructure.db.repositories.monthly_rollup_repository import (
+    MonthlyRollupRepository,
+    RollupTotals,
+    _delta_upsert,
+    _invoice_row,
+    _rollup_select,
+    _upsert,
+    add_invoice_to_rollup,
+    period_of,
+    refresh_rollup_for_dates,
+)
+
+USER = uuid.uuid4()
+
+
+def test_period_of():
+    assert period_of(date(2025, 1, 31)) == "2025-01"
+    assert period_of(date(2024, 12, 1)) == "2024-12"
+
+
+def test_upsert_statement_groups_and_overwrites():
+    sql = str(
+        _upsert(_rollup_select(Invoice.user_id == USER)).compile(
+            dialect=postgresql.dialect()
+        )
+    )
+    assert "INSERT INTO monthly_gst_rollup" in sql
+    assert "GROUP BY invoices.user_id, rollup_gstin, rollup_period, invoices.direction" in sql
+    assert "ON CONFLICT ON CONSTRAINT uq_monthly_gst_rollup_key DO UPDATE" in sql
+
+
+def test_refresh_periods_empty_is_noop():
+    db = MagicMock()
+    db.execute = AsyncMock()
+    asyncio.run(MonthlyRollupRepository(db).refresh_periods(USER, []))
+    db.execute.assert_not_awaited()
+
+
+def test_refresh_periods_deletes_then_upserts():
+    db = MagicMock()
+    db.execute = AsyncMock()
+    db.commit = AsyncMock()
+    asyncio.run(
+        MonthlyRollupRepository(db).refresh_for_dates(
+            USER, [date(2025, 1, 3), date(2025, 1, 20), None]
+        )
+    )
+    assert db.execute.await_count == 2
+    first = str(db.execute.await_args_list[0].args[0])
+    assert first.startswith("DELETE FROM monthly_gst_rollup")
+    db.commit.assert_awaited_once()
+
+
+def test_refresh_helper_swallows_errors():
+    db = MagicMock()
+    db.execute = AsyncMock(side_effect=RuntimeError("db down"))
+    db.rollback = AsyncMock()
+    asyncio.run(refresh_rollup_for_dates(db, USER, [date(2025, 1, 1)]))
+    db.rollback.assert_awaited_once()
+
+
+def _invoice(**kw):
+    fields = dict(
+        id=uuid.uuid4(), user_id=USER, invoice_date=date(2025, 1, 9), direction="inward",
+        supplier_gstin="27AAAAA0000A1Z5", receiver_gstin="", recipient_gstin="29BBBBB0000B1Z5",
+        taxable_value=Decimal("-100.00"), igst_amount=None, cgst_amount=Decimal("9"),
+        sgst_amount=Decimal("9"), tax_rate=Decimal("0"), itc_eligible=True,
+    )
+    return SimpleNamespace(**(fields | kw))
+
+
+def test_invoice_row_matches_group_by_columns():
+    row = _invoice_row(_invoice(), 1)
+    assert (row["gstin"], row["period"], row["invoice_count"]) == ("29BBBBB0000B1Z5", "2025-01", 1)
+    assert row["itc_eligible_taxable"] == Decimal("-100.00")
+    assert row["credit_note_taxable"] == Decimal("100.00")
+    assert row["exempt_nil_taxable"] == 0 and row["igst"] == 0
+
+    out = _invoice_row(_invoice(direction="outward", taxable_value=Decimal("50"), itc_eligible=False), -1)
+    assert out["gstin"] == "27AAAAA0000A1Z5" and out["invoice_count"] == -1
+    assert (out["taxable_value"], out["exempt_nil_taxable"], out["itc_eligible_taxable"]) == (-50, -50, 0)
+    assert _invoice_row(_invoice(invoice_date=None), 1) is None
+
+
+def test_single_invoice_write_is_a_delta_upsert():
+    sql = str(_delta_upsert(_invoice_row(_invoice(), 1)).compile(dialect=postgresql.dialect()))
+    assert "SELECT" not in sql and "invoices" not in sql
+    assert "taxable_value = (monthly_gst_rollup.taxable_value + excluded.taxable_value)" in sql
+    assert "invoice_count = (monthly_gst_rollup.invoice_count + excluded.invoice_count)" in sql
+
+    db = MagicMock()
+    db.execute = AsyncMock()
+    db.commit = AsyncMock()
+    asyncio.run(add_invoice_to_rollup(db, _invoice()))
+    assert db.execute.await_count == 1
+    assert not str(db.execute.await_args.args[0]).startswith("DELETE")
+
+
+def _period(period: str):
+    return SimpleNamespace(
+        period=period,
+        output_tax_igst=Decimal("0"),
+        output_tax_cgst=Decimal("0"),
+        output_tax_sgst=Decimal("0"),
+        outward_count=1,
+    )
+
+
+def test_detailed_recon_reads_rollup_once():
+    from app.domain.services.gst_itr_recon import reconcile_turnover_detailed
+
+    period_repo = MagicMock()
+    period_repo.list_for_fy = AsyncMock(return_value=[_period("2024-04"), _period("2024-05")])
+    totals = {
+        ("2024-04", "outward"): RollupTotals(
+            period="2024-04",
+            direction="outward",
+            taxable_value=Decimal("1000"),
+            credit_note_taxable=Decimal("100"),
+            exempt_nil_taxable=Decimal("50"),
+        ),
+    }
+    rollup = AsyncMock(return_value=totals)
+
+    with patch(
+        "app.infrastructure.db.repositories.return_period_repository.ReturnPeriodRepository",
+        return_value=period_repo,
+    ), patch.object(MonthlyRollupRepository, "totals_by_period", rollup), patch(
+        "app.domain.services.gst_itr_recon._get_itr_turnover", AsyncMock(return_value=None)
+    ):
+        result = asyncio.run(reconcile_turnover_detailed(USER, "2024-25", MagicMock()))
+
+    # one rollup read for the summary, one for the detail — never per period
+    assert rollup.await_count == 2
+    assert result.summary.gst_turnover == Decimal("1000")
+    apr, may = result.period_details
+    assert apr.gst_net_taxable == Decimal("900")
+    assert apr.gst_exempt_nil == Decimal("50")
+    assert may.gst_outward_taxable == Decimal("0")
+    assert result.adjusted_gst_turnover == Decimal("900")
+
+
+def test_annual_books_totals_from_rollup():
+    from app.domain.services.gst_annual import (
+        _fy_expected_periods,
+        _sum_books_from_rollup,
+    )
+
+    totals = {
+        ("2024-04", "outward"): RollupTotals("2024-04", "outward", taxable_value=Decimal("500")),
+        ("2025-03", "outward"): RollupTotals("2025-03", "outward", taxable_value=Decimal("250")),
+        ("2024-04", "inward"): RollupTotals(
+            "2024-04", "inward", taxable_value=Decimal("900"), itc_eligible_taxable=Decimal("300")
+        ),
+    }
+    with patch.object(
+        MonthlyRollupRepository, "totals_by_period", AsyncMock(return_value=totals)
+    ) as read:
+        outward, inward = asyncio.run(
+            _sum_books_from_rollup(USER, _fy_expected_periods("2024-25"), MagicMock())
+        )
+    assert outward == Decimal("750")
+    assert inward == Decimal("300")
+    assert len(read.await_args.args[1]) == 12
@@ -55,3 +55,135 @@ def test_format_gstin_list_numbering():
     assert "1." in result
     assert "2." in result
     assert "3." in result
+
+
+# ---------------------------------------------------------------------------
+# Consolidated dashboard
+# ---------------------------------------------------------------------------
+
+import asyncio
+import json
+import time
+import uuid
+from decimal import Decimal
+from types import SimpleNamespace
+
+from sqlalchemy.dialects import postgresql
+
+from app.domain.services import multi_gstin_service as mgs
+
+USER = uuid.uuid4()
+
+
+def _row(gstin, period=None, status=None, tax="0", credit="0", net="0", label="", primary=False):
+    return SimpleNamespace(
+        gstin=gstin, label=label, is_primary=primary, is_active=True,
+        period=period, status=status,
+        total_tax=Decimal(tax) if period else None,
+        total_credit=Decimal(credit) if period else None,
+        net_payable=Decimal(net) if period else None,
+    )
+
+
+def _db_returning(rows):
+    result = MagicMock()
+    result.all.return_value = rows
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+    return db
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.hashes: dict[str, dict[str, str]] = {}
+
+    async def hmget(self, key, fields):
+        h = self.hashes.get(key, {})
+        return [h.get(f) for f in fields]
+
+    async def hset(self, key, mapping):
+        self.hashes.setdefault(key, {}).update(mapping)
+
+    async def expire(self, key, ttl):
+        pass
+
+    async def hdel(self, key, field):
+        self.hashes.get(key, {}).pop(field, None)
+
+    async def delete(self, key):
+        self.hashes.pop(key, None)
+
+
+def test_consolidated_stmt_is_single_outer_join():
+    sql = str(
+        mgs.consolidated_stmt(USER, ["2025-01", "2025-02"]).compile(
+            dialect=postgresql.dialect()
+        )
+    ).upper()
+    assert "LEFT OUTER JOIN RETURN_PERIODS" in sql
+    assert "RETURN_PERIODS.PERIOD IN" in sql
+
+
+def test_summary_from_one_query_without_cache():
+    rows = [
+        _row("36AABCU9603R1ZM", "2025-01", "filed", tax="1000", credit="400", label="HQ", primary=True),
+        _row("27AADCB2230M1ZP"),  # no period row → not started
+    ]
+    db = _db_returning(rows)
+    with patch.object(mgs, "_get_redis", return_value=None):
+        summary = asyncio.run(mgs.get_consolidated_summary(USER, "2025-01", db))
+
+    assert db.execute.await_count == 1
+    assert summary["count"] == 2
+    assert summary["total_tax"] == 1000.0
+    assert summary["total_credit"] == 400.0
+    assert summary["status_counts"] == {"filed": 1, "not_started": 1}
+    assert "🟢" in summary["summary_text"] and "🔴" in summary["summary_text"]
+
+
+def test_summary_served_from_cache_until_invalidated():
+    redis = _FakeRedis()
+    db = _db_returning([_row("36AABCU9603R1ZM", "2025-01", "draft")])
+    with patch.object(mgs, "_get_redis", return_value=redis):
+        asyncio.run(mgs.get_consolidated_summary(USER, "2025-01", db))
+        asyncio.run(mgs.get_consolidated_summary(USER, "2025-01", db))
+        assert db.execute.await_count == 1
+
+        from app.domain.services.gst_workflow import on_period_status_changed
+
+        asyncio.run(on_period_status_changed(USER, "2025-01"))
+        asyncio.run(mgs.get_consolidated_summary(USER, "2025-01", db))
+    assert db.execute.await_count == 2
+
+
+def test_expired_cache_field_is_ignored():
+    redis = _FakeRedis()
+    stale = {"cached_at": time.time() - 3600, "summary": {"count": 99}}
+    redis.hashes[mgs._dashboard_key(USER)] = {"2025-01": json.dumps(stale)}
+    db = _db_returning([])
+    with patch.object(mgs, "_get_redis", return_value=redis):
+        summary = asyncio.run(mgs.get_consolidated_summary(USER, "2025-01", db))
+    assert summary["count"] == 0
+    assert db.execute.await_count == 1
+
+
+def test_trailing_periods_crosses_year():
+    assert mgs.trailing_periods("2025-02", 4) == ["2024-11", "2024-12", "2025-01", "2025-02"]
+
+
+def test_trend_fetches_only_missing_periods():
+    redis = _FakeRedis()
+    cached = mgs._build_summaries([_row("36AABCU9603R1ZM", "2025-01", "filed", tax="50")], ["2025-01"])
+    redis.hashes[mgs._dashboard_key(USER)] = {
+        "2025-01": json.dumps({"cached_at": time.time(), "summary": cached["2025-01"]})
+    }
+    db = _db_returning([_row("36AABCU9603R1ZM", "2025-02", "data_ready", tax="70", net="20")])
+    with patch.object(mgs, "_get_redis", return_value=redis):
+        trend = asyncio.run(mgs.get_consolidated_trend(USER, "2025-02", db, months=2))
+
+    params = db.execute.await_args.args[0].compile().params
+    assert ["2025-02"] in params.values()
+    assert [p["period"] for p in trend["periods"]] == ["2025-01", "2025-02"]
+    assert trend["periods"][0]["filed"] == 1
+    assert trend["periods"][1]["pending"] == 1
+    assert trend["periods"][1]["net_payable"] == 20.0
@@ -0,0 +1,136 @@
+# tests/test_pdf_renderer.py
+"""Tests for the pooled, cached PDF renderer."""
+
+from __future__ import annotations
+
+import asyncio
+from dataclasses import dataclass
+from datetime import date
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+
+from app.domain.services import invoice_pdf
+from app.domain.services import pdf_renderer as pr
+
+INVOICE = {
+    "invoice_number": "INV-1",
+    "invoice_date": "2025-01-05",
+    "supplier_gstin": "36AABCU9603R1ZM",
+    "taxable_value": 1000.0,
+    "tax_amount": 180.0,
+    "total_amount": 1180.0,
+}
+
+
+@pytest.fixture
+def renderer(tmp_path):
+    """Thread rendering into an empty cache directory."""
+    with patch.object(pr.settings, "PDF_CACHE_DIR", str(tmp_path)), \
+            patch.object(pr.settings, "PDF_RENDER_WORKERS", 0):
+        yield tmp_path
+
+
+async def _aiter(rows):
+    for row in rows:
+        yield row
+
+
+def _rows(n):
+    return [(f"INV-{i}", date(2025, 1, 1 + i % 28), Decimal("100.50"), Decimal("18.09"), Decimal("118.59"))
+            for i in range(n)]
+
+
+class TestContentKey:
+    def test_stable_and_input_sensitive(self):
+        assert pr.content_key("invoice", INVOICE) == pr.content_key("invoice", dict(INVOICE))
+        assert pr.content_key("invoice", INVOICE) != pr.content_key("invoice", {**INVOICE, "tax_amount": 1})
+        assert pr.content_key("invoice", INVOICE) != pr.content_key("invoice_summary", INVOICE)
+
+    def test_hashes_dataclasses_and_decimals(self):
+        @dataclass
+        class Inp:
+            income: Decimal
+
+        assert pr.content_key("itr1", Inp(Decimal("1.0"))) != pr.content_key("itr1", Inp(Decimal("2.0")))
+
+
+class TestRenderBytes:
+    def test_renders_once_then_serves_from_cache(self, renderer):
+        real = invoice_pdf.generate_invoice_pdf
+        calls = MagicMock(side_effect=real)
+        with patch.object(invoice_pdf, "generate_invoice_pdf", calls):
+            first = asyncio.run(pr.render_invoice_pdf(INVOICE))
+            second = asyncio.run(pr.render_invoice_pdf(INVOICE))
+        assert first.startswith(b"%PDF") and first == second
+        assert calls.call_count == 1
+        assert len(list(renderer.glob("*.pdf"))) == 1
+
+    def test_expired_entries_are_rerendered(self, renderer):
+        with patch.object(pr.settings, "PDF_CACHE_TTL_SECONDS", 0):
+            asyncio.run(pr.render_invoice_summary_pdf([INVOICE]))
+            assert pr._cached_path(pr.content_key("invoice_summary", [INVOICE])) is None
+
+    def test_process_pool_renders(self, tmp_path):
+        with patch.object(pr.settings, "PDF_CACHE_DIR", str(tmp_path)), \
+                patch.object(pr.settings, "PDF_RENDER_WORKERS", 1):
+            try:
+                pdf = asyncio.run(pr.render_invoice_pdf(INVOICE))
+            finally:
+                pr.shutdown_render_pool()
+        assert pdf.startswith(b"%PDF")
+
+
+class TestInvoiceReport:
+    HEADER = {"name": "Acme", "gstin": "36AABCU9603R1ZM", "pan": None,
+              "whatsapp_number": "919876543210", "generated": "2025-02-01"}
+
+    def test_spools_renders_to_file_and_caches(self, renderer):
+        path = asyncio.run(pr.render_invoice_report(self.HEADER, _aiter(_rows(120))))
+        assert path.read_bytes().startswith(b"%PDF")
+        assert not list(renderer.glob("*.jsonl")) and not list(renderer.glob("*.part"))
+
+        with patch.object(invoice_pdf, "write_invoice_report_pdf") as write:
+            again = asyncio.run(pr.render_invoice_report(self.HEADER, _aiter(_rows(120))))
+        write.assert_not_called()
+        assert again == path
+
+        changed = asyncio.run(pr.render_invoice_report(self.HEADER, _aiter(_rows(121))))
+        assert changed != path
+
+    def test_report_pages_follow_row_count(self, tmp_path):
+        spool = tmp_path / "rows.jsonl"
+        spool.write_text('["INV-1", "2025-01-01", "10", "1.8", "11.8"]\n' * 200, encoding="utf-8")
+        pages = invoice_pdf.write_invoice_report_pdf(
+            str(spool), str(tmp_path / "out.pdf"), {**self.HEADER, "count": 200}
+        )
+        assert pages == 5
+        empty = invoice_pdf.write_invoice_report_pdf(
+            str(tmp_path / "missing.jsonl"), str(tmp_path / "empty.pdf"), {"count": 0}
+        )
+        assert empty == 1
+
+    def test_client_report_streams_rows(self, renderer):
+        client = SimpleNamespace(name="Acme", gstin=None, pan=None, whatsapp_number="919876543210")
+        user_result = MagicMock()
+        user_result.scalar_one_or_none.return_value = 42
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=user_result)
+        db.stream = AsyncMock(return_value=_aiter(_rows(3)))
+
+        path = asyncio.run(pr.render_client_invoice_report(client, db))
+
+        assert path.exists()
+        stmt = db.stream.await_args.args[0]
+        assert stmt.get_execution_options()["yield_per"] == pr.settings.PDF_REPORT_FETCH_ROWS
+        assert "ORDER BY invoices.invoice_date DESC" in str(stmt)
+
+    def test_client_without_user_gets_empty_report(self, renderer):
+        client = SimpleNamespace(name="Solo", gstin=None, pan=None, whatsapp_number=None)
+        db = MagicMock()
+        db.stream = AsyncMock()
+        path = asyncio.run(pr.render_client_invoice_report(client, db))
+        assert path.exists()
+        db.stream.assert_not_called()
@@ -0,0 +1,388 @@
+# tests/test_period_close.py
+"""Tests for the period-close pipeline (2B import → reconcile → liability → risk)."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+import uuid
+from datetime import date
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock, patch
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.domain.services import period_close as pc
+from app.infrastructure.queue import period_close_jobs
+
+PERIOD_ID = uuid.uuid4()
+REF = pc.PeriodRef(
+    id=PERIOD_ID, user_id=uuid.uuid4(), gstin="36AABCU9603R1ZM", period="2025-01",
+    start=date(2025, 1, 1), end=date(2025, 1, 31),
+)
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.hashes: dict[str, dict[str, str]] = {}
+        self.strings: dict[str, str] = {}
+
+    async def hgetall(self, key):
+        return dict(self.hashes.get(key, {}))
+
+    async def hset(self, key, field=None, value=None, mapping=None):
+        h = self.hashes.setdefault(key, {})
+        if field is not None:
+            h[field] = value
+        h.update({k: str(v) for k, v in (mapping or {}).items()})
+
+    async def set(self, key, value, nx=False, ex=None):
+        if nx and key in self.strings:
+            return None
+        self.strings[key] = value
+        return True
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def delete(self, *keys):
+        for key in keys:
+            self.strings.pop(key, None)
+
+    async def eval(self, script, numkeys, key, token):
+        assert script is pc._RELEASE_LOCK
+        if self.strings.get(key) == token:          # compare-and-delete
+            del self.strings[key]
+            return 1
+        return 0
+
+    def pipeline(self, transaction=True):
+        fake, ops = self, []
+
+        class _Pipe:
+            def hset(self, key, mapping=None):
+                ops.append(fake.hset(key, mapping=mapping))
+
+            def expire(self, key, ttl):
+                pass
+
+            async def execute(self):
+                return [await op for op in ops]
+
+        return _Pipe()
+
+
+class _Inputs:
+    """Fake steps whose digests read a mutable dict of input versions."""
+
+    def __init__(self):
+        self.versions = {"import_2b": 1, "reconcile": 1, "liability": 1, "risk": 1}
+        self.runs: list[str] = []
+        self.fail: set[str] = set()
+
+    def steps(self):
+        def make(name):
+            async def run(ref, db):
+                self.runs.append(name)
+                if name in self.fail:
+                    raise RuntimeError(f"{name} broke")
+                return {"step": name}
+
+            async def digest(ref, db):
+                return f"{name}:{self.versions[name]}"
+
+            return run, digest
+
+        out = []
+        for step in pc.STEPS:
+            run, digest = make(step.name)
+            out.append(pc.Step(step.name, step.after, run, digest, optional=step.optional))
+        return tuple(out)
+
+
+@pytest.fixture
+def redis():
+    fake = _FakeRedis()
+    with patch("app.infrastructure.cache.redis_client.get_redis_client", return_value=fake):
+        yield fake
+
+
+@pytest.fixture
+def inputs():
+    fake = _Inputs()
+    with patch.object(pc, "STEPS", fake.steps()), \
+            patch.object(pc, "_load_ref", AsyncMock(return_value=REF)):
+        yield fake
+
+
+def _close(**kwargs):
+    db = MagicMock()
+    db.rollback = AsyncMock()
+    return asyncio.run(pc.close_period(PERIOD_ID, db, **kwargs))
+
+
+class TestDigestStatements:
+    def test_digests_are_computed_in_postgres(self):
+        for stmt in (
+            pc.invoice_digest_stmt(REF.user_id, REF.start, REF.end, "inward"),
+            pc.itc_digest_stmt(PERIOD_ID),
+            pc.payment_digest_stmt(PERIOD_ID),
+        ):
+            sql = str(stmt.compile(dialect=postgresql.dialect())).upper()
+            assert "MD5(STRING_AGG(CONCAT_WS(" in sql
+            assert "ORDER BY" in sql and "GROUP BY" not in sql
+
+
+class TestClosePeriod:
+    def test_first_run_executes_every_step_in_order(self, redis, inputs):
+        result = _close()
+        assert result.status == "done"
+        assert inputs.runs == list(pc.STEP_NAMES)
+        status = asyncio.run(pc.get_period_status(PERIOD_ID))
+        assert status["status"] == "done"
+        assert [s["state"] for s in status["steps"]] == ["done"] * 4
+
+    def test_unchanged_inputs_are_skipped(self, redis, inputs):
+        _close()
+        inputs.runs.clear()
+        inputs.versions["liability"] += 1          # e.g. a new outward invoice
+
+        result = _close()
+        assert inputs.runs == ["liability"]
+        assert [s.state for s in result.steps] == ["skipped", "skipped", "done", "skipped"]
+
+    def test_force_and_step_subset(self, redis, inputs):
+        _close()
+        inputs.runs.clear()
+        _close(force=True, steps=["risk"])
+        assert inputs.runs == ["risk"]
+
+    def test_failure_blocks_downstream_and_is_retried(self, redis, inputs):
+        inputs.fail = {"reconcile"}
+        result = _close()
+        assert result.status == "failed"
+        assert [s.state for s in result.steps] == ["done", "failed", "blocked", "blocked"]
+
+        inputs.fail.clear()
+        inputs.runs.clear()
+        assert _close().status == "done"
+        assert inputs.runs == ["reconcile", "liability", "risk"]
+
+    def test_optional_2b_failure_does_not_block(self, redis, inputs):
+        inputs.fail = {"import_2b"}
+        result = _close()
+        assert result.status == "done"
+        assert [s.state for s in result.steps] == ["failed", "done", "done", "done"]
+
+    def test_concurrent_close_of_same_period_is_busy(self, redis, inputs):
+        redis.strings[pc._lock_key(PERIOD_ID)] = "other-job"
+        assert _close().status == "busy"
+        assert inputs.runs == []
+
+    def test_lock_is_released_only_while_still_ours(self, redis, inputs):
+        key = pc._lock_key(PERIOD_ID)
+        _close()
+        assert key not in redis.strings
+
+        async def lock_expires_and_is_retaken(ref, outcome):
+            redis.strings[key] = "other-run"
+
+        _close(on_progress=lock_expires_and_is_retaken)
+        assert redis.strings[key] == "other-run"
+
+    def test_progress_callback_sees_each_step(self, redis, inputs):
+        seen = []
+
+        async def on_progress(ref, outcome):
+            seen.append((ref.period, outcome.name, outcome.state))
+
+        _close(on_progress=on_progress)
+        assert seen == [("2025-01", name, "done") for name in pc.STEP_NAMES]
+
+
+class TestPortfolio:
+    def test_concurrency_is_bounded(self):
+        active = peak = 0
+
+        async def fake_close(period_id, db, **kwargs):
+            nonlocal active, peak
+            active += 1
+            peak = max(peak, active)
+            await asyncio.sleep(0.01)
+            active -= 1
+            return pc.CloseResult(period_id=str(period_id), status="done")
+
+        class _Session:
+            async def __aenter__(self):
+                return MagicMock()
+
+            async def __aexit__(self, *exc):
+                return False
+
+        with patch.object(pc, "close_period", fake_close), \
+                patch("app.core.db.AsyncSessionLocal", _Session):
+            results = asyncio.run(pc.close_periods([uuid.uuid4() for _ in range(10)], concurrency=3))
+
+        assert len(results) == 10 and all(r.status == "done" for r in results)
+        assert peak == 3
+
+
+class TestJob:
+    def test_job_notifies_whatsapp_per_step(self, redis, inputs):
+        arq = MagicMock()
+        arq.enqueue_job = AsyncMock()
+
+        class _Session:
+            async def __aenter__(self):
+                db = MagicMock()
+                db.rollback = AsyncMock()
+                return db
+
+            async def __aexit__(self, *exc):
+                return False
+
+        risk = {"risk_score": 42, "risk_level": "MEDIUM", "category_a_score": 1, "category_b_score": 2,
+                "category_c_score": 3, "category_d_score": 4, "category_e_score": 5, "flag_count": 2}
+        steps = tuple(
+            s if s.name != "risk" else pc.Step("risk", s.after, AsyncMock(return_value=risk), s.digest)
+            for s in pc.STEPS
+        )
+        with patch.object(pc, "STEPS", steps), patch("app.core.db.AsyncSessionLocal", _Session):
+            out = asyncio.run(period_close_jobs.period_close_job(
+                {"redis": arq, "job_id": "j1"}, [str(PERIOD_ID)], notify_wa_id="919800000000",
+            ))
+
+        assert out["counts"] == {"done": 1}
+        texts = [c.args[2] for c in arq.enqueue_job.await_args_list]
+        assert all(c.args[:2] == ("send_whatsapp_job", "919800000000") for c in arq.enqueue_job.await_args_list)
+        assert len(texts) == 4
+        assert "GSTR-2B import" in texts[0]
+        assert "42/100" in texts[-1]
+        assert json.loads(redis.hashes[pc._key(PERIOD_ID)]["step:risk"])["detail"]["risk_score"] == 42
+
+
+    def test_busy_period_is_requeued_then_reported(self, redis, inputs):
+        arq = MagicMock()
+        arq.enqueue_job = AsyncMock()
+        redis.strings[pc._lock_key(PERIOD_ID)] = "other-run"
+
+        class _Session:
+            async def __aenter__(self):
+                return MagicMock()
+
+            async def __aexit__(self, *exc):
+                return False
+
+        def run(attempt):
+            arq.enqueue_job.reset_mock()
+            with patch("app.core.db.AsyncSessionLocal", _Session), \
+                    patch.object(pc.settings, "PERIOD_CLOSE_BUSY_RETRIES", 2):
+                return asyncio.run(period_close_jobs.period_close_job(
+                    {"redis": arq, "job_id": "j2"}, [str(PERIOD_ID)], True, ["risk"],
+                    "919800000000", "en", attempt,
+                ))
+
+        out = run(0)
+        assert out["counts"] == {"busy": 1, "requeued": 1} and inputs.runs == []
+        call = arq.enqueue_job.await_args
+        assert call.args == ("period_close_job", [str(PERIOD_ID)], True, ["risk"], "919800000000", "en", 1)
+        assert call.kwargs["_defer_by"] == pc.settings.PERIOD_CLOSE_BUSY_RETRY_SECONDS
+
+        out = run(2)
+        assert "requeued" not in out["counts"]
+        (call,) = arq.enqueue_job.await_args_list
+        assert call.args[:2] == ("send_whatsapp_job", "919800000000")
+        assert "2025-01" in call.args[2] and "try again" in call.args[2]
+
+
+class TestLiabilityHandOff:
+    def test_score_risk_false_skips_inline_scoring(self):
+        from app.domain.services.gst_liability import compute_net_liability
+        from app.infrastructure.db.repositories.invoice_aggregate_repository import (
+            InvoiceAggregateRepository,
+        )
+
+        period_repo = MagicMock()
+        period_repo.get_by_id = AsyncMock(return_value=SimpleNamespace(
+            id=PERIOD_ID, user_id=REF.user_id, period="2025-01"))
+        period_repo.update_computation = AsyncMock()
+        period_repo.update_status = AsyncMock()
+        scorer = AsyncMock()
+
+        with patch(
+            "app.infrastructure.db.repositories.return_period_repository.ReturnPeriodRepository",
+            return_value=period_repo,
+        ), patch.object(InvoiceAggregateRepository, "totals_by_direction", AsyncMock(return_value={})), \
+                patch("app.domain.services.gst_risk_scoring.compute_risk_score", scorer), \
+                patch("app.infrastructure.db.repositories.monthly_rollup_repository.refresh_rollup_for_dates",
+                      AsyncMock()):
+            asyncio.run(compute_net_liability(PERIOD_ID, MagicMock(), score_risk=False))
+            assert scorer.await_count == 0
+            asyncio.run(compute_net_liability(PERIOD_ID, MagicMock()))
+            assert scorer.await_count == 1
+
+    def test_schedule_risk_score_falls_back_inline(self):
+        scorer = AsyncMock()
+        with patch.object(pc, "enqueue_close", AsyncMock(side_effect=ConnectionError("down"))), \
+                patch("app.domain.services.gst_risk_scoring.compute_risk_score", scorer):
+            job_id = asyncio.run(pc.schedule_risk_score(PERIOD_ID, MagicMock()))
+        assert job_id is None and scorer.await_count == 1
+
+
+class TestPortfolioRoute:
+    """POST /ca/periods/{period}/close only reaches the CA's own clients' periods."""
+
+    def _arrange(self, session):
+        from app.infrastructure.db.models import (
+            BusinessClient,
+            CAUser,
+            ReturnPeriod,
+            User,
+        )
+
+        owner_ca = CAUser(id=1, email="a@firm.in", password_hash="x", name="A")
+        other_ca = CAUser(id=2, email="b@firm.in", password_hash="x", name="B")
+        owner = User(id=uuid.uuid4(), whatsapp_number="919800000001")
+        other = User(id=uuid.uuid4(), whatsapp_number="919800000002")
+        rp = ReturnPeriod(
+            id=uuid.uuid4(), user_id=owner.id, gstin=REF.gstin,
+            fy="2024-25", period="2025-01",
+        )
+        session.add_all([owner_ca, other_ca, owner, other, rp])
+
+        def client(name, ca_id, user=None):
+            return BusinessClient(
+                name=name, ca_id=ca_id, gstin=REF.gstin, status="active",
+                whatsapp_number=user.whatsapp_number if user else None,
+            )
+
+        # Same GSTIN typed in by another CA, for another user and for nobody
+        session.add_all([
+            client("Owner", 1, owner), client("Copy", 2, other), client("No phone", 2),
+        ])
+        session.commit()
+        return owner_ca, other_ca, rp
+
+    def _close(self, session, ca):
+        from app.api.routes import ca_dashboard
+        from tests.conftest import SyncSessionAdapter
+
+        return asyncio.run(ca_dashboard.close_portfolio_period(
+            "2025-01", force=False, ca=ca, db=SyncSessionAdapter(session),
+        ))
+
+    def test_same_gstin_under_another_ca_is_not_found(self, ownership_db):
+        from fastapi import HTTPException
+
+        owner_ca, other_ca, rp = self._arrange(ownership_db)
+        enqueue = AsyncMock(return_value="job-1")
+        with patch.object(pc, "enqueue_close", enqueue), \
+                patch("app.api.routes.ca_dashboard.log_ca_action"):
+            with pytest.raises(HTTPException) as exc:
+                self._close(ownership_db, other_ca)
+            assert exc.value.status_code == 404
+            enqueue.assert_not_awaited()
+
+            assert self._close(ownership_db, owner_ca)["total"] == 1
+        assert enqueue.await_args.args[0] == [rp.id]
@@ -0,0 +1,50 @@
+# tests/test_startup_imports.py
+"""API startup must not import heavy OCR / PDF / ML / OpenAI dependencies."""
+
+import json
+import os
+import subprocess
+import sys
+
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+LAZY_MODULES = (
+    "openai",
+    "pytesseract",
+    "pdf2image",
+    "PIL",
+    "pandas",
+    "numpy",
+    "reportlab",
+    "tiktoken",
+    "sklearn",
+    "joblib",
+)
+
+
+def _loaded_after(stmt: str) -> list[str]:
+    code = (
+        f"import json, sys\n{stmt}\n"
+        f"print(json.dumps(sorted(m for m in {LAZY_MODULES!r} if m in sys.modules)))"
+    )
+    proc = subprocess.run(
+        [sys.executable, "-c", code],
+        cwd=PROJECT_ROOT,
+        capture_output=True,
+        text=True,
+        check=True,
+    )
+    return json.loads(proc.stdout.strip().splitlines()[-1])
+
+
+def test_api_startup_keeps_heavy_modules_lazy():
+    assert _loaded_after("import app.main") == []
+
+
+def test_ocr_backend_loads_dependencies_on_first_use():
+    loaded = _loaded_after(
+        "from app.infrastructure.ocr import tesseract_backend\n"
+        "from app.infrastructure.external import openai_client"
+    )
+    assert "pytesseract" not in loaded
+    assert "openai" not in loaded
@@ -0,0 +1,132 @@
+# tests/test_tax_analytics_columnar.py
+"""The columnar analytics path must reproduce tax_analytics exactly."""
+
+from __future__ import annotations
+
+import asyncio
+import random
+from dataclasses import fields
+from datetime import date, datetime
+from decimal import Decimal
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from app.domain.services.tax_analytics import aggregate_invoices, detect_anomalies
+from app.domain.services.tax_analytics_columnar import (
+    InvoiceColumns,
+    aggregate_columns,
+    detect_anomalies_columns,
+    invoice_columns_stmt,
+    load_invoice_columns,
+)
+from app.infrastructure.db.models import Invoice
+
+
+def _amount(rng: random.Random):
+    r = rng.random()
+    if r < 0.05:
+        return None
+    if r < 0.1:
+        return Decimal("0.00")
+    upper = 10**9 if rng.random() < 0.01 else 10**7
+    return Decimal(rng.randint(1, upper)).scaleb(-2)
+
+
+def _invoices(n: int, seed: int = 1) -> list[SimpleNamespace]:
+    rng = random.Random(seed)
+    out = []
+    for _ in range(n):
+        number = f"INV-{rng.randint(0, n // 2)}"
+        if rng.random() < 0.1:
+            number = rng.choice([None, ""])
+        out.append(SimpleNamespace(
+            invoice_number=number,
+            invoice_date=rng.choice([
+                None,
+                date(2024, rng.randint(1, 12), rng.randint(1, 28)),
+                datetime(2023, 5, 1, 3),
+            ]),
+            supplier_gstin=rng.choice([None, "", "29ABCDE1234F1Z5", "07AAACR5055K1Z4"]),
+            receiver_gstin=rng.choice([None, "", "27ABCDE1234F1Z5", "SHORT"]),
+            recipient_gstin=rng.choice([None, "", "36AABCU9603R1ZM"]),
+            supplier_gstin_valid=rng.choice([None, True, False]),
+            receiver_gstin_valid=rng.choice([None, True, False]),
+            taxable_value=_amount(rng),
+            tax_amount=_amount(rng),
+            total_amount=_amount(rng),
+            cgst_amount=_amount(rng),
+            sgst_amount=_amount(rng),
+            igst_amount=_amount(rng),
+            tax_rate=rng.choice([None, Decimal("18.00"), Decimal("5.00"),
+                                 Decimal("0.00"), Decimal("13.50")]),
+        ))
+    return out
+
+
+def test_summary_matches_row_wise():
+    invoices = _invoices(3000)
+    expected = aggregate_invoices(invoices)
+    actual = aggregate_columns(InvoiceColumns.from_invoices(invoices))
+
+    assert actual == expected
+    assert str(actual.total_amount) == str(expected.total_amount)
+    assert str(actual.avg_invoice_value) == str(expected.avg_invoice_value)
+    assert list(actual.tax_rate_distribution) == list(expected.tax_rate_distribution)
+
+
+def test_anomalies_match_row_wise():
+    invoices = _invoices(3000, seed=2)
+    expected = detect_anomalies(invoices, valid_gst_rates={0, 5, 18})
+    actual = detect_anomalies_columns(
+        InvoiceColumns.from_invoices(invoices), valid_gst_rates={0, 5, 18}
+    )
+    for f in fields(expected):
+        assert getattr(actual, f.name) == getattr(expected, f.name), f.name
+    assert expected.high_value_invoices and expected.duplicate_invoice_numbers
+
+
+def test_dict_inputs_and_empty_input():
+    rows = [
+        {"invoice_number": "A", "invoice_date": "2024-01-05", "total_amount": 100.5,
+         "taxable_value": 90, "tax_rate": 18, "receiver_gstin": "27ABCDE1234F1Z5"},
+        {"invoice_number": "A", "total_amount": 0, "taxable_value": 0, "tax_rate": 7},
+    ]
+    cols = InvoiceColumns.from_invoices(rows)
+    assert aggregate_columns(cols) == aggregate_invoices(rows)
+    assert detect_anomalies_columns(cols) == detect_anomalies(rows)
+
+    empty = InvoiceColumns.from_rows([])
+    assert len(empty) == 0
+    assert aggregate_columns(empty) == aggregate_invoices([])
+    assert detect_anomalies_columns(empty) == detect_anomalies([])
+
+
+def test_stmt_selects_columns_not_entities():
+    stmt = invoice_columns_stmt(
+        Invoice.user_id == 1, order_by=(Invoice.created_at.desc(),), limit=10,
+    )
+    sql = str(stmt.compile(dialect=postgresql.dialect())).upper()
+    assert "INVOICES.RAW_TEXT" not in sql
+    assert "CAST(COALESCE(INVOICES.TOTAL_AMOUNT" in sql and "AS BIGINT)" in sql
+    assert "LENGTH(COALESCE(NULLIF(INVOICES.RECIPIENT_GSTIN" in sql
+    assert "ORDER BY INVOICES.CREATED_AT DESC" in sql
+    assert "LIMIT" in sql
+    assert len(stmt.selected_columns) == 16
+
+
+def test_load_invoice_columns_from_db_rows():
+    row = ("INV-1", True, date(2024, 4, 1), "29ABCDE1234F1Z5", None,
+           "36AABCU9603R1ZM", True, False, False,
+           100000, 18000, 118000, 9000, 9000, 0, 18.0)
+    result = MagicMock()
+    result.all.return_value = [row]
+    db = MagicMock()
+    db.execute = AsyncMock(return_value=result)
+
+    cols = asyncio.run(load_invoice_columns(db, Invoice.user_id == 1))
+    summary = aggregate_columns(cols)
+    assert summary.total_amount == Decimal("1180.00")
+    assert summary.b2b_count == 1
+    assert summary.tax_rate_distribution == {"18.0": 1}
@@ -0,0 +1,146 @@
+# tests/test_tax_rate_cache.py
+"""Tests for the in-process tax rate config layer and its pub/sub invalidation."""
+
+from __future__ import annotations
+
+import asyncio
+from decimal import Decimal
+from unittest.mock import AsyncMock, patch
+
+import pytest
+
+from app.domain.models.tax_rate_config import GSTRateConfig, ITRSlabConfig
+from app.domain.services import tax_rate_service as trs
+from app.domain.services.itr_service import (
+    ITR1Input,
+    compute_itr1,
+    compute_itr1_dynamic,
+)
+from app.domain.services.tax_rate_defaults import default_itr_slabs
+
+
+class _FakePubSub:
+    def __init__(self, messages):
+        self.messages = messages
+        self.channels = []
+        self.on_listen = lambda: None
+
+    async def subscribe(self, *channels):
+        self.channels.extend(channels)
+
+    async def listen(self):
+        self.on_listen()
+        for message in self.messages:
+            yield message
+        raise asyncio.CancelledError
+
+    async def aclose(self):
+        pass
+
+
+class _FakeRedis:
+    def __init__(self, messages=()):
+        self.strings: dict[str, str] = {}
+        self.published: list[tuple[str, str]] = []
+        self._pubsub = _FakePubSub(list(messages))
+
+    async def get(self, key):
+        return self.strings.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.strings[key] = value
+
+    async def publish(self, channel, message):
+        self.published.append((channel, message))
+        return 1
+
+    def pubsub(self):
+        return self._pubsub
+
+
+@pytest.fixture
+def service():
+    svc = trs.TaxRateService()
+    svc._redis = _FakeRedis()
+    return svc
+
+
+class TestFrozenConfig:
+    def test_slabs_become_tuples_and_version_tracks_content(self):
+        base = default_itr_slabs("2025-26")
+        frozen = base.frozen()
+        assert isinstance(frozen.new_regime_slabs, tuple)
+        assert isinstance(frozen.surcharge_slabs, tuple)
+        assert frozen.version.startswith("2025-26:")
+        assert frozen.version == ITRSlabConfig.from_dict(base.to_dict()).frozen().version
+        base.cess_rate = Decimal("5")
+        assert base.frozen().version != frozen.version
+        assert "version" not in frozen.to_dict()
+
+    def test_gst_rates_become_frozenset(self):
+        frozen = GSTRateConfig(valid_rates={5, 18}).frozen()
+        assert frozen.valid_rates == frozenset({5, 18})
+        assert frozen.version.startswith("gst:")
+
+
+class TestLocalLayer:
+    def test_second_lookup_skips_redis(self, service):
+        fetch = AsyncMock(return_value=default_itr_slabs("2025-26").to_dict())
+        with patch.object(service, "_get_from_redis", fetch):
+            first = asyncio.run(service.get_itr_slabs("2025-26"))
+            second = asyncio.run(service.get_itr_slabs("2025-26"))
+        assert first is second
+        assert fetch.await_count == 1
+        assert first.version
+
+    def test_expired_entries_are_resolved_again(self, service):
+        fetch = AsyncMock(return_value=default_itr_slabs("2025-26").to_dict())
+        with patch.object(service, "_get_from_redis", fetch), \
+                patch.object(trs.settings, "TAX_RATE_LOCAL_TTL_SECONDS", 0):
+            asyncio.run(service.get_itr_slabs("2025-26"))
+            asyncio.run(service.get_itr_slabs("2025-26"))
+        assert fetch.await_count == 2
+
+    def test_manual_override_publishes_and_drops_local_copy(self, service):
+        with patch.object(service, "_get_from_redis", AsyncMock(return_value=None)), \
+                patch.object(service, "_get_from_db", AsyncMock(return_value=None)), \
+                patch.object(service, "_fetch_from_ai_itr", AsyncMock(return_value=None)):
+            asyncio.run(service.get_itr_slabs("2025-26"))
+        key = service._itr_key("2025-26")
+        assert key in service._local
+
+        with patch.object(service, "_save_to_db", AsyncMock()):
+            asyncio.run(service.save_manual_itr_config("2025-26", default_itr_slabs("2025-26")))
+
+        assert key not in service._local
+        assert service._redis.published == [(trs.INVALIDATE_CHANNEL, key)]
+
+    def test_listener_drops_published_keys(self, service):
+        keep, changed = service._gst_key(), service._itr_key("2025-26")
+        service._redis = _FakeRedis([
+            {"type": "subscribe", "channel": trs.INVALIDATE_CHANNEL, "data": 1},
+            {"type": "message", "channel": trs.INVALIDATE_CHANNEL, "data": changed},
+        ])
+        service._set_local(keep, GSTRateConfig())          # cleared on (re)subscribe
+
+        def cache_entries():
+            service._set_local(keep, GSTRateConfig())
+            service._set_local(changed, default_itr_slabs())
+
+        service._redis._pubsub.on_listen = cache_entries
+        with pytest.raises(asyncio.CancelledError):
+            asyncio.run(service.listen_for_invalidations())
+        assert service._redis._pubsub.channels == [trs.INVALIDATE_CHANNEL]
+        assert keep in service._local and changed not in service._local
+
+
+class TestComputationStamp:
+    def test_result_records_config_version(self, service):
+        inp = ITR1Input(salary_income=Decimal("1200000"))
+        fetch = AsyncMock(return_value=default_itr_slabs("2025-26").to_dict())
+        with patch.object(trs, "_service", service), \
+                patch.object(service, "_get_from_redis", fetch):
+            result = asyncio.run(compute_itr1_dynamic(inp))
+        assert result.config_version == service._local[service._itr_key("2025-26")][1].version
+        assert compute_itr1(inp).config_version == ""
+        assert result.new_regime.total_tax_liability == compute_itr1(inp).new_regime.total_tax_liability
@@ -0,0 +1,82 @@
+# tests/test_trigram_search.py
+"""Tests for pg_trgm-backed client and invoice search."""
+
+from __future__ import annotations
+
+import asyncio
+import uuid
+from types import SimpleNamespace
+from unittest.mock import AsyncMock, MagicMock
+
+from sqlalchemy.dialects import postgresql
+
+from app.infrastructure.db.models import BusinessClient, Invoice
+from app.infrastructure.db.repositories.ca_repository import BusinessClientRepository
+from app.infrastructure.db.repositories.invoice_repository import InvoiceRepository
+from app.infrastructure.db.repositories.trigram_search import like_pattern
+
+CA_ID = 7
+USER = uuid.uuid4()
+
+
+def _sql(stmt) -> str:
+    return str(stmt.compile(dialect=postgresql.dialect())).upper()
+
+
+def _result(rows):
+    res = MagicMock()
+    res.all.return_value = rows
+    return res
+
+
+class TestIndexes:
+    def test_trigram_gin_indexes_declared(self):
+        for table, names in (
+            (BusinessClient.__table__, ("name", "gstin", "pan", "whatsapp")),
+            (Invoice.__table__, ("invoice_number", "supplier_gstin", "receiver_gstin")),
+        ):
+            idx = {i.name: i for i in table.indexes}
+            for name in names:
+                index = idx[f"ix_{table.name}_{name}_trgm"]
+                assert index.dialect_options["postgresql"]["using"] == "gin"
+                assert list(index.dialect_options["postgresql"]["ops"].values()) == ["gin_trgm_ops"]
+
+
+class TestStatements:
+    def test_like_pattern_escapes_wildcards(self):
+        assert like_pattern("50%_off\\") == "%50\\%\\_off\\\\%"
+
+    def test_client_search_is_ranked_and_indexable(self):
+        sql = _sql(BusinessClientRepository.search_stmt(CA_ID, "shrma"))
+        assert "BUSINESS_CLIENTS.NAME ILIKE" in sql and "ESCAPE" in sql
+        assert "BUSINESS_CLIENTS.PAN ILIKE" in sql
+        assert "<%%" in sql
+        assert "ORDER BY GREATEST(WORD_SIMILARITY(" in sql
+        assert "DESC, BUSINESS_CLIENTS.NAME ASC" in sql
+
+    def test_typeahead_selects_light_columns_with_limit(self):
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=_result([SimpleNamespace(id=1, name="Sharma Traders")]))
+        rows = asyncio.run(BusinessClientRepository(db).typeahead(CA_ID, "sharma", 5))
+        assert rows[0].name == "Sharma Traders"
+        stmt = db.execute.await_args.args[0]
+        sql = _sql(stmt)
+        assert sql.startswith("SELECT BUSINESS_CLIENTS.ID, BUSINESS_CLIENTS.NAME,")
+        assert "LIMIT" in sql and stmt._limit == 5
+
+    def test_search_page_counts_with_window(self):
+        client = SimpleNamespace(id=1)
+        db = MagicMock()
+        db.execute = AsyncMock(return_value=_result([(client, 42)]))
+        page, total = asyncio.run(BusinessClientRepository(db).search_page(CA_ID, "sha", 10, 20))
+        assert page == [client] and total == 42
+        sql = _sql(db.execute.await_args.args[0])
+        assert "COUNT(*) OVER ()" in sql and "OFFSET" in sql
+
+    def test_invoice_search_covers_number_and_counterparty(self):
+        sql = _sql(InvoiceRepository.search_stmt(USER, "INV-20", 10))
+        assert "INVOICES.INVOICE_NUMBER ILIKE" in sql
+        assert "INVOICES.SUPPLIER_GSTIN ILIKE" in sql
+        assert "INVOICES.RECEIVER_GSTIN ILIKE" in sql
+        assert "INVOICES.USER_ID =" in sql
+        assert "ORDER BY GREATEST(" in sql and "LIMIT" in sql
@@ -0,0 +1,180 @@
+# tests/test_voice_pipeline.py
+"""Tests for voice-note segmentation, the concurrent STT/translation pipeline and its cache."""
+
+from __future__ import annotations
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, patch
+
+import httpx
+import numpy as np
+import pytest
+
+from app.core.config import settings
+from app.domain.services import voice_audio, voice_handler
+from app.infrastructure.external import translation_bhashini
+
+RATE = voice_audio.SAMPLE_RATE
+
+
+def _pcm(*parts: tuple[str, float]) -> bytes:
+    """Concatenate ("tone" | "quiet", seconds) parts into 16 kHz s16le PCM."""
+    chunks = []
+    for kind, seconds in parts:
+        t = np.arange(int(seconds * RATE)) / RATE
+        level = 0.3 if kind == "tone" else 0.001
+        chunks.append((level * 32767 * np.sin(2 * np.pi * 220 * t)).astype("<i2"))
+    return np.concatenate(chunks).tobytes()
+
+
+def _split(pcm, max_seconds=4.0):
+    return voice_audio.split_speech(pcm, max_seconds=max_seconds, threshold_db=-40, min_silence_ms=250)
+
+
+class TestSplitSpeech:
+    def test_trims_ends_and_cuts_at_the_pause(self):
+        pcm = _pcm(("quiet", 1.0), ("tone", 3.0), ("quiet", 0.6), ("tone", 3.0), ("quiet", 1.0))
+        (a0, a1), (b0, b1) = _split(pcm)
+        assert a0 / RATE == pytest.approx(1.0 - 0.16, abs=0.03)
+        assert 4.0 < a1 / RATE < 4.6 and a1 == b0          # inside the 0.6 s pause
+        assert b1 / RATE == pytest.approx(7.6 + 0.16, abs=0.03)
+
+    def test_silence_and_unbroken_speech(self):
+        assert _split(_pcm(("quiet", 2.0))) == []
+        ranges = _split(_pcm(("tone", 10.0)))
+        assert [round((b - a) / RATE, 2) for a, b in ranges] == [4.0, 4.0, 2.0]
+
+    def test_wav_segments_without_ffmpeg(self):
+        pcm = _pcm(("tone", 3.0), ("quiet", 0.5), ("tone", 3.0))
+        with patch.object(settings, "VOICE_SEGMENT_MAX_SECONDS", 4.0), \
+                patch.object(settings, "VOICE_FFMPEG_PATH", "/nonexistent/ffmpeg"):
+            segments = asyncio.run(voice_audio.prepare_segments(voice_audio.to_wav(pcm)))
+            raw = asyncio.run(voice_audio.prepare_segments(b"OggS not really opus"))
+        assert [s.content_type for s in segments] == ["audio/wav", "audio/wav"]
+        assert voice_audio._wav_pcm(segments[1].data) is not None
+        assert sum(s.seconds for s in segments) == pytest.approx(6.5, abs=0.05)
+        assert [(s.filename, s.data) for s in raw] == [("audio.ogg", b"OggS not really opus")]
+
+
+class _FakeRedis:
+    def __init__(self):
+        self.data: dict[str, str] = {}
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    async def set(self, key, value, ex=None):
+        self.data[key] = value
+
+
+@pytest.fixture
+def voice():
+    """Fake media, STT (slow per segment) and translation; records call order."""
+    events: list[str] = []
+    state = {"active": 0, "peak": 0, "untranslated": set()}
+
+    async def stt(data, language=None, *, client=None, filename="", content_type=""):
+        state["active"] += 1
+        state["peak"] = max(state["peak"], state["active"])
+        events.append(f"stt:{filename}")
+        await asyncio.sleep(0.02 if filename != "segment0.wav" else 0.005)
+        state["active"] -= 1
+        return f" text-{filename.split('.')[0]} "
+
+    async def translate(text, source_lang="auto", target_lang="en", *, client=None):
+        events.append(f"tr:{text}")
+        if text in state["untranslated"]:
+            return text                 # what Bhashini does on an error
+        return text.upper()
+
+    redis = _FakeRedis()
+    audio = voice_audio.to_wav(_pcm(*[("tone", 3.0), ("quiet", 0.5)] * 4))
+    with patch.object(voice_handler, "get_media_url", AsyncMock(return_value="https://media")), \
+            patch.object(voice_handler, "download_media", AsyncMock(return_value=audio)), \
+            patch.object(voice_handler, "transcribe_audio_sarvam", side_effect=stt) as stt_mock, \
+            patch.object(voice_handler, "translate_with_bhashini", side_effect=translate), \
+            patch.object(translation_bhashini, "is_configured", return_value=True), \
+            patch("app.infrastructure.cache.redis_client.get_redis_client", return_value=redis), \
+            patch.object(settings, "VOICE_SEGMENT_MAX_SECONDS", 4.0), \
+            patch.object(settings, "VOICE_STT_CONCURRENCY", 2):
+        yield events, state, stt_mock, redis
+
+
+class TestProcessVoiceMessage:
+    def test_segments_are_transcribed_concurrently_and_joined_in_order(self, voice):
+        events, state, stt, _ = voice
+        result = asyncio.run(voice_handler.process_voice_message("m1", "hi"))
+        assert result.error is None
+        assert result.transcribed_text == "text-segment0 text-segment1 text-segment2 text-segment3"
+        assert result.translated_text == result.transcribed_text.upper()
+        assert state["peak"] == 2
+        # segment 0's translation starts while later segments are still in STT
+        assert events.index("tr:text-segment0") < events.index("stt:segment3.wav")
+
+    def test_transcript_is_cached_by_audio_hash(self, voice):
+        _, _, stt, redis = voice
+        first = asyncio.run(voice_handler.process_voice_message("m1", "hi"))
+        calls = stt.call_count
+        second = asyncio.run(voice_handler.process_voice_message("m2", "hi"))
+        assert second == first and stt.call_count == calls
+        assert json.loads(next(iter(redis.data.values())))["detected_lang"] == "hi"
+
+        asyncio.run(voice_handler.process_voice_message("m3", "ta"))    # other language: new transcript
+        assert stt.call_count == calls * 2
+
+    def test_english_skips_translation_and_errors_are_mapped(self, voice):
+        events, _, stt, redis = voice
+        result = asyncio.run(voice_handler.process_voice_message("m1", "en"))
+        assert result.translated_text is None and not any(e.startswith("tr:") for e in events)
+
+        redis.data.clear()
+        stt.side_effect = RuntimeError("Sarvam STT not configured")
+        assert asyncio.run(voice_handler.process_voice_message("m1", "hi")).error == "stt_not_configured"
+        assert not redis.data
+
+
+    def test_partial_or_failed_translation_is_not_cached(self, voice):
+        _, state, stt, redis = voice
+        state["untranslated"] = {"text-segment2"}
+        result = asyncio.run(voice_handler.process_voice_message("m1", "hi"))
+        assert result.translated_text.split() == [
+            "TEXT-SEGMENT0", "TEXT-SEGMENT1", "text-segment2", "TEXT-SEGMENT3",
+        ]
+        assert not redis.data
+
+        state["untranslated"] = set()
+        calls = stt.call_count
+        resent = asyncio.run(voice_handler.process_voice_message("m2", "hi"))
+        assert stt.call_count == calls * 2
+        assert resent.translated_text == resent.transcribed_text.upper()
+        assert len(redis.data) == 1
+
+
+class TestBhashiniPipelineCache:
+    def test_pipeline_config_is_fetched_once_per_pair(self):
+        paths: list[str] = []
+
+        def handler(request):
+            paths.append(request.url.path)
+            if request.url.path.endswith("getModelsPipeline"):
+                return httpx.Response(200, json={
+                    "pipelineResponseConfig": [{"config": [{"serviceId": "svc"}]}],
+                    "pipelineInferenceAPIEndPoint": {"callbackUrl": "https://infer.example/run",
+                                                     "inferenceApiKey": {"value": "k"}},
+                })
+            source = json.loads(request.content)["inputData"]["input"][0]["source"]
+            return httpx.Response(200, json={"pipelineResponse": [{"output": [{"target": source.upper()}]}]})
+
+        async def main():
+            async with httpx.AsyncClient(transport=httpx.MockTransport(handler)) as client:
+                return [await translation_bhashini.translate_with_bhashini(t, "hi", "en", client=client)
+                        for t in ("ek", "do", "teen")]
+
+        translation_bhashini.clear_pipeline_cache()
+        with patch.object(settings, "BHASHINI_USER_ID", "u"), \
+                patch.object(settings, "BHASHINI_ULCA_API_KEY", "k"), \
+                patch.object(settings, "BHASHINI_TRANSLATION_PIPELINE_ID", "p"):
+            assert asyncio.run(main()) == ["EK", "DO", "TEEN"]
+        translation_bhashini.clear_pipeline_cache()
+        assert sum(p.endswith("getModelsPipeline") for p in paths) == 1 and len(paths) == 4
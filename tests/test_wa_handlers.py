@@ -189,3 +189,25 @@ def test_no_duplicate_states_across_handlers():
         for s in handler_mod.HANDLED_STATES:
             assert s not in all_states, f"State {s} handled by multiple modules"
             all_states.append(s)
+
+
+def test_state_router_maps_every_handled_state_to_its_owner():
+    """STATE_ROUTER is a one-lookup index over all HANDLED_STATES."""
+    from app.api.routes.wa_handlers import STATE_ROUTER
+
+    for handler_mod in HANDLER_CHAIN:
+        for s in handler_mod.HANDLED_STATES:
+            assert STATE_ROUTER[s] is handler_mod
+    assert "MAIN_MENU" not in STATE_ROUTER
+
+
+def test_build_state_router_rejects_duplicate_owner():
+    """A state claimed by two modules fails at build (startup) time."""
+    from types import SimpleNamespace
+
+    from app.api.routes.wa_handlers import DuplicateStateOwnerError, build_state_router
+
+    first = SimpleNamespace(__name__="wa_handlers.first", HANDLED_STATES={"A", "B"})
+    second = SimpleNamespace(__name__="wa_handlers.second", HANDLED_STATES={"B"})
+    with pytest.raises(DuplicateStateOwnerError, match="'B'.*first.*second"):
+        build_state_router([first, second])
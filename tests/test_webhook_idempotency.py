@@ -0,0 +1,118 @@
+# tests/test_webhook_idempotency.py
+"""Tests for WhatsApp webhook de-duplication on message id."""
+
+import asyncio
+import json
+from unittest.mock import AsyncMock, MagicMock, patch
+
+from fastapi import Response
+
+from app.api.routes import whatsapp
+from app.infrastructure.cache import webhook_idempotency as idem
+
+
+class _FakeRedis:
+    """Just enough of redis.asyncio for SET NX/XX, GET, INCR and pipelines."""
+
+    def __init__(self):
+        self.data: dict[str, str] = {}
+
+    async def set(self, key, value, nx=False, xx=False, ex=None):
+        if nx and key in self.data:
+            return None
+        if xx and key not in self.data:
+            return None
+        self.data[key] = value
+        return True
+
+    async def get(self, key):
+        return self.data.get(key)
+
+    def pipeline(self, transaction=True):
+        fake, ops = self, []
+
+        class _Pipe:
+            def get(self, key):
+                ops.append(lambda: fake.data.get(key))
+
+            def incr(self, key):
+                def _incr():
+                    fake.data[key] = str(int(fake.data.get(key, 0)) + 1)
+                    return int(fake.data[key])
+                ops.append(_incr)
+
+            async def execute(self):
+                return [op() for op in ops]
+
+        return _Pipe()
+
+
+def _store(memoize=True):
+    store = idem.WebhookIdempotencyStore(
+        "redis://localhost:6379/0", 60, memoize=memoize
+    )
+    store._r = _FakeRedis()
+    return store
+
+
+def _payload(msg_id="wamid.ABC"):
+    return {
+        "entry": [{"changes": [{"value": {
+            "messages": [{"id": msg_id, "from": "919999999999", "type": "text",
+                          "text": {"body": "hi"}}],
+        }}]}],
+    }
+
+
+def _request(payload):
+    request = MagicMock()
+    request.body = AsyncMock(return_value=json.dumps(payload).encode())
+    request.headers = {}
+    return request
+
+
+class TestStore:
+    def test_first_claim_wins(self):
+        store = _store()
+        assert asyncio.run(store.claim("m1")) is None
+        assert asyncio.run(store.claim("m1")) == idem.PENDING
+        assert store._r.data[idem.DUP_HITS_KEY] == "1"
+
+    def test_memoised_status_returned_to_duplicates(self):
+        store = _store()
+        asyncio.run(store.claim("m1"))
+        asyncio.run(store.remember("m1", 200))
+        prior = asyncio.run(store.claim("m1"))
+        assert prior == "200"
+        assert idem.status_from_claim(prior) == 200
+
+    def test_memoise_disabled_keeps_pending_marker(self):
+        store = _store(memoize=False)
+        asyncio.run(store.claim("m1"))
+        asyncio.run(store.remember("m1", 200))
+        assert store._r.data["wa:msg:m1"] == idem.PENDING
+
+    def test_redis_failure_fails_open(self):
+        store = _store()
+        store._r.set = AsyncMock(side_effect=ConnectionError("down"))
+        assert asyncio.run(store.claim("m1")) is None
+
+
+class TestInbound:
+    def test_message_id_ignores_status_updates(self):
+        assert whatsapp._message_id(_payload("x")) == "x"
+        statuses_only = {"entry": [{"changes": [{"value": {"statuses": []}}]}]}
+        assert whatsapp._message_id(statuses_only) is None
+
+    def test_duplicate_delivery_skips_state_machine(self):
+        store = _store()
+        handler = AsyncMock(return_value=Response(status_code=200))
+        with patch.object(whatsapp, "idempotency_store", store), \
+                patch.object(whatsapp, "_handle_inbound", handler), \
+                patch.object(whatsapp, "_verify_webhook_signature", return_value=True):
+            first = asyncio.run(whatsapp.inbound(_request(_payload())))
+            second = asyncio.run(whatsapp.inbound(_request(_payload())))
+
+        assert first.status_code == second.status_code == 200
+        assert handler.await_count == 1
+        assert store._r.data["wa:msg:wamid.ABC"] == "200"
@@ -0,0 +1,211 @@
+# tests/test_write_behind.py
+"""Tests for the batched write-behind log sinks."""
+
+import asyncio
+from contextlib import asynccontextmanager
+from unittest.mock import MagicMock, patch
+
+from sqlalchemy import column, table
+
+from app.infrastructure.db import write_behind
+from app.infrastructure.db.write_behind import WriteBehindSink
+
+_T = table("t_log", column("a"))
+
+
+class _FakeEngine:
+    """``fail``: the database is unreachable; ``reject``: values of "a" it refuses."""
+
+    def __init__(self, fail=False, reject=(), down_after=None):
+        self.batches: list[list[dict]] = []
+        self.fail = fail
+        self.reject = set(reject)
+        self.down_after = down_after
+        self.calls = 0
+
+    @asynccontextmanager
+    async def begin(self):
+        conn = MagicMock()
+
+        async def execute(stmt, rows):
+            self.calls += 1
+            if self.fail or (self.down_after and self.calls > self.down_after):
+                raise ConnectionRefusedError("db down")
+            if any(r["a"] in self.reject for r in rows):
+                raise ValueError("invalid input for column a")
+            self.batches.append(list(rows))
+
+        conn.execute = execute
+        yield conn
+
+
+def _sink(name, **kw):
+    sink = WriteBehindSink(name, _T, **kw)
+    write_behind._SINKS.remove(sink)
+    return sink
+
+
+def test_size_trigger_flushes_full_batches():
+    engine = _FakeEngine()
+    sink = _sink("t_size", batch_size=3, flush_interval=60, max_queue=100)
+
+    async def scenario():
+        for i in range(7):
+            sink.add({"a": i})
+        await asyncio.sleep(0.01)
+        return len(sink._buffer)
+
+    with patch("app.core.db.engine", engine):
+        remaining = asyncio.run(scenario())
+
+    assert [len(b) for b in engine.batches] == [3, 3]
+    assert remaining == 1
+    assert sink._by_trigger["size"].value == 2
+
+
+def test_interval_flush_and_close_drains():
+    engine = _FakeEngine()
+    sink = _sink("t_interval", batch_size=100, flush_interval=0.01, max_queue=100)
+
+    async def scenario():
+        sink.add({"a": 1})
+        await asyncio.sleep(0.05)
+        sink.add({"a": 2})
+        await sink.close()
+
+    with patch("app.core.db.engine", engine):
+        asyncio.run(scenario())
+
+    assert engine.batches[0] == [{"a": 1}]
+    assert [r for b in engine.batches for r in b] == [{"a": 1}, {"a": 2}]
+    assert sink._written.value == 2
+
+
+def test_full_buffer_drops_and_counts():
+    sink = _sink("t_drop", batch_size=100, flush_interval=60, max_queue=2)
+
+    async def scenario():
+        results = [sink.add({"a": i}) for i in range(4)]
+        sink._task.cancel()
+        return results
+
+    assert asyncio.run(scenario()) == [True, True, False, False]
+    assert sink._dropped.value == 2
+
+
+def test_failed_flush_counts_rows():
+    sink = _sink("t_fail", batch_size=10, flush_interval=60, max_queue=100)
+    sink._buffer = [{"a": 1}, {"a": 2}]
+
+    with patch("app.core.db.engine", _FakeEngine(fail=True)):
+        written = asyncio.run(sink.flush())
+
+    assert written == 0
+    assert sink._failed.value == 2
+    assert sink._buffer == []
+
+
+def test_log_message_row_shape():
+    captured = []
+    with patch.object(write_behind.message_log_sink, "add", captured.append):
+        write_behind.log_message("919999999999", "hi", "sent")
+    row = captured[0]
+    assert row["status"] == "sent"
+    assert row["created_at"].tzinfo is not None
+
+
+def test_track_event_buffers_hashed_id():
+    from app.infrastructure.analytics.events import track_event
+
+    captured = []
+    with patch.object(write_behind.analytics_event_sink, "add", captured.append):
+        asyncio.run(track_event("919999999999", "menu_open", meta={"k": "v"}))
+    assert captured[0]["wa_id"] != "919999999999"
+    assert captured[0]["meta"] == {"k": "v"}
+
+
+def test_durable_sink_keeps_rows_and_retries():
+    sink = _sink(
+        "t_durable", batch_size=10, flush_interval=0.01, max_queue=2, durable=True,
+    )
+    sink._buffer = [{"a": 1}, {"a": 2}]
+
+    down, up = _FakeEngine(fail=True), _FakeEngine()
+    with patch("app.core.db.engine", down):
+        assert asyncio.run(sink.flush()) == 0
+        assert sink.add({"a": 3}) is True           # over max_queue, still kept
+    assert sink._buffer == [{"a": 1}, {"a": 2}, {"a": 3}]
+    assert sink.consecutive_failures == 1 and "db down" in sink.last_error
+    assert sink._retried.value == 2 and sink._failed.value == 0
+
+    with patch("app.core.db.engine", up):
+        asyncio.run(sink.close())
+    assert up.batches == [[{"a": 1}, {"a": 2}, {"a": 3}]]
+    assert sink.consecutive_failures == 0
+
+
+def test_durable_sink_logs_unwritten_rows_at_shutdown(caplog):
+    sink = _sink(
+        "t_durable_close", batch_size=10, flush_interval=0.001, max_queue=10,
+        durable=True,
+    )
+    sink._buffer = [{"a": 1}]
+
+    engine = _FakeEngine(fail=True)
+    with patch("app.core.db.engine", engine), caplog.at_level("CRITICAL"):
+        asyncio.run(sink.close())
+
+    assert sink._buffer == []
+    assert sink._failed.value == 1
+    assert 'WRITE_BEHIND_UNWRITTEN t_durable_close {"a": 1}' in caplog.text
+
+
+def test_durable_sink_sets_aside_a_rejected_row(caplog):
+    sink = _sink(
+        "t_durable_poison", batch_size=8, flush_interval=60, max_queue=100,
+        durable=True,
+    )
+    sink._buffer = [{"a": i} for i in range(10)]
+
+    engine = _FakeEngine(reject={5})
+    with patch("app.core.db.engine", engine), caplog.at_level("CRITICAL"):
+        assert asyncio.run(sink.flush()) == 7
+        assert asyncio.run(sink.flush()) == 2       # later rows are not blocked
+
+    written = [r["a"] for b in engine.batches for r in b]
+    assert written == [0, 1, 2, 3, 4, 6, 7, 8, 9]
+    assert sink._buffer == [] and sink.consecutive_failures == 0
+    assert sink._failed.value == 1 and sink._retried.value == 0
+    assert 'WRITE_BEHIND_UNWRITTEN t_durable_poison {"a": 5}' in caplog.text
+
+
+def test_durable_sink_requeues_unwritten_halves_when_the_db_goes_away():
+    sink = _sink(
+        "t_durable_split", batch_size=8, flush_interval=60, max_queue=100,
+        durable=True,
+    )
+    sink._buffer = [{"a": i} for i in range(8)]
+    # Whole batch rejected, first half written, then the connection drops
+    engine = _FakeEngine(reject={6}, down_after=2)
+
+    with patch("app.core.db.engine", engine):
+        assert asyncio.run(sink.flush()) == 4
+
+    assert [r["a"] for b in engine.batches for r in b] == [0, 1, 2, 3]
+    assert sink._buffer == [{"a": i} for i in range(4, 8)]
+    assert sink.consecutive_failures == 1 and sink._failed.value == 0
+
+
+def test_durable_sink_has_a_hard_ceiling(caplog):
+    sink = _sink(
+        "t_durable_ceiling", batch_size=10, flush_interval=60, max_queue=2,
+        durable=True,
+    )
+    sink.hard_max_queue = 3
+
+    with caplog.at_level("CRITICAL"):
+        added = [sink.add({"a": i}) for i in range(5)]
+
+    assert added == [True, True, True, False, False]
+    assert len(sink._buffer) == 3 and sink._failed.value == 2
+    assert 'WRITE_BEHIND_UNWRITTEN t_durable_ceiling {"a": 4}' in caplog.text